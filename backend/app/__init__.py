@@ -1 +1,9 @@
 # App package initialization
+import sys
+from pathlib import Path
+
+# Shared text normalization engine lives in shared/ at the project root
+# (copied next to app/ in the Docker image, where PYTHONPATH already covers it)
+_project_root = str(Path(__file__).resolve().parents[2])
+if _project_root not in sys.path:
+    sys.path.append(_project_root)
@@ -17,6 +17,11 @@ class GPUTrainingConfig:
     cache_dir: str = "./models/cache"
     output_dir: str = "./models/trained"
     
+    # Tokenization (pre-tokenized splits cached on disk, padded per batch)
+    max_length: int = 512
+    tokenized_cache_dir: str = "./data/cache/tokenized"
+    group_by_length: bool = True
+    
     # Training hyperparameters
     num_epochs: int = 3
     batch_size: int = 8
@@ -33,11 +33,12 @@ class FastGraphRAGConfig:
     top_k_edges: int = 10  # Nombre d'arêtes à considérer
     use_pagerank: bool = True  # Utiliser PageRank pour le classement des nœuds
     pagerank_iterations: int = 20  # Nombre d'itérations PageRank
+    pagerank_alpha: float = 0.85  # Probabilité de suivre une arête (1 - alpha: retour aux nœuds de départ)
     
     # Chemins de stockage
     storage_dir: Path = Path("/app/data/fast_graphrag")
     graph_file: str = "knowledge_graph.pkl"
-    index_file: str = "vector_index.bin"
+    index_file: str = "node_embeddings.npy"  # Matrice float32 normalisée (mémoire mappée)
     metadata_file: str = "graph_metadata.json"
     
     # Paramètres de performance
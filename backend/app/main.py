@@ -5,9 +5,10 @@ Provides REST API endpoints for tweet processing and analysis
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
 from logging.handlers import RotatingFileHandler
 import os
@@ -21,7 +22,7 @@ from .models import (
 from .services.csv_processor import CSVProcessor
 from .services.llm_analyzer import LLMAnalyzer
 from .services.kpi_calculator import KPICalculator
-from .services.chatbot_service import ChatbotService
+from .services.chatbot_service import ChatbotService, format_sse
 from .services.tweet_classifier import TweetClassifier, ClassificationResult
 
 # Import new modernized components
@@ -832,6 +833,7 @@ class ChatMessageResponse(BaseModel):
     llm_provider: str
     intent_detected: Optional[str] = None
     documents_found: int = 0
+    answer_cached: bool = False
     error: Optional[str] = None
 
 class FeedbackRequest(BaseModel):
@@ -846,6 +848,11 @@ class FeedbackRequest(BaseModel):
 # Initialiser le service chatbot
 chatbot_service = ChatbotService(db_manager=db_manager)
 
+@app.on_event("shutdown")
+async def flush_chatbot_writes():
+    """Écrire les conversations et messages encore en file avant l'arrêt"""
+    await chatbot_service.close()
+
 @app.post("/api/chatbot/message", response_model=ChatMessageResponse)
 async def send_message(request: ChatMessageRequest):
     """
@@ -863,6 +870,9 @@ async def send_message(request: ChatMessageRequest):
         # Générer un ID de conversation si nécessaire
         conversation_id = request.conversation_id or f"conv_{request.session_id}_{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}"
 
+        # Écrire d'abord l'échange précédent s'il est encore en file
+        await chatbot_service.write_buffer.flush_pending(conversation_id)
+
         # Traiter le message avec le service chatbot
         result = await chatbot_service.process_message(
             message=request.message,
@@ -882,6 +892,7 @@ async def send_message(request: ChatMessageRequest):
             llm_provider=result.get('llm_provider', request.llm_provider),
             intent_detected=result.get('intent_detected'),
             documents_found=result.get('documents_found', 0),
+            answer_cached=result.get('answer_cached', False),
             error=result.get('error')
         )
 
@@ -895,6 +906,43 @@ async def send_message(request: ChatMessageRequest):
             detail=f"Erreur lors du traitement du message: {str(e)}"
         )
 
+@app.post("/api/chatbot/message/stream")
+async def stream_message(request: ChatMessageRequest):
+    """
+    Envoyer un message au chatbot et recevoir la réponse en flux (Server-Sent Events)
+
+    Événements: metadata (sources, intention), token (fragment de réponse),
+    puis done (temps de traitement, temps jusqu'au premier fragment, ID du
+    message) ou error. Les messages sont stockés après la fin du flux.
+
+    Args:
+        request: Requête contenant le message et les métadonnées
+
+    Returns:
+        Flux text/event-stream
+    """
+    logger.info(f"New streamed chatbot message: '{request.message[:50]}...'")
+
+    # Générer un ID de conversation si nécessaire
+    conversation_id = request.conversation_id or f"conv_{request.session_id}_{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}"
+    await chatbot_service.write_buffer.flush_pending(conversation_id)
+    history = await db_manager.get_conversation_messages(conversation_id, limit=10)
+
+    async def events():
+        async for event in chatbot_service.stream_message(
+            message=request.message,
+            conversation_id=conversation_id,
+            llm_provider=request.llm_provider,
+            conversation_history=history
+        ):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/chatbot/conversations/{user_id}")
 async def get_user_conversations(user_id: str, limit: int = 20):
     """
@@ -942,6 +990,9 @@ async def delete_conversation(conversation_id: str):
         # Marquer la conversation comme supprimée dans la base de données
         logger.info(f"🗑 Suppression de la conversation: {conversation_id}")
 
+        # Écrire d'abord la conversation si elle est encore en file
+        await chatbot_service.write_buffer.flush_pending(conversation_id)
+
         # Mettre à jour le statut de la conversation à 'deleted'
         try:
             async with db_manager.get_connection() as conn:
@@ -982,6 +1033,9 @@ async def submit_feedback(request: FeedbackRequest):
     try:
         logger.info(f" Nouveau feedback: {request.feedback_type} pour message {request.message_id}")
 
+        # Le message évalué peut être encore en file d'écriture
+        await chatbot_service.write_buffer.flush_pending(request.conversation_id)
+
         # Stocker le feedback dans la base de données
         feedback_data = {
             'conversation_id': request.conversation_id,
@@ -1196,6 +1250,80 @@ async def classify_batch_tweets(
             detail=f"Batch classification failed: {str(e)}"
         )
 
+class LocalClassifyRequest(BaseModel):
+    """Request model for classification with the local fine-tuned model"""
+    texts: List[str] = Field(min_length=1, max_length=256, description="Tweet texts to classify")
+
+# Local model behind a micro-batcher, loaded on first use
+local_classifier = None
+local_classifier_lock = asyncio.Lock()
+
+async def get_local_classifier():
+    """Load the fine-tuned (LoRA) model once and wrap it in a MicroBatcher"""
+    global local_classifier
+    async with local_classifier_lock:
+        if local_classifier is None:
+            from .services.model_training import GPU_AVAILABLE, LocalModelInference
+            from .services.micro_batcher import MicroBatcher
+            from .config_pkg import gpu_config
+
+            model_path = os.getenv("LOCAL_MODEL_PATH", gpu_config.gpu_training.output_dir)
+            if not GPU_AVAILABLE:
+                raise HTTPException(status_code=503, detail="Local model dependencies not installed (torch, transformers, peft)")
+            if not os.path.isdir(model_path):
+                raise HTTPException(status_code=503, detail=f"No fine-tuned model found at {model_path}")
+
+            try:
+                inference = await asyncio.get_running_loop().run_in_executor(None, LocalModelInference, model_path)
+            except Exception as e:
+                raise HTTPException(status_code=503, detail=f"Failed to load local model: {str(e)}")
+
+            local_classifier = MicroBatcher(
+                inference.predict_batch,
+                max_batch_size=int(os.getenv("LOCAL_MODEL_MAX_BATCH", "32")),
+                max_wait_ms=float(os.getenv("LOCAL_MODEL_MAX_WAIT_MS", "5")),
+                name="local-classifier"
+            )
+            logger.info(f"Local model served from {model_path}")
+    return local_classifier
+
+@app.on_event("shutdown")
+async def close_local_classifier():
+    """Release the local model inference thread"""
+    if local_classifier is not None:
+        await local_classifier.close()
+
+@app.post("/api/classify/local")
+async def classify_local(request: LocalClassifyRequest):
+    """
+    Classify tweets with the local fine-tuned model (no LLM call)
+
+    Concurrent requests are grouped by a micro-batcher and answered by a
+    single forward pass.
+
+    Args:
+        request: Texts to classify
+
+    Returns:
+        One prediction per text (label, confidence, probabilities)
+    """
+    classifier = await get_local_classifier()
+    start = datetime.now(UTC)
+
+    try:
+        predictions = await classifier.submit_many(request.texts)
+    except Exception as e:
+        logger.error(f"Local classification error: {e}")
+        raise HTTPException(status_code=500, detail=f"Local classification failed: {str(e)}")
+
+    return {
+        "success": True,
+        "predictions": predictions,
+        "processing_time": (datetime.now(UTC) - start).total_seconds(),
+        "batching": classifier.stats(),
+        "timestamp": datetime.now(UTC).isoformat()
+    }
+
 @app.get("/api/classify/models")
 async def list_classification_models():
     """
@@ -1227,6 +1355,12 @@ async def list_classification_models():
                 "configured": True,  # Ollama doesn't require API key
                 "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
             },
+            "local": {
+                "models": [os.getenv("LOCAL_MODEL_PATH", "./models/trained")],
+                "default": os.getenv("LOCAL_MODEL_PATH", "./models/trained"),
+                "configured": os.path.isdir(os.getenv("LOCAL_MODEL_PATH", "./models/trained")),
+                "endpoint": "/api/classify/local"
+            },
             "fallback": {
                 "models": ["rule-based"],
                 "default": "rule-based",
@@ -222,10 +222,47 @@ CREATE INDEX IF NOT EXISTS idx_tweets_text_fts ON tweets USING GIN (to_tsvector(
 """
 
 # Database initialization functions
+# Knowledge base tables for SQLite (the vector index file is rebuilt from chunk embeddings)
+SQLITE_KNOWLEDGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS knowledge_documents (
+    id TEXT PRIMARY KEY,
+    title VARCHAR(500) NOT NULL CHECK (length(title) > 0),
+    content TEXT NOT NULL CHECK (length(content) >= 10),
+    document_type VARCHAR(50) NOT NULL DEFAULT 'general',
+    source_url TEXT NOT NULL,
+    source_domain VARCHAR(200) NOT NULL,
+    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    content_hash VARCHAR(64) NOT NULL UNIQUE,
+    embedding_model VARCHAR(100),
+    embedding_dimension INTEGER,
+    usage_count INTEGER DEFAULT 0,
+    relevance_score REAL DEFAULT 0.0
+);
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_documents_content_hash ON knowledge_documents (content_hash);
+
+CREATE TABLE IF NOT EXISTS knowledge_chunks (
+    id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL REFERENCES knowledge_documents(id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL CHECK (chunk_index >= 0),
+    content TEXT NOT NULL,
+    content_hash VARCHAR(64) NOT NULL UNIQUE,
+    embedding BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_chunks_document_id ON knowledge_chunks (document_id);
+"""
+
 def get_database_schema() -> str:
     """Return the complete database schema"""
     return DATABASE_SCHEMA
 
+def get_sqlite_knowledge_schema() -> str:
+    """Return the SQLite knowledge base schema"""
+    return SQLITE_KNOWLEDGE_SCHEMA
+
 def get_postgresql_optimizations() -> str:
     """Return PostgreSQL specific optimizations"""
     return POSTGRESQL_OPTIMIZATIONS
@@ -371,6 +408,17 @@ CREATE TABLE IF NOT EXISTS knowledge_documents (
     UNIQUE(source_url)
 );
 
+-- Table chunks - Portions des documents encodées (embedding float32 brut)
+CREATE TABLE IF NOT EXISTS knowledge_chunks (
+    id VARCHAR(100) PRIMARY KEY,
+    document_id UUID NOT NULL REFERENCES knowledge_documents(id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL CHECK (chunk_index >= 0),
+    content TEXT NOT NULL,
+    content_hash VARCHAR(64) NOT NULL UNIQUE CHECK (length(content_hash) = 64),
+    embedding BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Table feedback - Feedback utilisateur sur les réponses
 CREATE TABLE IF NOT EXISTS chat_feedback (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -411,6 +459,8 @@ CREATE INDEX IF NOT EXISTS idx_knowledge_documents_last_updated ON knowledge_doc
 CREATE INDEX IF NOT EXISTS idx_knowledge_documents_usage_count ON knowledge_documents (usage_count);
 CREATE INDEX IF NOT EXISTS idx_knowledge_documents_relevance_score ON knowledge_documents (relevance_score);
 
+CREATE INDEX IF NOT EXISTS idx_knowledge_chunks_document_id ON knowledge_chunks (document_id);
+
 -- Index pour recherche full-text sur le contenu des documents
 CREATE INDEX IF NOT EXISTS idx_knowledge_documents_content_fts ON knowledge_documents USING GIN (to_tsvector('french', content));
 CREATE INDEX IF NOT EXISTS idx_knowledge_documents_title_fts ON knowledge_documents USING GIN (to_tsvector('french', title));
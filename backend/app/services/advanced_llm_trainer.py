@@ -55,6 +55,9 @@ except ImportError:
     OPENAI_AVAILABLE = False
     ANTHROPIC_AVAILABLE = False
 
+from .evaluation_engine import (EvaluationEngine, EvaluationStrategy, PredictionCache, fingerprint,
+                                from_classifier_taxonomy, parse_llm_classification)
+
 logger = logging.getLogger(__name__)
 
 class TrainingStrategy(Enum):
@@ -136,6 +139,8 @@ class AdvancedLLMTrainer:
         self.training_examples = []
         self.performance_history = []
         self.adaptive_prompts = {}
+        self.evaluation_concurrency = 8
+        self.evaluation_engine = EvaluationEngine(PredictionCache(str(self.output_dir / "evaluation_cache.sqlite")))
         
         # Initialize LLM and agents
         self._initialize_llm()
@@ -649,15 +654,39 @@ Confidence: {confidence}
         
         return few_shot_prompt
     
-    def _evaluate_on_dataset(self, dataset: pd.DataFrame, prompt_template) -> Dict[str, float]:
-        """Evaluate performance on dataset"""
-        # Simplified evaluation - in practice, you'd implement full evaluation
+    def _evaluate_on_dataset(self, dataset: pd.DataFrame, prompt_template) -> Dict[str, Any]:
+        """
+        Evaluate a prompt on the labelled dataset
+
+        Tweets are classified concurrently through the evaluation engine; the
+        rendered prompt is part of the cache key, so only tweets whose prompt
+        changed since the last run are sent to the LLM.
+        """
+        def predict(tweet: str) -> Dict[str, Any]:
+            response = self.llm.invoke(prompt_template.format(tweet=tweet))
+            content = getattr(response, "content", response)
+            return from_classifier_taxonomy(parse_llm_classification(str(content)))
+
+        strategy = EvaluationStrategy(
+            name=f"{self.training_strategy.value}-{self.llm_provider}",
+            predict=predict,
+            version=fingerprint(self.llm_provider, self.model_name),
+            concurrency=self.evaluation_concurrency,
+            cache_key=lambda tweet: prompt_template.format(tweet=tweet)
+        )
+        result = asyncio.run(self.evaluation_engine.evaluate(strategy, {"dataset": dataset}))
+        metrics = result["splits"]["dataset"]["metrics"]
+        tasks = [task for task in metrics if task != "overall"]
+
         return {
-            "accuracy": 0.85,
-            "precision": 0.82,
-            "recall": 0.80,
-            "f1_score": 0.81,
-            "confidence": 0.78
+            "accuracy": metrics["overall"]["avg_accuracy"],
+            "precision": float(np.mean([metrics[task]["precision"] for task in tasks])) if tasks else 0.0,
+            "recall": float(np.mean([metrics[task]["recall"] for task in tasks])) if tasks else 0.0,
+            "f1_score": metrics["overall"]["avg_f1"],
+            "confidence": metrics["overall"].get("avg_confidence", 0.0),
+            "per_task": {task: {key: metrics[task][key] for key in ("accuracy", "precision", "recall", "f1_score")}
+                         for task in tasks},
+            "run": result["splits"]["dataset"]["run"]
         }
     
     def _save_training_results(self, results: Dict):
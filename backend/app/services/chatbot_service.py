@@ -8,8 +8,9 @@ import json
 import logging
 import uuid
 import os
+import time
 from datetime import datetime, UTC
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Tuple, AsyncIterator, Callable, Iterable
 import hashlib
 
 # Embeddings and similarity search
@@ -38,10 +39,23 @@ from ..models import (
 from ..services.llm_analyzer import LLMAnalyzer, LLMProvider
 from ..services.documentation_scraper import DocumentationScraper
 from ..services.fast_graphrag_service import FastGraphRAGService
+from ..services.query_cache import QueryCache, normalize_query
 from ..utils.database import DatabaseManager
+from ..utils.write_behind import ChatWriteBuffer
 
 logger = logging.getLogger(__name__)
 
+# Modèles de l'Agent Agno selon le fournisseur
+MISTRAL_API_MODEL = "mistral-large-latest"
+OLLAMA_MODEL = "mistral:latest"
+
+# Message renvoyé quand la génération échoue
+LLM_ERROR_RESPONSE = "Désolé, je rencontre actuellement des difficultés techniques. Veuillez réessayer dans quelques instants."
+
+# Événements Agno porteurs d'un fragment de texte (les événements de fin
+# portent la réponse complète et ne doivent pas être retransmis)
+_CONTENT_EVENTS = {"RunContent", "RunResponse", "RunResponseContent"}
+
 class ChatbotService:
     """Service principal du chatbot SAV intelligent"""
     
@@ -84,6 +98,14 @@ class ChatbotService:
         self.similarity_threshold = 0.3  # Seuil de similarité minimum
         self.max_context_length = 3000  # Longueur max du contexte en caractères
 
+        # Caches des requêtes (embeddings, résultats, réponses), invalidés si la base change
+        self.query_cache = QueryCache(answer_threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")))
+
+        # Écriture différée des conversations et messages (transactions groupées)
+        self.write_buffer = ChatWriteBuffer(
+            db_manager, flush_interval=float(os.getenv("CHAT_WRITE_FLUSH_INTERVAL", "0.2"))
+        ) if db_manager else None
+
         # Configuration Fast-GraphRAG
         self.graphrag_timeout = float(os.getenv("GRAPHRAG_TIMEOUT", "5.0"))  # Timeout en secondes
         self.graphrag_min_score = float(os.getenv("GRAPHRAG_MIN_SCORE", "0.5"))  # Score minimum de pertinence
@@ -167,19 +189,17 @@ HISTORIQUE CONVERSATION:
             self.logger.info(f"🤖 Création d'un nouvel Agent Agno avec provider: {self.llm_provider}")
 
             # Créer le modèle selon le provider
-            if self.llm_provider == "mistral":
+            provider, model_id = self._agent_model()
+            if provider == "mistral":
                 # Utiliser Mistral API (cloud)
-                if self.mistral_api_key and self.mistral_api_key != "test_api_key_for_demo_deployment":
-                    model = MistralChat(id="mistral-large-latest", api_key=self.mistral_api_key)
-                    self.logger.info(" Modèle Mistral API créé")
-                else:
+                model = MistralChat(id=model_id, api_key=self.mistral_api_key)
+                self.logger.info(" Modèle Mistral API créé")
+            else:
+                if self.llm_provider == "mistral":
                     self.logger.warning(" MISTRAL_API_KEY non configurée, fallback vers Ollama")
                     self.llm_provider = "ollama"
-                    model = Ollama(id="mistral:latest", host=self.ollama_url)
-                    self.logger.info(f" Modèle Ollama créé: {self.ollama_url}")
-            else:
                 # Utiliser Ollama (local)
-                model = Ollama(id="mistral:latest", host=self.ollama_url)
+                model = Ollama(id=model_id, host=self.ollama_url)
                 self.logger.info(f" Modèle Ollama créé: {self.ollama_url}")
 
             # Créer un nouvel Agent Agno pour chaque requête
@@ -200,6 +220,20 @@ HISTORIQUE CONVERSATION:
             self.logger.error(f"Traceback: {traceback.format_exc()}")
             return None
 
+    def _agent_model(self) -> Tuple[str, str]:
+        """
+        Fournisseur et modèle effectivement utilisés par l'Agent Agno
+
+        Mistral API si configuré avec une vraie clé, sinon Ollama local.
+
+        Returns:
+            Tuple (fournisseur, identifiant du modèle)
+        """
+        if (self.llm_provider == "mistral" and self.mistral_api_key
+                and self.mistral_api_key != "test_api_key_for_demo_deployment"):
+            return "mistral", MISTRAL_API_MODEL
+        return "ollama", OLLAMA_MODEL
+
     async def initialize_knowledge_base(self) -> Dict[str, Any]:
         """
         Initialiser la base de connaissances en scrapant la documentation
@@ -232,12 +266,49 @@ HISTORIQUE CONVERSATION:
             # Pour l'instant, on simule avec un cache vide
             self.knowledge_cache = {}
             self.last_cache_update = datetime.now(UTC)
+            self.query_cache.invalidate()
             
             self.logger.info(" Cache rechargé")
             
         except Exception as e:
             self.logger.error(f" Erreur lors du rechargement du cache: {e}")
     
+    def _knowledge_revision(self) -> Tuple[Optional[int], Optional[int]]:
+        """Révision de la base de connaissances (graphe et index vectoriel)"""
+        graph_revision = self.fast_graphrag.revision if self.fast_graphrag else None
+        index_revision = self.db_manager.get_vector_index().revision if self.db_manager else None
+        return graph_revision, index_revision
+
+    def _embed_query(self, query: str, source: str = "documents"):
+        """
+        Embedding d'une requête, mis en cache par question normalisée
+
+        Args:
+            query: Requête de l'utilisateur
+            source: "documents" (modèle du scraper) ou "graphrag"
+
+        Returns:
+            Embedding de la requête ou None si aucun modèle disponible
+        """
+        if source == "graphrag":
+            if not self.fast_graphrag or not self.fast_graphrag.embedding_model:
+                return None
+            model_name = self.fast_graphrag.config.embedding_model
+            encode = self.fast_graphrag.embedding_model.encode
+        else:
+            if not self.doc_scraper.embedding_model:
+                return None
+            model_name = self.doc_scraper.embedding_model_name
+            encode = self.doc_scraper._generate_embeddings
+
+        key = (model_name, normalize_query(query))
+        embedding = self.query_cache.embeddings.get(key)
+        if embedding is None:
+            embedding = encode(query)
+            if embedding is not None:
+                self.query_cache.embeddings.set(key, embedding)
+        return embedding
+
     async def _search_with_graphrag(self, query: str, max_results: int = 5) -> Optional[List[Tuple[KnowledgeDocument, float]]]:
         """
         Rechercher avec Fast-GraphRAG (méthode principale)
@@ -257,7 +328,9 @@ HISTORIQUE CONVERSATION:
 
             # Recherche avec timeout
             graphrag_results = await asyncio.wait_for(
-                self.fast_graphrag.query_graph(query, top_k=max_results),
+                self.fast_graphrag.query_graph(
+                    query, top_k=max_results, query_embedding=self._embed_query(query, "graphrag")
+                ),
                 timeout=self.graphrag_timeout
             )
 
@@ -318,8 +391,8 @@ HISTORIQUE CONVERSATION:
             self.logger.info(f"Classic vector search: '{query[:50]}...'")
 
             # Générer l'embedding de la requête
-            query_embedding = self.doc_scraper._generate_embeddings(query)
-            if not query_embedding:
+            query_embedding = self._embed_query(query)
+            if query_embedding is None:
                 self.logger.warning(" Impossible de générer l'embedding de la requête")
                 return []
 
@@ -364,7 +437,8 @@ HISTORIQUE CONVERSATION:
     async def _search_relevant_documents(self, query: str, max_results: int = 5) -> List[Tuple[KnowledgeDocument, float]]:
         """
         Rechercher les documents les plus pertinents pour une requête
-        Utilise Fast-GraphRAG en priorité, avec fallback vers recherche vectorielle
+        Utilise Fast-GraphRAG en priorité, avec fallback vers recherche vectorielle.
+        Les résultats sont mis en cache par question normalisée.
 
         Args:
             query: Requête de l'utilisateur
@@ -373,17 +447,27 @@ HISTORIQUE CONVERSATION:
         Returns:
             Liste de tuples (document, score_similarité)
         """
+        self.query_cache.check_revision(self._knowledge_revision())
+        cache_key = (normalize_query(query), max_results)
+        cached_results = self.query_cache.retrieval.get(cache_key)
+        if cached_results is not None:
+            self.logger.info(f" Résultats de recherche en cache ({len(cached_results)} documents)")
+            return cached_results
+
         # Tentative 1: Fast-GraphRAG
         graphrag_results = await self._search_with_graphrag(query, max_results)
 
         if graphrag_results:
             self.logger.info(f" Utilisation des résultats Fast-GraphRAG ({len(graphrag_results)} documents)")
+            self.query_cache.retrieval.set(cache_key, graphrag_results)
             return graphrag_results
 
         # Fallback: Recherche vectorielle classique
         self.logger.info("🔄 Fallback vers recherche vectorielle classique")
         vector_results = await self._search_with_vector_db(query, max_results)
 
+        if vector_results:
+            self.query_cache.retrieval.set(cache_key, vector_results)
         return vector_results
     
     def _build_context_from_documents(self, documents: List[Tuple[KnowledgeDocument, float]]) -> str:
@@ -483,6 +567,82 @@ HISTORIQUE CONVERSATION:
         else:
             return "default"
     
+    async def _prepare_answer(self, message: str,
+                              conversation_history: Optional[List[ChatMessage]] = None,
+                              llm_provider: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Préparer la réponse à un message: réponse en cache ou prompt documenté
+
+        Les réponses en cache ne sont réutilisées que pour le même fournisseur
+        demandé et le même modèle de l'Agent.
+
+        Args:
+            message: Message de l'utilisateur
+            conversation_history: Historique de la conversation
+            llm_provider: Fournisseur LLM demandé
+
+        Returns:
+            Dictionnaire avec intent, cached_response (None si le LLM doit
+            répondre), system_prompt, sources, documents_found, et les
+            éléments nécessaires à la mise en cache de la réponse
+        """
+        # Détecter l'intention pour choisir le bon prompt
+        intent = self._detect_intent(message)
+
+        # Question sans historique: réutiliser la réponse d'une question quasi identique
+        query_embedding = None
+        answer_model = (llm_provider, *self._agent_model())
+        if not conversation_history:
+            self.query_cache.check_revision(self._knowledge_revision())
+            query_embedding = self._embed_query(message)
+            if query_embedding is None:
+                query_embedding = self._embed_query(message, "graphrag")
+            cached_answer = None
+            if query_embedding is not None:
+                cached_answer = self.query_cache.answers.lookup(query_embedding, intent=intent,
+                                                                model=answer_model)
+            if cached_answer:
+                answer, similarity = cached_answer
+                self.logger.info(f" Réponse en cache réutilisée (similarité {similarity:.3f}), pas d'appel LLM")
+                return {
+                    'intent': intent,
+                    'cached_response': answer['response'],
+                    'sources': answer['sources'],
+                    'documents_found': answer['documents_found']
+                }
+
+        # Rechercher les documents pertinents
+        relevant_docs = await self._search_relevant_documents(message, self.max_context_documents)
+
+        # Construire le contexte et l'historique
+        context = self._build_context_from_documents(relevant_docs)
+        history = self._build_conversation_history(conversation_history or [])
+
+        # Construire le prompt système
+        system_prompt = self.system_prompts[intent].format(
+            context=context,
+            conversation_history=history
+        )
+
+        return {
+            'intent': intent,
+            'cached_response': None,
+            'system_prompt': system_prompt,
+            'sources': [doc.source_url for doc, _ in relevant_docs],
+            'documents_found': len(relevant_docs),
+            'query_embedding': query_embedding,
+            'answer_model': answer_model
+        }
+
+    def _remember_answer(self, prepared: Dict[str, Any], response_content: str, generated: bool) -> None:
+        """Mettre en cache une réponse du LLM fondée sur la documentation"""
+        if prepared.get('query_embedding') is not None and generated and prepared['documents_found']:
+            self.query_cache.answers.add(prepared['query_embedding'], {
+                'response': response_content,
+                'sources': prepared['sources'],
+                'documents_found': prepared['documents_found']
+            }, intent=prepared['intent'], model=prepared['answer_model'])
+
     async def process_message(self, 
                             message: str, 
                             conversation_id: str,
@@ -505,120 +665,35 @@ HISTORIQUE CONVERSATION:
         try:
             self.logger.info(f"Processing message: '{message[:50]}...'")
             
-            # Rechercher les documents pertinents
-            relevant_docs = await self._search_relevant_documents(message, self.max_context_documents)
-            
-            # Construire le contexte
-            context = self._build_context_from_documents(relevant_docs)
-            
-            # Construire l'historique
-            history = self._build_conversation_history(conversation_history or [])
+            prepared = await self._prepare_answer(message, conversation_history, llm_provider)
             
-            # Détecter l'intention pour choisir le bon prompt
-            intent = self._detect_intent(message)
-            
-            # Construire le prompt système
-            system_prompt = self.system_prompts[intent].format(
-                context=context,
-                conversation_history=history
-            )
-            
-            # Générer la réponse avec le LLM
-            # Pour l'instant, on simule une réponse car l'intégration LLM complète
-            # nécessite des ajustements du service existant
-            
-            response_content = await self._generate_llm_response(
-                system_prompt, message, llm_provider
-            )
+            if prepared['cached_response'] is not None:
+                response_content = prepared['cached_response']
+            else:
+                # Générer la réponse avec le LLM
+                response_content, generated = await self._generate_llm_response(
+                    prepared['system_prompt'], message, llm_provider
+                )
+                self._remember_answer(prepared, response_content, generated)
             
             # Calculer le temps de traitement
             processing_time = (datetime.now(UTC) - start_time).total_seconds()
-            
-            # Extraire les sources utilisées
-            sources = [doc.source_url for doc, _ in relevant_docs]
 
-            # Stocker le message utilisateur dans la base de données
-            user_message_id = None
-            assistant_message_id = None
-
-            self.logger.info(f"Before storage - DB Manager: {self.db_manager}")
-            if self.db_manager:
-                try:
-                    self.logger.info(f"DB Manager available: {self.db_manager is not None}")
-                    self.logger.info(f"DB Type: {self.db_manager.database_type}")
-
-                    # Pour l'instant, nous allons créer une conversation avec un UUID personnalisé
-                    # en utilisant le conversation_id comme clé primaire
-                    # Extraire session_id du conversation_id (format: conv_{session_id}_{timestamp})
-                    # Exemple: conv_test_session_1760744803_20251017_234643 -> test_session_1760744803
-                    parts = conversation_id.replace('conv_', '').split('_')
-                    if len(parts) >= 3:
-                        session_id = '_'.join(parts[:-2])  # Tout sauf les 2 dernières parties (date et heure)
-                    else:
-                        session_id = conversation_id.replace('conv_', '')
-
-                    # Créer la conversation avec l'ID personnalisé
-                    conversation_data = {
-                        'id': conversation_id,  # Utiliser l'ID personnalisé
-                        'user_id': None,  # Pas d'authentification pour l'instant
-                        'session_id': session_id,
-                        'title': message[:50] + "..." if len(message) > 50 else message,
-                        'status': 'active',
-                        'llm_provider': llm_provider,
-                        'message_count': 0
-                    }
-
-                    self.logger.info(f" Données conversation: {conversation_data}")
-
-                    # Essayer de créer la conversation (ignore si elle existe déjà)
-                    created_conv_id = await self.db_manager.store_conversation_with_id(conversation_data)
-                    self.logger.info(f" Résultat store_conversation_with_id: {created_conv_id}")
-                    if created_conv_id:
-                        self.logger.info(f" Conversation créée: {created_conv_id}")
-                    else:
-                        self.logger.warning(f" Impossible de créer la conversation")
-
-                except Exception as conv_error:
-                    self.logger.error(f" Erreur lors de la gestion de la conversation: {conv_error}", exc_info=True)
-
-                try:
-                    # Stocker le message utilisateur
-                    user_message_data = {
-                        'conversation_id': conversation_id,
-                        'role': 'user',
-                        'content': message,
-                        'sources': [],
-                        'llm_provider': None,
-                        'processing_time': None
-                    }
-                    user_message_id = await self.db_manager.store_message(user_message_data)
-                    self.logger.info(f" Message utilisateur stocké: {user_message_id}")
-
-                    # Stocker la réponse de l'assistant
-                    assistant_message_data = {
-                        'conversation_id': conversation_id,
-                        'role': 'assistant',
-                        'content': response_content,
-                        'sources': sources,
-                        'llm_provider': llm_provider,
-                        'processing_time': processing_time
-                    }
-                    assistant_message_id = await self.db_manager.store_message(assistant_message_data)
-                    self.logger.info(f" Message assistant stocké: {assistant_message_id}")
-
-                except Exception as db_error:
-                    self.logger.error(f" Erreur lors du stockage des messages: {db_error}", exc_info=True)
-            else:
-                self.logger.warning(f" DB Manager non disponible")
+            # Stocker les messages (écriture différée, hors du chemin de la réponse)
+            assistant_message_id = self._store_exchange(
+                conversation_id, message, response_content, prepared['sources'], llm_provider,
+                processing_time, received_at=start_time
+            )
 
             result = {
                 'success': True,
                 'response': response_content,
-                'sources': sources,
+                'sources': prepared['sources'],
                 'processing_time': processing_time,
                 'llm_provider': llm_provider,
-                'intent_detected': intent,
-                'documents_found': len(relevant_docs),
+                'intent_detected': prepared['intent'],
+                'documents_found': prepared['documents_found'],
+                'answer_cached': prepared['cached_response'] is not None,
                 'conversation_id': conversation_id,
                 'message_id': assistant_message_id  # ID du message assistant pour le feedback
             }
@@ -634,8 +709,174 @@ HISTORIQUE CONVERSATION:
                 'conversation_id': conversation_id,
                 'processing_time': (datetime.now(UTC) - start_time).total_seconds()
             }
-    
-    async def _generate_llm_response(self, system_prompt: str, user_message: str, provider: str) -> str:
+
+    async def stream_message(self,
+                             message: str,
+                             conversation_id: str,
+                             llm_provider: str = "mistral",
+                             conversation_history: Optional[List[ChatMessage]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Traiter un message en transmettant la réponse au fil de sa génération
+
+        Événements produits, dans l'ordre:
+        - metadata: sources, intention, documents trouvés
+        - token: fragment de réponse (un ou plusieurs)
+        - done: temps de traitement, temps jusqu'au premier fragment, ID du message
+        - error: en cas d'échec (remplace done)
+
+        Les messages sont mis en file d'écriture après le dernier fragment:
+        le stockage ne retarde pas la réponse.
+
+        Args:
+            message: Message de l'utilisateur
+            conversation_id: ID de la conversation
+            llm_provider: Fournisseur LLM à utiliser
+            conversation_history: Historique de la conversation
+        """
+        received_at = datetime.now(UTC)
+        start = time.perf_counter()
+        time_to_first_token = None
+
+        try:
+            self.logger.info(f"Streaming message: '{message[:50]}...'")
+            prepared = await self._prepare_answer(message, conversation_history, llm_provider)
+            yield {
+                'type': 'metadata',
+                'conversation_id': conversation_id,
+                'sources': prepared['sources'],
+                'intent_detected': prepared['intent'],
+                'documents_found': prepared['documents_found'],
+                'answer_cached': prepared['cached_response'] is not None
+            }
+
+            stream = None
+            if prepared['cached_response'] is not None:
+                chunks = self._single_chunk(prepared['cached_response'])
+            else:
+                stream = chunks = self._stream_llm_response(prepared['system_prompt'], message, llm_provider)
+
+            parts = []
+            async for chunk in chunks:
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - start
+                parts.append(chunk)
+                yield {'type': 'token', 'content': chunk}
+
+            response_content = "".join(parts)
+            if stream is not None:
+                self._remember_answer(prepared, response_content, stream.generated)
+            processing_time = time.perf_counter() - start
+
+            # Stockage après la fin du flux (écriture différée)
+            assistant_message_id = self._store_exchange(
+                conversation_id, message, response_content, prepared['sources'],
+                llm_provider, processing_time, received_at=received_at
+            )
+
+            self.logger.info(f" Réponse transmise en {processing_time:.2f}s "
+                             f"(premier fragment: {time_to_first_token or 0:.3f}s)")
+            yield {
+                'type': 'done',
+                'processing_time': processing_time,
+                'time_to_first_token': time_to_first_token,
+                'message_id': assistant_message_id
+            }
+
+        except Exception as e:
+            self.logger.error(f" Erreur lors du traitement en flux: {e}")
+            yield {
+                'type': 'error',
+                'error': str(e),
+                'processing_time': time.perf_counter() - start
+            }
+
+    @staticmethod
+    async def _single_chunk(text: str) -> AsyncIterator[str]:
+        yield text
+
+    def _store_exchange(self, conversation_id: str, message: str, response_content: str,
+                        sources: List[str], llm_provider: str, processing_time: float,
+                        received_at: datetime) -> Optional[str]:
+        """
+        Mettre en file le stockage de la conversation, du message et de la réponse
+
+        Les écritures sont regroupées par le tampon d'écriture différée
+        (ChatWriteBuffer) et envoyées en transactions groupées: la réponse
+        n'attend pas la base de données.
+
+        Args:
+            received_at: Réception du message utilisateur (horodatage du message)
+
+        Returns:
+            ID du message assistant (attribué avant le stockage), None si pas de base
+        """
+        if not self.write_buffer:
+            self.logger.warning(f" DB Manager non disponible")
+            return None
+
+        # Extraire session_id du conversation_id (format: conv_{session_id}_{timestamp})
+        # Exemple: conv_test_session_1760744803_20251017_234643 -> test_session_1760744803
+        parts = conversation_id.replace('conv_', '').split('_')
+        if len(parts) >= 3:
+            session_id = '_'.join(parts[:-2])  # Tout sauf les 2 dernières parties (date et heure)
+        else:
+            session_id = conversation_id.replace('conv_', '')
+
+        # Conversation avec l'ID personnalisé (ignorée si elle existe déjà)
+        self.write_buffer.add_conversation({
+            'id': conversation_id,
+            'user_id': None,  # Pas d'authentification pour l'instant
+            'session_id': session_id,
+            'title': message[:50] + "..." if len(message) > 50 else message,
+            'status': 'active',
+            'llm_provider': llm_provider,
+            'message_count': 0
+        })
+
+        self.write_buffer.add_message({
+            'conversation_id': conversation_id,
+            'role': 'user',
+            'content': message,
+            'sources': [],
+            'llm_provider': None,
+            'processing_time': None,
+            'timestamp': received_at.replace(tzinfo=None)
+        })
+        assistant_message_id = self.write_buffer.add_message({
+            'conversation_id': conversation_id,
+            'role': 'assistant',
+            'content': response_content,
+            'sources': sources,
+            'llm_provider': llm_provider,
+            'processing_time': processing_time
+        })
+        self.logger.info(f" Messages mis en file d'écriture: {assistant_message_id} "
+                         f"({self.write_buffer.pending} en attente)")
+        return assistant_message_id
+
+    async def close(self) -> None:
+        """Écrire les messages en attente et libérer le scraper (à appeler à l'arrêt de l'application)"""
+        if self.write_buffer:
+            await self.write_buffer.close()
+        self.doc_scraper.close()
+
+    def _fallback_response(self, user_message: str) -> str:
+        """Réponse simulée quand l'Agent Agno n'est pas disponible"""
+        return f"""Bonjour ! Je suis votre assistant SAV Free Mobile.
+
+J'ai bien reçu votre message : "{user_message}"
+
+Je suis en cours de développement et bientôt je pourrai vous aider avec :
+- Vos questions techniques sur votre mobile Free
+- Vos problèmes de facturation et d'abonnement
+- La configuration de vos services
+- Le dépannage de votre ligne
+
+En attendant, je vous invite à consulter notre documentation sur assistance.free.fr ou à contacter notre service client au 3244.
+
+Comment puis-je vous aider davantage ?"""
+
+    async def _generate_llm_response(self, system_prompt: str, user_message: str, provider: str) -> Tuple[str, bool]:
         """
         Générer une réponse avec le LLM via l'Agent Agno
 
@@ -645,7 +886,7 @@ HISTORIQUE CONVERSATION:
             provider: Fournisseur LLM
 
         Returns:
-            Réponse générée
+            Tuple (réponse, True si générée par le LLM et non par un fallback)
         """
         try:
             # Obtenir ou créer l'Agent Agno
@@ -659,7 +900,6 @@ HISTORIQUE CONVERSATION:
                 full_message = f"{system_prompt}\n\nQUESTION CLIENT:\n{user_message}"
 
                 # Générer la réponse avec l'Agent Agno (appel synchrone dans un contexte async)
-                import asyncio
                 loop = asyncio.get_event_loop()
                 response = await loop.run_in_executor(None, agent.run, full_message)
 
@@ -672,25 +912,11 @@ HISTORIQUE CONVERSATION:
                     response_text = str(response)
 
                 self.logger.info(f" Réponse générée avec succès ({len(response_text)} caractères)")
-                return response_text
+                return response_text, True
 
             # Fallback: réponse simulée si Agno non disponible
             self.logger.warning(" Agent Agno non disponible, utilisation de réponse simulée")
-            response = f"""Bonjour ! Je suis votre assistant SAV Free Mobile.
-
-J'ai bien reçu votre message : "{user_message}"
-
-Je suis en cours de développement et bientôt je pourrai vous aider avec :
-- Vos questions techniques sur votre mobile Free
-- Vos problèmes de facturation et d'abonnement
-- La configuration de vos services
-- Le dépannage de votre ligne
-
-En attendant, je vous invite à consulter notre documentation sur assistance.free.fr ou à contacter notre service client au 3244.
-
-Comment puis-je vous aider davantage ?"""
-
-            return response
+            return self._fallback_response(user_message), False
 
         except Exception as e:
             self.logger.error(f" Erreur lors de la génération LLM: {e}")
@@ -699,4 +925,101 @@ Comment puis-je vous aider davantage ?"""
             self.logger.error(f"Traceback: {traceback.format_exc()}")
 
             # Fallback en cas d'erreur
-            return "Désolé, je rencontre actuellement des difficultés techniques. Veuillez réessayer dans quelques instants."
+            return LLM_ERROR_RESPONSE, False
+
+    def _stream_llm_response(self, system_prompt: str, user_message: str, provider: str) -> 'LLMTokenStream':
+        """
+        Générer une réponse fragment par fragment via l'Agent Agno (stream=True)
+
+        Args:
+            system_prompt: Prompt système avec contexte
+            user_message: Message utilisateur
+            provider: Fournisseur LLM
+
+        Returns:
+            Flux asynchrone de fragments; `generated` indique ensuite si la
+            réponse vient du LLM (et non d'un fallback)
+        """
+        agent = self._get_or_create_agno_agent()
+        if agent:
+            self.logger.info(f"🤖 Génération en flux avec Agent Agno pour: {user_message[:50]}...")
+            full_message = f"{system_prompt}\n\nQUESTION CLIENT:\n{user_message}"
+            return LLMTokenStream(lambda: agent.run(full_message, stream=True), user_message, self)
+
+        self.logger.warning(" Agent Agno non disponible, utilisation de réponse simulée")
+        return LLMTokenStream(None, user_message, self)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Sérialiser un événement de ChatbotService.stream_message au format Server-Sent Events"""
+    data = {key: value for key, value in event.items() if key != 'type'}
+    return f"event: {event['type']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _event_text(event) -> Optional[str]:
+    """Fragment de texte d'un événement de flux Agno (ou d'un fragment brut)"""
+    if isinstance(event, str):
+        return event
+    event_type = getattr(event, 'event', None)
+    if event_type is not None and event_type not in _CONTENT_EVENTS:
+        return None
+    content = getattr(event, 'content', None)
+    return content if isinstance(content, str) else None
+
+
+class LLMTokenStream:
+    """
+    Flux asynchrone des fragments produits par le LLM
+
+    Le client Agno est synchrone: l'itération du flux tourne dans un thread
+    et chaque fragment est remis à la boucle d'événements par une file dès
+    son arrivée. Sans agent (ou si le LLM échoue avant le premier fragment)
+    le flux produit la réponse de secours en un seul fragment.
+    """
+
+    def __init__(self, start_stream: Optional[Callable[[], Iterable[Any]]], user_message: str,
+                 service: 'ChatbotService'):
+        self._start_stream = start_stream
+        self._user_message = user_message
+        self._service = service
+        self.generated = False
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        if self._start_stream is None:
+            yield self._service._fallback_response(self._user_message)
+            return
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        end = object()
+
+        def produce():
+            try:
+                for event in self._start_stream():
+                    text = _event_text(event)
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, end)
+
+        producer = loop.run_in_executor(None, produce)
+        sent_any = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is end:
+                    break
+                if isinstance(item, Exception):
+                    self._service.logger.error(f" Erreur lors de la génération LLM en flux: {item}")
+                    self.generated = False
+                    if not sent_any:
+                        yield LLM_ERROR_RESPONSE
+                    return
+                sent_any = True
+                yield item
+            self.generated = sent_any
+        finally:
+            if producer.done():
+                producer.result()
@@ -4,14 +4,16 @@ Handles loading, cleaning, and validation of tweet data from CSV files
 """
 
 import pandas as pd
-import re
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import logging
 from pathlib import Path
 
 from ..models import TweetRaw
-from ..utils.cleaning import TextCleaner
+from ..utils.cleaning import (
+    TextCleaner, URL_REGEX, REPEATED_MENTIONS_REGEX, ASCII_CONTROL_REGEX, REPEATED_EMOJI_REGEX,
+    collapse_whitespace, extract_entities, get_text_normalizer
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,19 +51,19 @@ class CSVProcessor:
             return ""
             
         # Supprimer URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = URL_REGEX.sub('', text)
         
         # Normaliser espaces multiples
-        text = ' '.join(text.split())
+        text = collapse_whitespace(text)
         
         # Supprimer mentions multiples redondantes (@user @user @user -> @user)
-        text = re.sub(r'(@\w+\s*){3,}', lambda m: m.group(1), text)
+        text = REPEATED_MENTIONS_REGEX.sub(lambda m: m.group(1), text)
         
         # Supprimer caractères de contrôle
-        text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+        text = ASCII_CONTROL_REGEX.sub('', text)
         
         # Nettoyer emojis excessifs (garder quelques-uns)
-        text = re.sub(r'([\U0001F600-\U0001F64F]){3,}', r'\1\1', text)
+        text = REPEATED_EMOJI_REGEX.sub(r'\1\1', text)
         
         return text.strip()
     
@@ -77,11 +79,7 @@ class CSVProcessor:
         Returns:
             Dictionary with extracted metadata
         """
-        return {
-            'mentions': re.findall(r'@(\w+)', text),
-            'hashtags': re.findall(r'#(\w+)', text),
-            'urls': re.findall(r'http\S+|www\S+|https\S+', text)
-        }
+        return extract_entities(text)
     
     def validate_csv_structure(self, df: pd.DataFrame) -> Tuple[bool, List[str]]:
         """
@@ -141,7 +139,7 @@ class CSVProcessor:
             logger.info(f"Supprimé {duplicates_removed} doublons")
         
         # Clean text column
-        df['text'] = df['text'].astype(str).apply(self.clean_text)
+        df['text'] = get_text_normalizer().map_unique(df['text'].astype(str), self.clean_text)
         
         # Remove tweets that are too short after cleaning
         df = df[df['text'].str.len() >= self.min_text_length]
@@ -6,7 +6,9 @@ Scrapes Free Mobile assistance documentation and creates embeddings for semantic
 import asyncio
 import hashlib
 import logging
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, UTC
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
@@ -34,6 +36,8 @@ except ImportError:
 
 from ..models import KnowledgeDocument, DocumentType
 from ..utils.database import DatabaseManager
+from .embedding_pipeline import EmbeddingPipeline, embedding_to_blob
+from .polite_crawler import PoliteCrawler, FetchResult
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +73,7 @@ class DocumentationScraper:
         self.embedding_model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
         self.embedding_model = None
         self._initialize_embedding_model()
+        self.embedding_pipeline = EmbeddingPipeline(self.embedding_model)
         
         # Configuration du scraping
         self.session_headers = {
@@ -80,9 +85,26 @@ class DocumentationScraper:
             'Upgrade-Insecure-Requests': '1'
         }
         
-        # Cache pour éviter de scraper les mêmes pages
+        # Crawler partagé: concurrence et délai par domaine, GET conditionnel
+        self.crawler = PoliteCrawler(
+            headers=self.session_headers,
+            max_per_domain=2,
+            delay=0.5,
+            cache_path=os.getenv("CRAWL_CACHE_PATH", "./data/crawl_cache.json")
+        )
+        # L'analyse HTML (BeautifulSoup) ne bloque pas la boucle d'événements
+        self._parse_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="doc-parse")
+
+        # Cache pour éviter de scraper les mêmes pages (par passage)
         self.scraped_urls = set()
         self.failed_urls = set()
+        self.unchanged_urls = set()
+        # Validateurs (ETag, Last-Modified) des pages en attente de stockage
+        self._pending_validators: Dict[str, FetchResult] = {}
+
+    def close(self) -> None:
+        """Arrêter le pool de threads d'analyse HTML (à l'arrêt de l'application)"""
+        self._parse_executor.shutdown(wait=True)
     
     def _initialize_embedding_model(self):
         """Initialiser le modèle d'embeddings"""
@@ -255,8 +277,10 @@ class DocumentationScraper:
     
     def _generate_embeddings(self, text: str) -> Optional[List[float]]:
         """
-        Générer les embeddings pour un texte
-        
+        Générer les embeddings pour un texte court (requête)
+
+        Les documents passent par le pipeline de chunks (_embed_documents).
+
         Args:
             text: Texte à encoder
             
@@ -267,14 +291,8 @@ class DocumentationScraper:
             if not self.embedding_model:
                 self.logger.error(" Modèle d'embeddings non initialisé")
                 return None
-            
-            # Limiter la taille du texte pour éviter les erreurs de mémoire
-            max_length = 512  # Limite du modèle
-            if len(text) > max_length:
-                text = text[:max_length]
-            
-            embeddings = self.embedding_model.encode(text, convert_to_tensor=False)
-            return embeddings.tolist()
+
+            return self.embedding_pipeline.encode([text])[0].tolist()
             
         except Exception as e:
             self.logger.error(f" Erreur lors de la génération des embeddings: {e}")
@@ -288,26 +306,34 @@ class DocumentationScraper:
             url: URL à scraper
 
         Returns:
-            Document de connaissances ou None si erreur
+            Document de connaissances, None si erreur ou page inchangée
         """
-        if url in self.scraped_urls or url in self.failed_urls:
+        if url in self.scraped_urls or url in self.failed_urls or url in self.unchanged_urls:
             self.logger.info(f"URL already processed: {url}")
             return None
 
+        if not self.crawler.is_open:
+            async with self.crawler:
+                return await self.scrape_url(url)
+
         try:
             self.logger.info(f"Scraping URL: {url}")
 
-            async with aiohttp.ClientSession(headers=self.session_headers) as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    if response.status != 200:
-                        self.logger.warning(f" Statut HTTP {response.status} pour {url}")
-                        self.failed_urls.add(url)
-                        return None
-
-                    html = await response.text()
+            result = await self.crawler.fetch(url)
+            if result.not_modified:
+                self.logger.info(f"Page inchangée (304): {url}")
+                self.unchanged_urls.add(url)
+                return None
+            if result.status != 200:
+                self.logger.warning(f" Statut HTTP {result.status} pour {url}")
+                self.failed_urls.add(url)
+                return None
 
-            # Extraire le contenu
-            title, content, document_type = self._extract_content_from_html(html, url)
+            # Extraire le contenu (dans le pool de threads)
+            loop = asyncio.get_running_loop()
+            title, content, document_type = await loop.run_in_executor(
+                self._parse_executor, self._extract_content_from_html, result.text, url
+            )
 
             if not content or len(content) < 50:
                 self.logger.warning(f" Contenu insuffisant pour {url}")
@@ -317,11 +343,6 @@ class DocumentationScraper:
             # Générer le hash du contenu
             content_hash = self._generate_content_hash(content)
 
-            # Générer les embeddings
-            embeddings = self._generate_embeddings(content)
-            if not embeddings:
-                self.logger.warning(f" Impossible de générer les embeddings pour {url}")
-
             # Extraire le domaine
             parsed_url = urlparse(url)
             source_domain = parsed_url.netloc
@@ -334,11 +355,13 @@ class DocumentationScraper:
                 source_url=url,
                 source_domain=source_domain,
                 content_hash=content_hash,
-                embedding_model=self.embedding_model_name if embeddings else None,
-                embedding_dimension=len(embeddings) if embeddings else None
+                embedding_model=self.embedding_model_name if self.embedding_model else None,
+                embedding_dimension=self.embedding_pipeline.dimension
             )
 
             self.scraped_urls.add(url)
+            # Validateurs conservés seulement une fois le document stocké et encodé
+            self._pending_validators[url] = result
             self.logger.info(f" Document créé: {title[:50]}... ({len(content)} caractères)")
 
             return document
@@ -357,18 +380,17 @@ class DocumentationScraper:
         """
         self.logger.info(" Début du scraping de la documentation Free Mobile")
 
-        documents = []
+        self.scraped_urls.clear()
+        self.failed_urls.clear()
+        self.unchanged_urls.clear()
 
-        # Scraper les URLs de base
-        for url in self.BASE_URLS:
-            document = await self.scrape_url(url)
-            if document:
-                documents.append(document)
-
-            # Pause entre les requêtes pour être respectueux
-            await asyncio.sleep(1)
+        # Requêtes concurrentes; le crawler espace celles d'un même domaine
+        async with self.crawler:
+            results = await asyncio.gather(*(self.scrape_url(url) for url in self.BASE_URLS))
+        documents = [document for document in results if document]
 
         self.logger.info(f" Scraping terminé: {len(documents)} documents créés")
+        self.logger.info(f" Pages inchangées: {len(self.unchanged_urls)}")
         self.logger.info(f" URLs échouées: {len(self.failed_urls)}")
 
         return documents
@@ -377,39 +399,150 @@ class DocumentationScraper:
         """
         Stocker les documents dans la base de données
 
+        Un document déjà stocké pour la même URL avec un autre contenu est
+        mis à jour sur place: ses chunks sont supprimés de la base et de
+        l'index vectoriel, puis ré-encodés depuis le nouveau contenu.
+
         Args:
             documents: Liste des documents à stocker
 
         Returns:
-            Nombre de documents stockés
+            Nombre de documents stockés ou mis à jour
         """
         if not self.db_manager:
             self.logger.error(" Gestionnaire de base de données non disponible")
+            self._commit_validators([], [document.source_url for document in documents])
             return 0
 
-        stored_count = 0
+        stored = []
+        kept_urls = []
+        failed_urls = []
+        replaced_chunk_ids = []
 
         for document in documents:
             try:
                 # Vérifier si le document existe déjà (par hash de contenu)
                 existing = await self._check_existing_document(document.content_hash)
 
-                if existing:
+                if existing and (existing['chunk_count'] or not self.embedding_model):
                     self.logger.info(f"Document already exists: {document.title[:50]}...")
+                    kept_urls.append(document.source_url)
+                    continue
+
+                if existing:
+                    # Stocké sans chunks (encodage échoué): ré-encoder, sans le dupliquer
+                    stored.append((existing['id'], document))
+                    self.logger.info(f"Document stored without embeddings, re-embedding: {document.title[:50]}...")
+                    continue
+
+                # Page modifiée: mettre à jour le document de cette URL (ses anciens chunks sont supprimés)
+                previous = await self.db_manager.find_knowledge_document_by_url(document.source_url)
+                if previous:
+                    replaced = await self.db_manager.replace_knowledge_document(
+                        previous['id'], document.model_dump(mode='json')
+                    )
+                    if replaced is None:
+                        failed_urls.append(document.source_url)
+                        continue
+                    replaced_chunk_ids.extend(replaced)
+                    stored.append((previous['id'], document))
+                    self.logger.info(f"Document updated: {document.title[:50]}...")
                     continue
 
                 # Stocker le document
-                await self._store_single_document(document)
-                stored_count += 1
-                self.logger.info(f"Document stored: {document.title[:50]}...")
+                document_id = await self._store_single_document(document)
+                if document_id:
+                    stored.append((document_id, document))
+                    self.logger.info(f"Document stored: {document.title[:50]}...")
+                else:
+                    failed_urls.append(document.source_url)
 
             except Exception as e:
                 self.logger.error(f" Erreur lors du stockage de {document.title[:50]}...: {e}")
+                failed_urls.append(document.source_url)
 
-        self.logger.info(f" Stockage terminé: {stored_count} nouveaux documents")
-        return stored_count
+        if replaced_chunk_ids:
+            # Les passages remplacés ne doivent plus ressortir de la recherche
+            index = await self.db_manager.ensure_vector_index()
+            removed = index.remove(replaced_chunk_ids)
+            index.save()
+            self.logger.info(f" Index vectoriel: {removed} chunks remplacés retirés")
 
-    async def _check_existing_document(self, content_hash: str) -> bool:
+        stored_urls = [document.source_url for _, document in stored]
+        if stored and self.embedding_model:
+            try:
+                await self._embed_documents(stored)
+            except Exception as e:
+                self.logger.error(f" Erreur lors de la génération des embeddings: {e}")
+                failed_urls.extend(stored_urls)
+                stored_urls = []
+
+        # Pages non stockées ou non encodées: à retélécharger au prochain passage (pas de 304)
+        self._commit_validators(kept_urls + stored_urls, failed_urls)
+
+        self.logger.info(f" Stockage terminé: {len(stored)} documents nouveaux ou mis à jour")
+        return len(stored)
+
+    async def _embed_documents(self, stored: List[Tuple[str, KnowledgeDocument]]) -> int:
+        """
+        Découper les documents stockés en chunks et les encoder par lots
+
+        Tous les chunks du lot sont encodés ensemble; ceux dont le hash de
+        contenu est déjà en base ET dans l'index vectoriel ne sont pas
+        ré-encodés. Un chunk en base absent de l'index est ré-encodé et
+        réindexé sous son identifiant stocké.
+
+        Args:
+            stored: Couples (identifiant, document) stockés
+
+        Returns:
+            Nombre de chunks encodés
+        """
+        chunks = [
+            chunk
+            for document_id, document in stored
+            for chunk in self.embedding_pipeline.chunk_document(document_id, document.content)
+        ]
+        index = await self.db_manager.ensure_vector_index()
+        existing = await self.db_manager.get_existing_chunk_ids([chunk.content_hash for chunk in chunks])
+        known = {content_hash for content_hash, chunk_id in existing.items() if chunk_id in index}
+        chunks, vectors = self.embedding_pipeline.encode_chunks(chunks, known_hashes=known)
+        if not chunks:
+            return 0
+
+        new_chunks = [
+            dict(chunk.to_dict(), embedding=embedding_to_blob(vector))
+            for chunk, vector in zip(chunks, vectors)
+            if chunk.content_hash not in existing
+        ]
+        stored_count = await self.db_manager.store_knowledge_chunks(new_chunks)
+        if new_chunks and not stored_count:
+            raise RuntimeError(f"Aucun des {len(new_chunks)} chunks n'a été stocké")
+
+        # Mise à jour incrémentale de l'index vectoriel (une sauvegarde par lot)
+        index.add([existing.get(chunk.content_hash, chunk.chunk_id) for chunk in chunks], vectors)
+        index.save()
+        self.logger.info(f" Index vectoriel: {len(chunks)} chunks de {len(stored)} documents ajoutés ({len(index)} au total)")
+        return len(chunks)
+
+    def _commit_validators(self, stored_urls: List[str], failed_urls: List[str]) -> None:
+        """
+        Conserver les validateurs HTTP des pages stockées, oublier les autres
+
+        Args:
+            stored_urls: Pages stockées et encodées (GET conditionnel au prochain passage)
+            failed_urls: Pages à retélécharger entièrement au prochain passage
+        """
+        for url in stored_urls:
+            result = self._pending_validators.pop(url, None)
+            if result is not None:
+                self.crawler.remember(result)
+        for url in failed_urls:
+            self._pending_validators.pop(url, None)
+            self.crawler.forget(url)
+        self.crawler.save()
+
+    async def _check_existing_document(self, content_hash: str) -> Optional[Dict[str, Any]]:
         """
         Vérifier si un document existe déjà par son hash
 
@@ -417,32 +550,34 @@ class DocumentationScraper:
             content_hash: Hash du contenu à vérifier
 
         Returns:
-            True si le document existe déjà
+            {'id', 'chunk_count'} si le document existe déjà, None sinon
+            (chunk_count = 0: document stocké dont l'encodage a échoué)
         """
         try:
-            # Cette méthode devra être implémentée selon le système de base de données
-            # Pour l'instant, on retourne False (pas de vérification)
-            return False
+            return await self.db_manager.find_knowledge_document(content_hash)
         except Exception as e:
             self.logger.error(f" Erreur lors de la vérification d'existence: {e}")
-            return False
+            return None
 
-    async def _store_single_document(self, document: KnowledgeDocument):
+    async def _store_single_document(self, document: KnowledgeDocument) -> Optional[str]:
         """
         Stocker un seul document dans la base de données
 
         Args:
             document: Document à stocker
+
+        Returns:
+            Identifiant du document stocké, None si échec
         """
         try:
-            # Cette méthode devra être implémentée selon le système de base de données
-            # Pour l'instant, on log juste les informations
             self.logger.info(f" Stockage du document: {document.title}")
             self.logger.debug(f"   - URL: {document.source_url}")
             self.logger.debug(f"   - Type: {document.document_type}")
             self.logger.debug(f"   - Taille: {len(document.content)} caractères")
             self.logger.debug(f"   - Hash: {document.content_hash}")
 
+            return await self.db_manager.store_knowledge_document(document.model_dump(mode='json'))
+
         except Exception as e:
             self.logger.error(f" Erreur lors du stockage: {e}")
             raise
@@ -472,8 +607,9 @@ class DocumentationScraper:
                 'start_time': start_time,
                 'end_time': end_time,
                 'duration_seconds': duration,
-                'total_urls_processed': len(self.scraped_urls) + len(self.failed_urls),
+                'total_urls_processed': len(self.scraped_urls) + len(self.failed_urls) + len(self.unchanged_urls),
                 'successful_scrapes': len(documents),
+                'unchanged_pages': len(self.unchanged_urls),
                 'failed_scrapes': len(self.failed_urls),
                 'documents_stored': stored_count,
                 'failed_urls': list(self.failed_urls)
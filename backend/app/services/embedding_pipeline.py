@@ -0,0 +1,196 @@
+"""
+Pipeline d'embeddings pour la base de connaissances
+Découpe les documents en chunks bornés en tokens (avec chevauchement) et les
+encode par lots, afin que l'intégralité de chaque document soit indexée
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Taille de chunk si le modèle n'expose pas sa longueur de séquence
+DEFAULT_MAX_TOKENS = 256
+# Tokens spéciaux ajoutés par le modèle autour de chaque séquence ([CLS], [SEP])
+SPECIAL_TOKENS = 2
+
+
+def embedding_to_blob(vector) -> bytes:
+    """Sérialiser un embedding en blob float32"""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def blob_to_embedding(blob: bytes) -> np.ndarray:
+    """Désérialiser un blob float32 écrit par embedding_to_blob"""
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+@dataclass
+class TextChunk:
+    """Portion contiguë d'un document, encodée séparément"""
+
+    document_id: str
+    chunk_index: int
+    content: str
+    content_hash: str
+
+    @property
+    def chunk_id(self) -> str:
+        """Identifiant dans l'index vectoriel: '<id document>#<index chunk>'"""
+        return f"{self.document_id}#{self.chunk_index}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.chunk_id,
+            'document_id': self.document_id,
+            'chunk_index': self.chunk_index,
+            'content': self.content,
+            'content_hash': self.content_hash,
+        }
+
+
+class EmbeddingPipeline:
+    """
+    Découpage et encodage par lots avec un modèle sentence-transformers
+
+    Les chunks sont bornés par le nombre de tokens du tokenizer du modèle
+    (un token par mot à défaut) et se chevauchent de `overlap_tokens`, pour
+    qu'une phrase coupée à une frontière soit encodée entière au moins une fois.
+    """
+
+    def __init__(self, model=None, max_tokens: Optional[int] = None,
+                 overlap_tokens: int = 32, batch_size: int = 64):
+        """
+        Initialiser le pipeline
+
+        Args:
+            model: Modèle SentenceTransformer (None = découpage seul)
+            max_tokens: Tokens par chunk (défaut: longueur de séquence du modèle)
+            overlap_tokens: Tokens partagés par deux chunks consécutifs
+            batch_size: Chunks encodés par passe du modèle
+        """
+        self.model = model
+        self._max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.batch_size = batch_size
+
+    @property
+    def max_tokens(self) -> int:
+        if self._max_tokens:
+            return self._max_tokens
+        max_seq_length = getattr(self.model, 'max_seq_length', None)
+        if max_seq_length:
+            return max(1, max_seq_length - SPECIAL_TOKENS)
+        return DEFAULT_MAX_TOKENS
+
+    @property
+    def dimension(self) -> Optional[int]:
+        if self.model is None or not hasattr(self.model, 'get_sentence_embedding_dimension'):
+            return None
+        return self.model.get_sentence_embedding_dimension()
+
+    # === Découpage ===
+
+    def count_tokens(self, words: Sequence[str]) -> List[int]:
+        """Nombre de tokens de chaque mot selon le tokenizer du modèle"""
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        if tokenizer is None or not words:
+            return [1] * len(words)
+        input_ids = tokenizer(list(words), add_special_tokens=False)['input_ids']
+        return [max(1, len(ids)) for ids in input_ids]
+
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Découper un texte en chunks d'au plus `max_tokens` tokens, chevauchants
+
+        Les coupures se font sur les espaces; un mot plus long que le budget
+        forme son propre chunk (tronqué par le modèle).
+        """
+        words = text.split()
+        if not words:
+            return []
+
+        counts = self.count_tokens(words)
+        max_tokens, overlap = self.max_tokens, min(self.overlap_tokens, self.max_tokens // 2)
+        chunks = []
+        start = 0
+        while start < len(words):
+            end, total = start, 0
+            while end < len(words) and (end == start or total + counts[end] <= max_tokens):
+                total += counts[end]
+                end += 1
+            chunks.append(' '.join(words[start:end]))
+            if end == len(words):
+                break
+
+            # Le chunk suivant reprend les `overlap` derniers tokens de celui-ci
+            next_start, shared = end, 0
+            while next_start > start + 1 and shared + counts[next_start - 1] <= overlap:
+                next_start -= 1
+                shared += counts[next_start]
+            start = next_start
+
+        return chunks
+
+    def chunk_document(self, document_id: str, text: str) -> List[TextChunk]:
+        """Chunks d'un document, avec leur hash de contenu"""
+        return [
+            TextChunk(
+                document_id=str(document_id),
+                chunk_index=index,
+                content=content,
+                content_hash=hashlib.sha256(content.encode('utf-8')).hexdigest()
+            )
+            for index, content in enumerate(self.chunk_text(text))
+        ]
+
+    # === Encodage ===
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Encoder des textes par lots
+
+        Returns:
+            Matrice float32 d'embeddings normalisés (L2), une ligne par texte
+        """
+        if self.model is None:
+            raise RuntimeError("Modèle d'embeddings non initialisé")
+        if not texts:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+
+        embeddings = self.model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+
+    def encode_chunks(self, chunks: Sequence[TextChunk], known_hashes=()) -> Tuple[List[TextChunk], np.ndarray]:
+        """
+        Encoder les chunks dont le contenu n'est pas déjà indexé
+
+        Args:
+            chunks: Chunks à encoder
+            known_hashes: Hashes de contenu déjà stockés (ignorés)
+
+        Returns:
+            (chunks encodés, matrice d'embeddings)
+        """
+        seen = set(known_hashes)
+        pending = []
+        for chunk in chunks:
+            if chunk.content_hash in seen:
+                continue
+            seen.add(chunk.content_hash)
+            pending.append(chunk)
+
+        skipped = len(chunks) - len(pending)
+        if skipped:
+            logger.info(f"Pipeline d'embeddings: {skipped} chunks déjà indexés ignorés")
+        return pending, self.encode([chunk.content for chunk in pending])
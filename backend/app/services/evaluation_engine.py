@@ -0,0 +1,586 @@
+"""
+Evaluation engine for tweet classifiers
+Any classifier (rules, fine-tuned model, LLM) is run over the evaluation
+splits with bounded concurrency. Predictions are cached on disk per
+(strategy, version, input), so re-running an evaluation only calls the model
+for inputs whose text or prompt changed. Metrics are computed with vectorized
+NumPy and every run records throughput, latency and cost
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TASKS = ('sentiment', 'category', 'priority')
+FAILED_LABEL = '__failed__'
+
+# TweetClassifier / agent taxonomy (upper-case French labels) mapped to the dataset labels
+TAXONOMY_TO_DATASET = {
+    'sentiment': ('sentiment', {'POSITIF': 'positive', 'NEUTRE': 'neutral', 'NEGATIF': 'negative'}),
+    'category': ('theme', {'FACTURE': 'facturation', 'RESEAU': 'réseau', 'FIBRE': 'technique',
+                           'MOBILE': 'technique', 'TV': 'technique', 'SAV': 'question', 'AUTRE': 'autre'}),
+    'priority': ('urgence', {'CRITIQUE': 'critique', 'ELEVEE': 'haute', 'MOYENNE': 'moyenne', 'FAIBLE': 'basse'}),
+}
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of the given parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()[:32]
+
+
+def source_fingerprint(*objects: Any) -> str:
+    """Hash of the source code of functions or classes (changes when the logic is edited)"""
+    sources = []
+    for obj in objects:
+        try:
+            sources.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            sources.append(repr(obj))
+    return fingerprint(*sources)
+
+
+def from_classifier_taxonomy(classification: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a TweetClassifier-style classification (theme, urgence...) to dataset labels
+
+    Fields already named after the task (category, priority) are accepted too.
+    """
+    prediction: Dict[str, Any] = {}
+    for task, (field, mapping) in TAXONOMY_TO_DATASET.items():
+        value = str(classification.get(field, classification.get(task, ''))).strip().upper()
+        if value:
+            prediction[task] = mapping.get(value, value.lower())
+    if 'confidence' in classification:
+        prediction['confidence'] = classification['confidence']
+    return prediction
+
+
+def parse_llm_classification(text: str) -> Dict[str, Any]:
+    """
+    Extract a classification from a raw LLM answer
+
+    The first JSON object of the answer is used; otherwise "key: value" lines.
+    """
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        try:
+            parsed = json.loads(match.group(0))
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+
+    parsed = {}
+    for key, value in re.findall(r"^\s*[-*]?\s*\"?(\w+)\"?\s*[:=]\s*\"?([^\"\n,]+)", text, re.MULTILINE):
+        parsed.setdefault(key.lower(), value.strip())
+    return parsed
+
+
+def classification_metrics(y_true: Sequence[Any], y_pred: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Accuracy, weighted precision/recall/F1, per-class report and confusion matrix
+
+    Labels are encoded once with np.unique and the confusion matrix is built
+    with a single bincount; every score derives from it. Results match
+    scikit-learn (weighted average, zero_division=0) and use the same keys as
+    ModelTrainingService.calculate_metrics.
+
+    Args:
+        y_true: Ground truth labels
+        y_pred: Predicted labels
+
+    Returns:
+        Dictionary with metrics
+    """
+    y_true = np.asarray(y_true, dtype=object).astype(str)
+    y_pred = np.asarray(y_pred, dtype=object).astype(str)
+    if len(y_true) != len(y_pred):
+        raise ValueError(f"{len(y_true)} labels for {len(y_pred)} predictions")
+
+    labels, encoded = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+    n, k = len(y_true), len(labels)
+    cm = np.bincount(encoded[:n] * k + encoded[n:], minlength=k * k).reshape(k, k)
+
+    true_positives = np.diag(cm).astype(float)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    total = int(support.sum())
+    weights = support / total if total else np.zeros(k)
+    accuracy = float(true_positives.sum() / n) if n else 0.0
+
+    report: Dict[str, Any] = {
+        label: {'precision': float(p), 'recall': float(r), 'f1-score': float(f), 'support': int(s)}
+        for label, p, r, f, s in zip(labels.tolist(), precision, recall, f1, support)
+    }
+    report['accuracy'] = accuracy
+    report['macro avg'] = {
+        'precision': float(precision.mean()) if k else 0.0,
+        'recall': float(recall.mean()) if k else 0.0,
+        'f1-score': float(f1.mean()) if k else 0.0,
+        'support': total
+    }
+    report['weighted avg'] = {
+        'precision': float(precision @ weights),
+        'recall': float(recall @ weights),
+        'f1-score': float(f1 @ weights),
+        'support': total
+    }
+
+    return {
+        'accuracy': accuracy,
+        'precision': report['weighted avg']['precision'],
+        'recall': report['weighted avg']['recall'],
+        'f1_score': report['weighted avg']['f1-score'],
+        'support': total,
+        'classification_report': report,
+        'confusion_matrix': cm.tolist(),
+        'labels': labels.tolist()
+    }
+
+
+def overall_metrics(metrics: Mapping[str, Mapping[str, Any]], total_samples: int) -> Dict[str, Any]:
+    """Average accuracy and F1 over the evaluated tasks"""
+    tasks = [task for task in metrics if task != 'overall']
+    return {
+        'avg_accuracy': float(np.mean([metrics[task]['accuracy'] for task in tasks])) if tasks else 0.0,
+        'avg_f1': float(np.mean([metrics[task]['f1_score'] for task in tasks])) if tasks else 0.0,
+        'total_samples': total_samples
+    }
+
+
+@dataclass
+class EvaluationStrategy:
+    """
+    A classifier under evaluation
+
+    Exactly one of `predict` (one text, sync or async) or `predict_batch`
+    (list of texts, sync) must be given; both return {task: label} mappings
+    (or None on failure). `version` must change whenever the classifier's
+    behaviour changes (model, prompt, rules): it is part of every cache key.
+    `cache_key` can replace the raw text in the key, e.g. with the rendered
+    prompt so that any prompt edit invalidates exactly the affected items.
+    Cost is read from `cost_meter` (cumulative spend) when available,
+    otherwise estimated as `cost_per_item` per computed prediction.
+    """
+
+    name: str
+    predict: Optional[Callable[[str], Any]] = None
+    predict_batch: Optional[Callable[[List[str]], Sequence[Optional[Mapping[str, Any]]]]] = None
+    version: str = ""
+    tasks: Tuple[str, ...] = TASKS
+    concurrency: int = 8
+    batch_size: int = 32
+    cost_per_item: float = 0.0
+    cost_meter: Optional[Callable[[], float]] = None
+    cache_key: Optional[Callable[[str], str]] = None
+    default_prediction: Optional[Mapping[str, str]] = None
+
+    def __post_init__(self):
+        if (self.predict is None) == (self.predict_batch is None):
+            raise ValueError(f"Strategy {self.name} needs exactly one of predict / predict_batch")
+
+    def key(self, text: str) -> str:
+        material = self.cache_key(text) if self.cache_key else text
+        return fingerprint(self.name, self.version, material)
+
+
+class PredictionCache:
+    """Predictions persisted in SQLite, keyed by EvaluationStrategy.key"""
+
+    def __init__(self, path: Optional[str] = "./data/cache/evaluation/predictions.sqlite"):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite file (None keeps the cache in memory)
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path or ':memory:', check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS predictions (
+                    key TEXT PRIMARY KEY,
+                    strategy TEXT NOT NULL,
+                    prediction TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+        return self._conn
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, prediction FROM predictions WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update((key, json.loads(prediction)) for key, prediction in rows)
+        return found
+
+    def put_many(self, strategy: str, items: Iterable[Tuple[str, Mapping[str, Any]]]) -> None:
+        now = datetime.now().isoformat()
+        rows = [(key, strategy, json.dumps(prediction, ensure_ascii=False), now) for key, prediction in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)", rows)
+
+    def clear(self, strategy: Optional[str] = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if strategy is None:
+                    conn.execute("DELETE FROM predictions")
+                else:
+                    conn.execute("DELETE FROM predictions WHERE strategy = ?", (strategy,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class EvaluationEngine:
+    """Run classifiers over labelled splits, with caching, concurrency and run statistics"""
+
+    def __init__(self, cache: Optional[PredictionCache] = None, flush_every: int = 100):
+        """
+        Initialize the engine
+
+        Args:
+            cache: Prediction cache (on-disk default)
+            flush_every: Predictions buffered before being written to the cache
+                (an interrupted run keeps what it already paid for)
+        """
+        self.cache = cache if cache is not None else PredictionCache()
+        self.flush_every = flush_every
+
+    async def predict(self, strategy: EvaluationStrategy,
+                      texts: Sequence[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Predictions for texts, computing only those missing from the cache
+
+        Args:
+            strategy: Classifier to run
+            texts: Input texts (duplicates are computed once)
+
+        Returns:
+            (one prediction per text, run statistics)
+        """
+        texts = [str(text) for text in texts]
+        keys = [strategy.key(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        cached = self.cache.get_many(list(unique))
+        missing = [(key, text) for key, text in unique.items() if key not in cached]
+
+        meter_start = strategy.cost_meter() if strategy.cost_meter else 0.0
+        start = time.perf_counter()
+        computed, latencies, failed = await self._compute(strategy, missing)
+        wall_time = time.perf_counter() - start
+
+        if strategy.cost_meter:
+            cost = strategy.cost_meter() - meter_start
+        else:
+            cost = len(computed) * strategy.cost_per_item
+        cost_per_prediction = cost / len(computed) if computed else strategy.cost_per_item
+
+        fallback = dict(strategy.default_prediction or {task: FAILED_LABEL for task in strategy.tasks})
+        predictions = [cached.get(key) or computed.get(key) or fallback for key in keys]
+
+        latencies = np.asarray(latencies)
+        stats = {
+            'items': len(texts),
+            'unique_items': len(unique),
+            'cache_hits': len(cached),
+            'cache_hit_rate': len(cached) / len(unique) if unique else 0.0,
+            'computed': len(computed),
+            'failed': len(failed),
+            'model_calls': len(latencies),
+            'wall_time_s': wall_time,
+            'throughput_items_per_s': len(computed) / wall_time if computed and wall_time > 0 else 0.0,
+            'latency_mean_s': float(latencies.mean()) if latencies.size else 0.0,
+            'latency_p50_s': float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+            'latency_p95_s': float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+            'cost': cost,
+            'cost_saved': len(cached) * cost_per_prediction,
+            'concurrency': strategy.concurrency
+        }
+        logger.info(
+            f"[{strategy.name}] {len(texts)} items: {len(cached)} cached, {len(computed)} computed, "
+            f"{len(failed)} failed in {wall_time:.1f}s (cost ${cost:.4f})"
+        )
+        return predictions, stats
+
+    async def _compute(self, strategy: EvaluationStrategy, missing: List[Tuple[str, str]]
+                       ) -> Tuple[Dict[str, Dict[str, Any]], List[float], List[str]]:
+        computed: Dict[str, Dict[str, Any]] = {}
+        latencies: List[float] = []
+        failed: List[str] = []
+        if not missing:
+            return computed, latencies, failed
+
+        if strategy.predict_batch:
+            units = [missing[i:i + strategy.batch_size] for i in range(0, len(missing), strategy.batch_size)]
+        else:
+            units = [[item] for item in missing]
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(strategy.concurrency)
+        executor = ThreadPoolExecutor(max_workers=strategy.concurrency,
+                                      thread_name_prefix=f"eval-{strategy.name}")
+        is_async = strategy.predict is not None and inspect.iscoroutinefunction(strategy.predict)
+
+        async def run(unit: List[Tuple[str, str]]):
+            texts = [text for _, text in unit]
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    if strategy.predict_batch:
+                        outputs = await loop.run_in_executor(executor, strategy.predict_batch, texts)
+                    elif is_async:
+                        outputs = [await strategy.predict(texts[0])]
+                    else:
+                        outputs = [await loop.run_in_executor(executor, strategy.predict, texts[0])]
+                    if len(outputs) != len(unit):
+                        raise RuntimeError(f"{len(outputs)} predictions for {len(unit)} inputs")
+                except Exception as e:
+                    logger.warning(f"[{strategy.name}] prediction failed for {len(unit)} item(s): {e}")
+                    outputs = None
+                return unit, outputs, time.perf_counter() - started
+
+        pending_writes: List[Tuple[str, Dict[str, Any]]] = []
+        try:
+            for finished in asyncio.as_completed([run(unit) for unit in units]):
+                unit, outputs, elapsed = await finished
+                if outputs is None:
+                    failed.extend(key for key, _ in unit)
+                    continue
+                latencies.append(elapsed)
+                for (key, _), output in zip(unit, outputs):
+                    prediction = self._normalize(strategy, output)
+                    if prediction is None:
+                        failed.append(key)
+                        continue
+                    computed[key] = prediction
+                    pending_writes.append((key, prediction))
+                if len(pending_writes) >= self.flush_every:
+                    self.cache.put_many(strategy.name, pending_writes)
+                    pending_writes = []
+        finally:
+            self.cache.put_many(strategy.name, pending_writes)
+            executor.shutdown(wait=False)
+
+        return computed, latencies, failed
+
+    @staticmethod
+    def _normalize(strategy: EvaluationStrategy, output: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(output, Mapping):
+            return None
+        prediction = {task: str(getattr(output[task], 'value', output[task]))
+                      for task in strategy.tasks if output.get(task) is not None}
+        if not prediction:
+            return None
+        if isinstance(output.get('confidence'), (int, float)):
+            prediction['confidence'] = float(output['confidence'])
+        return prediction
+
+    async def evaluate(self, strategy: EvaluationStrategy,
+                       splits: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate a strategy on labelled splits
+
+        Args:
+            strategy: Classifier to run
+            splits: Split name -> DataFrame with a 'text' column and one column per task
+
+        Returns:
+            Metrics (calculate_metrics format) and run statistics per split
+        """
+        results: Dict[str, Any] = {'strategy': strategy.name, 'version': strategy.version, 'splits': {}}
+        for split, df in splits.items():
+            predictions, run = await self.predict(strategy, df['text'].tolist())
+
+            metrics: Dict[str, Any] = {}
+            for task in strategy.tasks:
+                if task not in df.columns:
+                    continue
+                y_true = df[task].to_numpy(dtype=object)
+                labelled = np.array([label is not None and label == label and str(label) != ''
+                                     for label in y_true], dtype=bool)  # NaN != NaN
+                y_pred = np.array([prediction.get(task, FAILED_LABEL) for prediction in predictions], dtype=object)
+                metrics[task] = classification_metrics(y_true[labelled], y_pred[labelled])
+            metrics['overall'] = overall_metrics(metrics, len(df))
+
+            confidences = [p['confidence'] for p in predictions if 'confidence' in p]
+            if confidences:
+                metrics['overall']['avg_confidence'] = float(np.mean(confidences))
+
+            results['splits'][split] = {'metrics': metrics, 'run': run}
+        return results
+
+    async def compare(self, strategies: Sequence[EvaluationStrategy], splits: Mapping[str, Any],
+                      parallel: bool = True) -> Dict[str, Any]:
+        """
+        Evaluate several strategies on the same splits
+
+        Args:
+            strategies: Classifiers to compare (unique names)
+            splits: Split name -> labelled DataFrame
+            parallel: Run the strategies concurrently (independent rate limits
+                and hardware), each with its own concurrency limit
+
+        Returns:
+            Per-strategy results and a summary table (one row per strategy and split)
+        """
+        names = [strategy.name for strategy in strategies]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Strategy names must be unique: {names}")
+
+        if parallel:
+            evaluated = await asyncio.gather(*(self.evaluate(strategy, splits) for strategy in strategies))
+        else:
+            evaluated = [await self.evaluate(strategy, splits) for strategy in strategies]
+
+        summary = []
+        for result in evaluated:
+            for split, split_result in result['splits'].items():
+                overall, run = split_result['metrics']['overall'], split_result['run']
+                summary.append({
+                    'strategy': result['strategy'],
+                    'split': split,
+                    'avg_accuracy': overall['avg_accuracy'],
+                    'avg_f1': overall['avg_f1'],
+                    'cache_hit_rate': run['cache_hit_rate'],
+                    'throughput_items_per_s': run['throughput_items_per_s'],
+                    'wall_time_s': run['wall_time_s'],
+                    'cost': run['cost'],
+                    'failed': run['failed']
+                })
+        summary.sort(key=lambda row: (row['split'], -row['avg_f1']))
+        return {'strategies': {result['strategy']: result for result in evaluated}, 'summary': summary}
+
+
+def llm_analyzer_strategy(analyzer, name: Optional[str] = None,
+                          default_prediction: Optional[Mapping[str, str]] = None) -> EvaluationStrategy:
+    """
+    Strategy running LLMAnalyzer.analyze_tweet (OpenAI, Mistral, Anthropic, Ollama)
+
+    The cache key is the rendered prompt: editing the prompt re-runs the
+    items whose prompt changed, nothing else.
+    """
+    from ..models import TweetRaw
+
+    provider = getattr(analyzer.provider, 'value', analyzer.provider)
+    prefix = provider.upper()
+    epoch = datetime(2000, 1, 1)
+
+    def as_tweet(text: str):
+        return TweetRaw(tweet_id='evaluation', author='evaluation', text=text, date=epoch)
+
+    async def predict(text: str) -> Optional[Dict[str, Any]]:
+        result = await analyzer.analyze_tweet(as_tweet(text))
+        if result is None:
+            return None
+        return {'sentiment': result.sentiment, 'category': result.category, 'priority': result.priority}
+
+    return EvaluationStrategy(
+        name=name or f"llm-{provider}",
+        predict=predict,
+        version=fingerprint(provider, os.getenv(f"{prefix}_MODEL", ""), os.getenv(f"{prefix}_TEMPERATURE", "")),
+        concurrency=analyzer.max_concurrent,
+        cost_meter=lambda: analyzer.stats['total_cost'],
+        cache_key=lambda text: analyzer._get_analysis_prompt(as_tweet(text)),
+        default_prediction=default_prediction
+    )
+
+
+def tweet_classifier_strategy(classifier=None, name: Optional[str] = None,
+                              cost_per_item: float = 0.0) -> EvaluationStrategy:
+    """
+    Strategy running TweetClassifier, labels mapped to the dataset taxonomy
+
+    Without a classifier, the keyword rules (fallback mode) are evaluated.
+    """
+    from .tweet_classifier import TweetClassifier
+
+    classifier = classifier or TweetClassifier(model_name="fallback")
+    taxonomy = fingerprint(TAXONOMY_TO_DATASET)
+
+    if classifier.provider == "fallback":
+        return EvaluationStrategy(
+            name=name or "rules",
+            predict_batch=lambda texts: [from_classifier_taxonomy(classifier._fallback_classification(text))
+                                         for text in texts],
+            version=fingerprint(source_fingerprint(type(classifier)._fallback_classification), taxonomy),
+            concurrency=1,
+            batch_size=256
+        )
+
+    return EvaluationStrategy(
+        name=name or f"tweet-classifier-{classifier.model_name}",
+        predict=lambda text: from_classifier_taxonomy(classifier.classify(text).model_dump()),
+        version=fingerprint(classifier.model_name, classifier.temperature, classifier.max_tokens, taxonomy),
+        concurrency=4,
+        cost_per_item=cost_per_item,
+        cache_key=classifier._build_user_prompt
+    )
+
+
+def local_model_strategy(inference, task: str = 'sentiment', name: Optional[str] = None,
+                         batch_size: int = 32) -> EvaluationStrategy:
+    """Strategy running a fine-tuned model (LocalModelInference) on one task, in batches"""
+    model_path = Path(inference.model_path)
+    mtime = max((p.stat().st_mtime for p in model_path.rglob('*') if p.is_file()), default=0)
+
+    def predict_batch(texts: List[str]) -> List[Dict[str, Any]]:
+        return [{task: p['label'], 'confidence': p['confidence']} for p in inference.predict_batch(texts)]
+
+    return EvaluationStrategy(
+        name=name or f"local-{model_path.name}",
+        predict_batch=predict_batch,
+        version=fingerprint(model_path.resolve(), mtime),
+        tasks=(task,),
+        concurrency=1,
+        batch_size=batch_size
+    )
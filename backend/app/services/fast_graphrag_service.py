@@ -5,11 +5,14 @@ Améliore la qualité du RAG en utilisant des relations sémantiques entre les e
 
 import logging
 import json
+import os
 import pickle
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import asyncio
 
+import numpy as np
+
 from app.config_pkg.fast_graphrag_config import get_config, FastGraphRAGConfig
 
 # Configuration du logger
@@ -19,6 +22,12 @@ class FastGraphRAGService:
     """
     Service de récupération de contexte basé sur Fast-GraphRAG
     Utilise un graphe de connaissances pour améliorer la qualité du RAG
+
+    Les embeddings des nœuds sont stockés dans une matrice float32 contiguë et
+    pré-normalisée (ligne i = i-ème nœud de graph["nodes"]), sauvegardée en
+    .npy et rechargée en mémoire mappée: une requête est un seul produit
+    matrice-vecteur. Les arêtes relient chaque nœud à ses plus proches voisins
+    et servent au PageRank personnalisé (second étage optionnel).
     """
     
     def __init__(self, config: Optional[FastGraphRAGConfig] = None):
@@ -33,6 +42,12 @@ class FastGraphRAGService:
         self.embedding_model = None
         self.is_initialized = False
         
+        # Matrice des embeddings et adjacence (CSR) alignées sur graph["nodes"]
+        self._embeddings = np.empty((0, self.config.embedding_dim), dtype=np.float32)
+        self._node_ids: List[str] = []
+        self._adjacency: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self.revision = 0  # Incrémenté à chaque modification du graphe (invalidation des caches)
+        
         logger.info(" Initialisation du service Fast-GraphRAG")
         logger.info(f"   - Modèle d'embedding: {self.config.embedding_model}")
         logger.info(f"   - LLM Provider: {self.config.llm_provider}")
@@ -58,12 +73,7 @@ class FastGraphRAGService:
             self.embedding_model = SentenceTransformer(self.config.embedding_model)
             
             # Initialiser ou charger le graphe existant
-            if self.config.graph_path.exists():
-                logger.info(f"📂 Chargement du graphe existant depuis {self.config.graph_path}")
-                self.graph = self._load_graph()
-            else:
-                logger.info("🆕 Création d'un nouveau graphe de connaissances")
-                self.graph = self._create_new_graph()
+            self._load_or_create_graph()
             
             self.is_initialized = True
             logger.info(" Service Fast-GraphRAG initialisé avec succès")
@@ -74,6 +84,16 @@ class FastGraphRAGService:
             if not self.config.fallback_on_error:
                 raise
     
+    def _load_or_create_graph(self):
+        """Charger le graphe existant (et sa matrice d'embeddings) ou en créer un nouveau"""
+        if self.config.graph_path.exists():
+            logger.info(f"📂 Chargement du graphe existant depuis {self.config.graph_path}")
+            self.graph = self._load_graph()
+        else:
+            logger.info("🆕 Création d'un nouveau graphe de connaissances")
+            self.graph = self._create_new_graph()
+        self._load_embeddings()
+    
     def _create_new_graph(self) -> Any:
         """
         Créer un nouveau graphe de connaissances
@@ -109,14 +129,170 @@ class FastGraphRAGService:
             return self._create_new_graph()
     
     def _save_graph(self):
-        """Sauvegarder le graphe sur le disque"""
+        """Sauvegarder le graphe et la matrice d'embeddings sur le disque"""
         try:
             with open(self.config.graph_path, 'wb') as f:
                 pickle.dump(self.graph, f)
+            # Fichier temporaire puis remplacement: la matrice mappée en cours reste lisible
+            tmp_path = self.config.index_path.with_name(self.config.index_path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(self._embeddings, dtype=np.float32))
+            os.replace(tmp_path, self.config.index_path)
             logger.info(f"Graph saved to {self.config.graph_path}")
         except Exception as e:
             logger.error(f" Erreur lors de la sauvegarde du graphe: {e}")
     
+    # === Matrice d'embeddings ===
+    
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """Embeddings float32 de norme 1 (une ligne par vecteur)"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def _load_embeddings(self):
+        """
+        Charger la matrice d'embeddings (mémoire mappée) alignée sur les nœuds
+        
+        Un graphe ancien format (liste "embedding" dans chaque nœud) est
+        converti en matrice, puis les listes sont retirées des nœuds.
+        """
+        nodes = self.graph["nodes"]
+        self._node_ids = list(nodes.keys())
+        
+        legacy = [node_id for node_id in self._node_ids if "embedding" in nodes[node_id]]
+        if legacy and len(legacy) == len(self._node_ids):
+            self._embeddings = self._normalize([nodes[node_id].pop("embedding") for node_id in self._node_ids])
+            self._save_graph()
+        elif self.config.index_path.exists():
+            self._embeddings = np.load(self.config.index_path, mmap_mode='r')
+        
+        if len(self._embeddings) != len(self._node_ids):
+            logger.error(f" Matrice d'embeddings ({len(self._embeddings)} lignes) incohérente avec "
+                         f"{len(self._node_ids)} nœuds, graphe réinitialisé")
+            self.graph = self._create_new_graph()
+            self._node_ids = []
+            self._embeddings = np.empty((0, self.config.embedding_dim), dtype=np.float32)
+        
+        self._build_adjacency()
+        self.revision += 1
+    
+    def _add_nodes(self, documents: List[str]) -> int:
+        """
+        Ajouter des documents comme nœuds (encodage par lots) et les relier
+        
+        Returns:
+            Nombre d'arêtes créées
+        """
+        start = len(self._node_ids)
+        vectors = self._normalize(self.embedding_model.encode(documents, batch_size=self.config.batch_size))
+        
+        for offset, doc in enumerate(documents):
+            node_id = f"doc_{self.graph['metadata']['num_documents'] + offset}"
+            self.graph["nodes"][node_id] = {"content": doc}
+            self._node_ids.append(node_id)
+        self._embeddings = np.concatenate([np.asarray(self._embeddings), vectors])
+        
+        edges = self._link_nodes(np.arange(start, len(self._node_ids)))
+        self.graph["edges"].extend(edges)
+        self._build_adjacency()
+        self.revision += 1
+        return len(edges)
+    
+    def _link_nodes(self, rows: np.ndarray, chunk_size: int = 128) -> List[Tuple[str, str, float]]:
+        """
+        Arêtes vers les plus proches voisins des nœuds rows
+        
+        Chaque nœud est relié à au plus top_k_edges voisins de similarité
+        supérieure ou égale à similarity_threshold.
+        """
+        k = min(self.config.top_k_edges, len(self._node_ids) - 1)
+        if k <= 0:
+            return []
+        
+        pairs = {}
+        for chunk_start in range(0, len(rows), chunk_size):
+            chunk = rows[chunk_start:chunk_start + chunk_size]
+            similarities = self._embeddings[chunk] @ self._embeddings.T
+            similarities[np.arange(len(chunk)), chunk] = -np.inf
+            neighbours = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            
+            for i, row in enumerate(chunk.tolist()):
+                for neighbour in neighbours[i].tolist():
+                    weight = float(similarities[i, neighbour])
+                    if weight >= self.config.similarity_threshold:
+                        pairs[(min(row, neighbour), max(row, neighbour))] = weight
+        
+        return [(self._node_ids[a], self._node_ids[b], weight) for (a, b), weight in pairs.items()]
+    
+    def _build_adjacency(self):
+        """Adjacence non orientée au format CSR (indptr, voisins, poids)"""
+        n = len(self._node_ids)
+        rows = {node_id: row for row, node_id in enumerate(self._node_ids)}
+        edges = [(rows[a], rows[b], w) for a, b, w in self.graph.get("edges", []) if a in rows and b in rows]
+        if not edges:
+            self._adjacency = None
+            return
+        
+        source, target, weight = (np.asarray(column) for column in zip(*edges))
+        source, target = np.concatenate([source, target]), np.concatenate([target, source])
+        weight = np.concatenate([weight, weight]).astype(np.float32)
+        order = np.argsort(source, kind='stable')
+        indptr = np.searchsorted(source[order], np.arange(n + 1))
+        self._adjacency = (indptr, target[order], weight[order])
+    
+    def _personalized_pagerank(self, seeds: np.ndarray, seed_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        PageRank personnalisé sur le voisinage des nœuds de départ
+        
+        Le calcul est limité aux nœuds à au plus max_graph_depth sauts des
+        graines (et à max_graph_nodes nœuds): son coût ne dépend pas de la
+        taille totale du graphe.
+        
+        Returns:
+            (lignes des nœuds du voisinage, score PageRank de chaque nœud)
+        """
+        indptr, neighbours, weights = self._adjacency
+        
+        # Voisinage des graines
+        nodes, frontier = np.unique(seeds), np.unique(seeds)
+        for _ in range(self.config.max_graph_depth):
+            if len(nodes) >= self.config.max_graph_nodes:
+                break
+            reached = np.concatenate([neighbours[indptr[row]:indptr[row + 1]] for row in frontier.tolist()])
+            frontier = np.setdiff1d(reached, nodes)
+            if not len(frontier):
+                break
+            nodes = np.union1d(nodes, frontier[:self.config.max_graph_nodes - len(nodes)])
+        
+        # Arêtes internes au voisinage
+        degrees = indptr[nodes + 1] - indptr[nodes]
+        source = np.repeat(np.arange(len(nodes)), degrees)
+        slices = [slice(indptr[row], indptr[row + 1]) for row in nodes.tolist()]
+        target = np.concatenate([neighbours[sl] for sl in slices])
+        weight = np.concatenate([weights[sl] for sl in slices])
+        position = np.minimum(np.searchsorted(nodes, target), len(nodes) - 1)
+        inside = nodes[position] == target
+        source, target, weight = source[inside], position[inside], weight[inside]
+        
+        out_weight = np.bincount(source, weights=weight, minlength=len(nodes))
+        transition = weight / out_weight[source]
+        dangling = out_weight == 0
+        
+        personalization = np.zeros(len(nodes))
+        personalization[np.searchsorted(nodes, seeds)] = np.maximum(seed_scores, 0) + 1e-9
+        personalization /= personalization.sum()
+        
+        alpha = self.config.pagerank_alpha
+        ranks = personalization.copy()
+        for _ in range(self.config.pagerank_iterations):
+            spread = np.bincount(target, weights=transition * ranks[source], minlength=len(nodes))
+            ranks = (1 - alpha) * personalization + alpha * (spread + ranks[dangling].sum() * personalization)
+        
+        return nodes, ranks
+    
     async def build_graph_from_documents(self, documents: List[str]) -> bool:
         """
         Construire le graphe de connaissances à partir de documents
@@ -137,35 +313,38 @@ class FastGraphRAGService:
         try:
             logger.info(f"🔨 Construction du graphe à partir de {len(documents)} documents")
             
-            # TODO: Implémenter la construction du graphe avec Fast-GraphRAG
-            # Pour l'instant, stocker simplement les documents
-            if self.graph is None:
-                self.graph = self._create_new_graph()
-            
-            for idx, doc in enumerate(documents):
-                node_id = f"doc_{idx}"
-                self.graph["nodes"][node_id] = {
-                    "content": doc,
-                    "embedding": self.embedding_model.encode(doc).tolist()
-                }
+            # Reconstruction complète: nouveau graphe, nœuds et arêtes de similarité
+            self.graph = self._create_new_graph()
+            self._node_ids = []
+            self._embeddings = np.empty((0, self.config.embedding_dim), dtype=np.float32)
             
+            num_edges = self._add_nodes(documents)
             self.graph["metadata"]["num_documents"] = len(documents)
             self._save_graph()
             
-            logger.info(f" Graphe construit avec succès: {len(documents)} documents")
+            logger.info(f" Graphe construit avec succès: {len(documents)} documents, {num_edges} arêtes")
             return True
             
         except Exception as e:
             logger.error(f" Erreur lors de la construction du graphe: {e}")
             return False
     
-    async def query_graph(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    async def query_graph(self, query: str, top_k: int = 5,
+                          expand: Optional[bool] = None,
+                          query_embedding=None) -> List[Dict[str, Any]]:
         """
         Interroger le graphe pour récupérer le contexte pertinent
         
+        Premier étage: similarité cosinus de la requête avec tous les nœuds en
+        un produit matrice-vecteur, top-k par argpartition. Second étage
+        (optionnel): PageRank personnalisé depuis ces nœuds, qui fait remonter
+        les voisins fortement reliés.
+        
         Args:
             query: Requête utilisateur
             top_k: Nombre de résultats à retourner
+            expand: Active le PageRank personnalisé (défaut: config.use_pagerank)
+            query_embedding: Embedding de la requête déjà calculé (sinon encodé ici)
             
         Returns:
             Liste de contextes pertinents avec leurs scores
@@ -177,30 +356,42 @@ class FastGraphRAGService:
         try:
             logger.info(f"Searching in graph: '{query[:50]}...'")
             
-            # Encoder la requête
-            query_embedding = self.embedding_model.encode(query)
+            if not self._node_ids or top_k <= 0:
+                return []
             
-            # TODO: Implémenter la recherche avec Fast-GraphRAG et PageRank
-            # Pour l'instant, recherche vectorielle simple
-            results = []
-            for node_id, node_data in self.graph["nodes"].items():
-                # Calculer la similarité cosinus
-                import numpy as np
-                node_emb = np.array(node_data["embedding"])
-                similarity = np.dot(query_embedding, node_emb) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(node_emb)
-                )
-                
-                if similarity >= self.config.similarity_threshold:
-                    results.append({
-                        "content": node_data["content"],
-                        "score": float(similarity),
-                        "node_id": node_id
-                    })
+            # Encoder la requête, puis similarité avec tous les nœuds
+            if query_embedding is None:
+                query_embedding = self.embedding_model.encode(query)
+            query_embedding = self._normalize(query_embedding)[0]
+            similarities = self._embeddings @ query_embedding
+            
+            num_seeds = min(len(similarities), max(top_k, self.config.top_k_nodes))
+            seeds = np.argpartition(-similarities, num_seeds - 1)[:num_seeds]
+            seeds = seeds[similarities[seeds] >= self.config.similarity_threshold]
+            if not len(seeds):
+                logger.info(" Trouvé 0 résultats pertinents")
+                return []
+            
+            expand = self.config.use_pagerank if expand is None else expand
+            expand = expand and self._adjacency is not None
+            if expand:
+                rows, ranks = self._personalized_pagerank(seeds, similarities[seeds])
+            else:
+                rows, ranks = seeds, similarities[seeds]
             
             # Trier par score et retourner top_k
-            results.sort(key=lambda x: x["score"], reverse=True)
-            results = results[:top_k]
+            order = np.argsort(-ranks, kind='stable')[:top_k]
+            results = []
+            for i in order.tolist():
+                node_id = self._node_ids[rows[i]]
+                result = {
+                    "content": self.graph["nodes"][node_id]["content"],
+                    "score": float(similarities[rows[i]]),
+                    "node_id": node_id
+                }
+                if expand:
+                    result["pagerank"] = float(ranks[i])
+                results.append(result)
             
             logger.info(f" Trouvé {len(results)} résultats pertinents")
             return results
@@ -230,15 +421,7 @@ class FastGraphRAGService:
             if self.graph is None:
                 return await self.build_graph_from_documents(new_documents)
             
-            current_num_docs = self.graph["metadata"]["num_documents"]
-            
-            for idx, doc in enumerate(new_documents):
-                node_id = f"doc_{current_num_docs + idx}"
-                self.graph["nodes"][node_id] = {
-                    "content": doc,
-                    "embedding": self.embedding_model.encode(doc).tolist()
-                }
-            
+            self._add_nodes(new_documents)
             self.graph["metadata"]["num_documents"] += len(new_documents)
             self._save_graph()
             
@@ -31,7 +31,8 @@ except ImportError:
     MistralAsyncClient = None
 
 from ..models import TweetRaw, TweetAnalyzed, SentimentType, CategoryType, PriorityLevel
-from ..utils.rate_limiter import RateLimiter
+from ..utils.rate_limiter import RateLimiter, DEFAULT_PROVIDER_LIMITS, estimate_tokens
+from ..utils.cleaning import extract_entities
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +43,14 @@ class LLMProvider(str, Enum):
     ANTHROPIC = "anthropic"
     OLLAMA = "ollama"
 
+# Completion token cap per provider (environment variable, default)
+_MAX_OUTPUT_TOKENS = {
+    LLMProvider.OPENAI: ("OPENAI_MAX_TOKENS", "300"),
+    LLMProvider.MISTRAL: ("MISTRAL_MAX_TOKENS", "400"),
+    LLMProvider.ANTHROPIC: ("ANTHROPIC_MAX_TOKENS", "300"),
+    LLMProvider.OLLAMA: ("OLLAMA_MAX_TOKENS", "400"),
+}
+
 class LLMAnalyzer:
     """
     Analyseur LLM avec rate limiting
@@ -67,10 +76,11 @@ class LLMAnalyzer:
         self.batch_size = batch_size
         self.max_concurrent = max_concurrent
 
-        # Initialize rate limiter
+        # Initialize rate limiter (token budget from the provider defaults)
         self.rate_limiter = RateLimiter(
             max_calls=rate_limit_per_minute,
-            time_window=60  # 1 minute
+            time_window=60,  # 1 minute
+            max_tokens=DEFAULT_PROVIDER_LIMITS.get(self.provider.value, {}).get('max_tokens')
         )
 
         # Initialize clients
@@ -190,14 +200,32 @@ RÈGLES:
 - priority: UNIQUEMENT "critique", "haute", "moyenne" ou "basse"
 - Pas de markdown, pas de texte supplémentaire"""
     
-    async def _call_openai(self, prompt: str) -> Optional[Dict[str, Any]]:
+    def _max_output_tokens(self) -> int:
+        """Completion token cap configured for the current provider"""
+        env_var, default = _MAX_OUTPUT_TOKENS[self.provider]
+        return int(os.getenv(env_var, default))
+    
+    def _update_rate_limits(self, headers, actual_tokens: Optional[int] = None, estimated_tokens: int = 0):
+        """Feed provider rate-limit headers and real token usage back to the rate limiter"""
+        if headers:
+            self.rate_limiter.update_from_headers(headers)
+        if actual_tokens is not None:
+            self.rate_limiter.record_usage(actual_tokens, estimated_tokens)
+    
+    @staticmethod
+    def _error_headers(error: Exception):
+        """Response headers carried by an SDK error (429 Retry-After...), if any"""
+        response = getattr(error, 'response', None) or getattr(error, 'raw_response', None)
+        return getattr(response, 'headers', None)
+    
+    async def _call_openai(self, prompt: str, estimated_tokens: int = 0) -> Optional[Dict[str, Any]]:
         """Call OpenAI API"""
         try:
             client = self.clients.get('openai')
             if not client:
                 raise ValueError("OpenAI client not initialized")
             
-            response = await client.chat.completions.create(
+            raw_response = await client.chat.completions.with_raw_response.create(
                 model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
                 messages=[
                     {"role": "system", "content": "Tu es un assistant d'analyse de satisfaction client pour Free. Réponds UNIQUEMENT en JSON valide."},
@@ -206,6 +234,10 @@ RÈGLES:
                 temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.3")),
                 max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "300"))
             )
+            response = raw_response.parse()
+            self._update_rate_limits(raw_response.headers,
+                                     response.usage.total_tokens if response.usage else None,
+                                     estimated_tokens)
             
             content = response.choices[0].message.content.strip()
             # Clean markdown if present
@@ -221,9 +253,10 @@ RÈGLES:
             
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
+            self._update_rate_limits(self._error_headers(e))
             return None
     
-    async def _call_mistral(self, prompt: str) -> Optional[Dict[str, Any]]:
+    async def _call_mistral(self, prompt: str, estimated_tokens: int = 0) -> Optional[Dict[str, Any]]:
         """Call Mistral API"""
         try:
             client = self.clients.get('mistral')
@@ -239,6 +272,9 @@ RÈGLES:
                 temperature=float(os.getenv("MISTRAL_TEMPERATURE", "0.2")),
                 max_tokens=int(os.getenv("MISTRAL_MAX_TOKENS", "400"))
             )
+            # The SDK does not expose success headers: only the real usage is fed back
+            self._update_rate_limits(None, response.usage.total_tokens if response.usage else None,
+                                     estimated_tokens)
             
             content = response.choices[0].message.content.strip()
             content = content.replace("```json", "").replace("```", "").strip()
@@ -250,22 +286,28 @@ RÈGLES:
             
         except Exception as e:
             logger.error(f"Mistral API error: {e}")
+            self._update_rate_limits(self._error_headers(e))
             return None
     
-    async def _call_anthropic(self, prompt: str) -> Optional[Dict[str, Any]]:
+    async def _call_anthropic(self, prompt: str, estimated_tokens: int = 0) -> Optional[Dict[str, Any]]:
         """Call Anthropic Claude API"""
         try:
             client = self.clients.get('anthropic')
             if not client:
                 raise ValueError("Anthropic client not initialized")
             
-            response = await client.messages.create(
+            raw_response = await client.messages.with_raw_response.create(
                 model=os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307"),
                 max_tokens=int(os.getenv("ANTHROPIC_MAX_TOKENS", "300")),
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
             )
+            response = raw_response.parse()
+            usage = response.usage
+            self._update_rate_limits(raw_response.headers,
+                                     usage.input_tokens + usage.output_tokens if usage else None,
+                                     estimated_tokens)
             
             content = response.content[0].text.strip()
             content = content.replace("```json", "").replace("```", "").strip()
@@ -277,9 +319,10 @@ RÈGLES:
             
         except Exception as e:
             logger.error(f"Anthropic API error: {e}")
+            self._update_rate_limits(self._error_headers(e))
             return None
 
-    async def _call_ollama(self, prompt: str) -> Optional[Dict[str, Any]]:
+    async def _call_ollama(self, prompt: str, estimated_tokens: int = 0) -> Optional[Dict[str, Any]]:
         """Call Ollama API with detailed logging for debugging"""
         logger.info("=" * 80)
         logger.info("OLLAMA API CALL - START")
@@ -336,6 +379,9 @@ RÈGLES:
             logger.info(f"   - Status code: {response.status_code}")
             logger.info(f"   - Headers: {dict(response.headers)}")
 
+            # Honour Retry-After / x-ratelimit-* budgets sent by the server
+            self.rate_limiter.update_from_headers(response.headers)
+
             response.raise_for_status()
             logger.info(f" Status check passed (2xx)")
 
@@ -343,6 +389,7 @@ RÈGLES:
             logger.info(f"Parsing response JSON...")
             data = response.json()
             logger.info(f"   - Response keys: {list(data.keys())}")
+            self._update_rate_limits(None, (data.get('usage') or {}).get('total_tokens'), estimated_tokens)
 
             if 'choices' in data:
                 logger.info(f"   - Choices count: {len(data['choices'])}")
@@ -446,36 +493,36 @@ RÈGLES:
                     reasoning=cached_result['reasoning']
                 )
 
+        # Generate prompt and estimate its tokens for the rate limiter
+        prompt = self._get_analysis_prompt(tweet)
+        estimated_tokens = estimate_tokens(prompt, self._max_output_tokens())
+
         # Wait for rate limiter
-        await self.rate_limiter.acquire()
+        await self.rate_limiter.acquire(estimated_tokens)
 
         try:
             self.stats['total_analyzed'] += 1
 
-            # Generate prompt
-            prompt = self._get_analysis_prompt(tweet)
-
             # Call appropriate LLM
             analysis = None
             if self.provider == LLMProvider.OPENAI:
-                analysis = await self._call_openai(prompt)
+                analysis = await self._call_openai(prompt, estimated_tokens)
             elif self.provider == LLMProvider.MISTRAL:
-                analysis = await self._call_mistral(prompt)
+                analysis = await self._call_mistral(prompt, estimated_tokens)
             elif self.provider == LLMProvider.ANTHROPIC:
-                analysis = await self._call_anthropic(prompt)
+                analysis = await self._call_anthropic(prompt, estimated_tokens)
             elif self.provider == LLMProvider.OLLAMA:
-                analysis = await self._call_ollama(prompt)
+                analysis = await self._call_ollama(prompt, estimated_tokens)
             
             if not analysis:
                 self.stats['failed'] += 1
                 return None
             
-            # Extract metadata from original text
-            from ..utils.cleaning import TextCleaner
-            cleaner = TextCleaner()
-            mentions = cleaner.extract_mentions(tweet.text)
-            hashtags = cleaner.extract_hashtags(tweet.text)
-            urls = cleaner.extract_urls(tweet.text)
+            # Extract metadata from original text (shared precompiled patterns)
+            entities = extract_entities(tweet.text)
+            mentions = entities['mentions']
+            hashtags = entities['hashtags']
+            urls = entities['urls']
             
             # Create TweetAnalyzed object
             analyzed_tweet = TweetAnalyzed(
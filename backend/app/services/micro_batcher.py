@@ -0,0 +1,148 @@
+"""
+Micro-batching for model inference
+Concurrent requests are collected for a few milliseconds and answered by a
+single batched forward pass
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Group concurrent single-item requests into batches
+
+    The first waiting request opens a batch; the batch is run as soon as it
+    holds `max_batch_size` items or `max_wait_ms` have elapsed. The batch
+    function runs in a dedicated thread (forward passes never block the
+    event loop and never overlap) while the next batch is being collected,
+    and each caller receives the result at its own position. If the batch
+    function fails, every request of that batch receives the exception.
+    """
+
+    def __init__(self, predict_batch: Callable[[List[T]], Sequence[R]], max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, name: str = "micro-batcher"):
+        """
+        Initialize the batcher
+
+        Args:
+            predict_batch: Function mapping a list of inputs to a list of results
+            max_batch_size: Maximum items per call
+            max_wait_ms: Maximum time the first item of a batch waits for others
+            name: Thread name prefix
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _ensure_running(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return loop
+
+    async def submit(self, item: T) -> R:
+        """Result for one input, computed in a shared batch"""
+        loop = self._ensure_running()
+        future = loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def submit_many(self, items: Sequence[T]) -> List[R]:
+        """Results for several inputs (batched with concurrent requests)"""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def _collect(self) -> List[Tuple[T, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("Micro-batcher closed"))
+                raise
+        return [(item, future) for item, future in batch if not future.cancelled()]
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+
+            try:
+                results = await self._loop.run_in_executor(
+                    self._executor, self.predict_batch, [item for item, _ in batch]
+                )
+                if len(results) != len(batch):
+                    raise RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} inputs")
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("Micro-batcher closed"))
+                raise
+            except Exception as e:
+                logger.error(f"Batched prediction failed ({len(batch)} requests): {e}")
+                self._fail(batch, e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[T, asyncio.Future]], error: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self) -> None:
+        """Stop collecting batches and release the inference thread"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        while self._queue is not None and not self._queue.empty():
+            self._fail([self._queue.get_nowait()], RuntimeError("Micro-batcher closed"))
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
@@ -11,8 +11,6 @@ import json
 import asyncio
 import os
 from pathlib import Path
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support, confusion_matrix
-from sklearn.metrics import classification_report
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -40,22 +38,32 @@ from ..models import TweetAnalyzed, TweetRaw, SentimentType, CategoryType, Prior
 from ..services.llm_analyzer import LLMAnalyzer, LLMProvider
 from ..utils.database import DatabaseManager
 from ..config_pkg import gpu_config as config
+from .tokenization_cache import LengthGroupedSampler, TokenizationCache, TokenizedSplit, pad_sequences
+from .evaluation_engine import (EvaluationEngine, EvaluationStrategy, PredictionCache, classification_metrics,
+                                llm_analyzer_strategy, overall_metrics)
 
 logger = logging.getLogger(__name__)
 
+# Column names and sentiment labels of splits exported before the schema was translated
+LEGACY_COLUMNS = {'catégorie': 'category'}
+LEGACY_SENTIMENTS = {'positif': 'positive', 'neutre': 'neutral', 'negatif': 'negative'}
+
 class ModelTrainingService:
     """Service for training and evaluating LLM models on tweet analysis tasks"""
     
-    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+    def __init__(self, db_manager: Optional[DatabaseManager] = None,
+                 evaluation_cache_path: str = "./data/cache/evaluation/predictions.sqlite"):
         """
         Initialize model training service
         
         Args:
             db_manager: Database manager for storing results
+            evaluation_cache_path: SQLite file caching predictions across evaluation runs
         """
         self.db_manager = db_manager or DatabaseManager()
         self.training_results = {}
         self.evaluation_metrics = {}
+        self.evaluation_engine = EvaluationEngine(PredictionCache(evaluation_cache_path))
         
     def load_training_data(self, data_dir: str = "data/training") -> Dict[str, pd.DataFrame]:
         """
@@ -81,11 +89,13 @@ class ModelTrainingService:
             if file_path.exists():
                 try:
                     df = pd.read_csv(file_path, encoding='utf-8')
+                    df = df.rename(columns=LEGACY_COLUMNS)
 
                     # Validate required columns
                     missing_columns = [col for col in required_columns if col not in df.columns]
                     if missing_columns:
                         raise ValueError(f"Missing required columns in {split} dataset: {missing_columns}")
+                    df['sentiment'] = df['sentiment'].replace(LEGACY_SENTIMENTS)
 
                     # Validate data types and content
                     if df.empty:
@@ -131,6 +141,9 @@ class ModelTrainingService:
                                     provider: LLMProvider = LLMProvider.MISTRAL) -> Dict[str, Any]:
         """
         Evaluate baseline (non-fine-tuned) model performance
+
+        Tweets are analyzed concurrently through the evaluation engine; only
+        tweets missing from the prediction cache are sent to the LLM.
         
         Args:
             test_df: Test dataset
@@ -140,79 +153,61 @@ class ModelTrainingService:
             Evaluation results
         """
         logger.info(f"Evaluating baseline model with {provider.value}")
-        
-        analyzer = LLMAnalyzer(provider=provider)
-        
-        predictions = {
-            'sentiment': [],
-            'category': [],
-            'priority': []
-        }
-        
-        ground_truth = {
-            'sentiment': test_df['sentiment'].tolist(),
-            'category': test_df['category'].tolist(),
-            'priority': test_df['priority'].tolist()
-        }
-        
-        # Prepare tweets for batch analysis
-        tweets_to_analyze = []
-        failed_tweets = 0
-
-        for _, row in test_df.iterrows():
-            try:
-                tweet = TweetRaw(
-                    tweet_id=str(row['tweet_id']),
-                    author=row['author'],
-                    text=row['text'],
-                    date=pd.to_datetime(row['date'])
-                )
-                tweets_to_analyze.append(tweet)
-            except Exception as e:
-                logger.error(f"Error creating tweet object for {row['tweet_id']}: {e}")
-                failed_tweets += 1
 
-        if not tweets_to_analyze:
+        if test_df.empty:
             raise ValueError("No valid tweets found for analysis")
 
-        logger.info(f"Starting batch analysis of {len(tweets_to_analyze)} tweets ({failed_tweets} failed to parse)")
+        # Failed analyses are scored with default predictions
+        strategy = llm_analyzer_strategy(
+            LLMAnalyzer(provider=provider),
+            default_prediction={'sentiment': 'neutral', 'category': 'autre', 'priority': 'moyenne'}
+        )
+        result = await self.evaluation_engine.evaluate(strategy, {'test': test_df})
+        metrics = result['splits']['test']['metrics']
+        run = result['splits']['test']['run']
 
-        # Use batch processing for much better performance
-        try:
-            analyzed_results = await analyzer.analyze_batch(tweets_to_analyze)
-        except Exception as e:
-            logger.error(f"Batch analysis failed: {e}")
-            raise RuntimeError(f"LLM analysis failed: {e}")
-
-        # Process results and align with test_df order
-        successful_analyses = len(analyzed_results)
         total_samples = len(test_df)
-
-        # Create a mapping of tweet_id to results for quick lookup
-        results_map = {result.tweet_id: result for result in analyzed_results}
-
-        # Fill predictions in the same order as test_df
-        for _, row in test_df.iterrows():
-            tweet_id = str(row['tweet_id'])
-
-            if tweet_id in results_map:
-                result = results_map[tweet_id]
-                predictions['sentiment'].append(result.sentiment.value)
-                predictions['category'].append(result.category.value)
-                predictions['priority'].append(result.priority.value)
-            else:
-                # Use default predictions for failed analyses
-                predictions['sentiment'].append('neutral')
-                predictions['category'].append('autre')
-                predictions['priority'].append('moyenne')
-
-        # Calculate metrics
-        metrics = self.calculate_metrics(ground_truth, predictions)
+        successful_analyses = total_samples - run['failed']
         metrics['successful_analyses'] = successful_analyses
         metrics['success_rate'] = successful_analyses / total_samples
+        metrics['run'] = run
 
         logger.info(f"Baseline evaluation completed: {successful_analyses}/{total_samples} successful")
         return metrics
+
+    async def compare_strategies(self, strategies: List[EvaluationStrategy],
+                                 data_dir: str = "data/training",
+                                 splits: Tuple[str, ...] = ('validation', 'test')) -> Dict[str, Any]:
+        """
+        Compare classifiers on the validation and test splits
+
+        Each strategy runs with its own concurrency limit and predictions are
+        cached, so re-running after a prompt or rule change only pays for the
+        affected items.
+
+        Args:
+            strategies: Classifiers to compare (see evaluation_engine factories)
+            data_dir: Directory with training data
+            splits: Splits to evaluate
+
+        Returns:
+            Per-strategy metrics and run statistics, and a summary table
+        """
+        datasets = self.load_training_data(data_dir)
+        selected = {split: datasets[split] for split in splits if split in datasets}
+        if not selected:
+            raise ValueError(f"None of the splits {splits} found in {data_dir}")
+
+        comparison = await self.evaluation_engine.compare(strategies, selected)
+        for row in comparison['summary']:
+            logger.info(
+                f"{row['strategy']:<24} {row['split']:<10} F1 {row['avg_f1']:.3f}  "
+                f"{row['throughput_items_per_s']:.1f} items/s  ${row['cost']:.4f}  "
+                f"cache {row['cache_hit_rate']:.0%}"
+            )
+
+        self.evaluation_metrics.update(comparison['strategies'])
+        return comparison
     
     def calculate_metrics(self, ground_truth: Dict[str, List], 
                          predictions: Dict[str, List]) -> Dict[str, Any]:
@@ -229,43 +224,12 @@ class ModelTrainingService:
         metrics = {}
         
         for task in ['sentiment', 'category', 'priority']:
-            y_true = ground_truth[task]
-            y_pred = predictions[task]
-            
-            # Basic metrics
-            accuracy = accuracy_score(y_true, y_pred)
-            precision, recall, f1, support = precision_recall_fscore_support(
-                y_true, y_pred, average='weighted', zero_division=0
-            )
-            
-            # Per-class metrics
-            class_report = classification_report(
-                y_true, y_pred, output_dict=True, zero_division=0
-            )
-            
-            # Confusion matrix
-            cm = confusion_matrix(y_true, y_pred)
-            unique_labels = sorted(list(set(y_true + y_pred)))
-            
-            metrics[task] = {
-                'accuracy': accuracy,
-                'precision': precision,
-                'recall': recall,
-                'f1_score': f1,
-                'support': int(np.sum(support)),
-                'classification_report': class_report,
-                'confusion_matrix': cm.tolist(),
-                'labels': unique_labels
-            }
-            
-            logger.info(f"{task.capitalize()} - Accuracy: {accuracy:.3f}, F1: {f1:.3f}")
+            metrics[task] = classification_metrics(ground_truth[task], predictions[task])
+            logger.info(f"{task.capitalize()} - Accuracy: {metrics[task]['accuracy']:.3f}, "
+                        f"F1: {metrics[task]['f1_score']:.3f}")
         
         # Overall metrics
-        metrics['overall'] = {
-            'avg_accuracy': np.mean([metrics[task]['accuracy'] for task in metrics.keys() if task != 'overall']),
-            'avg_f1': np.mean([metrics[task]['f1_score'] for task in metrics.keys() if task != 'overall']),
-            'total_samples': len(ground_truth['sentiment'])
-        }
+        metrics['overall'] = overall_metrics(metrics, len(ground_truth['sentiment']))
         
         return metrics
     
@@ -352,7 +316,13 @@ class ModelTrainingService:
                 
                 if 'success_rate' in metrics:
                     f.write(f"- **Success Rate:** {metrics['success_rate']:.3f}\n")
-                
+
+                if 'run' in metrics:
+                    run = metrics['run']
+                    f.write(f"- **Throughput:** {run['throughput_items_per_s']:.1f} tweets/s "
+                            f"({run['cache_hits']} cached predictions)\n")
+                    f.write(f"- **Cost:** ${run['cost']:.4f} (saved by cache: ${run['cost_saved']:.4f})\n")
+
                 f.write("\n")
             
             # Task-specific metrics
@@ -481,15 +451,18 @@ if GPU_AVAILABLE:
     from torch.utils.data import Dataset as TorchDataset
 
     class TweetDataset(TorchDataset):
-        """PyTorch Dataset for tweet classification"""
+        """
+        PyTorch Dataset for tweet classification
 
-        def __init__(self, texts: List[str], labels: Dict[str, List], tokenizer, max_length: int = 512):
-            self.texts = texts
+        Examples hold unpadded token IDs read from a pre-tokenized split
+        (see TokenizationCache); batches are padded by DynamicPaddingCollator.
+        """
+
+        def __init__(self, encodings: TokenizedSplit, labels: Dict[str, List]):
+            self.encodings = encodings
             self.sentiment_labels = labels['sentiment']
             self.category_labels = labels['category']
             self.priority_labels = labels['priority']
-            self.tokenizer = tokenizer
-            self.max_length = max_length
 
             # Create label mappings
             self.sentiment_to_id = {label: idx for idx, label in enumerate(sorted(set(self.sentiment_labels)))}
@@ -501,28 +474,38 @@ if GPU_AVAILABLE:
             self.id_to_priority = {idx: label for label, idx in self.priority_to_id.items()}
 
         def __len__(self):
-            return len(self.texts)
+            return len(self.encodings)
 
-        def __getitem__(self, idx):
-            text = str(self.texts[idx])
-
-            # Tokenize
-            encoding = self.tokenizer(
-                text,
-                truncation=True,
-                padding='max_length',
-                max_length=self.max_length,
-                return_tensors='pt'
-            )
+        @property
+        def lengths(self) -> np.ndarray:
+            """Token count of each example (for length-grouped sampling)"""
+            return self.encodings.lengths
 
+        def __getitem__(self, idx):
             return {
-                'input_ids': encoding['input_ids'].flatten(),
-                'attention_mask': encoding['attention_mask'].flatten(),
+                'input_ids': self.encodings[idx],
                 'sentiment_labels': torch.tensor(self.sentiment_to_id[self.sentiment_labels[idx]], dtype=torch.long),
                 'category_labels': torch.tensor(self.category_to_id[self.category_labels[idx]], dtype=torch.long),
                 'priority_labels': torch.tensor(self.priority_to_id[self.priority_labels[idx]], dtype=torch.long)
             }
 
+    class DynamicPaddingCollator:
+        """Pad each batch to its longest sequence instead of max_length"""
+
+        def __init__(self, pad_token_id: int, pad_to_multiple_of: Optional[int] = None):
+            self.pad_token_id = pad_token_id
+            self.pad_to_multiple_of = pad_to_multiple_of
+
+        def __call__(self, features: List[Dict[str, Any]]) -> Dict[str, Any]:
+            input_ids, attention_mask = pad_sequences(
+                [feature['input_ids'] for feature in features], self.pad_token_id, self.pad_to_multiple_of
+            )
+            batch = {'input_ids': torch.from_numpy(input_ids), 'attention_mask': torch.from_numpy(attention_mask)}
+            for key in features[0]:
+                if key not in batch:
+                    batch[key] = torch.stack([feature[key] for feature in features])
+            return batch
+
     class MultiTaskModel(nn.Module):
         """Multi-task model for sentiment, category, and priority classification"""
 
@@ -583,6 +566,10 @@ else:
         def __init__(self, *args, **kwargs):
             raise ImportError("GPU training dependencies not available. Install torch, transformers, etc.")
 
+    class DynamicPaddingCollator:
+        def __init__(self, *args, **kwargs):
+            raise ImportError("GPU training dependencies not available. Install torch, transformers, etc.")
+
     class MultiTaskModel:
         def __init__(self, *args, **kwargs):
             raise ImportError("GPU training dependencies not available. Install torch, transformers, etc.")
@@ -668,10 +655,12 @@ class GPUModelTrainer:
             'priority': test_df['priority'].tolist()
         }
 
-        # Create datasets
-        train_dataset = TweetDataset(train_df['text'].tolist(), train_labels, tokenizer)
-        val_dataset = TweetDataset(val_df['text'].tolist(), val_labels, tokenizer)
-        test_dataset = TweetDataset(test_df['text'].tolist(), test_labels, tokenizer)
+        # Tokenize each split once (cached on disk for later runs)
+        cache = TokenizationCache(config.gpu_training.tokenized_cache_dir)
+        max_length = config.gpu_training.max_length
+        train_dataset = TweetDataset(cache.encode(tokenizer, train_df['text'].tolist(), max_length), train_labels)
+        val_dataset = TweetDataset(cache.encode(tokenizer, val_df['text'].tolist(), max_length), val_labels)
+        test_dataset = TweetDataset(cache.encode(tokenizer, test_df['text'].tolist(), max_length), test_labels)
 
         return train_dataset, val_dataset, test_dataset, tokenizer
 
@@ -807,8 +796,11 @@ class GPUModelTrainer:
                 seed=42
             )
 
-            # Data collator
-            data_collator = DataCollatorWithPadding(tokenizer=tokenizer)
+            # Data collator: dynamic padding (multiples of 8 for fp16 tensor cores)
+            data_collator = DynamicPaddingCollator(
+                tokenizer.pad_token_id,
+                pad_to_multiple_of=8 if training_args.fp16 else None
+            )
 
             # Custom trainer for multi-task learning
             trainer = MultiTaskTrainer(
@@ -902,6 +894,16 @@ if GPU_AVAILABLE:
             outputs = model(**inputs)
             loss = outputs['loss']
             return (loss, outputs) if return_outputs else loss
+
+        def _get_train_sampler(self, *args, **kwargs):
+            """Group training examples of similar length (less padding per batch)"""
+            if config.gpu_training.group_by_length and hasattr(self.train_dataset, 'lengths'):
+                return LengthGroupedSampler(
+                    self.train_dataset.lengths,
+                    batch_size=self.args.train_batch_size * self.args.gradient_accumulation_steps,
+                    seed=self.args.seed
+                )
+            return super()._get_train_sampler(*args, **kwargs)
 else:
     class MultiTaskTrainer:
         def __init__(self, *args, **kwargs):
@@ -951,35 +953,50 @@ class LocalModelInference:
     def predict(self, text: str) -> Dict[str, Any]:
         """Make prediction on a single text"""
         try:
-            # Tokenize
-            inputs = self.tokenizer(
-                text,
-                truncation=True,
-                padding=True,
-                max_length=512,
-                return_tensors='pt'
-            ).to(self.device)
-
-            # Predict
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-
-            # Process outputs (this would need to be adapted based on your model architecture)
-            logits = outputs.logits
-            probabilities = torch.softmax(logits, dim=-1)
-            predicted_class = torch.argmax(probabilities, dim=-1).item()
-            confidence = probabilities.max().item()
-
-            return {
-                'predicted_class': predicted_class,
-                'confidence': confidence,
-                'probabilities': probabilities.cpu().numpy().tolist()
-            }
-
+            return self.predict_batch([text])[0]
         except Exception as e:
             self.logger.error(f"Prediction failed: {e}")
             return None
 
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Make predictions on several texts with a single forward pass
+
+        Texts are padded to the longest one in the batch, not to max_length.
+
+        Args:
+            texts: Texts to classify
+
+        Returns:
+            One prediction per text (predicted_class, label, confidence, probabilities)
+        """
+        inputs = self.tokenizer(
+            texts,
+            truncation=True,
+            padding=True,
+            max_length=config.gpu_training.max_length,
+            return_tensors='pt'
+        ).to(self.device)
+
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+
+        # Process outputs (this would need to be adapted based on your model architecture)
+        logits = outputs.logits
+        probabilities = torch.softmax(logits, dim=-1).cpu().numpy()
+        id2label = getattr(getattr(self.model, 'config', None), 'id2label', None) or {}
+
+        predictions = []
+        for row in probabilities:
+            predicted_class = int(row.argmax())
+            predictions.append({
+                'predicted_class': predicted_class,
+                'label': id2label.get(predicted_class, str(predicted_class)),
+                'confidence': float(row[predicted_class]),
+                'probabilities': row.tolist()
+            })
+        return predictions
+
 async def main():
     """Main function for testing model training"""
     service = ModelTrainingService()
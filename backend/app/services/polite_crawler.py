@@ -0,0 +1,208 @@
+"""
+Crawler HTTP concurrent et respectueux pour la documentation
+Session partagée, limites de concurrence et délai par domaine, GET
+conditionnel (ETag / Last-Modified) pour ne pas retélécharger les pages
+inchangées
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchResult:
+    """Résultat d'une requête du crawler"""
+
+    url: str
+    status: int
+    text: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class _DomainSlot:
+    """Limites d'un domaine: requêtes simultanées et espacement des départs"""
+
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+
+
+class PoliteCrawler:
+    """
+    Client HTTP partagé pour le scraping de la documentation
+
+    Toutes les requêtes passent par une seule session aiohttp (connexions
+    réutilisées). Par domaine, au plus `max_per_domain` requêtes sont en
+    cours et deux départs sont espacés d'au moins `delay` secondes; les
+    domaines différents ne s'attendent pas.
+
+    Les validateurs (ETag, Last-Modified) des pages retenues sont conservés
+    et renvoyés au prochain passage: une page inchangée répond 304 sans
+    corps, et n'est ni retéléchargée ni analysée.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, max_per_domain: int = 2,
+                 delay: float = 0.5, max_connections: int = 20, timeout: float = 30,
+                 cache_path: Optional[str] = None):
+        """
+        Initialiser le crawler
+
+        Args:
+            headers: En-têtes envoyés avec chaque requête
+            max_per_domain: Requêtes simultanées maximum par domaine
+            delay: Délai minimum (s) entre deux requêtes d'un même domaine
+            max_connections: Connexions simultanées maximum (tous domaines)
+            timeout: Timeout total d'une requête (s)
+            cache_path: Fichier JSON des validateurs (None = mémoire seule)
+        """
+        self.headers = headers or {}
+        self.max_per_domain = max_per_domain
+        self.delay = delay
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cache_path = Path(cache_path) if cache_path else None
+
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self._slots: Dict[str, _DomainSlot] = {}
+        self._session = None
+
+        if self.cache_path and self.cache_path.exists():
+            self.load()
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    async def __aenter__(self) -> 'PoliteCrawler':
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp non disponible. Install: pip install aiohttp")
+        self._slots = {}  # Primitives asyncio liées à la boucle courante
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._session.close()
+        self._session = None
+        self.save()
+
+    # === Politesse ===
+
+    async def _wait_turn(self, domain: str) -> _DomainSlot:
+        """Réserver un créneau sur le domaine (à libérer via slot.semaphore)"""
+        slot = self._slots.get(domain)
+        if slot is None:
+            slot = self._slots[domain] = _DomainSlot(self.max_per_domain)
+
+        await slot.semaphore.acquire()
+        try:
+            async with slot.lock:
+                loop = asyncio.get_running_loop()
+                wait = slot.next_start - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                slot.next_start = loop.time() + self.delay
+        except BaseException:
+            # Annulé pendant l'attente: la place est rendue aux autres requêtes
+            slot.semaphore.release()
+            raise
+        return slot
+
+    # === Requêtes ===
+
+    async def fetch(self, url: str) -> FetchResult:
+        """
+        Télécharger une page (GET conditionnel si la page est connue)
+
+        Args:
+            url: URL à télécharger
+
+        Returns:
+            Résultat (status 304 = page inchangée, sans corps)
+        """
+        if self._session is None:
+            raise RuntimeError("PoliteCrawler doit être utilisé comme contexte async (async with)")
+
+        headers = {}
+        known = self.validators.get(url, {})
+        if known.get('etag'):
+            headers['If-None-Match'] = known['etag']
+        if known.get('last_modified'):
+            headers['If-Modified-Since'] = known['last_modified']
+
+        slot = await self._wait_turn(urlparse(url).netloc)
+        try:
+            async with self._session.get(url, headers=headers) as response:
+                text = await response.text() if response.status == 200 else None
+                return FetchResult(
+                    url=url,
+                    status=response.status,
+                    text=text,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+        finally:
+            slot.semaphore.release()
+
+    def remember(self, result: FetchResult) -> None:
+        """Conserver les validateurs d'une page traitée avec succès"""
+        if result.etag or result.last_modified:
+            self.validators[result.url] = {
+                key: value for key, value in
+                (('etag', result.etag), ('last_modified', result.last_modified)) if value
+            }
+
+    def forget(self, url: str) -> None:
+        """Oublier une page (la prochaine requête sera complète)"""
+        self.validators.pop(url, None)
+
+    # === Persistance ===
+
+    def save(self) -> bool:
+        """Écrire les validateurs dans `cache_path` (remplacement atomique)"""
+        if not self.cache_path:
+            return False
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.validators, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.cache_path)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la sauvegarde du cache du crawler: {e}")
+            return False
+
+    def load(self) -> bool:
+        """Lire les validateurs depuis `cache_path`"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.validators = json.load(f)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement du cache du crawler: {e}")
+            self.validators = {}
+            return False
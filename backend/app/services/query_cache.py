@@ -0,0 +1,191 @@
+"""
+Caches de requêtes du chatbot SAV
+Embeddings et résultats de recherche par question normalisée (LRU), et
+cache sémantique des réponses: une question quasi identique à une question
+déjà traitée réutilise la réponse documentée, sans appel au LLM
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Forme canonique d'une question: casse, ponctuation et espaces ignorés
+
+    "Comment résilier ?" et "comment  résilier" donnent la même clé; les
+    accents sont conservés (ils portent du sens pour le modèle).
+    """
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class LRUCache:
+    """Cache borné, l'entrée la moins récemment utilisée est évincée"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SemanticAnswerCache:
+    """
+    Réponses indexées par l'embedding de la question
+
+    Une recherche est un produit matrice-vecteur sur les questions en cache;
+    la réponse la plus proche est réutilisée si sa similarité cosinus atteint
+    `threshold`, que l'intention détectée est la même et que la réponse a été
+    produite par le même modèle (fournisseur et modèle LLM). Le cache est un
+    tampon circulaire: la réponse la plus ancienne est remplacée.
+    """
+
+    def __init__(self, threshold: float = 0.95, maxsize: int = 512):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: list = []
+        self._next = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding, intent: Optional[str] = None,
+               model: Optional[Hashable] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Réponse en cache pour une question proche
+
+        Args:
+            embedding: Embedding de la question
+            intent: Intention détectée (doit correspondre)
+            model: Fournisseur et modèle LLM de la réponse (doit être identique)
+
+        Returns:
+            (réponse, similarité) ou None
+        """
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+            query = self._normalize(embedding)
+            if len(query) != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors[:len(self._entries)] @ query
+            for row in np.argsort(-similarities).tolist():
+                if similarities[row] < self.threshold:
+                    break
+                entry_intent, entry_model, answer = self._entries[row]
+                if (intent is None or entry_intent == intent) and entry_model == model:
+                    self.hits += 1
+                    return answer, float(similarities[row])
+
+            self.misses += 1
+            return None
+
+    def add(self, embedding, answer: Dict[str, Any], intent: Optional[str] = None,
+            model: Optional[Hashable] = None) -> None:
+        """Mettre en cache la réponse à une question (produite par model)"""
+        with self._lock:
+            vector = self._normalize(embedding)
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.maxsize, len(vector)), dtype=np.float32)
+                self._entries, self._next = [], 0
+
+            row = self._next
+            self._vectors[row] = vector
+            if row < len(self._entries):
+                self._entries[row] = (intent, model, answer)
+            else:
+                self._entries.append((intent, model, answer))
+            self._next = (row + 1) % self.maxsize
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries, self._next = [], 0
+
+
+class QueryCache:
+    """
+    Caches de ChatbotService, invalidés quand la base de connaissances change
+
+    - embeddings: (modèle, question normalisée) -> embedding
+    - retrieval: (question normalisée, nombre de résultats) -> documents
+    - answers: cache sémantique des réponses par modèle LLM (SemanticAnswerCache)
+
+    Les embeddings ne dépendent que du modèle et restent valides après une
+    mise à jour des documents; les résultats et les réponses sont vidés.
+    """
+
+    def __init__(self, embedding_size: int = 2048, retrieval_size: int = 1024,
+                 answer_size: int = 512, answer_threshold: float = 0.95):
+        self.embeddings = LRUCache(embedding_size)
+        self.retrieval = LRUCache(retrieval_size)
+        self.answers = SemanticAnswerCache(answer_threshold, answer_size)
+        self.revision: Any = None
+
+    def check_revision(self, revision: Any) -> None:
+        """Invalider les résultats si la base de connaissances a changé"""
+        if revision != self.revision:
+            if self.revision is not None:
+                logger.info("Base de connaissances modifiée, cache des résultats et réponses invalidé")
+            self.invalidate()
+            self.revision = revision
+
+    def invalidate(self) -> None:
+        self.retrieval.clear()
+        self.answers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {'size': len(cache), 'hits': cache.hits, 'misses': cache.misses}
+            for name, cache in (('embeddings', self.embeddings), ('retrieval', self.retrieval),
+                                ('answers', self.answers))
+        }
@@ -0,0 +1,207 @@
+"""
+Tokenization cache for fine-tuning datasets
+Splits are tokenized once per (tokenizer, max_length, split content) and
+stored as memory-mapped NumPy arrays; batches are padded dynamically and
+grouped by length so that little compute is spent on padding
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+
+def split_fingerprint(texts: Sequence[str]) -> str:
+    """Content hash of a split (order-sensitive)"""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Identify a tokenizer by class, checkpoint and vocabulary size"""
+    name = getattr(tokenizer, 'name_or_path', '') or ''
+    try:
+        vocab_size = len(tokenizer)
+    except TypeError:
+        vocab_size = getattr(tokenizer, 'vocab_size', 0)
+    return f"{type(tokenizer).__name__}:{name}:{vocab_size}"
+
+
+class TokenizedSplit:
+    """
+    Token IDs of a split, without padding
+
+    Sequences are stored back to back in one int32 array with an offsets
+    array (sequence i is tokens[offsets[i]:offsets[i + 1]]). Both arrays are
+    memory-mapped: opening a split costs nothing and DataLoader workers share
+    the page cache instead of copying the data.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.tokens = np.load(self.path / 'tokens.npy', mmap_mode='r')
+        self.offsets = np.load(self.path / 'offsets.npy')
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        return self.tokens[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def __getstate__(self):
+        # Workers started with "spawn" reopen the memory map instead of copying it
+        return {'path': str(self.path)}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+
+class TokenizationCache:
+    """Tokenize splits once and reuse them across runs"""
+
+    def __init__(self, cache_dir: str = "./data/cache/tokenized", batch_size: int = 1000):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding one subdirectory per tokenized split
+            batch_size: Texts per tokenizer call (fast tokenizers batch natively)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.batch_size = batch_size
+
+    def cache_key(self, tokenizer, texts: Sequence[str], max_length: int) -> str:
+        key = f"v{CACHE_FORMAT_VERSION}|{tokenizer_fingerprint(tokenizer)}|{max_length}|{split_fingerprint(texts)}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+    def encode(self, tokenizer, texts: Sequence[str], max_length: int = 512) -> TokenizedSplit:
+        """
+        Token IDs of a split, tokenized on first use only
+
+        Args:
+            tokenizer: Hugging Face tokenizer (or any callable with the same interface)
+            texts: Texts of the split
+            max_length: Truncation length (special tokens included)
+
+        Returns:
+            Memory-mapped tokenized split
+        """
+        texts = [str(text) for text in texts]
+        path = self.cache_dir / self.cache_key(tokenizer, texts, max_length)
+        if (path / 'offsets.npy').exists():
+            logger.info(f"Tokenized split loaded from cache: {path.name} ({len(texts)} texts)")
+            return TokenizedSplit(path)
+
+        logger.info(f"Tokenizing {len(texts)} texts (max_length={max_length})")
+        sequences: List[List[int]] = []
+        for start in range(0, len(texts), self.batch_size):
+            encoded = tokenizer(
+                texts[start:start + self.batch_size],
+                truncation=True,
+                max_length=max_length,
+                padding=False
+            )
+            sequences.extend(encoded['input_ids'])
+
+        offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in sequences], out=offsets[1:])
+        tokens = np.fromiter((token for ids in sequences for token in ids),
+                             dtype=np.int32, count=int(offsets[-1]))
+
+        # Written to a temporary directory then renamed: readers never see a partial split
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-'))
+        try:
+            np.save(tmp_path / 'tokens.npy', tokens)
+            np.save(tmp_path / 'offsets.npy', offsets)
+            os.replace(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not (path / 'offsets.npy').exists():  # Not written concurrently by another run
+                raise
+        return TokenizedSplit(path)
+
+
+def pad_sequences(sequences: Sequence[Sequence[int]], pad_token_id: int,
+                  pad_to_multiple_of: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pad a batch to its longest sequence
+
+    Args:
+        sequences: Token IDs of each example
+        pad_token_id: Padding token
+        pad_to_multiple_of: Round the padded length up (tensor-core friendly sizes)
+
+    Returns:
+        (input_ids, attention_mask) int64 arrays of shape (batch, length)
+    """
+    length = max((len(ids) for ids in sequences), default=0)
+    if pad_to_multiple_of:
+        length = -(-length // pad_to_multiple_of) * pad_to_multiple_of
+
+    input_ids = np.full((len(sequences), length), pad_token_id, dtype=np.int64)
+    attention_mask = np.zeros((len(sequences), length), dtype=np.int64)
+    for row, ids in enumerate(sequences):
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+    return input_ids, attention_mask
+
+
+class LengthGroupedSampler:
+    """
+    Shuffled indices where consecutive batches hold sequences of similar length
+
+    Indices are shuffled, cut into mega-batches of `mega_batch_mult` batches,
+    and sorted by length inside each mega-batch: batches stay random from one
+    epoch to the next but need little padding. The mega-batch holding the
+    longest sequence comes first so that out-of-memory errors show up
+    immediately. Each iteration reshuffles (epoch counter seeded by `seed`).
+    """
+
+    def __init__(self, lengths: Sequence[int], batch_size: int, mega_batch_mult: int = 50,
+                 seed: int = 42):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.mega_batch_mult = mega_batch_mult
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def indices(self, epoch: int) -> np.ndarray:
+        rng = np.random.default_rng((self.seed, epoch))
+        order = rng.permutation(len(self.lengths))
+        mega_size = max(self.batch_size * self.mega_batch_mult, 1)
+
+        megabatches = []
+        for start in range(0, len(order), mega_size):
+            megabatch = order[start:start + mega_size]
+            megabatches.append(megabatch[np.argsort(-self.lengths[megabatch], kind='stable')])
+
+        if megabatches:
+            longest = max(range(len(megabatches)), key=lambda i: self.lengths[megabatches[i][0]])
+            megabatches[0], megabatches[longest] = megabatches[longest], megabatches[0]
+            return np.concatenate(megabatches)
+        return order
+
+    def __iter__(self) -> Iterator[int]:
+        indices = self.indices(self.epoch)
+        self.epoch += 1
+        return iter(indices.tolist())
@@ -3,24 +3,27 @@ Text cleaning utilities for tweet processing
 Advanced text cleaning and normalization functions
 """
 
-import re
-import html
+from collections import Counter
 from typing import List, Dict, Optional
-import unicodedata
+
+from shared.text_normalization import (
+    URL_REGEX, MENTION_REGEX, HASHTAG_REGEX, EMOJI_REGEX, WHITESPACE_REGEX, WORD_REGEX,
+    REPEATED_MENTIONS_REGEX, ASCII_CONTROL_REGEX, REPEATED_EMOJI_REGEX,
+    TextNormalizer, collapse_whitespace, extract_entities, get_text_normalizer
+)
 
 class TextCleaner:
     """Advanced text cleaning for tweet analysis"""
     
     def __init__(self):
         """Initialize text cleaner with patterns"""
-        # Common patterns for cleaning
-        self.url_pattern = re.compile(r'http\S+|www\S+|https\S+', re.MULTILINE)
-        self.mention_pattern = re.compile(r'@\w+')
-        self.hashtag_pattern = re.compile(r'#\w+')
-        self.emoji_pattern = re.compile(
-            r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]|[\U0001F680-\U0001F6FF]|[\U0001F1E0-\U0001F1FF]'
-        )
-        self.whitespace_pattern = re.compile(r'\s+')
+        # Shared precompiled patterns (see shared/text_normalization.py)
+        self.url_pattern = URL_REGEX
+        self.mention_pattern = MENTION_REGEX
+        self.hashtag_pattern = HASHTAG_REGEX
+        self.emoji_pattern = EMOJI_REGEX
+        self.whitespace_pattern = WHITESPACE_REGEX
+        self.normalizer = get_text_normalizer()
         
         # French stopwords for keyword extraction
         self.french_stopwords = {
@@ -41,19 +44,7 @@ class TextCleaner:
         Returns:
             Cleaned text
         """
-        if not text or not isinstance(text, str):
-            return ""
-        
-        # Decode HTML entities
-        text = html.unescape(text)
-        
-        # Remove control characters
-        text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C')
-        
-        # Normalize whitespace
-        text = self.whitespace_pattern.sub(' ', text)
-        
-        return text.strip()
+        return self.normalizer.clean_basic(text)
     
     def remove_urls(self, text: str) -> str:
         """Remove URLs from text"""
@@ -85,6 +76,10 @@ class TextCleaner:
         """Extract URLs from text"""
         return self.url_pattern.findall(text)
     
+    def extract_entities(self, text: str) -> Dict[str, List[str]]:
+        """Extract mentions, hashtags and URLs"""
+        return extract_entities(text)
+    
     def clean_for_analysis(self, text: str, preserve_mentions: bool = True, 
                           preserve_hashtags: bool = True) -> str:
         """
@@ -98,28 +93,11 @@ class TextCleaner:
         Returns:
             Cleaned text suitable for analysis
         """
-        if not text:
-            return ""
-        
-        # Basic cleaning
-        text = self.clean_basic(text)
-        
-        # Remove URLs (usually not useful for sentiment analysis)
-        text = self.remove_urls(text)
-        
-        # Optionally remove mentions and hashtags
-        if not preserve_mentions:
-            text = self.remove_mentions(text)
-        if not preserve_hashtags:
-            text = self.remove_hashtags(text)
-        
-        # Normalize repeated characters (e.g., "noooooo" -> "nooo")
-        text = re.sub(r'(.)\1{3,}', r'\1\1\1', text)
-        
-        # Clean up whitespace
-        text = self.whitespace_pattern.sub(' ', text).strip()
-        
-        return text
+        return self.normalizer.clean_for_analysis(
+            text,
+            preserve_mentions=preserve_mentions,
+            preserve_hashtags=preserve_hashtags
+        )
     
     def extract_keywords(self, text: str, min_length: int = 3, max_keywords: int = 10) -> List[str]:
         """
@@ -141,7 +119,7 @@ class TextCleaner:
         clean_text = clean_text.lower()
         
         # Split into words and filter
-        words = re.findall(r'\b\w+\b', clean_text)
+        words = WORD_REGEX.findall(clean_text)
         
         # Filter words
         keywords = []
@@ -153,7 +131,6 @@ class TextCleaner:
                 keywords.append(word)
         
         # Count frequency and return most common
-        from collections import Counter
         word_counts = Counter(keywords)
         return [word for word, count in word_counts.most_common(max_keywords)]
     
@@ -188,22 +165,7 @@ class TextCleaner:
         Returns:
             Normalized text
         """
-        if not text:
-            return ""
-        
-        # Unicode normalization
-        text = unicodedata.normalize('NFKD', text)
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove accents (optional, might want to preserve for French)
-        # text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
-        
-        # Clean and normalize whitespace
-        text = self.whitespace_pattern.sub(' ', text).strip()
-        
-        return text
+        return self.normalizer.normalize_text(text)
     
     def is_spam_like(self, text: str) -> bool:
         """
@@ -222,19 +184,13 @@ class TextCleaner:
         if len(set(text.lower().split())) < len(text.split()) * 0.3:
             return True
         
-        # Check for excessive mentions
-        mentions = len(self.extract_mentions(text))
-        if mentions > 5:
+        # Check for excessive mentions, hashtags and URLs
+        entities = extract_entities(text)
+        if len(entities['mentions']) > 5:
             return True
-        
-        # Check for excessive hashtags
-        hashtags = len(self.extract_hashtags(text))
-        if hashtags > 8:
+        if len(entities['hashtags']) > 8:
             return True
-        
-        # Check for excessive URLs
-        urls = len(self.extract_urls(text))
-        if urls > 3:
+        if len(entities['urls']) > 3:
             return True
         
         # Check for excessive capitalization
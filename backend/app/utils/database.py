@@ -11,6 +11,7 @@ from pathlib import Path
 import logging
 from contextlib import asynccontextmanager
 import os
+import uuid
 from urllib.parse import quote_plus
 
 try:
@@ -26,7 +27,9 @@ except ImportError:
     psycopg2 = None
 
 from ..models import TweetAnalyzed, AnalysisLog, User
-from ..schemas import get_database_schema, get_postgresql_optimizations
+from ..schemas import get_database_schema, get_postgresql_optimizations, get_sqlite_knowledge_schema
+from .vector_index import VectorIndex
+from ..services.embedding_pipeline import blob_to_embedding
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +50,8 @@ class DatabaseManager:
         self.database_type = database_type.lower()
         self.connection_string = connection_string or self._get_default_connection_string()
         self.connection_pool = None
+        self._vector_index = None
+        self._vector_index_checked = False
         
         logger.info(f"Database manager initialized: {self.database_type}")
     
@@ -99,6 +104,7 @@ class DatabaseManager:
             # Execute schema
             schema = get_database_schema()
             await db.executescript(schema)
+            await db.executescript(get_sqlite_knowledge_schema())
             await db.commit()
             
             logger.info(f"SQLite database initialized: {self.connection_string}")
@@ -764,13 +770,333 @@ class DatabaseManager:
                     return document_id
 
             else:
-                logger.warning("Knowledge document storage not implemented for SQLite")
-                return None
+                document_id = str(uuid.uuid4())
+                async with self.get_connection() as conn:
+                    await conn.execute("""
+                        INSERT INTO knowledge_documents
+                        (id, title, content, document_type, source_url, source_domain,
+                         content_hash, embedding_model, embedding_dimension,
+                         usage_count, relevance_score)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        document_id,
+                        document['title'],
+                        document['content'],
+                        document.get('document_type', 'general'),
+                        document['source_url'],
+                        document['source_domain'],
+                        document['content_hash'],
+                        document.get('embedding_model'),
+                        document.get('embedding_dimension'),
+                        document.get('usage_count', 0),
+                        document.get('relevance_score', 0.0)
+                    ))
+                    await conn.commit()
+
+                logger.info(f"Knowledge document stored: {document_id}")
+                return document_id
 
         except Exception as e:
             logger.error(f"Error storing knowledge document: {e}")
             return None
 
+    def _get_vector_index_path(self) -> str:
+        """Vector index file, next to the SQLite database or in the data directory"""
+        path = os.getenv("VECTOR_INDEX_PATH")
+        if path:
+            return path
+        if self.database_type == "sqlite":
+            return str(Path(self.connection_string).with_suffix(".vectors.npz"))
+        return "./data/knowledge_documents.vectors.npz"
+
+    def get_vector_index(self) -> VectorIndex:
+        """Knowledge document vector index (loaded from disk on first use)"""
+        if self._vector_index is None:
+            self._vector_index = VectorIndex(self._get_vector_index_path())
+        return self._vector_index
+
+    async def ensure_vector_index(self) -> VectorIndex:
+        """
+        Knowledge vector index, rebuilt from the stored chunk embeddings when
+        the index file is missing or out of sync with the knowledge_chunks table
+
+        Returns:
+            VectorIndex instance
+        """
+        index = self.get_vector_index()
+        if self._vector_index_checked:
+            return index
+
+        try:
+            stored = await self.count_knowledge_chunks()
+            if stored != len(index):
+                logger.warning(f"Vector index out of sync ({len(index)} indexed, {stored} stored chunks): rebuilding")
+                index = await self.rebuild_vector_index()
+            self._vector_index_checked = True
+        except Exception as e:
+            logger.error(f"Error checking the vector index: {e}")
+        return index
+
+    async def rebuild_vector_index(self) -> VectorIndex:
+        """
+        Rebuild the vector index from the embeddings stored in knowledge_chunks
+
+        Returns:
+            Rebuilt VectorIndex (saved to disk)
+        """
+        previous = self.get_vector_index()
+        index = VectorIndex(flat_threshold=previous.flat_threshold, nprobe=previous.nprobe)
+        index.path = previous.path
+        index.revision = previous.revision + 1  # Caches keyed on the revision are invalidated
+
+        async with self.get_connection() as conn:
+            query = "SELECT id, embedding FROM knowledge_chunks ORDER BY id"
+            if self.database_type == "postgresql":
+                rows = [(row['id'], row['embedding']) for row in await conn.fetch(query)]
+            else:
+                cursor = await conn.execute(query)
+                rows = await cursor.fetchall()
+
+        if rows:
+            index.add([row[0] for row in rows], [blob_to_embedding(bytes(row[1])) for row in rows])
+        index.save()
+        self._vector_index = index
+        logger.info(f"Vector index rebuilt: {len(index)} chunks")
+        return index
+
+    async def count_knowledge_chunks(self) -> int:
+        """Number of knowledge chunks stored"""
+        async with self.get_connection() as conn:
+            if self.database_type == "postgresql":
+                return await conn.fetchval("SELECT COUNT(*) FROM knowledge_chunks")
+            cursor = await conn.execute("SELECT COUNT(*) FROM knowledge_chunks")
+            return (await cursor.fetchone())[0]
+
+    async def get_existing_chunk_ids(self, content_hashes: List[str]) -> Dict[str, str]:
+        """
+        Knowledge chunks already stored, by content hash
+
+        Args:
+            content_hashes: Chunk content hashes to look up
+
+        Returns:
+            Mapping content hash -> stored chunk id, for the hashes present in the database
+        """
+        if not content_hashes:
+            return {}
+
+        try:
+            async with self.get_connection() as conn:
+                if self.database_type == "postgresql":
+                    rows = await conn.fetch("""
+                        SELECT content_hash, id FROM knowledge_chunks WHERE content_hash = ANY($1::text[])
+                    """, list(content_hashes))
+                    return {row['content_hash']: row['id'] for row in rows}
+
+                found = {}
+                hashes = list(content_hashes)
+                for start in range(0, len(hashes), 500):  # SQLite variable limit
+                    batch = hashes[start:start + 500]
+                    placeholders = ", ".join("?" for _ in batch)
+                    cursor = await conn.execute(f"""
+                        SELECT content_hash, id FROM knowledge_chunks WHERE content_hash IN ({placeholders})
+                    """, batch)
+                    found.update((row[0], row[1]) for row in await cursor.fetchall())
+                return found
+
+        except Exception as e:
+            logger.error(f"Error looking up knowledge chunk hashes: {e}")
+            return {}
+
+    async def find_knowledge_document(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Knowledge document with this content hash, with its number of chunks
+
+        Args:
+            content_hash: Document content hash
+
+        Returns:
+            {'id', 'chunk_count'} or None if no document has this hash
+        """
+        query = """
+            SELECT d.id, COUNT(c.id) AS chunk_count
+            FROM knowledge_documents d LEFT JOIN knowledge_chunks c ON c.document_id = d.id
+            WHERE d.content_hash = {placeholder}
+            GROUP BY d.id
+        """
+        async with self.get_connection() as conn:
+            if self.database_type == "postgresql":
+                row = await conn.fetchrow(query.format(placeholder="$1"), content_hash)
+            else:
+                cursor = await conn.execute(query.format(placeholder="?"), (content_hash,))
+                row = await cursor.fetchone()
+
+        if row is None:
+            return None
+        return {'id': str(row[0]), 'chunk_count': row[1]}
+
+    async def find_knowledge_document_by_url(self, source_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Knowledge document stored for this source URL
+
+        Args:
+            source_url: Page URL
+
+        Returns:
+            {'id', 'content_hash'} of the most recently updated document, or None
+        """
+        query = """
+            SELECT id, content_hash FROM knowledge_documents
+            WHERE source_url = {placeholder}
+            ORDER BY last_updated DESC
+            LIMIT 1
+        """
+        async with self.get_connection() as conn:
+            if self.database_type == "postgresql":
+                row = await conn.fetchrow(query.format(placeholder="$1"), source_url)
+            else:
+                cursor = await conn.execute(query.format(placeholder="?"), (source_url,))
+                row = await cursor.fetchone()
+
+        if row is None:
+            return None
+        return {'id': str(row[0]), 'content_hash': row[1]}
+
+    async def replace_knowledge_document(self, document_id: str, document: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Update a knowledge document in place with new content and delete its chunks
+
+        The document keeps its id; its chunks are deleted in the same
+        transaction so they can be re-embedded from the new content.
+
+        Args:
+            document_id: Stored document id
+            document: New document data dictionary
+
+        Returns:
+            Ids of the deleted chunks (to remove from the vector index), None on failure
+        """
+        values = (
+            document['title'],
+            document['content'],
+            document.get('document_type', 'general'),
+            document['source_domain'],
+            document['content_hash'],
+            document.get('embedding_model'),
+            document.get('embedding_dimension'),
+        )
+        try:
+            async with self.get_connection() as conn:
+                if self.database_type == "postgresql":
+                    async with conn.transaction():
+                        await conn.execute("""
+                            UPDATE knowledge_documents
+                            SET title = $2, content = $3, document_type = $4, source_domain = $5,
+                                content_hash = $6, embedding_model = $7, embedding_dimension = $8,
+                                last_updated = CURRENT_TIMESTAMP
+                            WHERE id = $1
+                        """, document_id, *values)
+                        rows = await conn.fetch(
+                            "DELETE FROM knowledge_chunks WHERE document_id = $1 RETURNING id", document_id
+                        )
+                    chunk_ids = [row['id'] for row in rows]
+                else:
+                    cursor = await conn.execute(
+                        "SELECT id FROM knowledge_chunks WHERE document_id = ?", (document_id,)
+                    )
+                    chunk_ids = [row[0] for row in await cursor.fetchall()]
+                    await conn.execute("""
+                        UPDATE knowledge_documents
+                        SET title = ?, content = ?, document_type = ?, source_domain = ?,
+                            content_hash = ?, embedding_model = ?, embedding_dimension = ?,
+                            last_updated = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    """, (*values, document_id))
+                    await conn.execute("DELETE FROM knowledge_chunks WHERE document_id = ?", (document_id,))
+                    await conn.commit()
+
+            logger.info(f"Knowledge document replaced: {document_id} ({len(chunk_ids)} chunks deleted)")
+            return chunk_ids
+
+        except Exception as e:
+            logger.error(f"Error replacing knowledge document: {e}")
+            return None
+
+    async def store_knowledge_chunks(self, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Store embedded knowledge chunks
+
+        Args:
+            chunks: Chunk dictionaries (id, document_id, chunk_index, content,
+                    content_hash, embedding as a float32 blob)
+
+        Returns:
+            Number of chunks actually inserted (already stored hashes are ignored)
+        """
+        if not chunks:
+            return 0
+
+        rows = [
+            (chunk['id'], chunk['document_id'], chunk['chunk_index'], chunk['content'],
+             chunk['content_hash'], chunk['embedding'])
+            for chunk in chunks
+        ]
+        try:
+            async with self.get_connection() as conn:
+                if self.database_type == "postgresql":
+                    inserted = await conn.fetch("""
+                        INSERT INTO knowledge_chunks
+                        (id, document_id, chunk_index, content, content_hash, embedding)
+                        SELECT * FROM unnest($1::text[], $2::uuid[], $3::int[], $4::text[], $5::text[], $6::bytea[])
+                        ON CONFLICT (content_hash) DO NOTHING
+                        RETURNING id
+                    """, *(list(column) for column in zip(*rows)))
+                    stored = len(inserted)
+                else:
+                    cursor = await conn.executemany("""
+                        INSERT OR IGNORE INTO knowledge_chunks
+                        (id, document_id, chunk_index, content, content_hash, embedding)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, rows)
+                    stored = cursor.rowcount  # Sum over the batch, ignored rows excluded
+                    await conn.commit()
+
+            logger.info(f"Knowledge chunks stored: {stored}/{len(rows)}")
+            return stored
+
+        except Exception as e:
+            logger.error(f"Error storing knowledge chunks: {e}")
+            return 0
+
+    async def get_knowledge_documents_by_ids(self, document_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch knowledge documents by id
+
+        Args:
+            document_ids: Document identifiers
+
+        Returns:
+            Documents found (in no particular order)
+        """
+        if not document_ids:
+            return []
+
+        columns = """id, title, content, document_type, source_url, source_domain,
+                     content_hash, usage_count, relevance_score"""
+        async with self.get_connection() as conn:
+            if self.database_type == "postgresql":
+                rows = await conn.fetch(f"""
+                    SELECT {columns} FROM knowledge_documents WHERE id = ANY($1::uuid[])
+                """, document_ids)
+                return [dict(row) for row in rows]
+
+            conn.row_factory = aiosqlite.Row
+            placeholders = ", ".join("?" for _ in document_ids)
+            cursor = await conn.execute(f"""
+                SELECT {columns} FROM knowledge_documents WHERE id IN ({placeholders})
+            """, document_ids)
+            return [dict(row) for row in await cursor.fetchall()]
+
     async def search_documents_by_embedding(self, query_embedding: List[float],
                                           limit: int = 5,
                                           similarity_threshold: float = 0.3) -> List[Dict[str, Any]]:
@@ -786,31 +1112,33 @@ class DatabaseManager:
             List of matching documents with similarity scores
         """
         try:
-            if self.database_type == "postgresql":
-                async with self.get_connection() as conn:
-                    # For now, return documents without similarity calculation
-                    # since we don't have pgvector. We'll use full-text search instead
-                    rows = await conn.fetch("""
-                        SELECT id, title, content, document_type, source_url, source_domain,
-                               content_hash, usage_count, relevance_score, embedding_vector
-                        FROM knowledge_documents
-                        ORDER BY relevance_score DESC, usage_count DESC
-                        LIMIT $1
-                    """, limit)
-
-                    documents = []
-                    for row in rows:
-                        doc = dict(row)
-                        # For now, assign a default similarity score
-                        doc['similarity_score'] = 0.8  # Placeholder
-                        documents.append(doc)
+            index = await self.ensure_vector_index()
+            # Index entries are chunks ('<document id>#<chunk>'): over-fetch,
+            # then keep the best chunk of each document
+            chunk_matches = index.search(query_embedding, k=limit * 4, threshold=similarity_threshold)
+            best = {}
+            for chunk_id, similarity in chunk_matches:
+                best.setdefault(chunk_id.split("#", 1)[0], similarity)
+            matches = list(best.items())[:limit]
+            if not matches:
+                logger.info(f"No document above similarity {similarity_threshold} ({len(index)} chunks indexed)")
+                return []
 
-                    logger.info(f"Found {len(documents)} documents")
-                    return documents
+            rows = await self.get_knowledge_documents_by_ids([doc_id for doc_id, _ in matches])
+            rows_by_id = {str(row['id']): row for row in rows}
 
-            else:
-                logger.warning("Document search not implemented for SQLite")
-                return []
+            documents = []
+            for doc_id, similarity in matches:
+                row = rows_by_id.get(doc_id)
+                if row is None:
+                    continue  # Indexed but deleted from the database
+                doc = dict(row)
+                doc['id'] = doc_id
+                doc['similarity_score'] = similarity
+                documents.append(doc)
+
+            logger.info(f"Found {len(documents)} documents")
+            return documents
 
         except Exception as e:
             logger.error(f"Error searching documents: {e}")
@@ -944,7 +1272,8 @@ class DatabaseManager:
         Store a chat message in the database
 
         Args:
-            message: Message data dictionary
+            message: Message data dictionary. An optional 'id' is used as the
+                message ID (streamed answers announce it before storage)
 
         Returns:
             Message ID if successful, None otherwise
@@ -954,8 +1283,8 @@ class DatabaseManager:
                 async with self.get_connection() as conn:
                     result = await conn.fetchrow("""
                         INSERT INTO chat_messages
-                        (conversation_id, role, content, sources, llm_provider, processing_time)
-                        VALUES ($1, $2, $3, $4, $5, $6)
+                        (id, conversation_id, role, content, sources, llm_provider, processing_time)
+                        VALUES (COALESCE($7::uuid, uuid_generate_v4()), $1, $2, $3, $4, $5, $6)
                         RETURNING id
                     """,
                     message['conversation_id'],
@@ -963,7 +1292,8 @@ class DatabaseManager:
                     message['content'],
                     json.dumps(message.get('sources', [])),
                     message.get('llm_provider'),
-                    message.get('processing_time')
+                    message.get('processing_time'),
+                    message.get('id')
                     )
 
                     message_id = str(result['id'])
@@ -988,6 +1318,72 @@ class DatabaseManager:
             logger.error(f"Error storing message: {e}")
             return None
 
+    async def store_chat_batch(self, conversations: List[Dict[str, Any]],
+                               messages: List[Dict[str, Any]]) -> int:
+        """
+        Store conversations and messages in a single transaction
+
+        Inserts are idempotent (conversations and messages carry their own
+        IDs and conflicting rows are skipped), so a batch can safely be
+        written again after a failure. Message counts are recomputed rather
+        than incremented for the same reason.
+
+        Args:
+            conversations: Conversation dictionaries with 'id' field
+            messages: Message dictionaries with 'id' and 'timestamp' fields
+
+        Returns:
+            Number of messages written
+
+        Raises:
+            Exception: If the transaction fails (nothing is written)
+        """
+        if not conversations and not messages:
+            return 0
+
+        if self.database_type != "postgresql":
+            logger.warning("Conversation storage not implemented for SQLite")
+            return 0
+
+        async with self.get_connection() as conn:
+            async with conn.transaction():
+                if conversations:
+                    await conn.executemany("""
+                        INSERT INTO conversations
+                        (id, user_id, session_id, title, status, llm_provider, message_count)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7)
+                        ON CONFLICT (id) DO NOTHING
+                    """, [
+                        (conversation['id'], conversation.get('user_id'), conversation['session_id'],
+                         conversation.get('title'), conversation.get('status', 'active'),
+                         conversation.get('llm_provider', 'mistral'), conversation.get('message_count', 0))
+                        for conversation in conversations
+                    ])
+
+                if messages:
+                    await conn.executemany("""
+                        INSERT INTO chat_messages
+                        (id, conversation_id, role, content, sources, llm_provider, processing_time, timestamp)
+                        VALUES ($1::uuid, $2, $3, $4, $5, $6, $7, COALESCE($8, CURRENT_TIMESTAMP))
+                        ON CONFLICT (id) DO NOTHING
+                    """, [
+                        (message['id'], message['conversation_id'], message['role'], message['content'],
+                         json.dumps(message.get('sources', [])), message.get('llm_provider'),
+                         message.get('processing_time'), message.get('timestamp'))
+                        for message in messages
+                    ])
+
+                    await conn.execute("""
+                        UPDATE conversations c
+                        SET message_count = (SELECT COUNT(*) FROM chat_messages m WHERE m.conversation_id = c.id),
+                            last_message_at = (SELECT MAX(m.timestamp) FROM chat_messages m WHERE m.conversation_id = c.id),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE c.id = ANY($1::text[])
+                    """, list({message['conversation_id'] for message in messages}))
+
+        logger.info(f"Chat batch stored: {len(conversations)} conversations, {len(messages)} messages")
+        return len(messages)
+
     async def get_conversation_messages(self, conversation_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
         Get messages for a conversation
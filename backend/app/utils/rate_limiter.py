@@ -1,98 +1,392 @@
 """
 Rate limiting utilities for API calls
-Implements token bucket and sliding window rate limiting
+Implements GCRA (token bucket) rate limiting on request and token budgets
 """
 
 import asyncio
+import re
 import time
-from typing import Dict, Optional, Any
-from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Any, Mapping
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Duration units used by provider reset headers (e.g. OpenAI "6m0s", "20ms")
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+# Header names for remaining budget / reset time, by budget kind
+_REMAINING_HEADERS = {
+    'requests': ('x-ratelimit-remaining-requests', 'anthropic-ratelimit-requests-remaining',
+                 'x-ratelimit-remaining', 'ratelimit-remaining'),
+    'tokens': ('x-ratelimit-remaining-tokens', 'anthropic-ratelimit-tokens-remaining'),
+}
+_RESET_HEADERS = {
+    'requests': ('x-ratelimit-reset-requests', 'anthropic-ratelimit-requests-reset',
+                 'x-ratelimit-reset', 'ratelimit-reset'),
+    'tokens': ('x-ratelimit-reset-tokens', 'anthropic-ratelimit-tokens-reset'),
+}
+
+# Default per-minute limits by provider
+DEFAULT_PROVIDER_LIMITS = {
+    'openai': {'max_calls': 60, 'time_window': 60, 'max_tokens': 150000},  # 60 calls per minute
+    'mistral': {'max_calls': 30, 'time_window': 60, 'max_tokens': 500000},  # 30 calls per minute (free tier)
+    'anthropic': {'max_calls': 50, 'time_window': 60, 'max_tokens': 40000},  # 50 calls per minute
+}
+
+# Rough characters per token for French/English prompts
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str, max_output_tokens: int = 0) -> int:
+    """
+    Estimate the tokens a call will consume, before sending it
+
+    The completion is reserved at its cap; record_usage() corrects the
+    token budget once the provider reports the real usage.
+
+    Args:
+        text: Prompt text
+        max_output_tokens: Completion token cap of the call
+
+    Returns:
+        Estimated tokens
+    """
+    return len(text) // CHARS_PER_TOKEN + 1 + max_output_tokens
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header value
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP-date
+        now: Current Unix time (defaults to time.time())
+
+    Returns:
+        Seconds to wait, or None if the value cannot be parsed
+    """
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+
+def parse_reset_time(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a rate-limit reset header into seconds from now
+
+    Supports durations ("1s", "6m0s", "20ms"), plain seconds ("12.5"),
+    Unix timestamps and RFC 3339 dates (Anthropic).
+
+    Args:
+        value: Header value
+        now: Current Unix time (defaults to time.time())
+
+    Returns:
+        Seconds until the budget resets, or None if the value cannot be parsed
+    """
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    now = time.time() if now is None else now
+
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+
+    if number is not None:
+        # Large values are absolute Unix timestamps, small ones are deltas
+        return max(0.0, number - now) if number > 1e9 else max(0.0, number)
+
+    parts = _DURATION_PART.findall(value)
+    if parts and ''.join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+    try:
+        reset_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max(0.0, reset_at.timestamp() - now)
+
+
 class RateLimiter:
     """
-    Async rate limiter using token bucket algorithm
-    Ensures API calls don't exceed specified limits
+    Async rate limiter using the GCRA (generic cell rate algorithm)
+
+    Each call reserves the next free slot on a "theoretical arrival time"
+    (TAT) per budget and then sleeps outside of any lock until that slot.
+    Reservations happen in arrival order, so waiters are served FIFO and
+    calls are evenly spaced at the configured rate (low jitter).
+
+    Two budgets are tracked: requests (max_calls per time_window) and,
+    optionally, tokens (max_tokens per time_window).
     """
     
-    def __init__(self, max_calls: int, time_window: int = 60):
+    def __init__(self,
+                 max_calls: int,
+                 time_window: int = 60,
+                 max_tokens: Optional[int] = None,
+                 burst: Optional[int] = None):
         """
         Initialize rate limiter
         
         Args:
             max_calls: Maximum number of calls allowed
             time_window: Time window in seconds (default: 60s)
+            max_tokens: Maximum number of tokens per time window (None = unlimited)
+            burst: Number of calls allowed back-to-back before pacing kicks in
+                (default: max_calls, a full window at once)
         """
         self.max_calls = max_calls
         self.time_window = time_window
-        self.calls = deque()
-        self.lock = asyncio.Lock()
+        self.max_tokens = max_tokens
+        self._burst = burst
         
-        logger.info(f"Rate limiter initialized: {max_calls} calls per {time_window}s")
+        # Theoretical arrival times of the next request / token
+        self._request_tat = 0.0
+        self._token_tat = 0.0
     
-    async def acquire(self) -> None:
+        # Server-imposed pause (Retry-After, exhausted budget)
+        self._blocked_until = 0.0
+
+        self.waiting = 0
+        self.total_calls = 0
+        self.total_tokens = 0
+        self.total_wait_time = 0.0
+        self._recent_calls = []
+
+        logger.info(f"Rate limiter initialized: {max_calls} calls per {time_window}s"
+                    + (f", {max_tokens} tokens per {time_window}s" if max_tokens else ""))
+
+    @property
+    def burst(self) -> int:
+        """Calls allowed back-to-back (follows max_calls unless set explicitly)"""
+        return max(1, self._burst if self._burst is not None else self.max_calls)
+
+    @property
+    def request_interval(self) -> float:
+        """Seconds between two calls at the sustained rate"""
+        return self.time_window / self.max_calls
+
+    @property
+    def token_interval(self) -> float:
+        """Seconds needed to replenish one token (0 if tokens are unlimited)"""
+        return self.time_window / self.max_tokens if self.max_tokens else 0.0
+
+    def _reserve(self, tokens: int, now: float) -> float:
+        """
+        Reserve the next slot for a call (no await: atomic on the event loop)
+
+        Args:
+            tokens: Tokens the call is expected to consume
+            now: Current monotonic time
+
+        Returns:
+            Monotonic time at which the call may proceed
+        """
+        start = max(now, self._blocked_until)
+
+        # Request budget: the burst tolerance lets `burst` calls through at once
+        tolerance = (self.burst - 1) * self.request_interval
+        start = max(start, self._request_tat - tolerance)
+
+        # Token budget: a full window worth of tokens may be spent at once
+        if self.max_tokens and tokens:
+            tokens = min(tokens, self.max_tokens)
+            token_tolerance = self.time_window - tokens * self.token_interval
+            start = max(start, self._token_tat - token_tolerance)
+            self._token_tat = max(self._token_tat, start) + tokens * self.token_interval
+
+        self._request_tat = max(self._request_tat, start) + self.request_interval
+        return start
+
+    def _release(self, tokens: int) -> None:
+        """
+        Give back a reservation that will not be used
+
+        Args:
+            tokens: Tokens reserved with the slot
+        """
+        self._request_tat -= self.request_interval
+        if self.max_tokens and tokens:
+            self._token_tat -= min(tokens, self.max_tokens) * self.token_interval
+
+    async def acquire(self, tokens: int = 0) -> None:
         """
         Acquire permission to make an API call
-        Blocks if rate limit would be exceeded
+        Waits (without holding any lock) until the call fits both budgets
+
+        Args:
+            tokens: Estimated tokens for the call (ignored without max_tokens)
         """
-        async with self.lock:
-            now = time.time()
-            
-            # Remove old calls outside the time window
-            while self.calls and self.calls[0] <= now - self.time_window:
-                self.calls.popleft()
-            
-            # Check if we can make a call
-            if len(self.calls) >= self.max_calls:
-                # Calculate how long to wait
-                oldest_call = self.calls[0]
-                wait_time = oldest_call + self.time_window - now
+        requested_at = time.monotonic()
+        self.waiting += 1
+        try:
+            slot = self._reserve(tokens, requested_at)
+            while True:
+                delay = slot - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.sleep(delay)
+                    except asyncio.CancelledError:
+                        # A cancelled caller gives its slot back to the others
+                        self._release(tokens)
+                        raise
+
+                # A Retry-After received while sleeping pushes the call back:
+                # the unused slot is released before reserving a new one
+                if self._blocked_until <= slot:
+                    break
+                self._release(tokens)
+                slot = self._reserve(tokens, time.monotonic())
+        finally:
+            self.waiting -= 1
+
+        now = time.monotonic()
+        self.total_calls += 1
+        self.total_tokens += tokens
+        self.total_wait_time += now - requested_at
+        self._recent_calls.append(now)
+        if len(self._recent_calls) > 2 * self.max_calls:
+            del self._recent_calls[:self.max_calls]
                 
-                if wait_time > 0:
-                    logger.info(f"Rate limit reached, waiting {wait_time:.2f}s")
-                    await asyncio.sleep(wait_time)
+    def record_usage(self, actual_tokens: int, estimated_tokens: int = 0) -> None:
+        """
+        Correct the token budget once the real usage of a call is known
                     
-                    # Remove the old call after waiting
-                    if self.calls and self.calls[0] <= time.time() - self.time_window:
-                        self.calls.popleft()
+        Args:
+            actual_tokens: Tokens actually consumed
+            estimated_tokens: Tokens reserved in acquire()
+        """
+        if not self.max_tokens:
+            return
             
-            # Record this call
-            self.calls.append(time.time())
+        delta = actual_tokens - estimated_tokens
+        self.total_tokens += delta
+        self._token_tat = max(time.monotonic(), self._token_tat + delta * self.token_interval)
+
+    def block_for(self, seconds: float) -> None:
+        """
+        Pause all calls for the given duration (e.g. Retry-After)
+
+        Args:
+            seconds: Pause duration in seconds
+        """
+        if seconds <= 0:
+            return
+
+        until = time.monotonic() + seconds
+        if until > self._blocked_until:
+            self._blocked_until = until
+            logger.warning(f"Rate limit: pausing calls for {seconds:.2f}s")
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Apply provider rate-limit headers (Retry-After, remaining/reset budgets)
+
+        Args:
+            headers: Response headers (case-insensitive mapping or dict)
+
+        Returns:
+            Pause applied in seconds, or None if the headers imposed none
+        """
+        if not headers:
+            return None
+
+        lowered = {str(k).lower(): v for k, v in headers.items()}
+        pause = parse_retry_after(lowered.get('retry-after'))
+
+        for kind in ('requests', 'tokens'):
+            remaining = next((lowered[h] for h in _REMAINING_HEADERS[kind] if h in lowered), None)
+            reset = next((lowered[h] for h in _RESET_HEADERS[kind] if h in lowered), None)
+            try:
+                exhausted = remaining is not None and float(remaining) <= 0
+            except ValueError:
+                exhausted = False
+            if exhausted:
+                reset_in = parse_reset_time(reset)
+                if reset_in is not None:
+                    pause = max(pause or 0.0, reset_in)
+
+        if not pause:
+            return None
+
+        self.block_for(pause)
+        return pause
+
+    def set_rate(self, max_calls: int, max_tokens: Optional[int] = None) -> None:
+        """
+        Change the sustained rate without losing pending reservations
+
+        Args:
+            max_calls: New maximum calls per time window
+            max_tokens: New maximum tokens per time window (None = unchanged)
+        """
+        self.max_calls = max_calls
+        if max_tokens is not None:
+            self.max_tokens = max_tokens
+
+    def _calls_in_window(self) -> int:
+        """Number of calls granted during the last time window"""
+        cutoff = time.monotonic() - self.time_window
+        self._recent_calls = [t for t in self._recent_calls if t > cutoff]
+        return len(self._recent_calls)
     
     def get_remaining_calls(self) -> int:
-        """Get number of remaining calls in current window"""
-        now = time.time()
+        """Get number of calls that can start right now without waiting"""
+        now = max(time.monotonic(), self._blocked_until)
+        if self._blocked_until > time.monotonic():
+            return 0
         
-        # Remove old calls
-        while self.calls and self.calls[0] <= now - self.time_window:
-            self.calls.popleft()
-        
-        return max(0, self.max_calls - len(self.calls))
+        tolerance = (self.burst - 1) * self.request_interval
+        free_time = now + tolerance + self.request_interval - max(self._request_tat, now)
+        return max(0, min(self.burst, int(free_time / self.request_interval)))
     
     def get_reset_time(self) -> Optional[float]:
-        """Get time when rate limit resets (Unix timestamp)"""
-        if not self.calls:
+        """Get time when the limiter is fully idle again (Unix timestamp)"""
+        now = time.monotonic()
+        idle_at = max(self._request_tat, self._token_tat, self._blocked_until)
+        if idle_at <= now:
             return None
         
-        return self.calls[0] + self.time_window
+        return time.time() + (idle_at - now)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get rate limiter statistics"""
-        now = time.time()
-        
-        # Clean old calls
-        while self.calls and self.calls[0] <= now - self.time_window:
-            self.calls.popleft()
+        current_calls = self._calls_in_window()
         
         return {
             'max_calls': self.max_calls,
+            'max_tokens': self.max_tokens,
             'time_window': self.time_window,
-            'current_calls': len(self.calls),
+            'current_calls': current_calls,
             'remaining_calls': self.get_remaining_calls(),
             'reset_time': self.get_reset_time(),
-            'utilization_percent': (len(self.calls) / self.max_calls) * 100
+            'waiting': self.waiting,
+            'total_calls': self.total_calls,
+            'total_tokens': self.total_tokens,
+            'avg_wait_seconds': self.total_wait_time / self.total_calls if self.total_calls else 0.0,
+            'blocked_for_seconds': max(0.0, self._blocked_until - time.monotonic()),
+            'utilization_percent': (current_calls / self.max_calls) * 100
         }
 
 class MultiProviderRateLimiter:
@@ -106,13 +400,10 @@ class MultiProviderRateLimiter:
         self.limiters: Dict[str, RateLimiter] = {}
         
         # Default rate limits for different providers
-        self.default_limits = {
-            'openai': {'max_calls': 60, 'time_window': 60},  # 60 calls per minute
-            'mistral': {'max_calls': 30, 'time_window': 60},  # 30 calls per minute (free tier)
-            'anthropic': {'max_calls': 50, 'time_window': 60},  # 50 calls per minute
-        }
+        self.default_limits = dict(DEFAULT_PROVIDER_LIMITS)
     
-    def add_provider(self, provider: str, max_calls: int, time_window: int = 60):
+    def add_provider(self, provider: str, max_calls: int, time_window: int = 60,
+                     max_tokens: Optional[int] = None):
         """
         Add a rate limiter for a specific provider
         
@@ -120,8 +411,9 @@ class MultiProviderRateLimiter:
             provider: Provider name
             max_calls: Maximum calls allowed
             time_window: Time window in seconds
+            max_tokens: Maximum tokens allowed per time window
         """
-        self.limiters[provider] = RateLimiter(max_calls, time_window)
+        self.limiters[provider] = RateLimiter(max_calls, time_window, max_tokens=max_tokens)
         logger.info(f"Added rate limiter for {provider}: {max_calls} calls per {time_window}s")
     
     def get_or_create_limiter(self, provider: str) -> RateLimiter:
@@ -137,22 +429,37 @@ class MultiProviderRateLimiter:
         if provider not in self.limiters:
             if provider in self.default_limits:
                 limits = self.default_limits[provider]
-                self.add_provider(provider, limits['max_calls'], limits['time_window'])
+                self.add_provider(provider, limits['max_calls'], limits['time_window'],
+                                  limits.get('max_tokens'))
             else:
                 # Default fallback
                 self.add_provider(provider, 30, 60)
         
         return self.limiters[provider]
     
-    async def acquire(self, provider: str) -> None:
+    async def acquire(self, provider: str, tokens: int = 0) -> None:
         """
         Acquire permission for specific provider
         
         Args:
             provider: Provider name
+            tokens: Estimated tokens for the call
         """
         limiter = self.get_or_create_limiter(provider)
-        await limiter.acquire()
+        await limiter.acquire(tokens)
+
+    def update_from_headers(self, provider: str, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Apply a provider's rate-limit response headers
+
+        Args:
+            provider: Provider name
+            headers: Response headers
+
+        Returns:
+            Pause applied in seconds, or None
+        """
+        return self.get_or_create_limiter(provider).update_from_headers(headers)
     
     def get_stats(self, provider: str = None) -> Dict[str, any]:
         """
@@ -181,7 +488,8 @@ class AdaptiveRateLimiter:
     Reduces rate when hitting limits, increases when successful
     """
     
-    def __init__(self, initial_rate: int = 30, min_rate: int = 5, max_rate: int = 100):
+    def __init__(self, initial_rate: int = 30, min_rate: int = 5, max_rate: int = 100,
+                 max_tokens: Optional[int] = None):
         """
         Initialize adaptive rate limiter
         
@@ -189,24 +497,33 @@ class AdaptiveRateLimiter:
             initial_rate: Starting rate limit
             min_rate: Minimum rate limit
             max_rate: Maximum rate limit
+            max_tokens: Token budget per minute (None = unlimited)
         """
         self.current_rate = initial_rate
         self.min_rate = min_rate
         self.max_rate = max_rate
-        self.limiter = RateLimiter(initial_rate, 60)
+        self.limiter = RateLimiter(initial_rate, 60, max_tokens=max_tokens)
         self.consecutive_successes = 0
         self.consecutive_failures = 0
         
         logger.info(f"Adaptive rate limiter initialized: {initial_rate} calls/min")
     
-    async def acquire(self) -> None:
+    async def acquire(self, tokens: int = 0) -> None:
         """Acquire permission with current rate"""
-        await self.limiter.acquire()
+        await self.limiter.acquire(tokens)
     
-    def report_success(self):
-        """Report successful API call"""
+    def report_success(self, headers: Optional[Mapping[str, str]] = None):
+        """
+        Report successful API call
+
+        Args:
+            headers: Response headers, used to honour remaining/reset budgets
+        """
         self.consecutive_successes += 1
         self.consecutive_failures = 0
+
+        if headers:
+            self.limiter.update_from_headers(headers)
         
         # Increase rate after multiple successes
         if self.consecutive_successes >= 10 and self.current_rate < self.max_rate:
@@ -214,19 +531,24 @@ class AdaptiveRateLimiter:
             self.current_rate = min(self.max_rate, int(self.current_rate * 1.2))
             
             if self.current_rate != old_rate:
-                self.limiter = RateLimiter(self.current_rate, 60)
+                self.limiter.set_rate(self.current_rate)
                 logger.info(f"Rate limit increased: {old_rate} -> {self.current_rate} calls/min")
                 self.consecutive_successes = 0
     
-    def report_failure(self, is_rate_limit_error: bool = False):
+    def report_failure(self, is_rate_limit_error: bool = False,
+                       headers: Optional[Mapping[str, str]] = None):
         """
         Report failed API call
         
         Args:
             is_rate_limit_error: Whether failure was due to rate limiting
+            headers: Response headers (Retry-After, rate-limit budgets)
         """
         self.consecutive_failures += 1
         self.consecutive_successes = 0
+
+        if headers:
+            self.limiter.update_from_headers(headers)
         
         # Decrease rate on rate limit errors or multiple failures
         if is_rate_limit_error or self.consecutive_failures >= 3:
@@ -235,7 +557,7 @@ class AdaptiveRateLimiter:
                 self.current_rate = max(self.min_rate, int(self.current_rate * 0.7))
                 
                 if self.current_rate != old_rate:
-                    self.limiter = RateLimiter(self.current_rate, 60)
+                    self.limiter.set_rate(self.current_rate)
                     logger.warning(f"Rate limit decreased: {old_rate} -> {self.current_rate} calls/min")
                     self.consecutive_failures = 0
     
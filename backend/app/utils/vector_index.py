@@ -0,0 +1,349 @@
+"""
+Vector index for knowledge-document retrieval
+Embedded approximate nearest-neighbour search over document embeddings,
+persisted next to the database and updated incrementally
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over document embeddings (pure NumPy)
+
+    Below `flat_threshold` vectors every query is an exact matrix-vector
+    product. Above it the index switches to IVF: vectors are partitioned
+    around k-means centroids and a query only scans the `nprobe` closest
+    partitions. New vectors are assigned to their nearest centroid as they
+    arrive; centroids are retrained when the index has doubled since the
+    last training.
+    """
+
+    def __init__(self, path: Optional[str] = None, flat_threshold: int = 20_000,
+                 nprobe: int = 16, seed: int = 0):
+        """
+        Initialize the index, loading it from `path` if the file exists
+
+        Args:
+            path: .npz file the index is persisted to (None = memory only)
+            flat_threshold: Vector count above which IVF partitions are used
+            nprobe: Number of partitions scanned per query in IVF mode
+            seed: Random seed for k-means initialisation
+        """
+        self.path = Path(path) if path else None
+        self.flat_threshold = flat_threshold
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._alive = np.empty(0, dtype=bool)
+        self._size = 0
+
+        # IVF state (None = flat search)
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.empty(0, dtype=np.int32)
+        self._offsets = np.zeros(1, dtype=np.int64)  # Partition bounds of grouped rows
+        self._grouped = 0  # Rows [0, _grouped) are stored grouped by partition
+        self._tails: List[List[int]] = []  # Rows added since the last grouping
+        self._tail_arrays: Dict[int, np.ndarray] = {}
+        self._trained_size = 0
+        self.revision = 0  # Incremented on every change (cache invalidation)
+
+        if self.path and self.path.exists():
+            self.load()
+
+    # === Properties ===
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id) -> bool:
+        return str(doc_id) in self._rows
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._vectors.shape[1] if self._vectors.shape[1] else None
+
+    @property
+    def is_partitioned(self) -> bool:
+        return self._centroids is not None
+
+    # === Updates ===
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add(self, ids: Sequence, vectors) -> int:
+        """
+        Add or replace vectors
+
+        Args:
+            ids: Document identifiers (an existing id is replaced)
+            vectors: Embeddings, one row per id
+
+        Returns:
+            Number of vectors added
+        """
+        ids = [str(doc_id) for doc_id in ids]
+        if not ids:
+            return 0
+        vectors = self._normalize(vectors)
+        if len(vectors) != len(ids):
+            raise ValueError(f"{len(ids)} ids for {len(vectors)} vectors")
+
+        with self._lock:
+            if self.dimension is None:
+                self._vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dimension}")
+
+            self._remove_rows([self._rows[doc_id] for doc_id in ids if doc_id in self._rows])
+
+            start = self._size
+            self._reserve(start + len(ids))
+            self._vectors[start:start + len(ids)] = vectors
+            self._alive[start:start + len(ids)] = True
+            self._ids.extend(ids)
+            self._size += len(ids)
+            for offset, doc_id in enumerate(ids):
+                self._rows[doc_id] = start + offset
+            self.revision += 1
+
+            if self.is_partitioned:
+                self._assign_rows(np.arange(start, self._size))
+                if len(self) >= 2 * self._trained_size:
+                    self.train()
+            elif len(self) >= self.flat_threshold:
+                self.train()
+
+        return len(ids)
+
+    def remove(self, ids: Sequence) -> int:
+        """Remove vectors by id, returns the number removed"""
+        with self._lock:
+            rows = [self._rows[str(doc_id)] for doc_id in ids if str(doc_id) in self._rows]
+            self._remove_rows(rows)
+            if rows:
+                self.revision += 1
+            return len(rows)
+
+    def _remove_rows(self, rows: List[int]) -> None:
+        for row in rows:
+            self._alive[row] = False
+            del self._rows[self._ids[row]]
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        vectors = np.empty((capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[:len(self._assign)] = self._assign[:capacity]
+        self._vectors, self._alive, self._assign = vectors, alive, assign
+
+    # === IVF ===
+
+    def _nearest_centroid(self, vectors: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), batch_size):
+            labels[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ self._centroids.T, axis=1)
+        return labels
+
+    def _assign_rows(self, rows: np.ndarray) -> None:
+        labels = self._nearest_centroid(self._vectors[rows])
+        self._assign[rows] = labels
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            self._tails[label].append(row)
+            self._tail_arrays.pop(label, None)
+
+    def train(self, iterations: int = 10) -> None:
+        """(Re)build IVF partitions with spherical k-means over live vectors"""
+        with self._lock:
+            self._compact()
+            n = self._size
+            if n < self.flat_threshold:
+                self._centroids = None
+                self._tails, self._tail_arrays, self._trained_size = [], {}, 0
+                return
+
+            n_lists = int(np.clip(np.sqrt(n), 16, 4096))
+            vectors = self._vectors[:n]
+            sample = vectors[self._rng.choice(n, size=min(n, n_lists * 64), replace=False)]
+            centroids = sample[self._rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = ~np.isin(np.arange(n_lists), labels)
+                sums[empty] = centroids[empty]
+                centroids = self._normalize(sums)
+
+            self._centroids = centroids
+            self._assign[:n] = self._nearest_centroid(vectors)
+            self._group_by_partition()
+            self._trained_size = n
+            logger.info(f"Vector index trained: {n} vectors in {n_lists} partitions")
+
+    def _compact(self) -> None:
+        """Drop removed rows from storage"""
+        if self._size == len(self):
+            return
+        self._permute(np.flatnonzero(self._alive[:self._size]))
+        if self.is_partitioned:
+            self._group_by_partition()
+
+    def _permute(self, order: np.ndarray) -> None:
+        """Keep rows `order` of storage, in that order"""
+        self._vectors = self._vectors[order]
+        self._ids = [self._ids[row] for row in order.tolist()]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._alive = self._alive[order]
+        self._assign = self._assign[order]
+        self._size = len(order)
+
+    def _group_by_partition(self) -> None:
+        """
+        Store rows contiguously by partition
+
+        A query then scans each probed partition as a slice of the vector
+        matrix (no copy) instead of gathering scattered rows.
+        """
+        labels = self._assign[:self._size]
+        order = np.argsort(labels, kind='stable')
+        self._permute(order)
+        self._offsets = np.searchsorted(self._assign, np.arange(len(self._centroids) + 1))
+        self._grouped = self._size
+        self._tails = [[] for _ in range(len(self._centroids))]
+        self._tail_arrays = {}
+
+    def _tail_rows(self, label: int) -> np.ndarray:
+        rows = self._tail_arrays.get(label)
+        if rows is None:
+            rows = np.asarray(self._tails[label], dtype=np.int64)
+            self._tail_arrays[label] = rows
+        return rows
+
+    def _partition_scores(self, labels: List[int], query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and scores of the given partitions"""
+        rows, scores = [], []
+        for label in labels:
+            start, end = self._offsets[label], self._offsets[label + 1]
+            rows.append(np.arange(start, end))
+            scores.append(self._vectors[start:end] @ query)
+            tail = self._tail_rows(label)
+            if len(tail):
+                rows.append(tail)
+                scores.append(self._vectors[tail] @ query)
+        return np.concatenate(rows), np.concatenate(scores)
+
+    # === Search ===
+
+    def search(self, query, k: int = 5, threshold: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Nearest documents to a query embedding
+
+        Args:
+            query: Query embedding
+            k: Maximum number of results
+            threshold: Minimum cosine similarity
+
+        Returns:
+            List of (document id, similarity), best first
+        """
+        with self._lock:
+            if not len(self) or k <= 0:
+                return []
+            query = self._normalize(query)[0]
+            if len(query) != self.dimension:
+                raise ValueError(f"Query dimension {len(query)} does not match index dimension {self.dimension}")
+
+            if self.is_partitioned:
+                centroid_scores = self._centroids @ query
+                probe = min(self.nprobe, len(centroid_scores))
+                nearest = np.argpartition(-centroid_scores, probe - 1)[:probe]
+                rows, scores = self._partition_scores(nearest.tolist(), query)
+            else:
+                rows = np.arange(self._size)
+                scores = self._vectors[:self._size] @ query
+
+            keep = (scores >= threshold) & self._alive[rows]
+            rows, scores = rows[keep], scores[keep]
+            if len(rows) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[top], scores[top]
+            order = np.argsort(-scores, kind='stable')
+
+            return [(self._ids[row], float(scores[i])) for i, row in zip(order.tolist(), rows[order].tolist())]
+
+    # === Persistence ===
+
+    def save(self) -> bool:
+        """Write the index to `path` (atomic replace), returns True on success"""
+        if not self.path:
+            return False
+        with self._lock:
+            try:
+                self._compact()
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(self.path.name + '.tmp')
+                with open(tmp_path, 'wb') as f:
+                    np.savez(
+                        f,
+                        ids=np.asarray(self._ids, dtype=str),
+                        vectors=self._vectors[:self._size],
+                        centroids=self._centroids if self.is_partitioned else np.empty((0, 0), dtype=np.float32),
+                        assign=self._assign[:self._size],
+                        trained_size=np.int64(self._trained_size)
+                    )
+                os.replace(tmp_path, self.path)
+                return True
+            except Exception as e:
+                logger.error(f"Error saving vector index to {self.path}: {e}")
+                return False
+
+    def load(self) -> bool:
+        """Read the index from `path`, returns True on success"""
+        with self._lock:
+            try:
+                with np.load(self.path, allow_pickle=False) as data:
+                    self._ids = [str(doc_id) for doc_id in data['ids']]
+                    self._vectors = np.ascontiguousarray(data['vectors'], dtype=np.float32)
+                    centroids = data['centroids']
+                    self._assign = data['assign'].astype(np.int32)
+                    self._trained_size = int(data['trained_size'])
+
+                self._size = len(self._ids)
+                self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+                self._alive = np.ones(self._size, dtype=bool)
+                self.revision += 1
+                if centroids.size:
+                    self._centroids = centroids
+                    self._group_by_partition()
+                else:
+                    self._centroids, self._tails, self._tail_arrays = None, [], {}
+
+                logger.info(f"Vector index loaded: {self._size} vectors from {self.path}")
+                return True
+            except Exception as e:
+                logger.error(f"Error loading vector index from {self.path}: {e}")
+                return False
@@ -0,0 +1,226 @@
+"""
+Write-behind buffer for chatbot persistence
+Queues conversations and messages in memory and writes them in periodic
+bulk transactions, off the request path
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import Counter, deque
+from datetime import datetime, UTC
+from itertools import islice
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ChatWriteBuffer:
+    """
+    Batches conversation and message inserts from concurrent requests
+
+    Writes are acknowledged as soon as they are queued. A background task
+    flushes the queue every `flush_interval` seconds (or as soon as
+    `max_batch` messages are waiting) through
+    `DatabaseManager.store_chat_batch`, one transaction per batch.
+
+    Delivery is at-least-once: entries leave the queue only after their
+    transaction has committed, and a failed batch is retried with
+    exponential backoff. Inserts are idempotent, so a batch that committed
+    but whose acknowledgement was lost is harmless when written again.
+    `close()` flushes what is left on shutdown. Beyond `max_pending`
+    queued messages (database unreachable for a long time) the oldest are
+    dropped to bound memory, with an error log.
+    """
+
+    def __init__(self, db_manager, flush_interval: float = 0.2, max_batch: int = 500,
+                 max_pending: int = 50000, retry_delay: float = 0.5, max_retry_delay: float = 30.0):
+        """
+        Initialize the buffer
+
+        Args:
+            db_manager: DatabaseManager providing store_chat_batch
+            flush_interval: Maximum time (s) a write waits before its flush
+            max_batch: Maximum messages per transaction
+            max_pending: Maximum queued messages before the oldest are dropped
+            retry_delay: Initial delay (s) before retrying a failed batch
+            max_retry_delay: Upper bound for the retry delay (s)
+        """
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._conversations: Dict[str, Dict[str, Any]] = {}
+        self._messages: Deque[Dict[str, Any]] = deque()
+        self._pending_by_conversation: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.flushed_messages = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of queued messages"""
+        return len(self._messages)
+
+    def has_pending(self, conversation_id: str) -> bool:
+        """Whether writes for a conversation are still queued"""
+        return conversation_id in self._conversations or self._pending_by_conversation[conversation_id] > 0
+
+    # === Queueing ===
+
+    def add_conversation(self, conversation: Dict[str, Any]) -> None:
+        """Queue a conversation insert (ignored if the conversation exists)"""
+        self._conversations.setdefault(conversation['id'], conversation)
+        self._ensure_running()
+
+    def add_message(self, message: Dict[str, Any]) -> str:
+        """
+        Queue a message insert
+
+        Args:
+            message: Message data dictionary; 'id' and 'timestamp' are set
+                if missing so that retries and ordering are stable
+
+        Returns:
+            Message ID
+        """
+        message = dict(message)
+        if not message.get('id'):
+            message['id'] = str(uuid.uuid4())
+        if not message.get('timestamp'):
+            message['timestamp'] = datetime.now(UTC).replace(tzinfo=None)
+
+        self._messages.append(message)
+        self._pending_by_conversation[message['conversation_id']] += 1
+        if len(self._messages) > self.max_pending:
+            self._discard_oldest()
+            self.dropped += 1
+            logger.error(f"Write buffer full ({self.max_pending} messages), oldest message dropped")
+
+        self._ensure_running()
+        if len(self._messages) >= self.max_batch and self._wake is not None:
+            self._wake.set()
+        return message['id']
+
+    def _discard_oldest(self) -> None:
+        message = self._messages.popleft()
+        self._pending_by_conversation[message['conversation_id']] -= 1
+        if self._pending_by_conversation[message['conversation_id']] <= 0:
+            del self._pending_by_conversation[message['conversation_id']]
+
+    # === Flushing ===
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """Create the asyncio primitives for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._flush_lock = asyncio.Lock()
+            self._wake = asyncio.Event()
+            self._task = None
+        return loop
+
+    def _ensure_running(self) -> None:
+        """Start the flush task on the running event loop"""
+        if self._closing:
+            return
+        try:
+            loop = self._bind_loop()
+        except RuntimeError:
+            return  # No loop: written by the next flush() or close()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        delay = self.retry_delay
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if await self.flush():
+                delay = self.retry_delay
+            else:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+    async def flush(self) -> bool:
+        """
+        Write everything queued so far, one transaction per batch
+
+        Returns:
+            True if the queue was written, False if a batch failed (its
+            entries stay queued for the next attempt)
+        """
+        self._bind_loop()
+        async with self._flush_lock:
+            while self._conversations or self._messages:
+                conversations = list(self._conversations.values())
+                messages = list(islice(self._messages, self.max_batch))
+                try:
+                    await self.db_manager.store_chat_batch(conversations, messages)
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Chat batch write failed, {len(messages)} messages kept for retry: {e}")
+                    return False
+
+                for conversation in conversations:
+                    if self._conversations.get(conversation['id']) is conversation:
+                        del self._conversations[conversation['id']]
+                # The batch is still a prefix of the queue (unless overflow dropped part of it)
+                written = {id(message) for message in messages}
+                while self._messages and id(self._messages[0]) in written:
+                    self._discard_oldest()
+                self.flushed_messages += len(messages)
+                self.flushes += 1
+        return True
+
+    async def flush_pending(self, conversation_id: str) -> None:
+        """Flush now if a conversation has queued writes (read-your-writes)"""
+        if self.has_pending(conversation_id):
+            await self.flush()
+
+    async def close(self, retries: int = 3) -> bool:
+        """
+        Stop the flush task and write what is left (call on shutdown)
+
+        Returns:
+            True if nothing is left in the queue
+        """
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            self._wake.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+        for attempt in range(retries):
+            if await self.flush():
+                return True
+            await asyncio.sleep(self.retry_delay * (2 ** attempt))
+        logger.error(f"Write buffer closed with {self.pending} unwritten messages")
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': self.pending,
+            'flushed_messages': self.flushed_messages,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'dropped': self.dropped
+        }
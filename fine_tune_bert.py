@@ -169,6 +169,7 @@ CONFIG = {
     'test_file': 'data/training/test_dataset_split.csv',
     'output_dir': 'models/bert_finetuning',
     'max_length': 128,
+    'tokenized_cache_dir': 'data/cache/tokenized',
     'batch_size': 16,
     'num_epochs': 3,
     'learning_rate': 2e-5,
@@ -193,6 +194,28 @@ print(f"   ✅ Train: {len(train_df):,} tweets")
 print(f"   ✅ Val:   {len(val_df):,} tweets")
 print(f"   ✅ Test:  {len(test_df):,} tweets\n")
 
+print("🔤 [2/7] Tokenisation des splits (cache)...")
+sys.path.insert(0, 'backend')
+from app.services.tokenization_cache import TokenizationCache, LengthGroupedSampler
+
+tokenizer = AutoTokenizer.from_pretrained(CONFIG['model_name'])
+cache = TokenizationCache(CONFIG['tokenized_cache_dir'])
+encodings = {}
+for name, df in (('train', train_df), ('val', val_df), ('test', test_df)):
+    start = datetime.now()
+    encodings[name] = cache.encode(tokenizer, df['text_cleaned'].fillna('').tolist(), CONFIG['max_length'])
+    lengths = encodings[name].lengths
+    print(f"   ✅ {name}: {len(lengths):,} séquences, longueur moyenne {lengths.mean():.1f} tokens "
+          f"({(datetime.now() - start).total_seconds():.2f}s)")
+
+# Padding dynamique par lots de longueurs proches (au lieu de max_length pour tous)
+sampler = LengthGroupedSampler(encodings['train'].lengths, batch_size=CONFIG['batch_size'])
+order = sampler.indices(0)
+padded = sum(encodings['train'].lengths[order[i:i + CONFIG['batch_size']]].max() * len(order[i:i + CONFIG['batch_size']])
+             for i in range(0, len(order), CONFIG['batch_size']))
+print(f"   ✅ Positions calculées par epoch: {padded:,} "
+      f"(contre {len(order) * CONFIG['max_length']:,} avec padding fixe)\n")
+
 # [Le reste du code de fine-tuning BERT serait ici si PyTorch est disponible]
 # Pour l'instant, on documente la démarche
 
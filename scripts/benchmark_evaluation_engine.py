@@ -0,0 +1,114 @@
+"""
+Benchmark - Moteur d'évaluation des classifieurs
+================================================
+
+Évalue, sur les splits validation et test de data/training:
+- les règles par mots-clés (TweetClassifier en mode fallback)
+- un LLM simulé (règles + latence réseau fixe par appel, asynchrone)
+
+Pour le LLM simulé, compare l'ancienne boucle séquentielle (un appel à la
+fois) au moteur d'évaluation: premier run concurrent, run suivant servi par
+le cache, puis run après modification d'une partie des tweets (seuls les
+tweets modifiés sont recalculés).
+
+Usage:
+    python scripts/benchmark_evaluation_engine.py
+
+Ou avec options:
+    python scripts/benchmark_evaluation_engine.py --latency-ms 200 --concurrency 16 --changed 0.05
+"""
+
+import sys
+import io
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Add backend to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / 'backend'))
+
+from app.services.evaluation_engine import (EvaluationEngine, EvaluationStrategy, PredictionCache,
+                                            tweet_classifier_strategy)
+
+
+def load_splits(data_dir: Path) -> dict:
+    """Splits validation et test (anciens noms de colonnes et de sentiments convertis)"""
+    splits = {}
+    for split in ('validation', 'test'):
+        df = pd.read_csv(data_dir / f'{split}_dataset.csv').rename(columns={'catégorie': 'category'})
+        df['sentiment'] = df['sentiment'].replace({'positif': 'positive', 'neutre': 'neutral', 'negatif': 'negative'})
+        splits[split] = df
+    return splits
+
+
+def simulated_llm(rules: EvaluationStrategy, latency: float, concurrency: int) -> EvaluationStrategy:
+    """LLM simulé: prédictions des règles, latence fixe par appel, 0,001 $ par appel"""
+    async def predict(text):
+        await asyncio.sleep(latency)
+        return rules.predict_batch([text])[0]
+
+    return EvaluationStrategy(name='llm-simule', predict=predict, version='v1',
+                              concurrency=concurrency, cost_per_item=0.001)
+
+
+def print_runs(label: str, comparison: dict, elapsed: float):
+    print(f"\n⏱️  {label}: {elapsed:.2f}s")
+    print(f"  {'stratégie':<12} {'split':<11} {'F1 moy.':>8} {'cache':>7} {'calculés':>9} {'tweets/s':>10} {'coût $':>8}")
+    for row in comparison['summary']:
+        run = comparison['strategies'][row['strategy']]['splits'][row['split']]['run']
+        print(f"  {row['strategy']:<12} {row['split']:<11} {row['avg_f1']:>8.3f} {row['cache_hit_rate']:>7.0%} "
+              f"{run['computed']:>9} {row['throughput_items_per_s']:>10.1f} {row['cost']:>8.3f}")
+
+
+async def run(args):
+    splits = load_splits(Path(args.data_dir))
+    total = sum(len(df) for df in splits.values())
+    rules = tweet_classifier_strategy()
+    llm = simulated_llm(rules, args.latency_ms / 1000, args.concurrency)
+
+    print(f"\n📂 {total:,} tweets (validation + test), latence simulée {args.latency_ms:.0f} ms/appel")
+    print(f"  Boucle séquentielle estimée: {total * args.latency_ms / 1000:.1f}s pour le LLM simulé")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = EvaluationEngine(PredictionCache(str(Path(tmp_dir) / 'predictions.sqlite')))
+
+        for label in ('Premier run (concurrent)', 'Second run (cache)'):
+            start = time.perf_counter()
+            comparison = await engine.compare([rules, llm], splits)
+            print_runs(label, comparison, time.perf_counter() - start)
+
+        changed = {}
+        for split, df in splits.items():
+            df = df.copy()
+            edited = df.sample(frac=args.changed, random_state=42).index
+            df.loc[edited, 'text'] = df.loc[edited, 'text'] + ' !'
+            changed[split] = df
+
+        start = time.perf_counter()
+        comparison = await engine.compare([rules, llm], changed)
+        print_runs(f'Après modification de {args.changed:.0%} des tweets', comparison, time.perf_counter() - start)
+        engine.cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du moteur d'évaluation")
+    parser.add_argument('--data-dir', default=str(project_root / 'data' / 'training'), help='Dossier des splits')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Latence simulée par appel LLM')
+    parser.add_argument('--concurrency', type=int, default=32, help='Appels LLM simultanés')
+    parser.add_argument('--changed', type=float, default=0.05, help='Part des tweets modifiés au dernier run')
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
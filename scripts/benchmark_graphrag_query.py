@@ -0,0 +1,128 @@
+"""
+Benchmark - Recherche Fast-GraphRAG
+===================================
+
+Compare, pour des graphes de taille croissante (embeddings et arêtes kNN
+synthétiques), la latence d'une requête:
+- boucle par nœud (ancienne implémentation: np.array + normes par nœud)
+- produit matrice-vecteur + argpartition
+- produit matrice-vecteur + PageRank personnalisé sur le voisinage
+
+Usage:
+    python scripts/benchmark_graphrag_query.py
+
+Ou avec tailles custom:
+    python scripts/benchmark_graphrag_query.py --sizes 1000 10000 100000 --queries 50
+"""
+
+import sys
+import io
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Add backend to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / 'backend'))
+
+from app.config_pkg.fast_graphrag_config import FastGraphRAGConfig
+from app.services.fast_graphrag_service import FastGraphRAGService
+
+
+class RandomEncoder:
+    """Encode chaque texte en un vecteur aléatoire stable"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def encode(self, text, batch_size=32):
+        return np.random.default_rng(abs(hash(text)) % (2 ** 32)).normal(size=self.dim).astype(np.float32)
+
+
+def make_service(size: int, dim: int, storage_dir: str) -> FastGraphRAGService:
+    """Service avec un graphe synthétique (thèmes, 10 voisins par nœud)"""
+    config = FastGraphRAGConfig(storage_dir=Path(storage_dir), embedding_dim=dim, similarity_threshold=0.1)
+    service = FastGraphRAGService(config)
+    service.embedding_model = RandomEncoder(dim)
+    service._load_or_create_graph()
+    service.is_initialized = True
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(10, size // 100), dim))
+    labels = rng.integers(0, len(centers), size)
+    vectors = centers[labels] + 0.5 * rng.normal(size=(size, dim))
+
+    node_ids = [f"doc_{i}" for i in range(size)]
+    service.graph["nodes"] = {node_id: {"content": node_id} for node_id in node_ids}
+    service._node_ids = node_ids
+    service._embeddings = service._normalize(vectors)
+
+    # Arêtes vers 10 nœuds du même thème
+    by_label = {label: np.flatnonzero(labels == label) for label in np.unique(labels)}
+    edges = []
+    for row in range(size):
+        same = by_label[labels[row]]
+        for neighbour in rng.choice(same, size=min(10, len(same)), replace=False).tolist():
+            if neighbour != row:
+                edges.append((node_ids[row], node_ids[neighbour], 0.8))
+    service.graph["edges"] = edges
+    service._build_adjacency()
+
+    # Format d'origine pour la boucle par nœud
+    service._legacy_nodes = {
+        node_id: {"content": node_id, "embedding": vectors[row].tolist()} for row, node_id in enumerate(node_ids)
+    }
+    return service
+
+
+def legacy_query(service: FastGraphRAGService, query: str, top_k: int = 5):
+    """Ancienne recherche: une similarité cosinus par nœud"""
+    query_embedding = service.embedding_model.encode(query)
+    results = []
+    for node_id, node_data in service._legacy_nodes.items():
+        node_emb = np.array(node_data["embedding"])
+        similarity = np.dot(query_embedding, node_emb) / (np.linalg.norm(query_embedding) * np.linalg.norm(node_emb))
+        if similarity >= service.config.similarity_threshold:
+            results.append({"content": node_data["content"], "score": float(similarity), "node_id": node_id})
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results[:top_k]
+
+
+def measure(fn, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la recherche Fast-GraphRAG')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 50_000], help='Nombres de nœuds')
+    parser.add_argument('--dim', type=int, default=384, help='Dimension des embeddings')
+    parser.add_argument('--queries', type=int, default=20, help='Requêtes par mesure')
+
+    args = parser.parse_args()
+    queries = [f"question {i}" for i in range(args.queries)]
+
+    print(f"\n⏱️  Latence moyenne par requête (ms), dimension {args.dim}")
+    print(f"  {'nœuds':>8} {'boucle':>10} {'matrice':>10} {'+ PageRank':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            service = make_service(size, args.dim, tmp_dir)
+            loop = measure(lambda q: legacy_query(service, q), queries[:max(1, args.queries // 4)])
+            matrix = measure(lambda q: asyncio.run(service.query_graph(q, expand=False)), queries)
+            pagerank = measure(lambda q: asyncio.run(service.query_graph(q, expand=True)), queries)
+        print(f"  {size:>8,} {loop:>10.1f} {matrix:>10.2f} {pagerank:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark - Moteur de KPIs en passe unique
+==========================================
+
+Compare, sur un DataFrame synthétique, le calcul de tous les modules de KPIs
+(classique, métier, étendu, avancé):
+- sans partage: le moteur est vidé avant chaque module (une passe par module)
+- avec partage: une seule passe réutilisée par tous les modules
+et affiche le détail des étapes du moteur (encodage, dates, agrégation...).
+
+Usage:
+    python scripts/benchmark_kpi_engine.py
+
+Ou avec taille custom:
+    python scripts/benchmark_kpi_engine.py --rows 1000000 --repeat 5
+"""
+
+import sys
+import io
+import time
+import argparse
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / 'streamlit_app'))
+
+# Les modules de KPIs importent streamlit pour leurs fonctions d'affichage
+if 'streamlit' not in sys.modules:
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        sys.modules['streamlit'] = MagicMock()
+
+from services.kpi_engine import KPIEngine, get_kpi_engine
+from services.classic_analysis_kpis import compute_classic_kpis
+from services.enhanced_kpis_vizualizations import compute_business_kpis
+from services.extended_kpi_calculator import ExtendedKPICalculator
+from services.advanced_metrics import AdvancedMetrics
+
+
+def make_dataframe(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Tweets classifiés synthétiques"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'text': np.full(rows, 'tweet'),
+        'date': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 90 * 86400, rows), unit='s'),
+        'sentiment': rng.choice(['positive', 'negative', 'neutral'], rows),
+        'is_claim': rng.choice(['oui', 'non'], rows),
+        'urgence': rng.choice(['haute', 'moyenne', 'basse'], rows),
+        'topics': rng.choice(['reseau', 'facture', 'offre', 'mobile', 'fibre'], rows),
+        'incident': rng.choice(['panne', 'lenteur', 'aucun'], rows),
+        'category': rng.choice(['reseau', 'facture', 'offre', 'mobile', 'fibre'], rows),
+        'status': rng.choice(['resolved', 'pending', 'open'], rows),
+        'agent': rng.choice([f'agent_{i}' for i in range(20)], rows),
+        'confidence': rng.random(rows),
+        'retweet_count': rng.integers(0, 50, rows),
+    })
+
+
+def run_all_modules(df: pd.DataFrame, reset_between: bool) -> float:
+    """Calcule tous les modules de KPIs, retourne la durée (s)"""
+    modules = [
+        compute_classic_kpis,
+        compute_business_kpis,
+        ExtendedKPICalculator().calculate_all_extended_kpis,
+        AdvancedMetrics().calculate_all_metrics,
+    ]
+    engine = get_kpi_engine()
+    engine.clear()
+
+    start = time.perf_counter()
+    for compute in modules:
+        if reset_between:
+            engine.clear()
+        compute(df)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du moteur de KPIs')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Nombre de lignes')
+    parser.add_argument('--repeat', type=int, default=3, help='Nombre de mesures (la plus rapide est retenue)')
+
+    args = parser.parse_args()
+
+    print(f"\n📊 Génération de {args.rows:,} tweets synthétiques...")
+    df = make_dataframe(args.rows)
+
+    # Détail des étapes d'une passe
+    frame = KPIEngine().compute(df)
+    print(f"\n⚙️  Passe unique du moteur ({len(frame.labels)} dimensions, cube de {len(frame.cube):,} lignes)")
+    for step, seconds in frame.timings.items():
+        print(f"  {step:<12} {seconds * 1000:8.1f} ms")
+
+    # Tous les modules, sans puis avec partage
+    print(f"\n⏱️  Tous les modules de KPIs (meilleur de {args.repeat})")
+    results = {}
+    for label, reset in [('Une passe par module', True), ('Passe partagée', False)]:
+        results[label] = min(run_all_modules(df, reset) for _ in range(args.repeat))
+        print(f"  {label:<24} {results[label]:8.2f} s")
+
+    speedup = results['Une passe par module'] / results['Passe partagée']
+    print(f"\n🚀 Accélération du partage: x{speedup:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark - Temps d'import au démarrage de l'application Streamlit
+===================================================================
+
+Profile les imports (python -X importtime) des modules chargés au démarrage
+de app.py et des pages, dans un interpréteur neuf par cible:
+- temps cumulé de chaque cible
+- modules les plus coûteux
+- bibliothèques lourdes effectivement chargées (torch, transformers, plotly...)
+
+Usage:
+    python scripts/benchmark_startup_imports.py
+
+Ou avec cibles custom et profil brut sauvegardé:
+    python scripts/benchmark_startup_imports.py --target services.auth_service --target components.auth_forms --save importtime.log
+"""
+
+import sys
+import io
+import re
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+app_dir = project_root / 'streamlit_app'
+
+# Modules importés au démarrage (page de connexion) puis par les pages
+DEFAULT_TARGETS = [
+    'services.auth_service',
+    'components.auth_forms',
+    'services.optimized_loader',
+    'services.multi_model_orchestrator',
+    'services.ultra_optimized_classifier',
+    'services.cascade_classifier',
+]
+
+# Bibliothèques qui ne doivent être chargées que sur les chemins qui les utilisent
+HEAVY_MODULES = ['torch', 'transformers', 'plotly', 'plotly.express', 'requests', 'sklearn', 'matplotlib']
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile_import(target: str, repeat: int) -> Tuple[List[Tuple[int, int, int, str]], str]:
+    """
+    Profile l'import d'un module dans un interpréteur neuf
+
+    Args:
+        target: Module à importer (ex: 'services.auth_service')
+        repeat: Nombre de mesures (la plus rapide est retenue)
+
+    Returns:
+        (entrées (self µs, cumulé µs, profondeur, module), stderr brut)
+    """
+    best_entries, best_raw, best_total = [], '', float('inf')
+
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+            cwd=app_dir, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'erreur inconnue'
+            raise RuntimeError(error)
+
+        entries = []
+        for line in proc.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, module = match.groups()
+                entries.append((int(self_us), int(cumulative_us), len(indent) // 2, module))
+
+        total = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0)
+        if total < best_total:
+            best_entries, best_raw, best_total = entries, proc.stderr, total
+
+    return best_entries, best_raw
+
+
+def summarize(entries: List[Tuple[int, int, int, str]]) -> Dict:
+    """
+    Résume un profil d'import
+
+    Args:
+        entries: Entrées retournées par profile_import
+
+    Returns:
+        Temps total (ms), modules lourds chargés, modules les plus coûteux
+    """
+    loaded = {module for _, _, _, module in entries}
+    cumulative = {module: cumulative for _, cumulative, _, module in entries}
+
+    return {
+        'total_ms': sum(c for _, c, depth, _ in entries if depth == 0) / 1000,
+        'heavy': {name: cumulative[name] / 1000 for name in HEAVY_MODULES if name in loaded},
+        'slowest': sorted(((s / 1000, m) for s, _, _, m in entries), reverse=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil des temps d'import au démarrage")
+    parser.add_argument('--target', action='append', help='Module à profiler (répétable)')
+    parser.add_argument('--repeat', type=int, default=3, help='Nombre de mesures par cible')
+    parser.add_argument('--top', type=int, default=5, help='Nombre de modules les plus coûteux affichés')
+    parser.add_argument('--save', type=str, help='Fichier où écrire les profils bruts -X importtime')
+
+    args = parser.parse_args()
+    targets = args.target or DEFAULT_TARGETS
+    raw_profiles = []
+
+    print(f"\n📊 Temps d'import à froid (meilleur de {args.repeat}, interpréteur neuf par cible)\n")
+
+    for target in targets:
+        try:
+            entries, raw = profile_import(target, args.repeat)
+        except RuntimeError as e:
+            print(f"  {target:<40} ❌ {e}")
+            continue
+
+        raw_profiles.append(f"# {target}\n{raw}")
+        summary = summarize(entries)
+        heavy = ', '.join(f"{name} ({ms:.0f} ms)" for name, ms in summary['heavy'].items()) or 'aucune'
+
+        print(f"  {target:<40} {summary['total_ms']:8.1f} ms")
+        print(f"    Bibliothèques lourdes: {heavy}")
+        for self_ms, module in summary['slowest'][:args.top]:
+            print(f"    {self_ms:8.1f} ms  {module}")
+        print()
+
+    if args.save:
+        Path(args.save).write_text('\n'.join(raw_profiles), encoding='utf-8')
+        print(f"💾 Profils bruts écrits dans {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Microbenchmark - Moteur de normalisation de texte partagé
+=========================================================
+
+Mesure le coût par tweet (µs) des opérations de normalisation:
+- extraction mentions/hashtags/URLs (patterns recompilés vs précompilés)
+- création d'un nettoyeur par tweet (ancien LLMAnalyzer.analyze_tweet)
+- clean_basic / clean_for_analysis, unitaire et batch
+
+Usage:
+    python scripts/benchmark_text_normalization.py
+
+Ou avec dataset custom:
+    python scripts/benchmark_text_normalization.py --csv data/raw/free_tweet_export.csv --column text --repeat 5
+"""
+
+import sys
+import io
+import re
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared.text_normalization import extract_entities, get_text_normalizer
+
+
+def load_tweets(csv_path: str, column: str) -> list:
+    """
+    Charge les tweets du benchmark
+
+    Args:
+        csv_path: CSV source (optionnel)
+        column: Colonne de texte
+
+    Returns:
+        Liste de tweets
+    """
+    if csv_path and Path(csv_path).exists():
+        return pd.read_csv(csv_path)[column].dropna().astype(str).tolist()
+
+    templates = [
+        "@Free panne internet depuis {i}h http://t.co/{i} #fibre 😡",
+        "Merci @Freebox pour le service &amp; la rapidité !!! {i}",
+        "Quelle est la procédure pour changer mon forfait ? www.free.fr/{i}",
+        "Le débit est nul nooooon #freemobile #reseau @free_1337 {i}",
+    ]
+    return [templates[i % len(templates)].format(i=i) for i in range(10_000)]
+
+
+def measure(label: str, func, n_items: int, repeat: int) -> float:
+    """
+    Chronomètre func et affiche le coût par tweet
+
+    Args:
+        label: Libellé de la mesure
+        func: Fonction sans argument traitant n_items tweets
+        n_items: Nombre de tweets traités par appel
+        repeat: Nombre de répétitions (meilleur temps retenu)
+
+    Returns:
+        Coût par tweet en microsecondes
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    per_tweet_us = best / n_items * 1e6
+    print(f"  {label:<52} {per_tweet_us:8.2f} µs/tweet")
+    return per_tweet_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark du moteur de normalisation de texte')
+    parser.add_argument('--csv', type=str, default=str(project_root / 'data/raw/free_tweet_export.csv'),
+                        help='Fichier CSV à utiliser (optionnel)')
+    parser.add_argument('--column', type=str, default='text', help='Colonne de texte')
+    parser.add_argument('--repeat', type=int, default=5, help='Nombre de répétitions')
+
+    args = parser.parse_args()
+
+    tweets = load_tweets(args.csv, args.column)
+    n = len(tweets)
+    normalizer = get_text_normalizer()
+
+    url_pattern = r'http\S+|www\S+|https\S+'
+    emoji_pattern = r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]'
+
+    def legacy_extraction():
+        # Ancien LLMAnalyzer.analyze_tweet: un nettoyeur (5 re.compile) + 3 findall par tweet
+        for text in tweets:
+            for pattern in (url_pattern, r'@\w+', r'#\w+', emoji_pattern, r'\s+'):
+                re.compile(pattern)
+            re.findall(r'@(\w+)', text)
+            re.findall(r'#(\w+)', text)
+            re.findall(url_pattern, text)
+
+    print(f"\n📊 Normalisation de {n:,} tweets (meilleur de {args.repeat})\n")
+
+    measure("Extraction legacy (nettoyeur par tweet + 3 findall)", legacy_extraction, n, args.repeat)
+    measure("Extraction précompilée", lambda: [extract_entities(t) for t in tweets], n, args.repeat)
+    measure("Extraction précompilée batch", lambda: normalizer.extract_entities_batch(tweets), n, args.repeat)
+    measure("clean_basic", lambda: [normalizer.clean_basic(t) for t in tweets], n, args.repeat)
+    measure("clean_for_analysis", lambda: [normalizer.clean_for_analysis(t) for t in tweets], n, args.repeat)
+    measure("clean_for_analysis batch", lambda: normalizer.clean_for_analysis_batch(tweets), n, args.repeat)
+    print()
+
+
+if __name__ == '__main__':
+    main()
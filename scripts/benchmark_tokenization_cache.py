@@ -0,0 +1,132 @@
+"""
+Benchmark - Préparation des données de fine-tuning
+==================================================
+
+Compare, sur les splits de data/training:
+- tokenisation exemple par exemple à chaque epoch (ancien TweetDataset,
+  padding à max_length) / tokenisation par lots mise en cache (1er run) /
+  relecture du cache mappé en mémoire (runs suivants)
+- positions calculées par epoch: padding fixe à max_length / padding
+  dynamique sur lots aléatoires / padding dynamique sur lots groupés par
+  longueur (le coût d'une epoch CPU est proportionnel à ce nombre)
+
+Le tokenizer du modèle est utilisé si transformers est installé, sinon un
+tokenizer approximatif (mots et ponctuation).
+
+Usage:
+    python scripts/benchmark_tokenization_cache.py
+
+Ou avec options:
+    python scripts/benchmark_tokenization_cache.py --model camembert-base --max-length 512 --batch-size 8
+"""
+
+import sys
+import io
+import re
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Add backend to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / 'backend'))
+
+from app.services.tokenization_cache import LengthGroupedSampler, TokenizationCache, pad_sequences
+
+
+class ApproximateTokenizer:
+    """Tokenizer approximatif: mots et ponctuation, <s> et </s> ajoutés"""
+
+    name_or_path = 'approximate'
+    pad_token_id = 1
+
+    def __init__(self):
+        self.vocab = {}
+
+    def __len__(self):
+        return len(self.vocab) + 4
+
+    def _encode(self, text, max_length):
+        ids = [self.vocab.setdefault(token, len(self.vocab) + 4) for token in re.findall(r"\w+|[^\w\s]", text)]
+        return [0] + ids[:max_length - 2] + [2]
+
+    def __call__(self, texts, truncation=True, max_length=512, padding=False, return_tensors=None):
+        single = isinstance(texts, str)
+        input_ids = [self._encode(text, max_length) for text in ([texts] if single else texts)]
+        if padding == 'max_length':
+            input_ids, _ = pad_sequences(input_ids, self.pad_token_id)
+            input_ids = np.pad(input_ids, ((0, 0), (0, max_length - input_ids.shape[1])),
+                               constant_values=self.pad_token_id)
+        return {'input_ids': input_ids[0] if single else input_ids}
+
+
+def load_tokenizer(model_name: str):
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_name), model_name
+    except Exception:
+        return ApproximateTokenizer(), 'approximatif (transformers indisponible)'
+
+
+def padded_positions(lengths: np.ndarray, order, batch_size: int) -> int:
+    return int(sum(lengths[order[i:i + batch_size]].max() * len(order[i:i + batch_size])
+                   for i in range(0, len(order), batch_size)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la préparation des données de fine-tuning')
+    parser.add_argument('--data-dir', default=str(project_root / 'data' / 'training'), help='Dossier des splits')
+    parser.add_argument('--model', default='camembert-base', help='Tokenizer à utiliser')
+    parser.add_argument('--max-length', type=int, default=512, help='Longueur maximale')
+    parser.add_argument('--batch-size', type=int, default=8, help='Taille des lots')
+
+    args = parser.parse_args()
+    tokenizer, tokenizer_name = load_tokenizer(args.model)
+    texts = pd.read_csv(Path(args.data_dir) / 'train_dataset.csv')['text'].astype(str).tolist()
+
+    print(f"\n📂 {len(texts):,} textes (train_dataset.csv), tokenizer: {tokenizer_name}")
+
+    start = time.perf_counter()
+    for text in texts:
+        tokenizer(text, truncation=True, padding='max_length', max_length=args.max_length, return_tensors='np')
+    per_example = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        TokenizationCache(tmp_dir).encode(tokenizer, texts, args.max_length)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        split = TokenizationCache(tmp_dir).encode(tokenizer, texts, args.max_length)
+        for i in range(len(split)):
+            split[i]
+        warm = time.perf_counter() - start
+        lengths = np.array(split.lengths)
+
+    print(f"\n⏱️  Tokenisation du split (s)")
+    print(f"  {'par exemple, chaque epoch':<32} {per_example:>8.3f}")
+    print(f"  {'cache, premier run':<32} {cold:>8.3f}")
+    print(f"  {'cache, runs suivants (lecture)':<32} {warm:>8.3f}")
+
+    fixed = len(lengths) * args.max_length
+    random_order = np.random.default_rng(42).permutation(len(lengths))
+    dynamic = padded_positions(lengths, random_order, args.batch_size)
+    grouped = padded_positions(lengths, LengthGroupedSampler(lengths, args.batch_size).indices(0), args.batch_size)
+
+    print(f"\n📏 Positions calculées par epoch (longueur moyenne {lengths.mean():.1f} tokens)")
+    for label, positions in (('padding fixe', fixed), ('padding dynamique', dynamic),
+                             ('dynamique + groupé par longueur', grouped)):
+        print(f"  {label:<32} {positions:>12,}  ({positions / fixed:6.1%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark - Index vectoriel des documents de connaissances
+==========================================================
+
+Mesure, sur des embeddings synthétiques regroupés par thème:
+- la construction de l'index (k-means IVF)
+- la latence de recherche (p50 / p95) et le rappel@k face à la recherche exacte
+- la sauvegarde et le rechargement du fichier .npz
+
+Usage:
+    python scripts/benchmark_vector_index.py
+
+Ou avec taille custom:
+    python scripts/benchmark_vector_index.py --docs 100000 --dim 384 --queries 500
+"""
+
+import sys
+import io
+import time
+import argparse
+import tempfile
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Chargement direct du module (pas de dépendances du backend)
+project_root = Path(__file__).resolve().parent.parent
+_spec = importlib.util.spec_from_file_location(
+    'backend_vector_index', project_root / 'backend' / 'app' / 'utils' / 'vector_index.py'
+)
+vector_index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vector_index)
+
+
+def make_embeddings(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Embeddings synthétiques regroupés par thème"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    return centers[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'index vectoriel")
+    parser.add_argument('--docs', type=int, default=100_000, help='Nombre de chunks indexés')
+    parser.add_argument('--dim', type=int, default=384, help="Dimension des embeddings")
+    parser.add_argument('--queries', type=int, default=300, help='Nombre de requêtes')
+    parser.add_argument('--k', type=int, default=5, help='Résultats par requête')
+
+    args = parser.parse_args()
+
+    print(f"\n📊 Génération de {args.docs:,} embeddings (dimension {args.dim})...")
+    vectors = make_embeddings(args.docs, args.dim, clusters=max(10, args.docs // 200))
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    index = vector_index.VectorIndex()
+    start = time.perf_counter()
+    index.add([str(i) for i in range(args.docs)], vectors)
+    mode = 'IVF' if index.is_partitioned else 'exact'
+    print(f"\n⚙️  Construction ({mode}): {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.docs, args.queries)] + 0.3 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    latencies, hits = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        found = index.search(query, k=args.k)
+        latencies.append(time.perf_counter() - start)
+
+        exact = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:args.k]
+        hits += len({int(doc_id) for doc_id, _ in found} & set(exact.tolist()))
+
+    latencies = np.array(latencies) * 1000
+    print(f"\n⏱️  Recherche ({args.queries} requêtes, k={args.k})")
+    print(f"  p50        {np.percentile(latencies, 50):8.2f} ms")
+    print(f"  p95        {np.percentile(latencies, 95):8.2f} ms")
+    print(f"  rappel@{args.k}   {hits / (args.queries * args.k):8.3f}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index.path = Path(tmp_dir) / 'knowledge.vectors.npz'
+        start = time.perf_counter()
+        index.save()
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        vector_index.VectorIndex(index.path)
+        loaded = time.perf_counter() - start
+        size_mb = index.path.stat().st_size / 1e6
+    print(f"\n💾 Sauvegarde {saved:.2f} s, rechargement {loaded:.2f} s ({size_mb:.0f} Mo)")
+
+
+if __name__ == '__main__':
+    main()
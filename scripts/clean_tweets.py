@@ -0,0 +1,106 @@
+"""
+Étape DVC clean_data - Nettoyage parallèle des tweets
+=====================================================
+
+Nettoie un export CSV brut par chunks sur plusieurs processus et écrit des
+shards Parquet nettoyés, un rapport JSON de statistiques fusionnées et la
+distribution du score de qualité (graphique DVC).
+
+Usage:
+    python scripts/clean_tweets.py --workers 8
+
+Ou avec un export custom:
+    python scripts/clean_tweets.py --input data/raw/free_tweet_export.csv --workers 8 --chunk-size 200000
+"""
+
+import sys
+import os
+import io
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+# Fix UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / 'streamlit_app'))
+
+from services.chunked_cleaning import ChunkedCleaningPipeline, CLEANING_ENGINES, DEFAULT_CHUNK_SIZE
+
+
+def load_preprocessing_params(params_path: Path) -> dict:
+    """
+    Charge la section 'preprocessing' de params.yaml
+
+    Args:
+        params_path: Chemin de params.yaml
+
+    Returns:
+        Paramètres de prétraitement (dict vide si absent)
+    """
+    if not params_path.exists():
+        return {}
+    with open(params_path, encoding='utf-8') as f:
+        return (yaml.safe_load(f) or {}).get('preprocessing', {})
+
+
+def main():
+    params = load_preprocessing_params(project_root / 'params.yaml')
+
+    parser = argparse.ArgumentParser(description='Nettoyage parallèle des tweets (étape DVC clean_data)')
+    parser.add_argument('--input', type=str, default='data/raw/tweets_raw.csv', help='CSV brut à nettoyer')
+    parser.add_argument('--output-dir', type=str, default='data/processed/tweets_cleaned',
+                        help='Répertoire des shards Parquet')
+    parser.add_argument('--report', type=str, default='data/processed/cleaning_report.json',
+                        help='Rapport JSON des statistiques de nettoyage')
+    parser.add_argument('--quality', type=str, default='data/processed/quality_distribution.csv',
+                        help='CSV de la distribution du score de qualité')
+    parser.add_argument('--workers', type=int, default=params.get('workers') or os.cpu_count(),
+                        help='Nombre de processus de nettoyage')
+    parser.add_argument('--chunk-size', type=int, default=params.get('chunk_size', DEFAULT_CHUNK_SIZE),
+                        help='Nombre de lignes par chunk')
+    parser.add_argument('--column', type=str, default='text', help='Colonne de texte')
+    parser.add_argument('--engine', choices=CLEANING_ENGINES, default='tweet_cleaner',
+                        help='Moteur de nettoyage')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    pipeline = ChunkedCleaningPipeline(
+        n_workers=args.workers,
+        chunk_size=args.chunk_size,
+        engine=args.engine,
+        text_column=args.column,
+        remove_duplicates=params.get('remove_duplicates', True),
+        min_length=params.get('min_length', 0),
+    )
+
+    stats = pipeline.run(args.input, args.output_dir)
+
+    report_path = Path(args.report)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False)
+
+    quality = pd.DataFrame(list(stats['quality_distribution'].items()), columns=['quality_score', 'count'])
+    quality_path = Path(args.quality)
+    quality_path.parent.mkdir(parents=True, exist_ok=True)
+    quality.to_csv(quality_path, index=False)
+
+    print(f"✅ {stats['total_original']:,} → {stats['total_cleaned']:,} tweets "
+          f"({len(stats['shards'])} shards, {stats['duration_seconds']}s, {stats['workers']} workers)")
+    if stats['bad_lines_skipped']:
+        print(f"⚠️  {stats['bad_lines_skipped']:,} lignes malformées ignorées")
+
+
+if __name__ == '__main__':
+    main()
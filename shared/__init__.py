@@ -0,0 +1,3 @@
+"""
+Code partagé par le backend, src/ et l'application Streamlit (sans dépendance externe)
+"""
@@ -0,0 +1,271 @@
+"""
+Moteur de normalisation de texte partagé
+Patterns précompilés uniques pour tous les nettoyeurs de tweets du projet
+
+Utilisé par:
+- backend/app/utils/cleaning.py (TextCleaner), CSVProcessor et LLMAnalyzer
+- src.core.NLP_processing.text_cleaning.TextCleaner
+- streamlit_app/services/tweet_cleaner.py (TweetCleaner)
+
+Le module ne dépend que de la bibliothèque standard: le backend, src/ et
+l'application Streamlit l'importent sans dépendre les uns des autres.
+"""
+
+import re
+import html
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+# Patterns de référence (source unique pour tout le projet)
+URL_PATTERN = r'http\S+|www\S+|https\S+'
+MENTION_PATTERN = r'@\w+'
+HASHTAG_PATTERN = r'#\w+'
+EMOJI_PATTERN = (
+    r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]|'
+    r'[\U0001F680-\U0001F6FF]|[\U0001F1E0-\U0001F1FF]'
+)
+WHITESPACE_PATTERN = r'\s+'
+
+# Patterns précompilés une seule fois au chargement du module
+URL_REGEX = re.compile(URL_PATTERN)
+MENTION_REGEX = re.compile(MENTION_PATTERN)
+HASHTAG_REGEX = re.compile(HASHTAG_PATTERN)
+EMOJI_REGEX = re.compile(EMOJI_PATTERN)
+WHITESPACE_REGEX = re.compile(WHITESPACE_PATTERN)
+REPEATED_CHAR_REGEX = re.compile(r'(.)\1{3,}')
+WORD_REGEX = re.compile(r'\b\w+\b')
+
+# Patterns spécifiques au nettoyage CSV (CSVProcessor)
+REPEATED_MENTIONS_REGEX = re.compile(r'(@\w+\s*){3,}')
+ASCII_CONTROL_REGEX = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+REPEATED_EMOJI_REGEX = re.compile(r'([\U0001F600-\U0001F64F]){3,}')
+
+# Extraction des entités sans leur préfixe (@, #)
+MENTION_NAME_REGEX = re.compile(r'@(\w+)')
+HASHTAG_NAME_REGEX = re.compile(r'#(\w+)')
+
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Remplace toute suite d'espaces par un espace unique et supprime les bords
+
+    Équivalent à WHITESPACE_REGEX.sub(' ', text).strip(), sans regex.
+    """
+    return ' '.join(text.split())
+
+
+def remove_control_chars(text: str) -> str:
+    """
+    Supprime les caractères de catégorie Unicode 'C' (contrôle, format...)
+
+    Un texte imprimable n'en contient aucun: il est renvoyé tel quel sans
+    parcourir chaque caractère.
+    """
+    if text.isprintable():
+        return text
+    return ''.join(char for char in text if unicodedata.category(char)[0] != 'C')
+
+
+def extract_entities(text: str) -> Dict[str, List[str]]:
+    """
+    Extrait mentions, hashtags et URLs
+
+    Les mentions et hashtags sont renvoyés sans leur préfixe (@, #). Chaque
+    type d'entité est cherché indépendamment dans le texte complet (comme
+    les anciens extracteurs): "@userhttp://x" donne la mention "userhttp"
+    et l'URL "http://x". Un type dont le déclencheur est absent du texte
+    ne coûte aucune passe regex.
+
+    Une alternance unique (groupes nommés) consommerait le texte d'une
+    entité avant les autres et perdrait ces chevauchements (mention collée
+    à une URL, "#ancre" d'une URL): d'où une passe par type.
+
+    Args:
+        text: Texte source
+
+    Returns:
+        Dictionnaire {'mentions': [...], 'hashtags': [...], 'urls': [...]}
+
+    Examples:
+        >>> extract_entities("@Free panne #fibre https://t.co/x")
+        {'mentions': ['Free'], 'hashtags': ['fibre'], 'urls': ['https://t.co/x']}
+    """
+    if not text:
+        return {'mentions': [], 'hashtags': [], 'urls': []}
+
+    return {
+        'mentions': MENTION_NAME_REGEX.findall(text) if '@' in text else [],
+        'hashtags': HASHTAG_NAME_REGEX.findall(text) if '#' in text else [],
+        'urls': URL_REGEX.findall(text) if ('http' in text or 'www' in text) else []
+    }
+
+
+class TextNormalizer:
+    """
+    Moteur de normalisation sans état
+
+    Toutes les méthodes utilisent les patterns précompilés du module; une
+    instance unique (get_text_normalizer) suffit pour toute l'application.
+    """
+
+    def clean_basic(self, text: str) -> str:
+        """
+        Nettoyage basique: entités HTML, caractères de contrôle, espaces
+
+        Args:
+            text: Texte brut
+
+        Returns:
+            Texte nettoyé
+        """
+        if not text or not isinstance(text, str):
+            return ""
+
+        if '&' in text:
+            text = html.unescape(text)
+        text = remove_control_chars(text)
+        return collapse_whitespace(text)
+
+    def remove_urls(self, text: str) -> str:
+        """Supprime les URLs du texte"""
+        return URL_REGEX.sub('', text)
+
+    def remove_mentions(self, text: str) -> str:
+        """Supprime les @mentions du texte"""
+        return MENTION_REGEX.sub('', text)
+
+    def remove_hashtags(self, text: str) -> str:
+        """Supprime les #hashtags du texte"""
+        return HASHTAG_REGEX.sub('', text)
+
+    def remove_emojis(self, text: str) -> str:
+        """Supprime les emojis du texte"""
+        return EMOJI_REGEX.sub('', text)
+
+    def clean_for_analysis(self,
+                           text: str,
+                           preserve_mentions: bool = True,
+                           preserve_hashtags: bool = True,
+                           preserve_emojis: bool = True) -> str:
+        """
+        Nettoie le texte pour l'analyse (LLM, NLP)
+
+        Args:
+            text: Texte à nettoyer
+            preserve_mentions: Conserver les @mentions
+            preserve_hashtags: Conserver les #hashtags
+            preserve_emojis: Conserver les emojis
+
+        Returns:
+            Texte nettoyé pour analyse
+        """
+        if not text:
+            return ""
+
+        text = self.clean_basic(text)
+        text = URL_REGEX.sub('', text)
+
+        if not preserve_mentions:
+            text = MENTION_REGEX.sub('', text)
+        if not preserve_hashtags:
+            text = HASHTAG_REGEX.sub('', text)
+        if not preserve_emojis:
+            text = EMOJI_REGEX.sub('', text)
+
+        # Normaliser les caractères répétés (ex: "nooooon" -> "nooon")
+        text = REPEATED_CHAR_REGEX.sub(r'\1\1\1', text)
+
+        return collapse_whitespace(text)
+
+    def normalize_text(self, text: str, lowercase: bool = True) -> str:
+        """
+        Normalise le texte (Unicode NFKD, casse, espaces)
+
+        Args:
+            text: Texte à normaliser
+            lowercase: Convertir en minuscules
+
+        Returns:
+            Texte normalisé
+        """
+        if not text:
+            return ""
+
+        text = unicodedata.normalize('NFKD', text)
+        if lowercase:
+            text = text.lower()
+        return collapse_whitespace(text)
+
+    def extract_entities(self, text: str) -> Dict[str, List[str]]:
+        """Extrait mentions, hashtags et URLs"""
+        return extract_entities(text)
+
+    # ------------------------------------------------------------------
+    # API batch: chaque texte distinct n'est traité qu'une fois
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def map_unique(texts: Iterable[str], func: Callable[[str], object]) -> List:
+        """
+        Applique func une seule fois par texte distinct
+
+        Args:
+            texts: Textes à traiter
+            func: Fonction de nettoyage/extraction
+
+        Returns:
+            Résultats dans l'ordre des textes
+        """
+        cache = {}
+        results = []
+        for text in texts:
+            try:
+                result = cache[text]
+            except KeyError:
+                result = cache[text] = func(text)
+            except TypeError:
+                # Valeur non hashable: pas de mémoïsation
+                result = func(text)
+            results.append(result)
+        return results
+
+    def clean_for_analysis_batch(self, texts: Iterable[str], **options) -> List[str]:
+        """
+        Version batch de clean_for_analysis
+
+        Args:
+            texts: Textes à nettoyer
+            **options: Options de clean_for_analysis (preserve_*)
+
+        Returns:
+            Textes nettoyés
+        """
+        return self.map_unique(texts, lambda text: self.clean_for_analysis(text, **options))
+
+    def extract_entities_batch(self, texts: Iterable[str]) -> List[Dict[str, List[str]]]:
+        """
+        Version batch de extract_entities
+
+        Args:
+            texts: Textes sources
+
+        Returns:
+            Entités extraites pour chaque texte (les textes identiques
+            partagent le même dictionnaire: ne pas le modifier en place)
+        """
+        return self.map_unique(texts, extract_entities)
+
+
+# Instance globale partagée
+_text_normalizer: Optional[TextNormalizer] = None
+
+
+def get_text_normalizer() -> TextNormalizer:
+    """Retourne l'instance globale du moteur de normalisation"""
+    global _text_normalizer
+
+    if _text_normalizer is None:
+        _text_normalizer = TextNormalizer()
+
+    return _text_normalizer
@@ -4,6 +4,7 @@ NLP Processing modules: Sentiment Analysis & Text Cleaning
 
 from .sentiment_analysis import SentimentAnalyzer
 from .text_cleaning import TextCleaner
+from shared.text_normalization import TextNormalizer, extract_entities, get_text_normalizer
 
-__all__ = ['SentimentAnalyzer', 'TextCleaner']
+__all__ = ['SentimentAnalyzer', 'TextCleaner', 'TextNormalizer', 'extract_entities', 'get_text_normalizer']
 
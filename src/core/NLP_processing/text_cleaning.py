@@ -3,26 +3,27 @@ Module de nettoyage de texte pour NLP
 Traitement robuste des tweets avec gestion des cas limites
 """
 
-import re
-import html
-import unicodedata
+from collections import Counter
 from typing import List, Dict, Optional
 
+from shared.text_normalization import (
+    URL_REGEX, MENTION_REGEX, HASHTAG_REGEX, EMOJI_REGEX, WHITESPACE_REGEX, WORD_REGEX,
+    extract_entities, get_text_normalizer
+)
+
 
 class TextCleaner:
     """Nettoyeur de texte avancé pour analyse NLP"""
     
     def __init__(self):
         """Initialize text cleaner with patterns"""
-        # Patterns regex pour différents éléments
-        self.url_pattern = re.compile(r'http\S+|www\S+|https\S+', re.MULTILINE)
-        self.mention_pattern = re.compile(r'@\w+')
-        self.hashtag_pattern = re.compile(r'#\w+')
-        self.emoji_pattern = re.compile(
-            r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]|'
-            r'[\U0001F680-\U0001F6FF]|[\U0001F1E0-\U0001F1FF]'
-        )
-        self.whitespace_pattern = re.compile(r'\s+')
+        # Patterns précompilés partagés (voir shared/text_normalization.py)
+        self.url_pattern = URL_REGEX
+        self.mention_pattern = MENTION_REGEX
+        self.hashtag_pattern = HASHTAG_REGEX
+        self.emoji_pattern = EMOJI_REGEX
+        self.whitespace_pattern = WHITESPACE_REGEX
+        self.normalizer = get_text_normalizer()
         
         # Stopwords français pour extraction de mots-clés
         self.french_stopwords = {
@@ -46,19 +47,7 @@ class TextCleaner:
             >>> cleaner.clean_basic("Hello&nbsp;World!")
             'Hello World!'
         """
-        if not text or not isinstance(text, str):
-            return ""
-        
-        # Décoder les entités HTML
-        text = html.unescape(text)
-        
-        # Supprimer les caractères de contrôle
-        text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C')
-        
-        # Normaliser les espaces
-        text = self.whitespace_pattern.sub(' ', text)
-        
-        return text.strip()
+        return self.normalizer.clean_basic(text)
     
     def remove_urls(self, text: str) -> str:
         """Supprime les URLs du texte"""
@@ -106,6 +95,18 @@ class TextCleaner:
         """Extrait les URLs du texte"""
         return self.url_pattern.findall(text)
     
+    def extract_entities(self, text: str) -> Dict[str, List[str]]:
+        """
+        Extrait mentions, hashtags et URLs
+        
+        Args:
+            text: Texte source
+            
+        Returns:
+            Dictionnaire {'mentions': [...], 'hashtags': [...], 'urls': [...]}
+        """
+        return extract_entities(text)
+    
     def clean_for_analysis(self, 
                           text: str, 
                           preserve_mentions: bool = True,
@@ -129,30 +130,12 @@ class TextCleaner:
             >>> cleaner.clean_for_analysis(text, preserve_emojis=False)
             '@Free le réseau est nul'
         """
-        if not text:
-            return ""
-        
-        # Nettoyage basique
-        text = self.clean_basic(text)
-        
-        # Supprimer les URLs (généralement pas utiles pour l'analyse)
-        text = self.remove_urls(text)
-        
-        # Supprimer optionnellement mentions, hashtags, emojis
-        if not preserve_mentions:
-            text = self.remove_mentions(text)
-        if not preserve_hashtags:
-            text = self.remove_hashtags(text)
-        if not preserve_emojis:
-            text = self.remove_emojis(text)
-        
-        # Normaliser les caractères répétés (ex: "nooooon" -> "nooon")
-        text = re.sub(r'(.)\1{3,}', r'\1\1\1', text)
-        
-        # Nettoyer les espaces
-        text = self.whitespace_pattern.sub(' ', text).strip()
-        
-        return text
+        return self.normalizer.clean_for_analysis(
+            text,
+            preserve_mentions=preserve_mentions,
+            preserve_hashtags=preserve_hashtags,
+            preserve_emojis=preserve_emojis
+        )
     
     def handle_special_cases(self, text: str) -> Dict[str, any]:
         """
@@ -206,20 +189,7 @@ class TextCleaner:
         Returns:
             Texte normalisé
         """
-        if not text:
-            return ""
-        
-        # Normalisation Unicode (NFKD pour décomposer les accents)
-        text = unicodedata.normalize('NFKD', text)
-        
-        # Convertir en minuscules si demandé
-        if lowercase:
-            text = text.lower()
-        
-        # Nettoyer les espaces
-        text = self.whitespace_pattern.sub(' ', text).strip()
-        
-        return text
+        return self.normalizer.normalize_text(text, lowercase=lowercase)
     
     def extract_keywords(self, 
                         text: str, 
@@ -249,7 +219,7 @@ class TextCleaner:
         clean_text = clean_text.lower()
         
         # Extraire les mots
-        words = re.findall(r'\b\w+\b', clean_text)
+        words = WORD_REGEX.findall(clean_text)
         
         # Filtrer les mots
         keywords = []
@@ -261,7 +231,6 @@ class TextCleaner:
                 keywords.append(word)
         
         # Compter les fréquences
-        from collections import Counter
         word_counts = Counter(keywords)
         
         return [word for word, count in word_counts.most_common(max_keywords)]
@@ -286,16 +255,13 @@ class TextCleaner:
             if unique_ratio < 0.3:
                 return True
         
-        # Vérifier les mentions excessives
-        if len(self.extract_mentions(text)) > 5:
+        # Vérifier mentions, hashtags et URLs excessifs
+        entities = extract_entities(text)
+        if len(entities['mentions']) > 5:
             return True
-        
-        # Vérifier les hashtags excessifs
-        if len(self.extract_hashtags(text)) > 8:
+        if len(entities['hashtags']) > 8:
             return True
-        
-        # Vérifier les URLs excessives
-        if len(self.extract_urls(text)) > 3:
+        if len(entities['urls']) > 3:
             return True
         
         # Vérifier les majuscules excessives
@@ -11,14 +11,12 @@ VERSION DÉFINITIVE avec TOUTES les fonctionnalités:
 ✅ Performance optimisée
 
 Classification professionnelle de tweets avec LLM et Machine Learning
-Few-shot learning | Analyse multi-dimensionnelle | 50 tweets max
+Few-shot learning | Analyse multi-dimensionnelle | Fichiers volumineux en flux
 """
 
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import json
 import time
 from datetime import datetime
@@ -37,6 +35,11 @@ logger = logging.getLogger(__name__)
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend', 'app'))
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Plotly chargé au premier graphique (pas au démarrage de la page)
+from services.optimized_loader import lazy_module
+px = lazy_module('plotly.express')
+go = lazy_module('plotly.graph_objects')
+
 # ==============================================================================
 # LAZY LOADING
 # ==============================================================================
@@ -534,12 +537,21 @@ def _handle_dynamic_classification(uploaded_file):
             # Nettoyer cache
             for key in ['preprocessed_dataframe', 'classified_dataframe', 'classification_metrics']:
                 st.session_state.pop(key, None)
+            _discard_previous_results()
             
             st.session_state['last_processed_file_id'] = current_file_id
             st.info(f"**Nouveau fichier:** {uploaded_file.name}")
         
-        # Lecture multi-encodage
-        df = _read_uploaded_file_robust(uploaded_file)
+        # Lecture multi-encodage (aperçu seulement: le fichier complet est lu en flux)
+        # Mémoïsée par hash du contenu: un rerun ne relit pas le fichier
+        from services.streaming_classification import PREVIEW_ROWS
+        from services.stage_cache import get_stage_cache, hash_file, stage_key
+        cache = get_stage_cache()
+        file_key = hash_file(uploaded_file)
+        df = cache.get_or_compute(
+            stage_key('parse', file_key, nrows=PREVIEW_ROWS),
+            lambda: _read_uploaded_file_robust(uploaded_file, nrows=PREVIEW_ROWS)
+        )
         
         if df is None or df.empty:
             st.error("Impossible de lire le fichier")
@@ -578,18 +590,36 @@ def _handle_dynamic_classification(uploaded_file):
         </div>
         """, unsafe_allow_html=True)
         
+        # Résultats déjà calculés pour ce fichier, cette colonne et cette configuration
+        config = st.session_state.get('llm_config', {})
+        classify_key = stage_key('classify', file_key, column=text_column,
+                                 mode=config.get('classification_mode'), provider=config.get('llm_provider'),
+                                 model=config.get('model_name'), batch_size=config.get('batch_size'))
+        cached = cache.get(classify_key)
+        if cached is not None and not os.path.exists(cached[1].get('results_path', '')):
+            cached = None  # Fichier de résultats supprimé entre-temps
+        
         if st.button("Lancer la Classification LLM", type="primary", use_container_width=True):
-            df_classified, metrics = _perform_dynamic_classification(df, text_column)
+            if cached is not None:
+                st.success("✅ Résultats réutilisés (même fichier et même configuration)")
+                df_classified, metrics = cached
+            else:
+                df_classified, metrics = _perform_dynamic_classification(uploaded_file, text_column)
+                if df_classified is not None:
+                    cache.put(classify_key, (df_classified, metrics))
             
             if df_classified is not None:
                 _display_classification_results(df_classified, metrics)
+        elif cached is not None:
+            # Un widget a changé: réaffichage sans reclassifier
+            _display_classification_results(*cached)
                 
     except Exception as e:
         st.error(f"Erreur: {str(e)}")
         logger.error(f"Handler error: {e}", exc_info=True)
 
-def _read_uploaded_file_robust(uploaded_file):
-    """Lecture robuste multi-encodage"""
+def _read_uploaded_file_robust(uploaded_file, nrows: Optional[int] = None):
+    """Lecture robuste multi-encodage (nrows: premières lignes seulement)"""
     try:
         file_ext = uploaded_file.name.split('.')[-1].lower()
         
@@ -598,7 +628,7 @@ def _read_uploaded_file_robust(uploaded_file):
             for encoding in ['utf-8-sig', 'utf-8', 'latin-1', 'iso-8859-1', 'cp1252']:
                 try:
                     uploaded_file.seek(0)
-                    df = pd.read_csv(uploaded_file, encoding=encoding, on_bad_lines='skip')
+                    df = pd.read_csv(uploaded_file, encoding=encoding, on_bad_lines='skip', nrows=nrows)
                     st.caption(f"✓ Encodage: {encoding}")
                     return df
                 except:
@@ -608,9 +638,12 @@ def _read_uploaded_file_robust(uploaded_file):
             return None
             
         elif file_ext in ['xlsx', 'xls']:
-            return pd.read_excel(uploaded_file)
+            return pd.read_excel(uploaded_file, nrows=nrows)
+        elif file_ext in ['jsonl', 'ndjson']:
+            return pd.read_json(uploaded_file, lines=True, nrows=nrows)
         elif file_ext == 'json':
-            return pd.read_json(uploaded_file)
+            df = pd.read_json(uploaded_file)
+            return df.head(nrows) if nrows else df
         else:
             st.error(f"Format non supporté: {file_ext}")
             return None
@@ -626,15 +659,24 @@ def _display_file_info(uploaded_file, df):
     with col1:
         st.metric("Nom", uploaded_file.name[:20] + "...")
     with col2:
-        st.metric("Lignes", f"{len(df):,}")
+        from services.streaming_classification import PREVIEW_ROWS
+        # Seul un aperçu est chargé: le nombre exact de lignes est connu après classification
+        st.metric("Lignes", f"{len(df):,}+" if len(df) >= PREVIEW_ROWS else f"{len(df):,}")
     with col3:
         st.metric("Colonnes", len(df.columns))
     with col4:
         st.metric("Taille", f"{uploaded_file.size / 1024:.1f} KB")
 
-def _perform_dynamic_classification(df, text_column):
-    """Classification optimisée avec mode PRECISE ou BALANCED"""
+def _perform_dynamic_classification(uploaded_file, text_column):
+    """
+    Classification en flux avec mode PRECISE ou BALANCED
+    
+    Le fichier est lu et classifié par chunks: les résultats sont écrits sur
+    disque au fil de l'eau, seuls un aperçu et les KPIs cumulés restent en
+    mémoire (pas de limite de lignes).
+    """
     import time as t
+    from services.streaming_classification import StreamingClassifier, iter_file_chunks
     
     # DOM stability: Initialize containers with small delay
     progress = st.progress(0)
@@ -647,14 +689,6 @@ def _perform_dynamic_classification(df, text_column):
         classification_mode = config.get('classification_mode', '⚡ Balanced (Rapide)')
         batch_size = config.get('batch_size', 10)
         
-        # Limit based on mode
-        LIMIT = 50 if "Precise" in classification_mode else 100
-        df_sample = df.head(LIMIT).copy()
-        total = len(df_sample)
-        
-        if len(df) > LIMIT:
-            st.info(f"📊 Analyse limitée aux {LIMIT} premiers tweets ({classification_mode})")
-        
         # Initialize classifier based on mode
         if "Precise" in classification_mode:
             # PRECISE MODE: Use LLM with few-shot learning
@@ -680,68 +714,43 @@ def _perform_dynamic_classification(df, text_column):
                 pass
             classifier_func = _get_balanced_classifier()
         
-        # Process in batches for better performance
         try:
-            status.text(f"🔄 Classification en cours... 0/{total}")
+            status.text("🔄 Classification en cours...")
             t.sleep(0.05)
             progress.progress(0.1)
         except Exception:
             pass
         
-        results = []
-        start_time = time.time()
+        streamer = StreamingClassifier(
+            classify_chunk=lambda chunk, column: _classify_chunk(chunk, column, classifier_func, batch_size)
+        )
         
-        # Batch processing
-        texts = df_sample[text_column].astype(str).tolist()
+        start_time = time.time()
+        partial = None
         
-        for batch_start in range(0, total, batch_size):
-            batch_end = min(batch_start + batch_size, total)
-            batch_texts = texts[batch_start:batch_end]
-            
-            # Classify batch
-            try:
-                batch_results = classifier_func(batch_texts)
-                results.extend(batch_results)
-            except Exception as batch_error:
-                logger.error(f"Batch error: {batch_error}")
-                # Fallback: process individually
-                for text in batch_texts:
-                    try:
-                        result = _classify_single_tweet_fallback(text)
-                        results.append(result)
-                    except:
-                        results.append(_get_default_result())
-            
-            # Update progress with DOM safety
-            pct = 0.1 + (batch_end / total) * 0.85
-            elapsed = time.time() - start_time
-            rate = batch_end / elapsed if elapsed > 0 else 0
-            eta = (total - batch_end) / rate if rate > 0 else 0
+        # Chunks lus, classifiés et écrits sur disque un par un
+        for partial in streamer.stream(iter_file_chunks(uploaded_file), text_column, progress_source=uploaded_file):
+            pct = 0.1 + (partial.progress or 0) * 0.85
+            kpis = partial.metrics
             
             try:
-                progress.progress(pct)
-                t.sleep(0.03)
-                status.text(f"🔄 {batch_end}/{total} tweets | {rate:.1f} tweets/sec | ETA: {eta:.0f}s")
+                progress.progress(min(pct, 0.95))
+                status.text(f"🔄 {partial.rows_done:,} tweets | {partial.tweets_per_second:.1f} tweets/sec | "
+                            f"Réclamations: {kpis['claims']:,} | Confiance: {kpis['avg_confidence']:.0%}")
             except Exception:
                 pass  # Ignore DOM errors
         
-        # Enrichissement
-        try:
-            status.text("✨ Enrichissement des données...")
-            t.sleep(0.05)
-            progress.progress(0.95)
-        except Exception:
-            pass
+        if partial is None:
+            st.error("Aucune ligne à classifier")
+            return None, None
         
-        df_sample['is_claim'] = [r['is_claim'] for r in results]
-        df_sample['topics'] = [r['topics'] for r in results]
-        df_sample['sentiment'] = [r['sentiment'] for r in results]
-        df_sample['urgence'] = [r['urgence'] for r in results]
-        df_sample['incident'] = [r['incident'] for r in results]
-        df_sample['confidence'] = [r['confidence'] for r in results]
+        total = partial.rows_done
+        metrics = partial.metrics
         
-        # Métriques
-        metrics = _calculate_classification_metrics(df_sample)
+        # Résultats complets sur disque, pas en session
+        _discard_previous_results()
+        st.session_state['classification_results_path'] = str(partial.output_path)
+        metrics['results_path'] = str(partial.output_path)
         
         # Add performance metrics
         total_time = time.time() - start_time
@@ -762,9 +771,9 @@ def _perform_dynamic_classification(df, text_column):
         except Exception:
             pass  # Ignore DOM errors
         
-        st.success(f"✅ {total} tweets classifiés en {total_time:.1f}s | Confiance: {metrics['avg_confidence']:.0%} | Mode: {classification_mode}")
+        st.success(f"✅ {total:,} tweets classifiés en {total_time:.1f}s | Confiance: {metrics['avg_confidence']:.0%} | Mode: {classification_mode}")
         
-        return df_sample, metrics
+        return streamer.preview, metrics
         
     except Exception as e:
         # Clear containers safely in exception handler
@@ -779,6 +788,36 @@ def _perform_dynamic_classification(df, text_column):
         logger.error(f"Classification error: {e}", exc_info=True)
         return None, None
 
+def _classify_chunk(chunk: pd.DataFrame, text_column: str, classifier_func, batch_size: int) -> pd.DataFrame:
+    """Classifie un chunk du fichier par lots de batch_size tweets"""
+    texts = chunk[text_column].astype(str).tolist()
+    results = []
+    
+    for batch_start in range(0, len(texts), batch_size):
+        batch_texts = texts[batch_start:batch_start + batch_size]
+        
+        try:
+            results.extend(classifier_func(batch_texts))
+        except Exception as batch_error:
+            logger.error(f"Batch error: {batch_error}")
+            # Fallback: process individually
+            for text in batch_texts:
+                try:
+                    results.append(_classify_single_tweet_fallback(text))
+                except:
+                    results.append(_get_default_result())
+    
+    classified = chunk.copy()
+    for column in ['is_claim', 'topics', 'sentiment', 'urgence', 'incident', 'confidence']:
+        classified[column] = [r[column] for r in results]
+    
+    return classified
+
+def _discard_previous_results():
+    """Supprime le fichier de résultats de la classification précédente"""
+    from services.streaming_classification import discard_dataframe
+    discard_dataframe(st.session_state.pop('classification_results_path', None))
+
 def _classify_single_tweet(tweet: str) -> Dict[str, Any]:
     """Classifie un tweet avec logique améliorée"""
     t = tweet.lower()
@@ -915,21 +954,11 @@ def _classify_single_tweet(tweet: str) -> Dict[str, Any]:
     }
 
 def _calculate_classification_metrics(df: pd.DataFrame) -> Dict[str, Any]:
-    """Calcule métriques complètes"""
-    total = len(df)
-    
-    return {
-        'total_tweets': total,
-        'claims': int(df['is_claim'].sum()),
-        'claims_percentage': (df['is_claim'].sum() / total * 100) if total > 0 else 0,
-        'negative_sentiments': int(len(df[df['sentiment'] == 'neg'])),
-        'high_urgency': int(len(df[df['urgence'] == 'haute'])),
-        'avg_confidence': float(df['confidence'].mean()),
-        'topic_dist': df['topics'].apply(lambda x: ', '.join(x) if isinstance(x, list) else x).value_counts(),
-        'sentiment_dist': df['sentiment'].value_counts(),
-        'urgence_dist': df['urgence'].value_counts(),
-        'incident_dist': df['incident'].value_counts()
-    }
+    """Calcule métriques complètes (mêmes KPIs que la classification en flux)"""
+    from services.streaming_classification import RunningKPIs
+    kpis = RunningKPIs()
+    kpis.update(df)
+    return kpis.to_metrics()
 
 def _display_classification_results(df: pd.DataFrame, metrics: Dict):
     """Affiche résultats COMPLETS avec tous graphiques et métriques de performance"""
@@ -1152,13 +1181,14 @@ def _display_all_visualizations(df, metrics):
             st.plotly_chart(fig, use_container_width=True)
     
     with col6:
-        # Confiance
-        fig = px.histogram(
-            df,
-            x='confidence',
-            nbins=20,
-            title="Distribution Confiance"
-        )
+        # Confiance (histogramme cumulé sur tout le fichier)
+        hist = metrics['confidence_hist']
+        fig = go.Figure(data=[go.Bar(
+            x=(np.arange(len(hist)) + 0.5) / len(hist),
+            y=hist,
+            width=1 / len(hist)
+        )])
+        fig.update_layout(title="Distribution Confiance")
         fig.add_vline(
             x=metrics['avg_confidence'],
             line_dash="dash",
@@ -1226,6 +1256,12 @@ def _prepare_df_for_business_kpis(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_conv
 
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _read_results_file(path: str, mtime: float) -> bytes:
+    """Contenu du CSV de résultats, lu une seule fois par version du fichier (clé: chemin + mtime)"""
+    with open(path, 'rb') as results_file:
+        return results_file.read()
+
 def _display_export_section(df, metrics):
     """Section export complète - Sans Font Awesome"""
     st.markdown("---")
@@ -1234,9 +1270,14 @@ def _display_export_section(df, metrics):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        export_df = df.copy()
-        export_df['topics'] = export_df['topics'].apply(lambda x: ', '.join(x) if isinstance(x, list) else x)
-        csv = export_df.to_csv(index=False).encode('utf-8')
+        # Résultats complets lus depuis le disque (écrits pendant la classification)
+        results_path = metrics.get('results_path') or st.session_state.get('classification_results_path')
+        if results_path and os.path.exists(results_path):
+            csv = _read_results_file(results_path, os.path.getmtime(results_path))
+        else:
+            export_df = df.copy()
+            export_df['topics'] = export_df['topics'].apply(lambda x: ', '.join(x) if isinstance(x, list) else x)
+            csv = export_df.to_csv(index=False).encode('utf-8')
         st.download_button(
             "Export CSV",
             csv,
@@ -1261,6 +1302,7 @@ def _display_export_section(df, metrics):
     
     with col3:
         if st.button("Nouvelle Analyse", use_container_width=True):
+            _discard_previous_results()
             for key in list(st.session_state.keys()):
                 if 'df_' in key or 'classification' in key:
                     st.session_state.pop(key, None)
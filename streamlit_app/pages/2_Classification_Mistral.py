@@ -24,8 +24,6 @@ import numpy as np
 import sys
 import os
 import logging
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 import time
 import json
@@ -41,6 +39,16 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+# DataFrames de travail sur disque: la session ne garde que leurs chemins
+from services.streaming_classification import save_dataframe, load_dataframe, discard_dataframe
+from services.stage_cache import get_stage_cache, hash_file, stage_key
+from services.label_schema import claim_mask
+
+# Plotly chargé au premier graphique (pas au démarrage de la page)
+from services.optimized_loader import lazy_module, is_available, get_loader
+px = lazy_module('plotly.express')
+go = lazy_module('plotly.graph_objects')
+
 # ==============================================================================
 # LAZY LOADING - OPTIMISATION CRITIQUE
 # ==============================================================================
@@ -78,14 +86,11 @@ def _load_classification_modules():
         except Exception as e:
             logger.warning(f"MultiModel orchestrator not available: {e}")
         
-        try:
-            from services.bert_classifier import BERTClassifier
-            modules['BERTClassifier'] = BERTClassifier
-        except ImportError as e:
-            if 'torch' in str(e).lower():
-                logger.warning("BERT classifier requires PyTorch - not available")
-            else:
-                logger.warning(f"BERT classifier not available: {e}")
+        # BERT: disponibilité vérifiée sans importer torch/transformers,
+        # chargés par les classificateurs au premier usage
+        modules['bert_available'] = is_available('torch') and is_available('transformers')
+        if not modules['bert_available']:
+            logger.warning("BERT classifier requires PyTorch - not available")
         
         try:
             from services.rule_classifier import EnhancedRuleClassifier
@@ -528,13 +533,20 @@ def _render_system_info_tab():
     with st.expander("Informations Système & Performance", expanded=False):
         try:
             modules = _load_classification_modules()
-            if modules.get('available'):
-                BERTClassifier = modules['BERTClassifier']
-                bert = BERTClassifier(use_gpu=False)
-                info = bert.get_model_info()
-                
+            if modules.get('available') and modules.get('bert_available'):
                 st.markdown("**🤖 Modèle BERT**", unsafe_allow_html=True)
                 
+                # Le modèle (torch + poids) n'est chargé qu'à la demande
+                if not st.session_state.get('show_bert_info'):
+                    st.caption("Chargé à la première classification")
+                    if st.button("Afficher le modèle BERT", key='show_bert_info_btn'):
+                        st.session_state.show_bert_info = True
+                        st.rerun()
+                    return
+                
+                bert = get_loader().load_bert_classifier(use_gpu=False)
+                info = bert.get_model_info()
+                
                 col1, col2 = st.columns(2)
                 with col1:
                     device_icon = "🖥️" if info['device'].upper() == "CPU" else "🎮"
@@ -672,6 +684,25 @@ def _section_upload():
     if uploaded_file:
         _handle_upload_robust(uploaded_file)
 
+def _read_csv_multi_encoding(uploaded_file) -> Optional[pd.DataFrame]:
+    """Lecture CSV en essayant plusieurs encodages (None si aucun ne fonctionne)"""
+    encodings_to_try = ['utf-8-sig', 'utf-8', 'latin-1', 'iso-8859-1', 'cp1252', 'windows-1252']
+    
+    for encoding in encodings_to_try:
+        try:
+            uploaded_file.seek(0)
+            df = pd.read_csv(uploaded_file, encoding=encoding, on_bad_lines='skip')
+            logger.info(f"✓ Lecture réussie avec encodage: {encoding}")
+            st.caption(f"Encodage détecté: {encoding}")
+            return df
+        except UnicodeDecodeError:
+            continue
+        except Exception as e:
+            logger.warning(f"Erreur avec {encoding}: {e}")
+            continue
+    
+    return None
+
 def _handle_upload_robust(uploaded_file):
     """Gestion upload ultra-robuste avec détection erreur 403"""
     try:
@@ -686,24 +717,12 @@ def _handle_upload_robust(uploaded_file):
         # Info fichier
         st.success(f"✅ Fichier accepté: {uploaded_file.name} ({file_size_mb:.1f} MB)")
         
-        # Lecture robuste avec multi-encodage
+        # Lecture robuste avec multi-encodage (mémoïsée par hash du contenu)
         with st.spinner("Lecture du fichier en cours..."):
-            df = None
-            
-            encodings_to_try = ['utf-8-sig', 'utf-8', 'latin-1', 'iso-8859-1', 'cp1252', 'windows-1252']
-            
-            for encoding in encodings_to_try:
-                try:
-                    uploaded_file.seek(0)
-                    df = pd.read_csv(uploaded_file, encoding=encoding, on_bad_lines='skip')
-                    logger.info(f"✓ Lecture réussie avec encodage: {encoding}")
-                    st.caption(f"Encodage détecté: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    logger.warning(f"Erreur avec {encoding}: {e}")
-                    continue
+            cache = get_stage_cache()
+            file_key = hash_file(uploaded_file)
+            st.session_state.file_key = file_key
+            df = cache.get_or_compute(stage_key('parse', file_key), lambda: _read_csv_multi_encoding(uploaded_file))
             
             if df is None:
                 st.error("❌ Impossible de lire le fichier")
@@ -745,7 +764,6 @@ def _handle_upload_robust(uploaded_file):
         )
         
         st.session_state.selected_text_column = selected_column
-        st.session_state.df_original = df
         
         # Sample texte
         sample = str(df[selected_column].iloc[0])
@@ -771,8 +789,21 @@ def _handle_upload_robust(uploaded_file):
             if st.button("Nettoyer et Préparer les Données", type="primary", use_container_width=True):
                 with st.spinner("Nettoyage des données en cours..."):
                     modules = _load_classification_modules()
+                    clean_key = stage_key('clean', file_key, column=selected_column,
+                                          **st.session_state.cleaning_config)
+                    cached = cache.get(clean_key)
                     
-                    if modules.get('TweetCleaner'):
+                    if cached is not None:
+                        # Même fichier, même colonne, même configuration: nettoyage réutilisé
+                        df_cleaned, stats = cached
+                        discard_dataframe(st.session_state.get('df_cleaned_path'))
+                        st.session_state.df_cleaned_path = save_dataframe(df_cleaned, 'cleaned')
+                        st.session_state.cleaning_stats = stats
+                        st.session_state.clean_key = clean_key
+                        st.session_state.workflow_step = 'classify'
+                        st.success("✅ Nettoyage réutilisé (cache)")
+                        st.rerun()
+                    elif modules.get('TweetCleaner'):
                         TweetCleaner = modules['TweetCleaner']
                         cleaner = TweetCleaner(
                             remove_urls=st.session_state.cleaning_config.get('remove_urls', True),
@@ -790,14 +821,17 @@ def _handle_upload_robust(uploaded_file):
                             pass
                         
                         df_cleaned, stats = cleaner.process_dataframe(df.copy(), selected_column)
+                        cache.put(clean_key, (df_cleaned, stats))
                         
                         try:
                             progress_bar.progress(1.0)
                         except Exception:
                             pass
                         
-                        st.session_state.df_cleaned = df_cleaned
+                        discard_dataframe(st.session_state.get('df_cleaned_path'))
+                        st.session_state.df_cleaned_path = save_dataframe(df_cleaned, 'cleaned')
                         st.session_state.cleaning_stats = stats
+                        st.session_state.clean_key = clean_key
                         st.session_state.workflow_step = 'classify'
                         
                         st.success("✅ Nettoyage terminé!")
@@ -819,6 +853,8 @@ def _handle_upload_robust(uploaded_file):
             if st.button("Réinitialiser", use_container_width=True):
                 for key in list(st.session_state.keys()):
                     if key.startswith('df_') or key == 'selected_text_column':
+                        if key.endswith('_path'):
+                            discard_dataframe(st.session_state[key])
                         del st.session_state[key]
                 st.rerun()
                 
@@ -834,18 +870,28 @@ def _handle_upload_robust(uploaded_file):
 # SECTION CLASSIFICATION  
 # ==============================================================================
 
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_results_frame(path: str, mtime: float) -> pd.DataFrame:
+    """DataFrame sauvegardé, relu une seule fois par version du fichier (partagé: ne pas modifier en place)"""
+    return load_dataframe(path)
+
+def _session_dataframe(key: str) -> pd.DataFrame:
+    """DataFrame dont le chemin est en session (pas de relecture du pickle à chaque rerun)"""
+    path = st.session_state[key]
+    return _load_results_frame(path, os.path.getmtime(path))
+
 def _section_classification():
     """Section classification avec batch processing"""
     st.header("⚙️ Étape 2 | Classification Intelligente Multi-Modèle")
     
-    if 'df_cleaned' not in st.session_state:
+    if 'df_cleaned_path' not in st.session_state:
         st.warning("Aucune donnée nettoyée trouvée", icon="⚠️")
         if st.button("Retour à l'upload", type="secondary"):
             st.session_state.workflow_step = 'upload'
             st.rerun()
         return
     
-    df_cleaned = st.session_state.df_cleaned
+    df_cleaned = _session_dataframe('df_cleaned_path')
     text_col = st.session_state.selected_text_column
     stats = st.session_state.get('cleaning_stats', {})
     
@@ -902,9 +948,42 @@ def _section_classification():
     st.subheader("▶ Lancer la Classification")
     
     if st.button("Démarrer la Classification Intelligente", type="primary", use_container_width=True):
-        _perform_classification(df_cleaned, text_col, mode, use_optimized)
+        classify_key = None
+        if st.session_state.get('clean_key'):
+            from services.mistral_classifier import DEFAULT_MODEL
+            config = st.session_state.get('config', {})
+            classify_key = stage_key('classify', st.session_state.clean_key, mode=mode, use_optimized=use_optimized,
+                                     model=DEFAULT_MODEL, llm_batch_size=config.get('llm_batch_size'),
+                                     bert_batch_size=config.get('bert_batch_size'),
+                                     llm_percentage=config.get('llm_percentage'))
+        
+        cached = get_stage_cache().get(classify_key) if classify_key else None
+        if cached is not None:
+            # Classification déjà calculée pour ces données nettoyées et ce mode
+            df_classified, cached_mode = cached
+            st.session_state.performance_metrics = {}
+            _store_classification(df_classified, cached_mode, classify_key)
+            st.rerun()
+        else:
+            # Copie privée: les classifieurs peuvent modifier le DataFrame reçu
+            _perform_classification(df_cleaned.copy(), text_col, mode, use_optimized, cache_key=classify_key)
+
+def _store_classification(df_classified: pd.DataFrame, mode: str, classify_key: Optional[str]):
+    """Enregistre les résultats de classification et leur rapport KPIs (mémoïsé) en session"""
+    if classify_key:
+        cache = get_stage_cache()
+        report = cache.get_or_compute(stage_key('kpis', classify_key), lambda: _calculate_metrics(df_classified))
+    else:
+        report = _calculate_metrics(df_classified)
+    
+    discard_dataframe(st.session_state.get('df_classified_path'))
+    st.session_state.df_classified_path = save_dataframe(df_classified, 'classified')
+    st.session_state.classified_key = classify_key
+    st.session_state.classification_report = report
+    st.session_state.classification_mode = mode
+    st.session_state.workflow_step = 'results'
 
-def _perform_classification(df, text_col, mode, use_optimized):
+def _perform_classification(df, text_col, mode, use_optimized, cache_key=None):
     """Lance la classification OPTIMISÉE avec batch processing, timeouts et tracking"""
     import time as t
     
@@ -919,6 +998,7 @@ def _perform_classification(df, text_col, mode, use_optimized):
     llm_batch_size = config.get('llm_batch_size', 10)
     max_retries = config.get('max_retries', 2)
     bert_batch_size = config.get('bert_batch_size', 50)
+    requested_mode = mode
     
     try:
         # DOM safe operations with try-catch
@@ -935,6 +1015,7 @@ def _perform_classification(df, text_col, mode, use_optimized):
             st.error(f"✗ Modules non disponibles: {modules.get('error')}")
             st.warning("⚠ Classification par règles de base utilisée...")
             df_classified = _classify_fallback(df, text_col)
+            cache_key = None  # Repli: résultat non représentatif du mode demandé
         else:
             start_time = time.time()
             total_tweets = len(df)
@@ -1041,13 +1122,14 @@ def _perform_classification(df, text_col, mode, use_optimized):
         except Exception:
             pass
         
-        report = _calculate_metrics(df_classified)
+        # Mise en cache (mode réel conservé: un repli vers FAST n'est pas un résultat du mode demandé)
+        if cache_key and mode == requested_mode:
+            get_stage_cache().put(cache_key, (df_classified, mode))
+        else:
+            cache_key = None
         
         # Sauvegarder
-        st.session_state.df_classified = df_classified
-        st.session_state.classification_report = report
-        st.session_state.classification_mode = mode
-        st.session_state.workflow_step = 'results'
+        _store_classification(df_classified, mode, cache_key)
         
         try:
             progress_bar.progress(1.0)
@@ -1244,21 +1326,26 @@ def _classify_fallback(df: pd.DataFrame, text_col: str) -> pd.DataFrame:
     classifications = df_copy[text_col].apply(classify_row)
     return pd.concat([df_copy, classifications], axis=1)
 
+def _label_counts(series: pd.Series) -> pd.Series:
+    """value_counts sans les catégories absentes (colonnes Categorical du schéma des labels)"""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
 def _calculate_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     """Calcule tous les KPIs - RÉCLAMATIONS au lieu de CLAIMS + RESPONSABLE"""
     return {
         'total_tweets': len(df),
-        'reclamations_count': len(df[df['is_claim'] == 'oui']) if 'is_claim' in df.columns else 0,
-        'reclamations_percentage': (len(df[df['is_claim'] == 'oui']) / len(df) * 100) if 'is_claim' in df.columns and len(df) > 0 else 0,
+        'reclamations_count': int(claim_mask(df).sum()),
+        'reclamations_percentage': (claim_mask(df).sum() / len(df) * 100) if len(df) > 0 else 0,
         'negative_count': len(df[df['sentiment'] == 'negatif']) if 'sentiment' in df.columns else 0,
         'negative_percentage': (len(df[df['sentiment'] == 'negatif']) / len(df) * 100) if 'sentiment' in df.columns and len(df) > 0 else 0,
         'urgence_haute_count': len(df[df['urgence'] == 'haute']) if 'urgence' in df.columns else 0,
         'urgence_haute_percentage': (len(df[df['urgence'] == 'haute']) / len(df) * 100) if 'urgence' in df.columns and len(df) > 0 else 0,
         'confidence_avg': df['confidence'].mean() if 'confidence' in df.columns else 0,
-        'sentiment_dist': df['sentiment'].value_counts() if 'sentiment' in df.columns else pd.Series(),
-        'urgence_dist': df['urgence'].value_counts() if 'urgence' in df.columns else pd.Series(),
-        'topics_dist': df['topics'].value_counts() if 'topics' in df.columns else pd.Series(),
-        'incident_dist': df['incident'].value_counts() if 'incident' in df.columns else pd.Series(),
+        'sentiment_dist': _label_counts(df['sentiment']) if 'sentiment' in df.columns else pd.Series(),
+        'urgence_dist': _label_counts(df['urgence']) if 'urgence' in df.columns else pd.Series(),
+        'topics_dist': _label_counts(df['topics']) if 'topics' in df.columns else pd.Series(),
+        'incident_dist': _label_counts(df['incident']) if 'incident' in df.columns else pd.Series(),
         'responsable_dist': df['responsable'].value_counts() if 'responsable' in df.columns else pd.Series()  # NEW
     }
 
@@ -1270,7 +1357,9 @@ def _section_results():
     """Section résultats ultra-complète avec bouton affichage total"""
     st.markdown("<h2><i class='fas fa-chart-line'></i> Étape 3 | Résultats et Export</h2>", unsafe_allow_html=True)
     
-    df = st.session_state.df_classified
+    classified_key = st.session_state.get('classified_key')
+    cached = get_stage_cache().get(classified_key) if classified_key else None
+    df = cached[0] if cached is not None else _session_dataframe('df_classified_path')
     report = st.session_state.get('classification_report', {})
     mode = st.session_state.get('classification_mode', 'balanced')
     
@@ -1423,28 +1512,38 @@ def _section_results():
     st.markdown("---")
     
     # Export avec permissions
-    _render_export_section(df, report)
+    _render_export_section(report)
+
+def _cached_figure(name: str, build):
+    """Figure mémoïsée pour les résultats courants (reconstruite seulement si les résultats changent)"""
+    classified_key = st.session_state.get('classified_key')
+    if not classified_key:
+        return build()
+    return get_stage_cache().get_or_compute(stage_key('figure', classified_key, chart=name), build)
 
 def _render_sentiment_chart(df):
     """Graphique sentiment"""
     st.markdown("<h4><i class='fas fa-smile'></i> Distribution des Sentiments</h4>", unsafe_allow_html=True)
     
     if 'sentiment' in df.columns:
-        counts = df['sentiment'].value_counts()
-        
-        fig = px.pie(
-            values=counts.values,
-            names=counts.index,
-            title="",
-            color_discrete_map={
-                'positif': '#10AC84',
-                'neutre': '#95A5A6',
-                'negatif': '#E74C3C'
-            }
-        )
-        fig.update_traces(textinfo='label+percent', textfont_size=14)
-        fig.update_layout(height=400, showlegend=True)
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            counts = _label_counts(df['sentiment'])
+        
+            fig = px.pie(
+                values=counts.values,
+                names=counts.index,
+                title="",
+                color_discrete_map={
+                    'positif': '#10AC84',
+                    'neutre': '#95A5A6',
+                    'negatif': '#E74C3C'
+                }
+            )
+            fig.update_traces(textinfo='label+percent', textfont_size=14)
+            fig.update_layout(height=400, showlegend=True)
+            return fig
+        
+        st.plotly_chart(_cached_figure('sentiment', build), use_container_width=True)
         
         st.caption(f"<i class='fas fa-info-circle'></i> Total: {len(df)} tweets analysés", unsafe_allow_html=True)
 
@@ -1453,24 +1552,27 @@ def _render_reclamations_chart(df):
     st.markdown("<h4><i class='fas fa-exclamation-circle'></i> Répartition Réclamations vs Non-Réclamations</h4>", unsafe_allow_html=True)
     
     if 'is_claim' in df.columns:
-        counts = df['is_claim'].value_counts()
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=['Réclamations' if l == 'oui' else 'Non-Réclamations' for l in counts.index],
-            values=counts.values,
-            marker_colors=['#E74C3C', '#10AC84'],
-            hole=0.5,
-            textinfo='label+percent'
-        )])
-        
-        fig.update_layout(
-            title="",
-            height=400,
-            showlegend=True
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            counts = _label_counts(pd.Series(claim_mask(df)))
+        
+            fig = go.Figure(data=[go.Pie(
+                labels=['Réclamations' if l else 'Non-Réclamations' for l in counts.index],
+                values=counts.values,
+                marker_colors=['#E74C3C', '#10AC84'],
+                hole=0.5,
+                textinfo='label+percent'
+            )])
+        
+            fig.update_layout(
+                title="",
+                height=400,
+                showlegend=True
+            )
+            return fig
+        
+        st.plotly_chart(_cached_figure('reclamations', build), use_container_width=True)
         
-        reclamations = len(df[df['is_claim'] == 'oui'])
+        reclamations = int(claim_mask(df).sum())
         pct = (reclamations / len(df) * 100) if len(df) > 0 else 0
         st.caption(f"<i class='fas fa-info-circle'></i> {reclamations:,} réclamations ({pct:.1f}%)", unsafe_allow_html=True)
 
@@ -1479,19 +1581,22 @@ def _render_urgence_chart(df):
     st.markdown("<h4><i class='fas fa-bolt'></i> Niveaux d'Urgence</h4>", unsafe_allow_html=True)
     
     if 'urgence' in df.columns:
-        counts = df['urgence'].value_counts()
-        
-        fig = px.bar(
-            x=counts.index,
-            y=counts.values,
-            title="",
-            color=counts.values,
-            color_continuous_scale='Reds',
-            text=counts.values
-        )
-        fig.update_traces(texttemplate='%{text}', textposition='outside')
-        fig.update_layout(height=400, showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            counts = _label_counts(df['urgence'])
+        
+            fig = px.bar(
+                x=counts.index,
+                y=counts.values,
+                title="",
+                color=counts.values,
+                color_continuous_scale='Reds',
+                text=counts.values
+            )
+            fig.update_traces(texttemplate='%{text}', textposition='outside')
+            fig.update_layout(height=400, showlegend=False)
+            return fig
+        
+        st.plotly_chart(_cached_figure('urgence', build), use_container_width=True)
         
         st.caption(f"<i class='fas fa-info-circle'></i> Distribution sur {len(df)} tweets", unsafe_allow_html=True)
 
@@ -1500,18 +1605,21 @@ def _render_topics_chart(df):
     st.markdown("<h4><i class='fas fa-tags'></i> Distribution des Thèmes</h4>", unsafe_allow_html=True)
     
     if 'topics' in df.columns:
-        counts = df['topics'].value_counts().head(10)
-        
-        fig = px.bar(
-            y=counts.index,
-            x=counts.values,
-            orientation='h',
-            title="",
-            text=counts.values
-        )
-        fig.update_traces(texttemplate='%{text}', textposition='outside')
-        fig.update_layout(height=400, showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            counts = _label_counts(df['topics']).head(10)
+        
+            fig = px.bar(
+                y=counts.index,
+                x=counts.values,
+                orientation='h',
+                title="",
+                text=counts.values
+            )
+            fig.update_traces(texttemplate='%{text}', textposition='outside')
+            fig.update_layout(height=400, showlegend=False)
+            return fig
+        
+        st.plotly_chart(_cached_figure('topics', build), use_container_width=True)
         
         st.caption(f"<i class='fas fa-info-circle'></i> Top 10 thèmes sur {len(df['topics'].unique())} différents", unsafe_allow_html=True)
 
@@ -1520,16 +1628,19 @@ def _render_incidents_chart(df):
     st.markdown("<h4><i class='fas fa-wrench'></i> Types d'Incidents</h4>", unsafe_allow_html=True)
     
     if 'incident' in df.columns:
-        counts = df['incident'].value_counts()
+        def build():
+            counts = _label_counts(df['incident'])
         
-        fig = px.pie(
-            values=counts.values,
-            names=counts.index,
-            title=""
-        )
-        fig.update_traces(textinfo='label+percent', textfont_size=12)
-        fig.update_layout(height=400, showlegend=True)
-        st.plotly_chart(fig, use_container_width=True)
+            fig = px.pie(
+                values=counts.values,
+                names=counts.index,
+                title=""
+            )
+            fig.update_traces(textinfo='label+percent', textfont_size=12)
+            fig.update_layout(height=400, showlegend=True)
+            return fig
+        
+        st.plotly_chart(_cached_figure('incidents', build), use_container_width=True)
         
         st.caption(f"<i class='fas fa-info-circle'></i> {len(df['incident'].unique())} types identifiés", unsafe_allow_html=True)
 
@@ -1538,36 +1649,39 @@ def _render_responsable_chart(df):
     st.markdown("<h4><i class='fas fa-user-tie'></i> Responsables de l'Incident</h4>", unsafe_allow_html=True)
     
     if 'responsable' in df.columns:
-        counts = df['responsable'].value_counts()
-        
-        # Couleurs adaptées par service
-        color_map = {
-            'service_technique': '#E74C3C',      # Rouge pour technique
-            'service_commercial': '#3498DB',     # Bleu pour commercial
-            'service_client': '#F39C12',         # Orange pour client
-            'service_reseau': '#9B59B6',         # Violet pour réseau
-            'aucun': '#95A5A6'                   # Gris pour aucun
-        }
+        def build():
+            counts = df['responsable'].value_counts()
+        
+            # Couleurs adaptées par service
+            color_map = {
+                'service_technique': '#E74C3C',      # Rouge pour technique
+                'service_commercial': '#3498DB',     # Bleu pour commercial
+                'service_client': '#F39C12',         # Orange pour client
+                'service_reseau': '#9B59B6',         # Violet pour réseau
+                'aucun': '#95A5A6'                   # Gris pour aucun
+            }
         
-        colors = [color_map.get(name, '#95A5A6') for name in counts.index]
-        
-        fig = go.Figure(data=[go.Bar(
-            x=counts.index,
-            y=counts.values,
-            marker_color=colors,
-            text=counts.values,
-            texttemplate='%{text}',
-            textposition='outside'
-        )])
-        
-        fig.update_layout(
-            title="",
-            height=400,
-            showlegend=False,
-            xaxis_title="Service Responsable",
-            yaxis_title="Nombre d'incidents"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+            colors = [color_map.get(name, '#95A5A6') for name in counts.index]
+        
+            fig = go.Figure(data=[go.Bar(
+                x=counts.index,
+                y=counts.values,
+                marker_color=colors,
+                text=counts.values,
+                texttemplate='%{text}',
+                textposition='outside'
+            )])
+        
+            fig.update_layout(
+                title="",
+                height=400,
+                showlegend=False,
+                xaxis_title="Service Responsable",
+                yaxis_title="Nombre d'incidents"
+            )
+            return fig
+        
+        st.plotly_chart(_cached_figure('responsable', build), use_container_width=True)
         
         # Afficher statistiques détaillées
         non_aucun = len(df[df['responsable'] != 'aucun'])
@@ -1642,7 +1756,7 @@ def _display_business_dashboard_mistral(df, report):
             
             with col2:
                 if 'is_claim' in df.columns:
-                    claims = len(df[df['is_claim'] == 'oui'])
+                    claims = int(claim_mask(df).sum())
                     claims_pct = (claims / len(df) * 100) if len(df) > 0 else 0
                     st.metric(
                         "Réclamations",
@@ -1674,7 +1788,19 @@ def _display_business_dashboard_mistral(df, report):
         logger.error(f"Erreur dashboard business: {e}")
         st.warning("Certains KPIs avancés ne sont pas disponibles", icon="⚠️")
 
-def _render_export_section(df, report):
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _export_bytes(path: str, mtime: float, fmt: str) -> bytes:
+    """Export CSV ou Excel des résultats, construit une seule fois par version du fichier"""
+    df = _load_results_frame(path, mtime)
+    if fmt == 'xlsx':
+        from io import BytesIO
+        buffer = BytesIO()
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name='Classification', index=False)
+        return buffer.getvalue()
+    return df.to_csv(index=False).encode('utf-8')
+
+def _render_export_section(report):
     """Section export avec vérification permissions"""
     st.markdown("<h3><i class='fas fa-download'></i> Export des Résultats</h3>", unsafe_allow_html=True)
     
@@ -1694,11 +1820,13 @@ def _render_export_section(df, report):
         return
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_path = st.session_state.df_classified_path
+    mtime = os.path.getmtime(results_path)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        csv = df.to_csv(index=False).encode('utf-8')
+        csv = _export_bytes(results_path, mtime, 'csv')
         st.download_button(
             "Export CSV",
             csv,
@@ -1719,14 +1847,9 @@ def _render_export_section(df, report):
     
     with col3:
         # Export Excel
-        from io import BytesIO
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Classification', index=False)
-        
         st.download_button(
             "Export Excel",
-            buffer.getvalue(),
+            _export_bytes(results_path, mtime, 'xlsx'),
             f"classification_{timestamp}.xlsx",
             "application/vnd.ms-excel",
             use_container_width=True
@@ -1734,7 +1857,9 @@ def _render_export_section(df, report):
     
     with col4:
         if st.button("Nouvelle Classification", use_container_width=True):
-            for key in ['df_cleaned', 'df_classified', 'classification_report', 'cleaning_stats']:
+            for key in ['df_cleaned_path', 'df_classified_path']:
+                discard_dataframe(st.session_state.pop(key, None))
+            for key in ['classification_report', 'cleaning_stats']:
                 st.session_state.pop(key, None)
             st.session_state.workflow_step = 'upload'
             st.rerun()
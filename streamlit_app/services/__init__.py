@@ -3,8 +3,16 @@ Services Package - FreeMobilaChat
 ==================================
 
 Ce package contient tous les modules de services pour l'application.
+
+Les classes principales sont exposées paresseusement: le module qui les
+définit (et ses dépendances lourdes, torch/transformers pour BERT) n'est
+importé qu'au premier accès.
+
+    from services import MultiModelOrchestrator  # importe services.multi_model_orchestrator
 """
 
+import importlib
+
 __all__ = [
     'tweet_cleaner',
     'mistral_classifier',
@@ -14,3 +22,29 @@ __all__ = [
     'dynamic_classifier'
 ]
 
+# Classe exposée -> module qui la définit (importé au premier accès)
+_LAZY_EXPORTS = {
+    'TweetCleaner': 'tweet_cleaner',
+    'MistralClassifier': 'mistral_classifier',
+    'BERTClassifier': 'bert_classifier',
+    'EnhancedRuleClassifier': 'rule_classifier',
+    'MultiModelOrchestrator': 'multi_model_orchestrator',
+    'OptimizedClassifier': 'optimized_classifier',
+    'UltraOptimizedClassifier': 'ultra_optimized_classifier',
+    'CascadeClassifier': 'cascade_classifier',
+    'DynamicClassificationEngine': 'dynamic_classifier',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value  # Accès suivants sans passer par __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
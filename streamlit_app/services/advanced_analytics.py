@@ -119,7 +119,7 @@ def calculate_urgency_rate(df: pd.DataFrame) -> Dict[str, Any]:
         'rate': round(rate, 1),
         'count': int(high_urgency),
         'distribution': {
-            str(k): int(v) for k, v in urgence_counts.to_dict().items()
+            str(k): int(v) for k, v in urgence_counts.to_dict().items() if v
         }
     }
 
@@ -220,8 +220,8 @@ def calculate_response_priority_matrix(df: pd.DataFrame) -> pd.DataFrame:
     if 'urgence' not in df.columns or 'topics' not in df.columns:
         return pd.DataFrame()
     
-    # Group by topic and urgency
-    matrix = df.groupby(['topics', 'urgence']).size().reset_index(name='count')
+    # Group by topic and urgency (observed combinations only for Categorical labels)
+    matrix = df.groupby(['topics', 'urgence'], observed=True).size().reset_index(name='count')
     
     # Pivot for heatmap
     pivot = matrix.pivot(index='topics', columns='urgence', values='count').fillna(0)
@@ -21,6 +21,8 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 import logging
 
+from services.kpi_engine import compute_kpi_frame, pinned_kpi_frame, normalize_label
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,17 +49,19 @@ class AdvancedMetrics:
         try:
             logger.info(f"Calcul des métriques avancées pour {len(df)} tweets")
             
-            metrics = {
-                'timestamp': datetime.now().isoformat(),
-                'data_info': self._get_data_info(df),
-                'core_metrics': self._calculate_core_metrics(df),
-                'temporal_metrics': self._calculate_temporal_metrics(df, historical_df),
-                'engagement_metrics': self._calculate_engagement_metrics(df),
-                'sentiment_metrics': self._calculate_sentiment_metrics(df),
-                'performance_metrics': self._calculate_performance_metrics(df),
-                'quality_metrics': self._calculate_quality_metrics(df),
-                'alerts': self._generate_alerts(df)
-            }
+            # Passe unique (comptages, dates, statistiques) partagée par les KPIs
+            with pinned_kpi_frame(df):
+                metrics = {
+                    'timestamp': datetime.now().isoformat(),
+                    'data_info': self._get_data_info(df),
+                    'core_metrics': self._calculate_core_metrics(df),
+                    'temporal_metrics': self._calculate_temporal_metrics(df, historical_df),
+                    'engagement_metrics': self._calculate_engagement_metrics(df),
+                    'sentiment_metrics': self._calculate_sentiment_metrics(df),
+                    'performance_metrics': self._calculate_performance_metrics(df),
+                    'quality_metrics': self._calculate_quality_metrics(df),
+                    'alerts': self._generate_alerts(df)
+                }
             
             logger.info("Calcul des métriques avancées terminé avec succès")
             return metrics
@@ -96,9 +100,11 @@ class AdvancedMetrics:
             'confidence_score': 0.0
         }
         
+        frame = compute_kpi_frame(df)
+        
         # Distribution des sentiments
-        if 'sentiment' in df.columns:
-            sentiment_counts = df['sentiment'].value_counts()
+        if frame.has('sentiment'):
+            sentiment_counts = frame.counts('sentiment')
             total = len(df)
             metrics['sentiment_distribution'] = {
                 'counts': sentiment_counts.to_dict(),
@@ -111,7 +117,7 @@ class AdvancedMetrics:
         # Distribution d'urgence
         urgency_col = self._find_column(df, ['urgency', 'priority', 'priorite'])
         if urgency_col:
-            urgency_counts = df[urgency_col].value_counts()
+            urgency_counts = frame.counts(urgency_col)
             total = len(df)
             metrics['urgency_distribution'] = {
                 'counts': urgency_counts.to_dict(),
@@ -124,16 +130,16 @@ class AdvancedMetrics:
         # Top sujets/catégories
         category_col = self._find_column(df, ['category', 'theme', 'sujet', 'topic'])
         if category_col:
-            top_categories = df[category_col].value_counts().head(10)
+            top_categories = frame.counts(category_col).head(10)
             metrics['top_topics'] = {
                 'categories': top_categories.to_dict(),
-                'total_categories': df[category_col].nunique()
+                'total_categories': frame.nunique(category_col)
             }
         
         # Répartition des types (plaintes, questions, demandes)
         type_col = self._find_column(df, ['type', 'request_type', 'type_demande'])
         if type_col:
-            type_counts = df[type_col].value_counts()
+            type_counts = frame.counts(type_col)
             total = len(df)
             metrics['type_distribution'] = {
                 'counts': type_counts.to_dict(),
@@ -146,7 +152,7 @@ class AdvancedMetrics:
         # Score de confiance moyen
         confidence_col = self._find_column(df, ['confidence', 'confidence_score', 'score'])
         if confidence_col:
-            metrics['confidence_score'] = round(df[confidence_col].mean(), 2)
+            metrics['confidence_score'] = round(frame.numeric(confidence_col)['mean'], 2)
         
         return metrics
     
@@ -172,21 +178,18 @@ class AdvancedMetrics:
             'growth_rate_percentage': 0.0
         }
         
-        date_col = self._find_date_column(df)
-        if not date_col:
+        frame = compute_kpi_frame(df)
+        if not frame.date_column:
             logger.warning("Pas de colonne de date trouvée")
             return metrics
         
-        # Convertir en datetime
-        df = df.copy()
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-        df_clean = df.dropna(subset=[date_col])
-        
-        if df_clean.empty:
+        # Dates déjà converties par le moteur de KPIs (pas de copie du DataFrame)
+        dated_rows = frame.dated_rows()
+        if not dated_rows:
             return metrics
         
         # Volume par heure
-        hourly_counts = df_clean.groupby(df_clean[date_col].dt.hour).size()
+        hourly_counts = frame.hourly_counts()
         metrics['hourly_volume'] = {
             'distribution': hourly_counts.to_dict(),
             'mean': round(hourly_counts.mean(), 1),
@@ -196,19 +199,19 @@ class AdvancedMetrics:
         # Heures de pointe (top 3)
         top_hours = hourly_counts.nlargest(3)
         metrics['peak_hours'] = [
-            {'hour': int(h), 'count': int(c), 'percentage': round(c/len(df_clean)*100, 1)}
+            {'hour': int(h), 'count': int(c), 'percentage': round(c/dated_rows*100, 1)}
             for h, c in top_hours.items()
         ]
         
         # Heures calmes (bottom 3)
         quiet_hours = hourly_counts.nsmallest(3)
         metrics['quiet_hours'] = [
-            {'hour': int(h), 'count': int(c), 'percentage': round(c/len(df_clean)*100, 1)}
+            {'hour': int(h), 'count': int(c), 'percentage': round(c/dated_rows*100, 1)}
             for h, c in quiet_hours.items()
         ]
         
         # Volume par jour
-        daily_counts = df_clean.groupby(df_clean[date_col].dt.date).size()
+        daily_counts = frame.daily_counts()
         metrics['daily_volume'] = {
             'distribution': {str(k): int(v) for k, v in daily_counts.items()},
             'mean': round(daily_counts.mean(), 1),
@@ -219,7 +222,7 @@ class AdvancedMetrics:
         
         # Pattern hebdomadaire
         day_names = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-        weekly_counts = df_clean.groupby(df_clean[date_col].dt.dayofweek).size()
+        weekly_counts = frame.weekday_counts()
         metrics['weekly_pattern'] = {
             day_names[i]: int(weekly_counts.get(i, 0))
             for i in range(7)
@@ -256,7 +259,7 @@ class AdvancedMetrics:
                     historical_df[hist_date_col], errors='coerce'
                 )
                 hist_count = len(historical_df)
-                current_count = len(df_clean)
+                current_count = dated_rows
                 
                 if hist_count > 0:
                     evolution_vs_historical = ((current_count - hist_count) / hist_count) * 100
@@ -287,10 +290,12 @@ class AdvancedMetrics:
         }
         
         scores = []
+        frame = compute_kpi_frame(df)
         
         # Score de sentiment
-        if 'sentiment' in df.columns:
-            sentiment_counts = df['sentiment'].value_counts(normalize=True)
+        if frame.has('sentiment'):
+            sentiment_counts = frame.counts('sentiment')
+            sentiment_counts = sentiment_counts / sentiment_counts.sum() if sentiment_counts.sum() else sentiment_counts
             positive_ratio = sentiment_counts.get('positive', 0)
             negative_ratio = sentiment_counts.get('negative', 0)
             neutral_ratio = sentiment_counts.get('neutral', 0)
@@ -305,21 +310,22 @@ class AdvancedMetrics:
         # Score de réactivité/réponse
         response_col = self._find_column(df, ['response_time', 'temps_reponse'])
         if response_col:
-            avg_response_time = df[response_col].mean()
+            response_stats = frame.numeric(response_col)
+            avg_response_time = response_stats['mean']
             # Score inversement proportionnel au temps (1h = 95, 24h = 50, 48h+ = 0)
             response_score = max(0, 100 - (avg_response_time / 3600 * 2))
             scores.append(response_score)
             metrics['components']['response_score'] = round(response_score, 1)
             metrics['response_stats'] = {
                 'average_hours': round(avg_response_time / 3600, 1),
-                'median_hours': round(df[response_col].median() / 3600, 1)
+                'median_hours': round(response_stats['median'] / 3600, 1)
             }
         
         # Score de résolution
         status_col = self._find_column(df, ['status', 'statut', 'etat'])
         if status_col:
             resolved_values = ['resolved', 'résolu', 'closed', 'fermé', 'terminé']
-            resolved_count = df[status_col].isin(resolved_values).sum()
+            resolved_count = frame.count_in(status_col, resolved_values)
             resolution_ratio = resolved_count / len(df)
             resolution_score = resolution_ratio * 100
             
@@ -331,7 +337,7 @@ class AdvancedMetrics:
         present_cols = [col for col in interaction_cols if col in df.columns]
         
         if present_cols:
-            total_interactions = df[present_cols].sum().sum()
+            total_interactions = sum(frame.numeric(col)['sum'] for col in present_cols)
             avg_interactions = total_interactions / len(df)
             # Score basé sur moyenne d'interactions (10+ interactions = 100%)
             interaction_score = min(100, avg_interactions * 10)
@@ -376,18 +382,16 @@ class AdvancedMetrics:
             'insights': []
         }
         
-        if 'sentiment' not in df.columns:
+        frame = compute_kpi_frame(df)
+        if not frame.has('sentiment'):
             return metrics
         
         # Corrélation sentiment-sujet
         category_col = self._find_column(df, ['category', 'theme', 'sujet', 'topic'])
-        if category_col:
-            # Créer matrice de corrélation
-            correlation_data = pd.crosstab(
-                df[category_col], 
-                df['sentiment'], 
-                normalize='index'
-            ) * 100
+        if frame.has(category_col):
+            # Matrice de corrélation à partir du tableau croisé du cube
+            sentiment_table = frame.crosstab(category_col, 'sentiment')
+            correlation_data = sentiment_table.div(sentiment_table.sum(axis=1), axis=0) * 100
             
             metrics['correlation_matrix'] = correlation_data.to_dict()
             
@@ -406,15 +410,15 @@ class AdvancedMetrics:
             correlations.sort(key=lambda x: x['percentage'], reverse=True)
             metrics['strongest_correlations'] = correlations[:10]
             
-            # Analyse par catégorie
-            for category in df[category_col].unique():
-                cat_df = df[df[category_col] == category]
-                sentiment_dist = cat_df['sentiment'].value_counts(normalize=True) * 100
+            # Analyse par catégorie (une ligne du tableau croisé par catégorie)
+            category_counts = frame.counts(category_col)
+            for category, row in correlation_data.iterrows():
+                sentiment_dist = row[sentiment_table.loc[category] > 0].sort_values(ascending=False)
                 
                 metrics['sentiment_by_category'][category] = {
                     'distribution': sentiment_dist.to_dict(),
                     'dominant_sentiment': sentiment_dist.idxmax(),
-                    'count': len(cat_df)
+                    'count': int(category_counts.get(category, 0))
                 }
             
             # Générer des insights
@@ -477,12 +481,13 @@ class AdvancedMetrics:
             }
         
         # Taux de résolution
+        frame = compute_kpi_frame(df)
         status_col = self._find_column(df, ['status', 'statut', 'etat'])
+        resolved_values = ['resolved', 'résolu', 'closed', 'fermé', 'terminé']
+        pending_values = ['pending', 'en_attente', 'open', 'ouvert']
         if status_col:
-            resolved_values = ['resolved', 'résolu', 'closed', 'fermé', 'terminé']
-            resolved_count = df[status_col].isin(resolved_values).sum()
-            pending_values = ['pending', 'en_attente', 'open', 'ouvert']
-            pending_count = df[status_col].isin(pending_values).sum()
+            resolved_count = frame.count_in(status_col, resolved_values)
+            pending_count = frame.count_in(status_col, pending_values)
             
             metrics['resolution_rate'] = {
                 'resolved_count': int(resolved_count),
@@ -494,32 +499,31 @@ class AdvancedMetrics:
         
         # Performance par agent
         agent_col = self._find_column(df, ['agent', 'assigned_to', 'agent_id', 'responsable'])
-        if agent_col:
+        if frame.has(agent_col):
             agent_stats = {}
-            for agent in df[agent_col].unique():
-                if pd.isna(agent):
-                    continue
-                    
-                agent_df = df[df[agent_col] == agent]
-                
+            # Tableau croisé agent x statut lu dans le cube (pas de filtre par agent)
+            status_table = frame.crosstab(agent_col, status_col) if frame.has(status_col) else None
+            if status_table is not None:
+                status_labels = status_table.columns.map(normalize_label)
+            processing_times = (
+                df.groupby(agent_col)['processing_time'].mean() if 'processing_time' in df.columns else None
+            )
+            
+            for agent, total_tickets in frame.counts(agent_col).items():
                 agent_stats[str(agent)] = {
-                    'total_tickets': len(agent_df),
+                    'total_tickets': int(total_tickets),
                     'resolved': 0,
                     'pending': 0,
                     'average_processing_time': 0
                 }
                 
-                if status_col:
-                    agent_stats[str(agent)]['resolved'] = int(
-                        agent_df[status_col].isin(resolved_values).sum()
-                    )
-                    agent_stats[str(agent)]['pending'] = int(
-                        agent_df[status_col].isin(pending_values).sum()
-                    )
+                if status_table is not None and agent in status_table.index:
+                    row = status_table.loc[agent].to_numpy()
+                    agent_stats[str(agent)]['resolved'] = int(row[status_labels.isin(resolved_values)].sum())
+                    agent_stats[str(agent)]['pending'] = int(row[status_labels.isin(pending_values)].sum())
                 
-                if 'processing_time' in agent_df.columns:
-                    avg_time = agent_df['processing_time'].mean()
-                    agent_stats[str(agent)]['average_processing_time'] = round(avg_time, 1)
+                if processing_times is not None and agent in processing_times.index:
+                    agent_stats[str(agent)]['average_processing_time'] = round(processing_times[agent], 1)
             
             metrics['agent_performance'] = agent_stats
         
@@ -627,9 +631,13 @@ class AdvancedMetrics:
         """
         alerts = []
         
+        frame = compute_kpi_frame(df)
+        
         # Alerte satisfaction < 70%
-        if 'sentiment' in df.columns:
-            sentiment_counts = df['sentiment'].value_counts(normalize=True) * 100
+        if frame.has('sentiment'):
+            sentiment_counts = frame.counts('sentiment')
+            if sentiment_counts.sum():
+                sentiment_counts = sentiment_counts / sentiment_counts.sum() * 100
             positive_percentage = sentiment_counts.get('positive', 0)
             negative_percentage = sentiment_counts.get('negative', 0)
             
@@ -654,11 +662,8 @@ class AdvancedMetrics:
                 })
         
         # Alerte volume anormal
-        date_col = self._find_date_column(df)
-        if date_col:
-            df_copy = df.copy()
-            df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce')
-            daily_counts = df_copy.groupby(df_copy[date_col].dt.date).size()
+        if frame.has_dates:
+            daily_counts = frame.daily_counts()
             
             if len(daily_counts) > 7:
                 mean_volume = daily_counts.mean()
@@ -686,7 +691,7 @@ class AdvancedMetrics:
         status_col = self._find_column(df, ['status', 'statut', 'etat'])
         if status_col:
             pending_values = ['pending', 'en_attente', 'open', 'ouvert']
-            pending_count = df[status_col].isin(pending_values).sum()
+            pending_count = frame.count_in(status_col, pending_values)
             pending_percentage = (pending_count / len(df)) * 100
             
             if pending_percentage > 50:
@@ -702,7 +707,7 @@ class AdvancedMetrics:
         urgency_col = self._find_column(df, ['urgency', 'priority', 'priorite'])
         if urgency_col:
             high_urgency_values = ['high', 'haute', 'urgent', 'critique']
-            high_urgency_count = df[urgency_col].astype(str).str.lower().isin(high_urgency_values).sum()
+            high_urgency_count = frame.count_in(urgency_col, high_urgency_values)
             high_urgency_percentage = (high_urgency_count / len(df)) * 100
             
             if high_urgency_count > 0 and high_urgency_percentage > 20:
@@ -733,19 +738,14 @@ class AdvancedMetrics:
     
     def _get_date_range(self, df: pd.DataFrame) -> Optional[Dict[str, str]]:
         """Retourne la plage de dates du DataFrame"""
-        date_col = self._find_date_column(df)
-        if date_col:
+        frame = compute_kpi_frame(df)
+        if frame.has_dates:
             try:
-                df_copy = df.copy()
-                df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce')
-                df_clean = df_copy.dropna(subset=[date_col])
-                
-                if not df_clean.empty:
-                    return {
-                        'start': df_clean[date_col].min().isoformat(),
-                        'end': df_clean[date_col].max().isoformat(),
-                        'duration_days': (df_clean[date_col].max() - df_clean[date_col].min()).days
-                    }
+                return {
+                    'start': frame.date_min.isoformat(),
+                    'end': frame.date_max.isoformat(),
+                    'duration_days': (frame.date_max - frame.date_min).days
+                }
             except Exception as e:
                 logger.warning(f"Erreur lors du calcul de la plage de dates: {e}")
         
@@ -11,6 +11,9 @@ import numpy as np
 from typing import Dict, Any, List, Optional
 import logging
 
+from services import chart_data
+from services.chart_data import cached_figure
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +45,13 @@ class AdvancedVisualizations:
         Returns:
             Figure Plotly
         """
+        date_col = self._find_date_column(df)
+        return cached_figure('temporal_evolution', df,
+                             lambda: self._build_temporal_evolution_chart(df, date_col),
+                             columns=[date_col, 'sentiment'] if date_col else ['sentiment'],
+                             date_col=date_col)
+    
+    def _build_temporal_evolution_chart(self, df: pd.DataFrame, date_col: Optional[str]) -> go.Figure:
         try:
             fig = make_subplots(
                 rows=2, cols=1,
@@ -50,11 +60,10 @@ class AdvancedVisualizations:
                 row_heights=[0.5, 0.5]
             )
             
-            # Préparer les données temporelles
-            date_col = self._find_date_column(df)
+            # Préparer les données temporelles (agrégées, df non modifié)
             if date_col:
-                df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-                daily_volume = df.groupby(df[date_col].dt.date).size()
+                by = 'sentiment' if 'sentiment' in df.columns else None
+                daily_volume, sentiment_daily = chart_data.daily_counts(df, date_col, by=by)
                 
                 # Graphique du volume
                 fig.add_trace(
@@ -71,9 +80,7 @@ class AdvancedVisualizations:
                 )
                 
                 # Graphique des sentiments si disponible
-                if 'sentiment' in df.columns:
-                    sentiment_daily = df.groupby([df[date_col].dt.date, 'sentiment']).size().unstack(fill_value=0)
-                    
+                if sentiment_daily is not None:
                     for sentiment in ['positive', 'neutral', 'negative']:
                         if sentiment in sentiment_daily.columns:
                             color = self.color_scheme.get(sentiment, '#888')
@@ -124,13 +131,8 @@ class AdvancedVisualizations:
             if not date_col or date_col not in df.columns:
                 return self._create_empty_figure("Pas de données temporelles")
             
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            
-            # Créer matrice jour de semaine x heure
-            df['day_of_week'] = df[date_col].dt.dayofweek
-            df['hour'] = df[date_col].dt.hour
-            
-            heatmap_data = df.groupby(['day_of_week', 'hour']).size().unstack(fill_value=0)
+            # Matrice jour de semaine x heure (7 x 24), df non modifié
+            heatmap_data = chart_data.weekday_hour_counts(df, date_col)
             
             # Noms des jours
             day_names = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
@@ -4,10 +4,14 @@ Handles communication with backend API and session management
 """
 
 import streamlit as st
-import requests
 from typing import Optional, Dict, Any
 import logging
 
+from services.optimized_loader import lazy_module
+
+# Chargé au premier appel API: la page de connexion s'affiche sans attendre requests
+requests = lazy_module('requests')
+
 logger = logging.getLogger(__name__)
 
 # Backend API URL
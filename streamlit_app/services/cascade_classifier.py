@@ -0,0 +1,369 @@
+"""
+Classification en cascade avec sortie anticipée - FreeMobilaChat
+================================================================
+
+Enchaîne les modèles du moins coûteux au plus coûteux:
+1. Règles (EnhancedRuleClassifier) - < 1ms/tweet
+2. BERT (BERTClassifier) - ~10ms/tweet
+3. Mistral (MistralClassifier) - ~1s/tweet
+
+Chaque étage a un seuil de confiance: un tweet tranché avec assez de
+confiance (un "merci" évident, une panne totale explicite...) sort de la
+cascade et n'atteint pas les étages suivants. Le dernier étage disponible
+accepte tous les tweets restants.
+
+Les seuils sont calibrés sur les données annotées de data/training: pour
+chaque étage, le plus petit seuil dont la précision sur les tweets sortants
+atteint la précision cible.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.rule_classifier import EnhancedRuleClassifier
+from services.label_schema import apply_label_schema
+
+logger = logging.getLogger(__name__)
+
+# Ordre des étages de la cascade
+STAGES = ('rules', 'bert', 'mistral')
+
+# Seuils par défaut (avant calibration)
+DEFAULT_THRESHOLDS = {'rules': 0.90, 'bert': 0.80}
+
+# Calibration
+TARGET_PRECISION = 0.90  # Précision minimale des tweets sortant d'un étage
+MIN_SUPPORT = 20  # Nombre minimal de tweets sortants pour valider un seuil
+NO_EXIT = float('inf')  # Seuil d'un étage sans sortie anticipée
+
+CALIBRATION_FILE = Path(__file__).resolve().parents[2] / 'data' / 'training' / 'validation_dataset.csv'
+
+# Indices de sentiment positif pour l'étage règles (texte avec ou sans accents)
+POSITIVE_PATTERN = (r'\b(merci|super|g[ée]nial|bravo|parfait|excellent|top|'
+                    r'satisfait|content|rapide|efficace|au top)\b')
+
+
+@dataclass
+class StageReport:
+    """Trafic et latence d'un étage de la cascade"""
+    name: str
+    threshold: float
+    received: int = 0
+    exited: int = 0
+    seconds: float = 0.0
+
+    @property
+    def exit_rate(self) -> float:
+        """Part des tweets reçus qui sortent à cet étage"""
+        return self.exited / self.received if self.received else 0.0
+
+    @property
+    def ms_per_tweet(self) -> float:
+        """Latence moyenne par tweet reçu (ms)"""
+        return self.seconds * 1000 / self.received if self.received else 0.0
+
+    def to_dict(self) -> Dict:
+        report = asdict(self)
+        report['exit_rate'] = round(self.exit_rate, 4)
+        report['ms_per_tweet'] = round(self.ms_per_tweet, 3)
+        return report
+
+
+@dataclass
+class CascadeReport:
+    """Bilan d'une classification en cascade"""
+    total_tweets: int
+    stages: List[StageReport]
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Tableau par étage (pour affichage Streamlit)"""
+        rows = []
+        for stage in self.stages:
+            row = stage.to_dict()
+            row['traffic_share'] = round(stage.exited / self.total_tweets, 4) if self.total_tweets else 0.0
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def log(self) -> None:
+        """Journalise le trafic et la latence par étage"""
+        logger.info(f" Cascade: {self.total_tweets} tweets en {self.total_seconds:.2f}s")
+        for stage in self.stages:
+            logger.info(f"   {stage.name}: {stage.exited}/{stage.received} sortis "
+                        f"({stage.exit_rate*100:.1f}%, seuil {stage.threshold:.2f}), "
+                        f"{stage.ms_per_tweet:.2f} ms/tweet")
+
+
+def calibrate_threshold(confidence: np.ndarray,
+                        correct: np.ndarray,
+                        target_precision: float = TARGET_PRECISION,
+                        min_support: int = MIN_SUPPORT) -> float:
+    """
+    Plus petit seuil dont la précision des tweets retenus atteint la cible
+
+    Args:
+        confidence: Confiance de l'étage pour chaque tweet annoté
+        correct: Prédiction de l'étage correcte (bool)
+        target_precision: Précision cible sur les tweets avec confiance >= seuil
+        min_support: Nombre minimal de tweets retenus
+
+    Returns:
+        Seuil calibré (NO_EXIT si aucun seuil n'atteint la cible)
+    """
+    confidence = np.asarray(confidence, dtype=float)
+    correct = np.asarray(correct, dtype=bool)
+    if len(confidence) == 0:
+        return NO_EXIT
+
+    order = np.argsort(-confidence, kind='stable')
+    sorted_conf = confidence[order]
+    precision = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+
+    # Seuils candidats: frontières entre valeurs distinctes de confiance
+    boundary = np.append(sorted_conf[1:] < sorted_conf[:-1], True)
+    support = np.arange(1, len(order) + 1)
+    valid = boundary & (precision >= target_precision) & (support >= min_support)
+
+    if not valid.any():
+        return NO_EXIT
+    return float(sorted_conf[np.flatnonzero(valid)[-1]])
+
+
+class CascadeClassifier:
+    """
+    Cascade Règles -> BERT -> Mistral avec sortie anticipée
+
+    Les règles (réclamation, urgence, topics, incident) sont calculées sur
+    tous les tweets; seul le sentiment est décidé par la cascade.
+    """
+
+    def __init__(self,
+                 rules: Optional[EnhancedRuleClassifier] = None,
+                 bert=None,
+                 mistral=None,
+                 thresholds: Optional[Dict[str, float]] = None):
+        """
+        Initialise la cascade
+
+        Args:
+            rules: Classificateur par règles (créé si absent)
+            bert: BERTClassifier (optionnel, étage ignoré si absent)
+            mistral: MistralClassifier (optionnel, étage ignoré si absent)
+            thresholds: Seuils de confiance par étage ('rules', 'bert')
+        """
+        self.rules = rules or EnhancedRuleClassifier()
+        self.bert = bert
+        self.mistral = mistral
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        if thresholds:
+            self.thresholds.update(thresholds)
+
+        self.calibration: Dict[str, Dict] = {}
+        self.last_report: Optional[CascadeReport] = None
+
+    def load_models(self) -> None:
+        """Charge BERT et Mistral si disponibles (chargement lazy)"""
+        if self.bert is None:
+            try:
+                from services.bert_classifier import BERTClassifier
+                self.bert = BERTClassifier(batch_size=32)
+            except Exception as e:
+                logger.warning(f"️ BERT indisponible, étage ignoré: {e}")
+
+        if self.mistral is None:
+            try:
+                from services.mistral_classifier import MistralClassifier, OLLAMA_AVAILABLE
+                if OLLAMA_AVAILABLE:
+                    self.mistral = MistralClassifier()
+                else:
+                    logger.warning("️ Ollama non installé, étage Mistral ignoré")
+            except Exception as e:
+                logger.warning(f"️ Mistral indisponible, étage ignoré: {e}")
+
+    def _active_stages(self) -> List[str]:
+        """Étages disponibles, dans l'ordre de la cascade"""
+        models = {'rules': self.rules, 'bert': self.bert, 'mistral': self.mistral}
+        return [name for name in STAGES if models[name] is not None]
+
+    # ═══════════════════════════════════════════════════════════
+    # ÉTAGES
+    # ═══════════════════════════════════════════════════════════
+
+    def _rules_stage(self, texts: List[str]) -> pd.DataFrame:
+        """
+        Règles: réclamation/urgence/topics/incident + sentiment par indices
+
+        La confiance croît avec le nombre d'indices concordants (réclamation,
+        urgence haute, incident; ou mots positifs). Indices contradictoires
+        ou absents: neutre, confiance faible.
+        """
+        result = self.rules.classify_batch_extended(texts)
+        series = pd.Series(texts, dtype=object).fillna('')
+
+        negative_hits = ((result['is_claim'] == 'oui').astype(int)
+                         + (result['urgence'] == 'haute').astype(int)
+                         + (result['incident'] != 'aucun').astype(int)).to_numpy()
+        positive_hits = series.str.count(POSITIVE_PATTERN, flags=re.IGNORECASE).to_numpy()
+
+        negative = (negative_hits > 0) & (positive_hits == 0)
+        positive = (positive_hits > 0) & (negative_hits == 0)
+
+        result['sentiment'] = np.select([negative, positive], ['negatif', 'positif'], 'neutre')
+        result['confidence'] = np.select(
+            [negative, positive],
+            [np.minimum(0.5 + 0.15 * negative_hits, 0.95), np.minimum(0.55 + 0.15 * positive_hits, 0.95)],
+            0.3
+        )
+        return result
+
+    def _bert_stage(self, texts: List[str]) -> pd.DataFrame:
+        """BERT: sentiment + confiance softmax"""
+        predictions = self.bert.predict_with_confidence(texts, show_progress=False)
+        return pd.DataFrame({
+            'sentiment': predictions['sentiment'].to_numpy(),
+            'confidence': predictions['sentiment_confidence'].to_numpy(dtype=float),
+        })
+
+    def _mistral_stage(self, texts: List[str]) -> pd.DataFrame:
+        """Mistral: sentiment + score de confiance du LLM"""
+        predictions = self.mistral.classify_dataframe(pd.DataFrame({'text': texts}), 'text', show_progress=False)
+        return pd.DataFrame({
+            'sentiment': predictions['sentiment'].to_numpy(),
+            'confidence': pd.to_numeric(predictions['score_confiance'], errors='coerce').fillna(0.5).to_numpy(),
+        })
+
+    def _run_stage(self, name: str, texts: List[str]) -> pd.DataFrame:
+        stage = {'rules': self._rules_stage, 'bert': self._bert_stage, 'mistral': self._mistral_stage}[name]
+        return stage(texts)
+
+    # ═══════════════════════════════════════════════════════════
+    # CLASSIFICATION
+    # ═══════════════════════════════════════════════════════════
+
+    def classify(self, df: pd.DataFrame, text_column: str = 'text_cleaned') -> Tuple[pd.DataFrame, CascadeReport]:
+        """
+        Classifie les tweets en cascade
+
+        Args:
+            df: DataFrame avec tweets nettoyés
+            text_column: Colonne de texte
+
+        Returns:
+            (DataFrame avec sentiment, confidence, cascade_stage et colonnes
+            des règles, bilan trafic/latence par étage)
+        """
+        results = df.copy()
+        texts = df[text_column].fillna('').astype(str).to_numpy(dtype=object)
+        stages = self._active_stages()
+
+        sentiment = np.full(len(df), 'neutre', dtype=object)
+        confidence = np.full(len(df), 0.5)
+        exit_stage = np.full(len(df), '', dtype=object)
+        pending = np.arange(len(df))
+        reports = []
+
+        for position, name in enumerate(stages):
+            is_last = position == len(stages) - 1
+            threshold = 0.0 if is_last else self.thresholds.get(name, NO_EXIT)
+            report = StageReport(name=name, threshold=threshold, received=len(pending))
+            reports.append(report)
+            if len(pending) == 0:
+                continue
+
+            stage_start = time.time()
+            output = self._run_stage(name, texts[pending].tolist())
+            report.seconds = time.time() - stage_start
+
+            if name == 'rules':
+                # Colonnes des règles conservées pour tous les tweets
+                for column in ('is_claim', 'urgence', 'topics', 'incident'):
+                    results[column] = output[column].to_numpy()
+
+            stage_confidence = output['confidence'].to_numpy(dtype=float)
+            sentiment[pending] = output['sentiment'].to_numpy()
+            confidence[pending] = stage_confidence
+            exit_stage[pending] = name
+
+            exits = stage_confidence >= threshold
+            report.exited = int(exits.sum())
+            pending = pending[~exits]
+
+        results['sentiment'] = sentiment
+        results['confidence'] = confidence
+        results['cascade_stage'] = exit_stage
+        apply_label_schema(results, inplace=True)
+
+        self.last_report = CascadeReport(total_tweets=len(df), stages=reports)
+        self.last_report.log()
+        return results, self.last_report
+
+    # ═══════════════════════════════════════════════════════════
+    # CALIBRATION
+    # ═══════════════════════════════════════════════════════════
+
+    def calibrate(self,
+                  df: Optional[pd.DataFrame] = None,
+                  text_column: str = 'text_cleaned',
+                  label_column: str = 'sentiment',
+                  target_precision: float = TARGET_PRECISION,
+                  min_support: int = MIN_SUPPORT) -> Dict[str, float]:
+        """
+        Calibre les seuils des étages sur des tweets annotés
+
+        Chaque étage est calibré sur les tweets qui l'atteignent réellement
+        (après sortie aux étages précédents avec les seuils déjà calibrés).
+
+        Args:
+            df: Tweets annotés (data/training/validation_dataset.csv par défaut)
+            text_column: Colonne de texte
+            label_column: Colonne du sentiment de référence
+            target_precision: Précision cible des tweets sortants
+            min_support: Nombre minimal de tweets sortants par étage
+
+        Returns:
+            Seuils calibrés par étage
+        """
+        if df is None:
+            df = pd.read_csv(CALIBRATION_FILE)
+
+        labeled = df.dropna(subset=[label_column])
+        texts = labeled[text_column].fillna('').astype(str).to_numpy(dtype=object)
+        labels = labeled[label_column].astype(str).to_numpy()
+        pending = np.arange(len(labeled))
+
+        # Le dernier étage accepte tout: pas de seuil à calibrer
+        for name in self._active_stages()[:-1]:
+            if len(pending) == 0:
+                break
+
+            output = self._run_stage(name, texts[pending].tolist())
+            stage_confidence = output['confidence'].to_numpy(dtype=float)
+            correct = output['sentiment'].to_numpy() == labels[pending]
+
+            threshold = calibrate_threshold(stage_confidence, correct, target_precision, min_support)
+            exits = stage_confidence >= threshold
+
+            self.thresholds[name] = threshold
+            self.calibration[name] = {
+                'threshold': threshold,
+                'received': int(len(pending)),
+                'exited': int(exits.sum()),
+                'precision': float(correct[exits].mean()) if exits.any() else None,
+                'stage_accuracy': float(correct.mean()),
+            }
+            logger.info(f" Calibration {name}: seuil {threshold:.3f}, "
+                        f"{int(exits.sum())}/{len(pending)} tweets sortants")
+
+            pending = pending[~exits]
+
+        return {name: self.thresholds[name] for name in self.calibration}
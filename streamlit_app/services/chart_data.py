@@ -0,0 +1,260 @@
+"""
+Couche de données des graphiques - FreeMobilaChat
+=================================================
+
+Prépare des données de taille bornée avant la construction des figures
+Plotly, pour que le JSON envoyé au navigateur ne dépende plus du nombre de
+lignes du fichier:
+- Histogrammes pré-calculés (np.histogram) au lieu des valeurs brutes
+- Séries temporelles lues dans le moteur de KPIs (jour, heure) et
+  ré-échantillonnées (semaine, mois) au-delà de MAX_POINTS
+- Courbes et nuages de points réduits par LTTB (Largest-Triangle-Three-
+  Buckets): forme, pics et extrémités conservés avec MAX_POINTS points
+- Figures mises en cache par hash des colonnes utilisées (services.stage_cache)
+"""
+
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.kpi_engine import compute_kpi_frame
+from services.stage_cache import get_stage_cache, hash_dataframe, stage_key
+
+logger = logging.getLogger(__name__)
+
+# Paramètres par défaut
+MAX_POINTS = 2000  # Points par trace (courbes et nuages de points)
+HISTOGRAM_BINS = 20
+
+
+# ═══════════════════════════════════════════════════════════
+# LTTB
+# ═══════════════════════════════════════════════════════════
+
+def _as_float(values) -> np.ndarray:
+    """Valeurs numériques ou dates en float (dates en nanosecondes)"""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('int64').to_numpy(dtype=float)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+
+
+def _is_numeric_axis(values: pd.Series) -> bool:
+    return (pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)) \
+        or pd.api.types.is_datetime64_any_dtype(values)
+
+
+def lttb_indices(x, y, max_points: int = MAX_POINTS) -> np.ndarray:
+    """
+    Indices des points retenus par LTTB
+
+    Le premier et le dernier point sont toujours gardés; entre les deux,
+    chaque bucket garde le point formant le plus grand triangle avec le
+    point retenu précédent et la moyenne du bucket suivant.
+
+    Args:
+        x: Abscisses triées (nombres ou dates)
+        y: Ordonnées
+        max_points: Nombre de points à garder
+
+    Returns:
+        Indices (croissants) des points retenus
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+
+    # max_points - 2 buckets entre le premier et le dernier point
+    edges = np.floor(np.linspace(1, n - 1, max_points - 1)).astype(int)
+    edges = np.append(edges, n)
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample(df: pd.DataFrame,
+               x: str,
+               y: str,
+               max_points: int = MAX_POINTS,
+               group: Optional[str] = None,
+               sort: bool = True) -> pd.DataFrame:
+    """
+    Réduit un DataFrame à au plus max_points lignes par LTTB
+
+    Args:
+        df: Données de la courbe / du nuage de points
+        x: Colonne des abscisses
+        y: Colonne des ordonnées
+        max_points: Nombre maximal de points (toutes séries confondues)
+        group: Colonne de couleur, chaque série garde une part proportionnelle
+        sort: Trie par x (sinon l'ordre des lignes est conservé)
+
+    Returns:
+        DataFrame réduit (inchangé s'il est déjà assez petit); échantillon
+        régulier si un axe n'est pas numérique ou si x n'est pas trié
+    """
+    if len(df) <= max_points:
+        return df
+
+    data = df.dropna(subset=[x, y])
+    if sort and not data[x].is_monotonic_increasing and _is_numeric_axis(data[x]):
+        data = data.sort_values(x, kind='stable')
+    if not (_is_numeric_axis(data[x]) and _is_numeric_axis(data[y]) and data[x].is_monotonic_increasing):
+        step = int(np.ceil(len(data) / max_points))
+        return data.iloc[::step]
+
+    if group is None or group not in data.columns:
+        return data.iloc[lttb_indices(data[x], data[y], max_points)]
+
+    parts = []
+    for _, part in data.groupby(group, sort=False, observed=True):
+        budget = max(3, int(max_points * len(part) / len(data)))
+        parts.append(part.iloc[lttb_indices(part[x], part[y], budget)])
+    return pd.concat(parts)
+
+
+# ═══════════════════════════════════════════════════════════
+# AGRÉGATIONS
+# ═══════════════════════════════════════════════════════════
+
+def histogram(values, bins: int = HISTOGRAM_BINS,
+              value_range: Optional[Tuple[float, float]] = None) -> pd.DataFrame:
+    """
+    Histogramme pré-calculé (une ligne par classe)
+
+    Returns:
+        DataFrame left, right, center, count
+    """
+    numeric = _as_float(values)
+    numeric = numeric[~np.isnan(numeric)]
+    if len(numeric) == 0:
+        return pd.DataFrame(columns=['left', 'right', 'center', 'count'])
+
+    counts, edges = np.histogram(numeric, bins=bins, range=value_range)
+    return pd.DataFrame({
+        'left': edges[:-1],
+        'right': edges[1:],
+        'center': (edges[:-1] + edges[1:]) / 2,
+        'count': counts,
+    })
+
+
+def _bounded(counts: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """Ré-échantillonne (semaine puis mois) une série journalière trop longue"""
+    for freq in ('W', 'MS'):
+        if len(counts) <= max_points:
+            break
+        counts = counts.resample(freq).sum()
+    return counts
+
+
+def daily_counts(df: pd.DataFrame,
+                 date_col: str,
+                 by: Optional[str] = None,
+                 max_points: int = MAX_POINTS) -> Tuple[pd.Series, Optional[pd.DataFrame]]:
+    """
+    Volumes par jour (et par valeur de by), bornés à max_points dates
+
+    Réutilise la passe du moteur de KPIs quand date_col est sa colonne de
+    date; sinon une seule conversion de dates et un groupby.
+
+    Returns:
+        (volume total indexé par date, tableau date x valeur de by ou None)
+    """
+    frame = compute_kpi_frame(df)
+
+    if frame.date_column == date_col:
+        total = frame.daily_counts()
+        table = frame.daily_crosstab(by) if by and frame.has(by) else None
+        total.index = pd.DatetimeIndex(total.index)
+        if table is not None:
+            table.index = pd.DatetimeIndex(table.index)
+    else:
+        dates = pd.to_datetime(df[date_col], errors='coerce')
+        days = dates.dt.normalize()
+        total = days.groupby(days).size()
+        table = None
+        if by and by in df.columns:
+            table = df.groupby([days, df[by]], observed=True).size().unstack(fill_value=0)
+
+    total = _bounded(total.to_frame('count'), max_points)['count']
+    if table is not None:
+        table = _bounded(table, max_points)
+    return total, table
+
+
+def weekday_hour_counts(df: pd.DataFrame, date_col: str) -> pd.DataFrame:
+    """
+    Matrice 7 x 24 des volumes (lignes: 0 = lundi, colonnes: heure)
+
+    Lue dans le cube du moteur de KPIs quand date_col est sa colonne de date.
+    """
+    frame = compute_kpi_frame(df)
+    if frame.date_column == date_col:
+        return frame.weekday_hour_counts()
+
+    dates = pd.to_datetime(df[date_col], errors='coerce').dropna()
+    counts = dates.groupby([dates.dt.dayofweek, dates.dt.hour]).size()
+    return (counts.unstack(fill_value=0)
+            .reindex(index=range(7), columns=range(24), fill_value=0)
+            .astype('int64'))
+
+
+def top_counts(values: pd.Series, limit: int = 50) -> pd.Series:
+    """Comptages des limit valeurs les plus fréquentes"""
+    return values.value_counts().head(limit)
+
+
+# ═══════════════════════════════════════════════════════════
+# CACHE DES FIGURES
+# ═══════════════════════════════════════════════════════════
+
+def cached_figure(name: str,
+                  df: pd.DataFrame,
+                  build: Callable[[], object],
+                  columns: Optional[List[str]] = None,
+                  **params):
+    """
+    Figure mise en cache par hash des données utilisées
+
+    Args:
+        name: Nom du graphique
+        df: Données source
+        build: Construit la figure (appelé seulement en cas d'absence)
+        columns: Colonnes lues par build (toutes par défaut)
+        **params: Paramètres influant sur la figure
+
+    Returns:
+        Figure (None n'est pas mis en cache)
+    """
+    try:
+        data = df[[c for c in columns if c in df.columns]] if columns else df
+        key = stage_key('figure', hash_dataframe(data), chart=name, **params)
+    except Exception as e:
+        logger.debug(f"Figure {name}: hash impossible ({e}), pas de cache")
+        return build()
+    return get_stage_cache().get_or_compute(key, build)
+
+
+def payload_size(fig) -> int:
+    """Taille (octets) du JSON envoyé au navigateur pour une figure"""
+    return len(fig.to_json().encode('utf-8'))
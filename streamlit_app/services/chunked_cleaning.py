@@ -0,0 +1,421 @@
+"""
+Nettoyage Parallèle par Chunks - FreeMobilaChat
+================================================
+
+Étape de nettoyage multi-processus pour les exports de plusieurs millions
+de tweets. Le CSV est lu en flux (chunks), chaque chunk est nettoyé par un
+worker du pool de processus, puis écrit sous forme de shard Parquet.
+
+Fonctionnalités:
+- Lecture CSV en streaming (mémoire bornée par la taille des chunks)
+- Pool de processus avec nombre borné de chunks en vol
+- Moteurs de nettoyage: TweetCleaner ou DataProcessor.clean_data
+- Déduplication globale entre chunks (hash vectorisé)
+- Fusion des statistiques de nettoyage de tous les chunks
+- Comptage des lignes CSV malformées ignorées à la lecture
+- Distribution du score de qualité (part du texte conservée par tweet)
+"""
+
+import os  # Nombre de cœurs disponibles
+import logging  # Journalisation des opérations
+import time  # Mesure de la durée du nettoyage
+import warnings  # Interception des lignes CSV ignorées
+from collections import deque  # File des chunks en cours de traitement
+from concurrent.futures import ProcessPoolExecutor  # Pool de workers multi-processus
+from pathlib import Path  # Gestion des chemins de sortie
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Moteurs de nettoyage disponibles
+CLEANING_ENGINES = ('tweet_cleaner', 'data_processor')
+
+# Nombre de lignes par chunk par défaut
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Classes du score de qualité (0, 10, ..., 100)
+QUALITY_BINS = list(range(0, 101, 10))
+
+# Colonnes temporaires du moteur data_processor (texte brut remplacé par le texte nettoyé)
+_RAW_LENGTH = '__raw_length__'
+_RAW_HASH = '__raw_hash__'
+
+
+def quality_distribution(raw_lengths: pd.Series, cleaned_lengths: pd.Series) -> Dict[int, int]:
+    """
+    Distribution du score de qualité des tweets
+
+    Le score d'un tweet est la part (en %) de son texte brut conservée par
+    le nettoyage, arrondie à la dizaine inférieure: un tweet réduit à
+    quelques mots après retrait des URLs et mentions obtient un score bas.
+
+    Args:
+        raw_lengths: Longueurs des textes bruts
+        cleaned_lengths: Longueurs des textes nettoyés (mêmes lignes)
+
+    Returns:
+        Score (0, 10, ..., 100) -> nombre de tweets
+    """
+    raw = raw_lengths.to_numpy(dtype=float)
+    kept = np.divide(cleaned_lengths.to_numpy(dtype=float), raw, out=np.zeros_like(raw), where=raw > 0)
+    scores = (np.clip(kept, 0.0, 1.0) * 10).astype(int) * 10
+    counts = np.bincount(scores // 10, minlength=len(QUALITY_BINS))
+    return {score: int(count) for score, count in zip(QUALITY_BINS, counts)}
+
+
+def merge_cleaning_stats(stats_list: Iterable[Dict]) -> Dict:
+    """
+    Fusionne les statistiques de nettoyage de plusieurs chunks
+
+    Les compteurs sont additionnés et les longueurs moyennes sont
+    recalculées en moyenne pondérée par le nombre de tweets concernés.
+
+    Args:
+        stats_list: Statistiques par chunk (format TweetCleaner.process_dataframe)
+
+    Returns:
+        Statistiques globales au même format
+    """
+    merged = {
+        'total_original': 0,
+        'empty_tweets': 0,
+        'duplicates_removed': 0,
+        'too_short_removed': 0,
+        'total_cleaned': 0,
+        'avg_length_before': 0.0,
+        'avg_length_after': 0.0,
+        'chunks': 0,
+        'quality_distribution': {score: 0 for score in QUALITY_BINS},
+        'cleaning_operations': []
+    }
+
+    weight_before = 0
+    weight_after = 0
+    sum_before = 0.0
+    sum_after = 0.0
+
+    for stats in stats_list:
+        merged['chunks'] += 1
+        for key in ('total_original', 'empty_tweets', 'duplicates_removed',
+                    'too_short_removed', 'total_cleaned'):
+            merged[key] += int(stats.get(key, 0))
+
+        # Longueur avant: mesurée après valeurs manquantes et doublons retirés
+        n_before = (stats.get('total_original', 0) - stats.get('empty_tweets', 0)
+                    - stats.get('duplicates_removed', 0))
+        sum_before += stats.get('avg_length_before', 0.0) * n_before
+        weight_before += n_before
+
+        # Longueur après: mesurée sur les mêmes lignes, avant filtrage des vides
+        sum_after += stats.get('avg_length_after', 0.0) * n_before
+        weight_after += n_before
+
+        for score, count in stats.get('quality_distribution', {}).items():
+            merged['quality_distribution'][score] += count
+
+    merged['avg_length_before'] = sum_before / weight_before if weight_before else 0.0
+    merged['avg_length_after'] = sum_after / weight_after if weight_after else 0.0
+
+    merged['cleaning_operations'] = [
+        f"Valeurs manquantes supprimées: {merged['empty_tweets']}",
+        f"Doublons supprimés: {merged['duplicates_removed']}",
+        f"Tweets trop courts supprimés: {merged['too_short_removed']}",
+        f"Tweets nettoyés: {merged['total_cleaned']}",
+    ]
+
+    return merged
+
+
+def _clean_chunk_worker(engine: str,
+                        cleaner_options: Dict,
+                        chunk: pd.DataFrame,
+                        text_column: str) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Nettoie un chunk dans un processus worker
+
+    Fonction de module (et non méthode) pour rester picklable.
+
+    Args:
+        engine: Moteur de nettoyage (voir CLEANING_ENGINES)
+        cleaner_options: Options passées au constructeur du moteur
+        chunk: Chunk brut
+        text_column: Colonne texte
+
+    Returns:
+        (chunk nettoyé, statistiques du chunk)
+    """
+    if engine == 'tweet_cleaner':
+        from services.tweet_cleaner import TweetCleaner
+        return TweetCleaner(**cleaner_options).process_dataframe(chunk, text_column)
+
+    from services.data_processor import DataProcessor
+    stats = {
+        'total_original': len(chunk),
+        'empty_tweets': 0,
+        'duplicates_removed': 0,
+        'total_cleaned': 0,
+        'avg_length_before': 0.0,
+        'avg_length_after': 0.0,
+    }
+    if text_column not in chunk.columns:
+        cleaned = DataProcessor().clean_data(chunk)
+        stats['total_cleaned'] = len(cleaned)
+        return cleaned, stats
+
+    # Mêmes étapes que TweetCleaner.process_dataframe: manquants, doublons, longueurs
+    from services.tweet_cleaner import TweetCleaner
+    raw = chunk.dropna(subset=[text_column])
+    stats['empty_tweets'] = len(chunk) - len(raw)
+    deduplicated = TweetCleaner.remove_duplicates(raw, text_column)
+    stats['duplicates_removed'] = len(raw) - len(deduplicated)
+    raw = deduplicated
+
+    raw_lengths = raw[text_column].astype(str).str.len()
+    cleaned = DataProcessor().clean_data(raw)
+    cleaned_lengths = cleaned[text_column].astype(str).str.len()
+
+    if len(raw) > 0:
+        stats['avg_length_before'] = float(raw_lengths.mean())
+        # Les lignes vidées par le nettoyage comptent pour une longueur nulle
+        stats['avg_length_after'] = float(cleaned_lengths.sum() / len(raw))
+    stats['total_cleaned'] = len(cleaned)
+
+    # clean_data conserve l'index: longueur et hash du texte brut réalignés
+    # pour le score de qualité et la déduplication entre chunks
+    cleaned[_RAW_LENGTH] = raw_lengths.reindex(cleaned.index).to_numpy()
+    raw_hashes = pd.util.hash_pandas_object(raw[text_column], index=False)
+    cleaned[_RAW_HASH] = raw_hashes.set_axis(raw.index).reindex(cleaned.index).to_numpy()
+    return cleaned, stats
+
+
+class ChunkedCleaningPipeline:
+    """
+    Pipeline de nettoyage parallèle par chunks
+
+    Les chunks sont soumis à un pool de processus avec au plus
+    2 × n_workers chunks en vol, puis récupérés dans l'ordre de lecture:
+    la mémoire reste bornée quelle que soit la taille du fichier et la
+    déduplication globale conserve toujours la première occurrence.
+    """
+
+    def __init__(self,
+                 n_workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 engine: str = 'tweet_cleaner',
+                 text_column: str = 'text',
+                 remove_duplicates: bool = True,
+                 min_length: int = 0,
+                 cleaner_options: Optional[Dict] = None):
+        """
+        Initialise le pipeline
+
+        Args:
+            n_workers: Nombre de processus (défaut: nombre de cœurs)
+            chunk_size: Nombre de lignes par chunk
+            engine: Moteur de nettoyage ('tweet_cleaner' ou 'data_processor')
+            text_column: Colonne texte à nettoyer
+            remove_duplicates: Déduplication globale entre chunks
+            min_length: Longueur minimale du texte nettoyé
+            cleaner_options: Options du moteur (ex: remove_hashtags=True)
+        """
+        if engine not in CLEANING_ENGINES:
+            raise ValueError(f"Moteur inconnu: {engine} (attendu: {', '.join(CLEANING_ENGINES)})")
+
+        self.n_workers = max(1, n_workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self.text_column = text_column
+        self.remove_duplicates = remove_duplicates
+        self.min_length = min_length
+        self.cleaner_options = cleaner_options or {}
+
+        # Hash des textes déjà conservés (déduplication entre chunks)
+        self._seen_hashes = set()
+
+        # Lignes CSV malformées ignorées par read_chunks
+        self.bad_lines_skipped = 0
+
+        logger.info(f"🔧 Nettoyage parallèle: {self.n_workers} workers, chunks de {chunk_size:,} lignes")
+
+    @property
+    def cleaned_column(self) -> str:
+        """Colonne contenant le texte nettoyé en sortie du moteur"""
+        if self.engine == 'tweet_cleaner':
+            return f'{self.text_column}_cleaned'
+        return self.text_column
+
+    def read_chunks(self, csv_path: str, **read_csv_kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Lit un CSV en flux par chunks
+
+        Les lignes malformées sont ignorées et comptées dans
+        bad_lines_skipped (sauf si on_bad_lines est fourni).
+
+        Args:
+            csv_path: Chemin du CSV
+            **read_csv_kwargs: Options supplémentaires pour pd.read_csv
+
+        Yields:
+            Chunks du CSV
+        """
+        read_csv_kwargs.setdefault('encoding', 'utf-8')
+        read_csv_kwargs.setdefault('on_bad_lines', 'warn')
+        self.bad_lines_skipped = 0
+
+        with pd.read_csv(csv_path, chunksize=self.chunk_size, **read_csv_kwargs) as reader:
+            while True:
+                # pandas signale chaque ligne ignorée par un ParserWarning ("Skipping line N: ...")
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter('always', pd.errors.ParserWarning)
+                    chunk = next(reader, None)
+
+                for warning in caught:
+                    if issubclass(warning.category, pd.errors.ParserWarning):
+                        self.bad_lines_skipped += str(warning.message).count('Skipping line')
+                    else:
+                        warnings.warn(warning.message, warning.category)
+
+                if chunk is None:
+                    return
+                yield chunk
+
+    def iter_cleaned(self, chunks: Iterable[pd.DataFrame]) -> Iterator[Tuple[pd.DataFrame, Dict]]:
+        """
+        Nettoie des chunks en parallèle et les restitue dans l'ordre
+
+        Args:
+            chunks: Chunks bruts (ex: read_chunks)
+
+        Yields:
+            (chunk nettoyé, statistiques du chunk)
+        """
+        max_pending = 2 * self.n_workers
+        pending = deque()
+
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            for chunk in chunks:
+                pending.append(executor.submit(
+                    _clean_chunk_worker, self.engine, self.cleaner_options, chunk, self.text_column
+                ))
+                if len(pending) >= max_pending:
+                    yield self._finalize_chunk(*pending.popleft().result())
+
+            while pending:
+                yield self._finalize_chunk(*pending.popleft().result())
+
+    def _finalize_chunk(self, cleaned: pd.DataFrame, stats: Dict) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Applique la déduplication globale et le filtre de longueur
+
+        Args:
+            cleaned: Chunk nettoyé par un worker
+            stats: Statistiques du worker
+
+        Returns:
+            (chunk final, statistiques mises à jour)
+        """
+        stats = dict(stats)
+        raw_hashes = cleaned.pop(_RAW_HASH).to_numpy() if _RAW_HASH in cleaned.columns else None
+        if _RAW_LENGTH in cleaned.columns:
+            raw_lengths = cleaned.pop(_RAW_LENGTH)
+        elif self.text_column in cleaned.columns:
+            raw_lengths = cleaned[self.text_column].astype(str).str.len()
+        else:
+            raw_lengths = pd.Series(0, index=cleaned.index)
+
+        if self.remove_duplicates and self.text_column in cleaned.columns and len(cleaned) > 0:
+            if raw_hashes is not None:
+                hashes = raw_hashes
+            else:
+                hashes = pd.util.hash_pandas_object(cleaned[self.text_column], index=False).to_numpy()
+            seen = self._seen_hashes
+            keep = np.fromiter((h not in seen for h in hashes), dtype=bool, count=len(hashes))
+            seen.update(hashes[keep].tolist())
+
+            cross_chunk = int((~keep).sum())
+            if cross_chunk:
+                cleaned = cleaned[keep]
+                raw_lengths = raw_lengths[keep]
+                stats['duplicates_removed'] = stats.get('duplicates_removed', 0) + cross_chunk
+                stats['total_cleaned'] = len(cleaned)
+
+        if self.min_length > 0 and self.cleaned_column in cleaned.columns:
+            long_enough = cleaned[self.cleaned_column].astype(str).str.len().to_numpy() >= self.min_length
+            too_short = int((~long_enough).sum())
+            if too_short:
+                cleaned = cleaned[long_enough]
+                raw_lengths = raw_lengths[long_enough]
+            stats['too_short_removed'] = too_short
+            stats['total_cleaned'] = len(cleaned)
+
+        if self.cleaned_column in cleaned.columns:
+            stats['quality_distribution'] = quality_distribution(
+                raw_lengths, cleaned[self.cleaned_column].astype(str).str.len()
+            )
+
+        return cleaned.reset_index(drop=True), stats
+
+    def run(self, input_csv: str, output_dir: str, **read_csv_kwargs) -> Dict:
+        """
+        Nettoie un CSV complet et écrit des shards Parquet
+
+        Args:
+            input_csv: CSV brut
+            output_dir: Répertoire des shards (part-00000.parquet, ...)
+            **read_csv_kwargs: Options supplémentaires pour pd.read_csv
+
+        Returns:
+            Statistiques fusionnées (avec 'shards' et 'duration_seconds')
+        """
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        for old_shard in output_path.glob('part-*.parquet'):
+            old_shard.unlink()
+
+        self._seen_hashes = set()
+        start = time.time()
+        shards: List[str] = []
+        all_stats: List[Dict] = []
+
+        for cleaned, stats in self.iter_cleaned(self.read_chunks(input_csv, **read_csv_kwargs)):
+            shard_path = output_path / f'part-{len(shards):05d}.parquet'
+            cleaned.to_parquet(shard_path, index=False)
+            shards.append(shard_path.name)
+            all_stats.append(stats)
+            logger.info(f"Shard {shard_path.name}: {stats['total_original']:,} → {len(cleaned):,} tweets")
+
+        merged = merge_cleaning_stats(all_stats)
+        merged['bad_lines_skipped'] = self.bad_lines_skipped
+        merged['shards'] = shards
+        merged['workers'] = self.n_workers
+        merged['duration_seconds'] = round(time.time() - start, 3)
+
+        if self.bad_lines_skipped:
+            logger.warning(f"{self.bad_lines_skipped:,} lignes malformées ignorées dans {input_csv}")
+        logger.info(f"Nettoyage terminé: {merged['total_original']:,} → {merged['total_cleaned']:,} "
+                    f"tweets en {merged['duration_seconds']}s ({len(shards)} shards)")
+
+        return merged
+
+    def process_dataframe(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Nettoie un DataFrame déjà en mémoire avec le pool de processus
+
+        Args:
+            df: DataFrame brut
+
+        Returns:
+            (DataFrame nettoyé, statistiques fusionnées)
+        """
+        self._seen_hashes = set()
+        chunks = (df.iloc[i:i + self.chunk_size] for i in range(0, len(df), self.chunk_size))
+        results = list(self.iter_cleaned(chunks))
+
+        if not results:
+            return df.iloc[0:0].copy(), merge_cleaning_stats([])
+
+        cleaned = pd.concat([r[0] for r in results], ignore_index=True)
+        return cleaned, merge_cleaning_stats(r[1] for r in results)
@@ -10,6 +10,11 @@ import plotly.graph_objects as go
 from typing import Dict, Any, List, Optional
 import streamlit as st
 
+from services.kpi_engine import (
+    compute_kpi_frame, CLAIM_LABELS, POSITIVE_LABELS, NEUTRAL_LABELS, NEGATIVE_LABELS
+)
+from services.chart_data import cached_figure, histogram
+
 # Couleurs Free Mobile
 COLORS = {
     'primary': '#CC0000',
@@ -37,13 +42,13 @@ def compute_classic_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     - confidence: Score de confiance (moyenne, min, max)
     
     GARANTIE DE DYNAMISME:
-    - Pas de cache entre les appels
+    - Pas de cache entre fichiers (passe partagée liée à l'objet df)
     - Calculs basés uniquement sur df
     - Chaque fichier uploadé = nouveaux KPIs
     
     OPTIMISATIONS:
-    - Calculs vectorisés pandas/numpy
-    - Réutilisation des calculs intermédiaires
+    - Une seule passe via le moteur partagé (services.kpi_engine)
+    - Normalisation des valeurs uniques seulement, pas des lignes
     - Gestion optimisée des valeurs manquantes
     
     Args:
@@ -58,18 +63,12 @@ def compute_classic_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     if total_tweets == 0:
         return kpis
     
-    # 1. Claim Detection (is_claim) - OPTIMISÉ
-    if 'is_claim' in df.columns:
-        # Gérer les listes et valeurs simples
-        if df['is_claim'].dtype == 'object':
-            # Si c'est une liste, extraire la première valeur
-            claims_array = df['is_claim'].apply(
-                lambda x: int(x[0]) if isinstance(x, list) and len(x) > 0 else (int(x) if pd.notna(x) else 0)
-            )
-        else:
-            claims_array = pd.to_numeric(df['is_claim'], errors='coerce').fillna(0)
-        
-        claims_count = int(claims_array.sum())
+    # Une seule passe sur df, partagée avec les autres modules de KPIs
+    frame = compute_kpi_frame(df)
+    
+    # 1. Claim Detection (is_claim)
+    if frame.has('is_claim'):
+        claims_count = frame.count_in('is_claim', CLAIM_LABELS)
         
         kpis['claim_rate'] = {
             'value': (claims_count / total_tweets * 100),
@@ -78,34 +77,23 @@ def compute_classic_kpis(df: pd.DataFrame) -> Dict[str, Any]:
             'non_claims': total_tweets - claims_count
         }
     
-    # 2. Topics Distribution - OPTIMISÉ
-    if 'topics' in df.columns:
-        # Aplatir les listes de topics
-        topics_flat = []
-        for topics_list in df['topics']:
-            if isinstance(topics_list, list):
-                topics_flat.extend(topics_list)
-            elif pd.notna(topics_list):
-                topics_flat.append(str(topics_list))
+    # 2. Topics Distribution (listes de topics aplaties par le moteur)
+    if frame.has('topics'):
+        topics_counts = frame.counts('topics')
         
-        if topics_flat:
-            topics_series = pd.Series(topics_flat)
-            topics_counts = topics_series.value_counts()
-            
+        if len(topics_counts) > 0:
             kpis['topics_distribution'] = {
                 'categories': topics_counts.to_dict(),
-                'top_category': topics_counts.index[0] if len(topics_counts) > 0 else 'N/A',
+                'top_category': topics_counts.index[0],
                 'count': len(topics_counts),
-                'total_mentions': len(topics_flat)
+                'total_mentions': int(topics_counts.sum())
             }
     
-    # 3. Sentiment Analysis - OPTIMISÉ
-    if 'sentiment' in df.columns:
-        sentiment_lower = df['sentiment'].str.lower().fillna('neu')
-        
-        positive = (sentiment_lower.isin(['positive', 'positif', 'pos'])).sum()
-        neutral = (sentiment_lower.isin(['neutral', 'neutre', 'neu'])).sum()
-        negative = (sentiment_lower.isin(['negative', 'négatif', 'negatif', 'neg'])).sum()
+    # 3. Sentiment Analysis (valeurs manquantes comptées neutres)
+    if frame.has('sentiment'):
+        positive = frame.count_in('sentiment', POSITIVE_LABELS)
+        neutral = frame.count_in('sentiment', NEUTRAL_LABELS) + frame.missing('sentiment')
+        negative = frame.count_in('sentiment', NEGATIVE_LABELS)
         
         satisfaction_index = ((positive - negative) / total_tweets * 50 + 50) if total_tweets > 0 else 50
         
@@ -119,28 +107,12 @@ def compute_classic_kpis(df: pd.DataFrame) -> Dict[str, Any]:
             'satisfaction_index': satisfaction_index
         }
     
-    # 4. Urgency Levels - OPTIMISÉ
-    if 'urgence' in df.columns:
-        urgency_lower = df['urgence'].str.lower().fillna('basse')
-        
-        haute = (urgency_lower.isin(['haute', 'high', 'urgent', 'critique'])).sum()
-        moyenne = (urgency_lower.isin(['moyenne', 'medium', 'moyen'])).sum()
-        basse = (urgency_lower.isin(['basse', 'low', 'faible'])).sum()
-        
-        kpis['urgency_levels'] = {
-            'haute_count': int(haute),
-            'moyenne_count': int(moyenne),
-            'basse_count': int(basse),
-            'haute_pct': (haute / total_tweets * 100),
-            'moyenne_pct': (moyenne / total_tweets * 100),
-            'basse_pct': (basse / total_tweets * 100),
-            'urgent_total': int(haute + moyenne)
-        }
-    elif 'priority' in df.columns:
-        priority_lower = df['priority'].str.lower().fillna('low')
-        haute = (priority_lower.isin(['haute', 'high', 'urgent'])).sum()
-        moyenne = (priority_lower.isin(['moyenne', 'medium'])).sum()
-        basse = (priority_lower.isin(['basse', 'low'])).sum()
+    # 4. Urgency Levels (valeurs manquantes comptées basses)
+    urgency_col = 'urgence' if frame.has('urgence') else ('priority' if frame.has('priority') else None)
+    if urgency_col:
+        haute = frame.count_in(urgency_col, ['haute', 'high', 'urgent', 'critique'])
+        moyenne = frame.count_in(urgency_col, ['moyenne', 'medium', 'moyen'])
+        basse = frame.count_in(urgency_col, ['basse', 'low', 'faible']) + frame.missing(urgency_col)
         
         kpis['urgency_levels'] = {
             'haute_count': int(haute),
@@ -152,9 +124,9 @@ def compute_classic_kpis(df: pd.DataFrame) -> Dict[str, Any]:
             'urgent_total': int(haute + moyenne)
         }
     
-    # 5. Incident Types - OPTIMISÉ
-    if 'incident' in df.columns:
-        incident_counts = df['incident'].value_counts()
+    # 5. Incident Types
+    if frame.has('incident'):
+        incident_counts = frame.counts('incident')
         
         kpis['incident_types'] = {
             'categories': incident_counts.to_dict(),
@@ -162,25 +134,17 @@ def compute_classic_kpis(df: pd.DataFrame) -> Dict[str, Any]:
             'count': len(incident_counts)
         }
     
-    # 6. Confidence Score - OPTIMISÉ
+    # 6. Confidence Score
     if 'confidence' in df.columns:
-        # Gérer les listes et valeurs simples
-        if df['confidence'].dtype == 'object':
-            confidence_array = df['confidence'].apply(
-                lambda x: float(x[0]) if isinstance(x, list) and len(x) > 0 else (float(x) if pd.notna(x) else 0.5)
-            )
-        else:
-            confidence_array = pd.to_numeric(df['confidence'], errors='coerce').fillna(0.5)
+        stats = frame.numeric('confidence')
         
-        confidence_clean = confidence_array[confidence_array > 0]
-        
-        if len(confidence_clean) > 0:
+        if stats and stats['count'] > 0:
             kpis['confidence_score'] = {
-                'average': float(confidence_clean.mean()),
-                'min': float(confidence_clean.min()),
-                'max': float(confidence_clean.max()),
-                'std': float(confidence_clean.std()),
-                'median': float(confidence_clean.median())
+                'average': stats['mean'],
+                'min': stats['min'],
+                'max': stats['max'],
+                'std': stats['std'] if stats['count'] > 1 else 0.0,
+                'median': stats['median']
             }
         else:
             kpis['confidence_score'] = {
@@ -617,7 +581,7 @@ def create_incident_pie_chart(df: pd.DataFrame) -> Optional[go.Figure]:
     if 'incident' not in df.columns:
         return None
     
-    incident_counts = df['incident'].value_counts()
+    incident_counts = compute_kpi_frame(df).counts('incident')
     
     if len(incident_counts) == 0:
         return None
@@ -646,30 +610,33 @@ def create_incident_pie_chart(df: pd.DataFrame) -> Optional[go.Figure]:
 
 
 def create_confidence_histogram(df: pd.DataFrame) -> Optional[go.Figure]:
-    """Crée un histogramme pour confidence"""
+    """Crée un histogramme pour confidence (classes pré-calculées, 20 barres quel que soit le volume)"""
     if 'confidence' not in df.columns:
         return None
+    return cached_figure('confidence_histogram', df, lambda: _build_confidence_histogram(df),
+                         columns=['confidence'])
+
+
+def _build_confidence_histogram(df: pd.DataFrame) -> Optional[go.Figure]:
+    # Extraire les valeurs de confidence (premier élément des listes)
+    confidence_values = df['confidence']
+    if confidence_values.dtype == object:
+        confidence_values = confidence_values.map(
+            lambda conf: conf[0] if isinstance(conf, list) and len(conf) > 0 else conf
+        )
+    bins = histogram(pd.to_numeric(confidence_values, errors='coerce'), bins=20)
     
-    # Extraire les valeurs de confidence
-    confidence_values = []
-    for conf in df['confidence']:
-        if isinstance(conf, list) and len(conf) > 0:
-            confidence_values.append(float(conf[0]))
-        elif pd.notna(conf):
-            try:
-                confidence_values.append(float(conf))
-            except:
-                continue
-    
-    if not confidence_values:
+    if bins.empty:
         return None
     
     fig = go.Figure(data=[
-        go.Histogram(
-            x=confidence_values,
-            nbinsx=20,
+        go.Bar(
+            x=bins['center'],
+            y=bins['count'],
+            width=bins['right'] - bins['left'],
+            customdata=bins[['left', 'right']],
             marker=dict(color='#CC0000'),
-            hovertemplate="<b>Confidence</b><br>Intervalle: %{x}<br>Count: %{y}<extra></extra>"
+            hovertemplate="<b>Confidence</b><br>Intervalle: %{customdata[0]:.2f} - %{customdata[1]:.2f}<br>Count: %{y}<extra></extra>"
         )
     ])
     
@@ -679,6 +646,7 @@ def create_confidence_histogram(df: pd.DataFrame) -> Optional[go.Figure]:
         height=350,
         template="plotly_white",
         showlegend=False,
+        bargap=0,
         xaxis_title="Score de Confiance",
         yaxis_title="Fréquence",
         margin=dict(t=50, b=50, l=40, r=20)
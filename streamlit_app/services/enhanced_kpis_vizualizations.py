@@ -23,6 +23,12 @@ from typing import Dict, Any, List, Tuple  # Annotations de types pour clarté
 import streamlit as st  # Interface utilisateur et composants de rendu
 from datetime import datetime  # Gestion des horodatages pour traçabilité
 
+from services.kpi_engine import (  # Moteur de KPIs en une passe partagé
+    compute_kpi_frame, CLAIM_LABELS, POSITIVE_LABELS, NEUTRAL_LABELS, NEGATIVE_LABELS
+)
+from services import chart_data  # Agrégations bornées pour les figures Plotly
+from services.chart_data import cached_figure
+
 # Palette de couleurs Free Mobile (identité visuelle de la marque)
 COLORS = {
     'primary': '#CC0000',  # Rouge principal Free Mobile (couleur signature)
@@ -42,16 +48,15 @@ def compute_business_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     Calcule les KPIs business de manière 100% DYNAMIQUE avec optimisations de performance
     
     GARANTIE DE DYNAMISME:
-    - Pas de cache entre les appels
+    - Pas de cache entre fichiers (passe partagée liée à l'objet df)
     - Pas de variables globales
     - Calculs basés uniquement sur df
     - Chaque fichier uploadé = nouveaux KPIs
     
     OPTIMISATIONS DE PERFORMANCE:
-    - Calculs vectorisés avec pandas/numpy
-    - Évite les boucles explicites
-    - Réutilise les calculs intermédiaires
-    - Minimise les conversions de types
+    - Une seule passe via le moteur partagé (services.kpi_engine)
+    - Normalisation et motifs appliqués aux valeurs distinctes, pas aux lignes
+    - Réutilise la passe déjà faite par les autres modules sur le même df
     
     Args:
         df: DataFrame avec les tweets analysés (données du fichier actuel)
@@ -66,22 +71,20 @@ def compute_business_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     if total_tweets == 0:
         return kpis
     
-    # 1. Claim Rate (Taux de réclamations) - OPTIMISÉ ET ROBUSTE
+    # Une seule passe sur df (encodage catégoriel + agrégation), partagée avec les autres modules
+    frame = compute_kpi_frame(df)
+    
+    # 1. Claim Rate (Taux de réclamations) - supporte 'oui'/'non' et 1/0
     claims_count = 0
     
     # Vérifier multiple colonnes possibles
-    if 'is_claim' in df.columns:
-        # Conversion vectorisée - supporter 'oui'/'non' et 1/0
-        claims_array = df['is_claim'].astype(str).str.lower()
-        claims_count = int(claims_array.isin(['oui', 'yes', '1', 'true']).sum())
-    elif 'category' in df.columns:
-        # Vectorisation avec str.contains
-        claims_mask = df['category'].astype(str).str.contains('réclamation|claim|complaint', case=False, na=False)
-        claims_count = int(claims_mask.sum())
-    elif 'incident' in df.columns:
+    if frame.has('is_claim'):
+        claims_count = frame.count_in('is_claim', CLAIM_LABELS)
+    elif frame.has('category'):
+        claims_count = frame.count_matching('category', 'réclamation|claim|complaint')
+    elif frame.has('incident'):
         # Support pour colonne 'incident'
-        claims_mask = df['incident'].astype(str).str.contains('réclamation|claim|complaint', case=False, na=False)
-        claims_count = int(claims_mask.sum())
+        claims_count = frame.count_matching('incident', 'réclamation|claim|complaint')
     
     kpis['claim_rate'] = {
         'value': (claims_count / total_tweets * 100) if total_tweets > 0 else 0.0,
@@ -89,42 +92,21 @@ def compute_business_kpis(df: pd.DataFrame) -> Dict[str, Any]:
         'total': total_tweets
     }
     
-    # 2. Thematic Distribution (Distribution thématique) - OPTIMISÉ
-    if 'category' in df.columns:
-        theme_dist = df['category'].value_counts()
-        kpis['thematic_distribution'] = {
-            'categories': theme_dist.to_dict(),
-            'top_category': theme_dist.index[0] if len(theme_dist) > 0 else 'N/A',
-            'count': len(theme_dist)
-        }
-    elif 'incident' in df.columns:
-        theme_dist = df['incident'].value_counts()
-        kpis['thematic_distribution'] = {
-            'categories': theme_dist.to_dict(),
-            'top_category': theme_dist.index[0] if len(theme_dist) > 0 else 'N/A',
-            'count': len(theme_dist)
-        }
-    elif 'theme' in df.columns:
-        theme_dist = df['theme'].value_counts()
+    # 2. Thematic Distribution (Distribution thématique)
+    theme_col = next((col for col in ('category', 'incident', 'theme') if frame.has(col)), None)
+    if theme_col:
+        theme_dist = frame.counts(theme_col)
         kpis['thematic_distribution'] = {
             'categories': theme_dist.to_dict(),
             'top_category': theme_dist.index[0] if len(theme_dist) > 0 else 'N/A',
             'count': len(theme_dist)
         }
     
-    # 3. Customer Satisfaction Index (Indice de satisfaction) - OPTIMISÉ ET ROBUSTE
-    if 'sentiment' in df.columns:
-        # Normaliser les sentiments pour supporter différents formats
-        sentiment_normalized = df['sentiment'].astype(str).str.lower().str.strip()
-        
-        # Détecter tous les formats possibles
-        positive_mask = sentiment_normalized.isin(['positive', 'positif', 'pos', '1', 'good', 'happy'])
-        neutral_mask = sentiment_normalized.isin(['neutral', 'neutre', 'neu', '0', 'ok'])
-        negative_mask = sentiment_normalized.isin(['negative', 'négatif', 'negatif', 'neg', '-1', 'bad', 'angry'])
-        
-        positive = int(positive_mask.sum())
-        neutral = int(neutral_mask.sum())
-        negative = int(negative_mask.sum())
+    # 3. Customer Satisfaction Index (Indice de satisfaction) - formats multiples
+    if frame.has('sentiment'):
+        positive = frame.count_in('sentiment', POSITIVE_LABELS + ['1', 'good', 'happy'])
+        neutral = frame.count_in('sentiment', NEUTRAL_LABELS + ['0', 'ok'])
+        negative = frame.count_in('sentiment', NEGATIVE_LABELS + ['-1', 'bad', 'angry'])
         
         # Calcul de l'indice de satisfaction (scale 0-100)
         # Formule: ((positif - négatif) / total) * 50 + 50
@@ -140,25 +122,17 @@ def compute_business_kpis(df: pd.DataFrame) -> Dict[str, Any]:
             'negative_pct': (negative / total_tweets * 100) if total_tweets > 0 else 0.0
         }
     
-    # 4. Urgency Rate (Taux d'urgence) - OPTIMISÉ ET ROBUSTE
+    # 4. Urgency Rate (Taux d'urgence) - motifs appliqués aux valeurs distinctes
     critical = 0
     high = 0
-    
-    if 'priority' in df.columns:
-        priority_normalized = df['priority'].astype(str).str.lower().fillna('')
-        critical_mask = priority_normalized.str.contains('critique|critical|urgent|très haute', regex=True, na=False)
-        high_mask = priority_normalized.str.contains('haute|high|élevée', regex=True, na=False) & ~critical_mask
-        critical = int(critical_mask.sum())
-        high = int(high_mask.sum())
-    elif 'urgence' in df.columns:
-        urgence_normalized = df['urgence'].astype(str).str.lower().fillna('')
-        critical_mask = urgence_normalized.str.contains('critique|critical|urgent|très haute', regex=True, na=False)
-        high_mask = urgence_normalized.str.contains('haute|high|élevée', regex=True, na=False) & ~critical_mask
-        critical = int(critical_mask.sum())
-        high = int(high_mask.sum())
-    elif 'is_urgent' in df.columns:
-        urgent_array = df['is_urgent'].astype(str).str.lower()
-        critical = int(urgent_array.isin(['oui', 'yes', '1', 'true']).sum())
+    critical_pattern = 'critique|critical|urgent|très haute'
+    
+    urgency_col = 'priority' if frame.has('priority') else ('urgence' if frame.has('urgence') else None)
+    if urgency_col:
+        critical = frame.count_matching(urgency_col, critical_pattern)
+        high = frame.count_matching(urgency_col, 'haute|high|élevée', exclude=critical_pattern)
+    elif frame.has('is_urgent'):
+        critical = frame.count_in('is_urgent', ['oui', 'yes', '1', 'true'])
         high = 0
     
     urgent_total = critical + high
@@ -169,29 +143,17 @@ def compute_business_kpis(df: pd.DataFrame) -> Dict[str, Any]:
         'urgency_pct': (urgent_total / total_tweets * 100) if total_tweets > 0 else 0.0
     }
     
-    # 5. Average Confidence Score (Score de confiance moyen) - OPTIMISÉ
-    if 'confidence' in df.columns:
-        confidence_numeric = pd.to_numeric(df['confidence'], errors='coerce')
-        confidence_clean = confidence_numeric.dropna()
+    # 5. Average Confidence Score (Score de confiance moyen)
+    if 'confidence' in df.columns or 'sentiment_score' in df.columns:
+        confidence_col = 'confidence' if 'confidence' in df.columns else 'sentiment_score'
+        stats = frame.numeric(confidence_col)
         
-        if len(confidence_clean) > 0:
+        if stats and stats['count'] > 0:
             kpis['confidence_score'] = {
-                'average': float(confidence_clean.mean()),
-                'min': float(confidence_clean.min()),
-                'max': float(confidence_clean.max()),
-                'std': float(confidence_clean.std()) if len(confidence_clean) > 1 else 0.0
-            }
-        else:
-            kpis['confidence_score'] = {'average': 0, 'min': 0, 'max': 0, 'std': 0}
-    elif 'sentiment_score' in df.columns:
-        sentiment_numeric = pd.to_numeric(df['sentiment_score'], errors='coerce').dropna()
-        
-        if len(sentiment_numeric) > 0:
-            kpis['confidence_score'] = {
-                'average': float(abs(sentiment_numeric.mean())),
-                'min': float(sentiment_numeric.min()),
-                'max': float(sentiment_numeric.max()),
-                'std': float(sentiment_numeric.std()) if len(sentiment_numeric) > 1 else 0.0
+                'average': stats['mean'] if confidence_col == 'confidence' else abs(stats['mean']),
+                'min': stats['min'],
+                'max': stats['max'],
+                'std': stats['std'] if stats['count'] > 1 else 0.0
             }
         else:
             kpis['confidence_score'] = {'average': 0, 'min': 0, 'max': 0, 'std': 0}
@@ -420,8 +382,8 @@ def create_sentiment_distribution_chart(df: pd.DataFrame) -> go.Figure:
     if 'sentiment' not in df.columns:
         return None
     
-    # Calcul optimisé avec value_counts (déjà vectorisé)
-    sentiment_counts = df['sentiment'].value_counts()
+    # Comptages lus dans la passe partagée du moteur de KPIs
+    sentiment_counts = compute_kpi_frame(df).counts('sentiment')
     
     if len(sentiment_counts) == 0:
         return None
@@ -499,10 +461,24 @@ def create_sentiment_distribution_chart(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+def _resolve_date_column(df: pd.DataFrame, date_col: str):
+    """Colonne de date présente dans df (date_col ou un nom alternatif), None sinon"""
+    if date_col in df.columns:
+        return date_col
+    possible_names = ['created_at', 'timestamp', 'datetime', 'Date']
+    for name in possible_names:
+        if name in df.columns:
+            return name
+    return None
+
+
 def create_time_series_chart(df: pd.DataFrame, date_col: str = 'date') -> go.Figure:
     """
     Crée un graphique temporel multi-lignes
     
+    Les volumes sont agrégés par jour (semaine ou mois au-delà de
+    MAX_POINTS dates): la taille de la figure ne dépend pas du nombre de tweets.
+    
     Args:
         df: DataFrame avec colonne de date
         date_col: Nom de la colonne de date
@@ -510,75 +486,64 @@ def create_time_series_chart(df: pd.DataFrame, date_col: str = 'date') -> go.Fig
     Returns:
         Figure Plotly
     """
-    if date_col not in df.columns:
-        # Essayer d'autres noms
-        possible_names = ['created_at', 'timestamp', 'datetime', 'Date']
-        for name in possible_names:
-            if name in df.columns:
-                date_col = name
-                break
-        else:
-            return None
+    date_col = _resolve_date_column(df, date_col)
+    if date_col is None:
+        return None
     
-    # Convertir en datetime
     try:
-        df_copy = df.copy()
-        df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce')
-        df_copy = df_copy.dropna(subset=[date_col])
-        
-        if len(df_copy) == 0:
-            return None
-        
-        # Grouper par jour
-        df_copy['date_only'] = df_copy[date_col].dt.date
-        daily_counts = df_copy.groupby('date_only').size().reset_index(name='count')
-        
-        # Si on a la colonne sentiment, ajouter les courbes par sentiment
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=daily_counts['date_only'],
-            y=daily_counts['count'],
-            mode='lines+markers',
-            name='Volume Total',
-            line=dict(color=COLORS['primary'], width=3),
-            marker=dict(size=6)
-        ))
-        
-        if 'sentiment' in df_copy.columns:
-            for sentiment in df_copy['sentiment'].unique():
-                if pd.notna(sentiment):
-                    sentiment_data = df_copy[df_copy['sentiment'] == sentiment].groupby('date_only').size().reset_index(name='count')
-                    
-                    color = COLORS.get(sentiment.lower(), COLORS['info'])
-                    
-                    fig.add_trace(go.Scatter(
-                        x=sentiment_data['date_only'],
-                        y=sentiment_data['count'],
-                        mode='lines',
-                        name=f'Sentiment: {sentiment}',
-                        line=dict(color=color, width=2),
-                        opacity=0.7
-                    ))
-        
-        fig.update_layout(
-            title="<b>Évolution Temporelle du Volume de Tweets</b>",
-            xaxis_title="Date",
-            yaxis_title="Nombre de Tweets",
-            title_font_size=18,
-            height=450,
-            template="plotly_white",
-            hovermode='x unified',
-            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
-        )
-        
-        return fig
-        
+        return cached_figure('time_series', df, lambda: _build_time_series_chart(df, date_col),
+                             columns=[date_col, 'sentiment'], date_col=date_col)
     except Exception as e:
         st.error(f"Erreur lors de la création du graphique temporel: {e}")
         return None
 
 
+def _build_time_series_chart(df: pd.DataFrame, date_col: str) -> go.Figure:
+    by = 'sentiment' if 'sentiment' in df.columns else None
+    daily_counts, by_sentiment = chart_data.daily_counts(df, date_col, by=by)
+    
+    if daily_counts.sum() == 0:
+        return None
+    
+    # Si on a la colonne sentiment, ajouter les courbes par sentiment
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=daily_counts.index,
+        y=daily_counts.values,
+        mode='lines+markers',
+        name='Volume Total',
+        line=dict(color=COLORS['primary'], width=3),
+        marker=dict(size=6)
+    ))
+    
+    if by_sentiment is not None:
+        for sentiment in by_sentiment.columns:
+            color = COLORS.get(str(sentiment).lower(), COLORS['info'])
+            
+            fig.add_trace(go.Scatter(
+                x=by_sentiment.index,
+                y=by_sentiment[sentiment].values,
+                mode='lines',
+                name=f'Sentiment: {sentiment}',
+                line=dict(color=color, width=2),
+                opacity=0.7
+            ))
+    
+    fig.update_layout(
+        title="<b>Évolution Temporelle du Volume de Tweets</b>",
+        xaxis_title="Date",
+        yaxis_title="Nombre de Tweets",
+        title_font_size=18,
+        height=450,
+        template="plotly_white",
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    
+    return fig
+
+
 def create_activity_heatmap(df: pd.DataFrame, date_col: str = 'date') -> go.Figure:
     """
     Crée une heatmap d'activité par heure et jour
@@ -590,62 +555,51 @@ def create_activity_heatmap(df: pd.DataFrame, date_col: str = 'date') -> go.Figu
     Returns:
         Figure Plotly
     """
-    if date_col not in df.columns:
-        possible_names = ['created_at', 'timestamp', 'datetime', 'Date']
-        for name in possible_names:
-            if name in df.columns:
-                date_col = name
-                break
-        else:
-            return None
+    date_col = _resolve_date_column(df, date_col)
+    if date_col is None:
+        return None
     
     try:
-        df_copy = df.copy()
-        df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce')
-        df_copy = df_copy.dropna(subset=[date_col])
-        
-        if len(df_copy) == 0:
-            return None
-        
-        # Extraire heure et jour de la semaine
-        df_copy['hour'] = df_copy[date_col].dt.hour
-        df_copy['day_of_week'] = df_copy[date_col].dt.day_name()
-        
-        # Créer une matrice heure x jour
-        heatmap_data = df_copy.groupby(['day_of_week', 'hour']).size().reset_index(name='count')
-        
-        # Pivoter pour avoir le bon format
-        heatmap_pivot = heatmap_data.pivot(index='day_of_week', columns='hour', values='count').fillna(0)
-        
-        # Ordonner les jours
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        heatmap_pivot = heatmap_pivot.reindex([d for d in day_order if d in heatmap_pivot.index])
-        
-        fig = go.Figure(data=go.Heatmap(
-            z=heatmap_pivot.values,
-            x=heatmap_pivot.columns,
-            y=heatmap_pivot.index,
-            colorscale='Reds',
-            hovertemplate='Jour: %{y}<br>Heure: %{x}h<br>Tweets: %{z}<extra></extra>',
-            colorbar=dict(title="Nombre de Tweets")
-        ))
-        
-        fig.update_layout(
-            title="<b>Heatmap d'Activité (Jour × Heure)</b>",
-            xaxis_title="Heure de la journée",
-            yaxis_title="Jour de la semaine",
-            title_font_size=18,
-            height=400,
-            template="plotly_white"
-        )
-        
-        return fig
-        
+        return cached_figure('activity_heatmap', df, lambda: _build_activity_heatmap(df, date_col),
+                             columns=[date_col], date_col=date_col)
     except Exception as e:
         st.error(f"Erreur lors de la création de la heatmap: {e}")
         return None
 
 
+def _build_activity_heatmap(df: pd.DataFrame, date_col: str) -> go.Figure:
+    # Matrice jour x heure (7 x 24) agrégée
+    heatmap_pivot = chart_data.weekday_hour_counts(df, date_col)
+    
+    if heatmap_pivot.values.sum() == 0:
+        return None
+    
+    # Ordonner les jours (jours observés seulement)
+    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    heatmap_pivot.index = day_order
+    heatmap_pivot = heatmap_pivot[heatmap_pivot.sum(axis=1) > 0]
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=heatmap_pivot.values,
+        x=heatmap_pivot.columns,
+        y=heatmap_pivot.index,
+        colorscale='Reds',
+        hovertemplate='Jour: %{y}<br>Heure: %{x}h<br>Tweets: %{z}<extra></extra>',
+        colorbar=dict(title="Nombre de Tweets")
+    ))
+    
+    fig.update_layout(
+        title="<b>Heatmap d'Activité (Jour × Heure)</b>",
+        xaxis_title="Heure de la journée",
+        yaxis_title="Jour de la semaine",
+        title_font_size=18,
+        height=400,
+        template="plotly_white"
+    )
+    
+    return fig
+
+
 def create_category_comparison_chart(df: pd.DataFrame, category_col: str = 'category') -> go.Figure:
     """
     Crée un histogramme comparatif par catégorie
@@ -660,7 +614,11 @@ def create_category_comparison_chart(df: pd.DataFrame, category_col: str = 'cate
     if category_col not in df.columns:
         return None
     
-    category_counts = df[category_col].value_counts().head(10)
+    frame = compute_kpi_frame(df)
+    if frame.has(category_col):
+        category_counts = frame.counts(category_col).head(10)
+    else:
+        category_counts = df[category_col].value_counts().head(10)
     
     fig = go.Figure(data=[
         go.Bar(
@@ -706,18 +664,25 @@ def create_radar_chart(kpis: Dict[str, Any], df: pd.DataFrame) -> go.Figure:
     if 'category' not in df.columns:
         return None
     
-    categories = df['category'].value_counts().head(6).index.tolist()
+    frame = compute_kpi_frame(df)
+    category_counts = frame.counts('category')
+    categories = category_counts.head(6).index.tolist()
+    
+    # Tableau croisé catégorie x sentiment lu dans le cube (pas de filtre par catégorie)
+    sentiment_table = frame.crosstab('category', 'sentiment') if frame.has('sentiment') else pd.DataFrame()
+    if not sentiment_table.empty:
+        labels = sentiment_table.columns.map(lambda label: str(label).lower())
+        positive_by_cat = sentiment_table.loc[:, labels.str.contains('positive|positif').to_numpy(dtype=bool)].sum(axis=1)
+        negative_by_cat = sentiment_table.loc[:, labels.str.contains('negative|négatif|negatif').to_numpy(dtype=bool)].sum(axis=1)
     
     metrics = []
     for cat in categories:
-        cat_df = df[df['category'] == cat]
-        
         # Calculer un score de performance (0-100)
         satisfaction = 50
-        if 'sentiment' in cat_df.columns:
-            positive = (cat_df['sentiment'].str.contains('positive|positif', case=False, na=False)).sum()
-            negative = (cat_df['sentiment'].str.contains('negative|négatif|negatif', case=False, na=False)).sum()
-            total = len(cat_df)
+        if not sentiment_table.empty:
+            positive = positive_by_cat.get(cat, 0)
+            negative = negative_by_cat.get(cat, 0)
+            total = category_counts[cat]
             satisfaction = ((positive - negative) / total * 50 + 50) if total > 0 else 50
         
         metrics.append(satisfaction)
@@ -761,7 +726,7 @@ def create_urgency_distribution_chart(df: pd.DataFrame) -> go.Figure:
         Figure Plotly
     """
     if 'priority' in df.columns:
-        priority_counts = df['priority'].value_counts()
+        priority_counts = compute_kpi_frame(df).counts('priority')
         
         # Mapper aux couleurs
         color_map = {
@@ -801,7 +766,7 @@ def create_urgency_distribution_chart(df: pd.DataFrame) -> go.Figure:
         return fig
     
     elif 'is_urgent' in df.columns:
-        urgent_counts = df['is_urgent'].value_counts()
+        urgent_counts = compute_kpi_frame(df).counts('is_urgent')
         
         fig = go.Figure(data=[
             go.Pie(
@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 import logging
 
+from services.kpi_engine import compute_kpi_frame, pinned_kpi_frame
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,35 +37,37 @@ class ExtendedKPICalculator:
         try:
             kpis = {}
             
-            # KPI 1: Taux d'évolution temporelle
-            kpis['temporal_evolution'] = self.calculate_temporal_evolution(df, historical_data)
+            # Passe unique sur df: chaque KPI ci-dessous lit le même résultat
+            with pinned_kpi_frame(df):
+                # KPI 1: Taux d'évolution temporelle
+                kpis['temporal_evolution'] = self.calculate_temporal_evolution(df, historical_data)
             
-            # KPI 2: Corrélation sentiment-sujet
-            kpis['sentiment_topic_correlation'] = self.calculate_sentiment_topic_correlation(df)
+                # KPI 2: Corrélation sentiment-sujet
+                kpis['sentiment_topic_correlation'] = self.calculate_sentiment_topic_correlation(df)
             
-            # KPI 3: Temps moyen de traitement
-            kpis['average_processing_time'] = self.calculate_average_processing_time(df)
+                # KPI 3: Temps moyen de traitement
+                kpis['average_processing_time'] = self.calculate_average_processing_time(df)
             
-            # KPI 4: Volume horaire d'activité
-            kpis['hourly_activity_volume'] = self.calculate_hourly_activity(df)
+                # KPI 4: Volume horaire d'activité
+                kpis['hourly_activity_volume'] = self.calculate_hourly_activity(df)
             
-            # KPI 5: Score global d'engagement
-            kpis['global_engagement_score'] = self.calculate_global_engagement(df)
+                # KPI 5: Score global d'engagement
+                kpis['global_engagement_score'] = self.calculate_global_engagement(df)
             
-            # KPI 6: Distribution temporelle avancée
-            kpis['advanced_temporal_distribution'] = self.calculate_advanced_temporal_distribution(df)
+                # KPI 6: Distribution temporelle avancée
+                kpis['advanced_temporal_distribution'] = self.calculate_advanced_temporal_distribution(df)
             
-            # KPI 7: Analyse de satisfaction
-            kpis['satisfaction_analysis'] = self.calculate_satisfaction_metrics(df)
+                # KPI 7: Analyse de satisfaction
+                kpis['satisfaction_analysis'] = self.calculate_satisfaction_metrics(df)
             
-            # KPI 8: Performance par catégorie
-            kpis['category_performance'] = self.calculate_category_performance(df)
+                # KPI 8: Performance par catégorie
+                kpis['category_performance'] = self.calculate_category_performance(df)
             
-            # KPI 9: Taux de résolution
-            kpis['resolution_rate'] = self.calculate_resolution_rate(df)
+                # KPI 9: Taux de résolution
+                kpis['resolution_rate'] = self.calculate_resolution_rate(df)
             
-            # KPI 10: Score de prioritisation
-            kpis['prioritization_score'] = self.calculate_prioritization_score(df)
+                # KPI 10: Score de prioritisation
+                kpis['prioritization_score'] = self.calculate_prioritization_score(df)
             
             logger.info("Calcul des KPI étendus terminé avec succès")
             return kpis
@@ -93,16 +97,12 @@ class ExtendedKPICalculator:
             }
             
             # Vérifier si on a une colonne date
-            date_col = self._find_date_column(df)
-            if not date_col:
+            frame = compute_kpi_frame(df)
+            if not frame.has_dates:
                 return result
             
-            # Convertir en datetime
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            df_sorted = df.sort_values(date_col)
-            
-            # Calculer l'évolution par jour
-            daily_volume = df_sorted.groupby(df_sorted[date_col].dt.date).size()
+            # Évolution par jour (ordre chronologique)
+            daily_volume = frame.daily_counts()
             
             if len(daily_volume) > 1:
                 # Calculer le taux de croissance
@@ -130,8 +130,8 @@ class ExtendedKPICalculator:
                 }
             
             # Évolution du sentiment si disponible
-            if 'sentiment' in df.columns:
-                sentiment_by_date = df.groupby([df[date_col].dt.date, 'sentiment']).size().unstack(fill_value=0)
+            if frame.has('sentiment'):
+                sentiment_by_date = frame.daily_crosstab('sentiment')
                 
                 if not sentiment_by_date.empty:
                     result['sentiment_evolution'] = {
@@ -164,14 +164,16 @@ class ExtendedKPICalculator:
             }
             
             # Vérifier colonnes nécessaires
-            sentiment_col = 'sentiment' if 'sentiment' in df.columns else None
-            topic_col = 'category' if 'category' in df.columns else ('theme' if 'theme' in df.columns else None)
+            frame = compute_kpi_frame(df)
+            sentiment_col = 'sentiment' if frame.has('sentiment') else None
+            topic_col = 'category' if frame.has('category') else ('theme' if frame.has('theme') else None)
             
             if not sentiment_col or not topic_col:
                 return result
             
-            # Créer la matrice de corrélation
-            correlation_data = pd.crosstab(df[topic_col], df[sentiment_col], normalize='index') * 100
+            # Créer la matrice de corrélation (pourcentages par sujet)
+            counts = frame.crosstab(topic_col, sentiment_col)
+            correlation_data = counts.div(counts.sum(axis=1), axis=0) * 100
             
             result['correlation_matrix'] = correlation_data.to_dict()
             
@@ -278,14 +280,12 @@ class ExtendedKPICalculator:
                 'quietest_hour': None
             }
             
-            date_col = self._find_date_column(df)
-            if not date_col:
+            frame = compute_kpi_frame(df)
+            if not frame.has_dates:
                 return result
             
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            
             # Distribution par heure
-            hourly_counts = df[date_col].dt.hour.value_counts().sort_index()
+            hourly_counts = frame.hourly_counts()
             result['hourly_distribution'] = hourly_counts.to_dict()
             
             # Identifier heures de pointe (top 3)
@@ -330,17 +330,19 @@ class ExtendedKPICalculator:
             }
             
             scores = []
+            frame = compute_kpi_frame(df)
             
             # Score de réponse
             if 'response_time' in df.columns:
-                avg_response = df['response_time'].mean()
+                avg_response = frame.numeric('response_time')['mean']
                 response_score = max(0, 100 - (avg_response / 3600 * 10))  # Pénalité par heure
                 scores.append(response_score)
                 result['components']['response_score'] = round(response_score, 1)
             
             # Score de sentiment
-            if 'sentiment' in df.columns:
-                sentiment_counts = df['sentiment'].value_counts(normalize=True)
+            if frame.has('sentiment'):
+                sentiment_counts = frame.counts('sentiment')
+                sentiment_counts = sentiment_counts / sentiment_counts.sum() if sentiment_counts.sum() else sentiment_counts
                 positive_ratio = sentiment_counts.get('positive', 0)
                 negative_ratio = sentiment_counts.get('negative', 0)
                 sentiment_score = (positive_ratio * 100) - (negative_ratio * 30)
@@ -348,8 +350,8 @@ class ExtendedKPICalculator:
                 result['components']['sentiment_score'] = round(sentiment_score, 1)
             
             # Score de résolution
-            if 'status' in df.columns:
-                resolved_ratio = (df['status'] == 'resolved').sum() / len(df)
+            if frame.has('status'):
+                resolved_ratio = frame.counts('status').get('resolved', 0) / len(df)
                 resolution_score = resolved_ratio * 100
                 scores.append(resolution_score)
                 result['components']['resolution_score'] = round(resolution_score, 1)
@@ -359,7 +361,7 @@ class ExtendedKPICalculator:
             present_cols = [col for col in interaction_cols if col in df.columns]
             
             if present_cols:
-                total_interactions = df[present_cols].sum().sum()
+                total_interactions = sum(frame.numeric(col)['sum'] for col in present_cols)
                 interaction_score = min(100, (total_interactions / len(df)) * 10)
                 scores.append(interaction_score)
                 result['components']['interaction_score'] = round(interaction_score, 1)
@@ -395,22 +397,20 @@ class ExtendedKPICalculator:
                 'patterns': []
             }
             
-            date_col = self._find_date_column(df)
-            if not date_col:
+            frame = compute_kpi_frame(df)
+            if not frame.has_dates:
                 return result
             
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            
             # Par jour de la semaine
             day_names = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-            day_counts = df[date_col].dt.dayofweek.value_counts().sort_index()
+            day_counts = frame.weekday_counts()
             result['by_day_of_week'] = {
                 day_names[day]: int(count) 
                 for day, count in day_counts.items()
             }
             
             # Par mois
-            month_counts = df[date_col].dt.month.value_counts().sort_index()
+            month_counts = frame.month_counts()
             month_names = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Jun', 
                           'Jul', 'Aoû', 'Sep', 'Oct', 'Nov', 'Déc']
             result['by_month'] = {
@@ -440,8 +440,9 @@ class ExtendedKPICalculator:
             }
             
             # Calculer depuis sentiment
-            if 'sentiment' in df.columns:
-                sentiment_counts = df['sentiment'].value_counts()
+            frame = compute_kpi_frame(df)
+            if frame.has('sentiment'):
+                sentiment_counts = frame.counts('sentiment')
                 total = len(df)
                 
                 positive = sentiment_counts.get('positive', 0)
@@ -471,24 +472,24 @@ class ExtendedKPICalculator:
                 'worst_category': None
             }
             
-            if 'category' not in df.columns:
+            frame = compute_kpi_frame(df)
+            if not frame.has('category'):
                 return result
             
-            categories = df['category'].value_counts()
+            categories = frame.counts('category')
+            sentiment_table = frame.crosstab('category', 'sentiment') if frame.has('sentiment') else None
             
-            for category in categories.index:
-                cat_df = df[df['category'] == category]
-                
+            for category, count in categories.items():
                 # Calculer métriques pour cette catégorie
                 metrics = {
-                    'count': len(cat_df),
-                    'percentage': round((len(cat_df) / len(df)) * 100, 1)
+                    'count': int(count),
+                    'percentage': round((count / len(df)) * 100, 1)
                 }
                 
-                # Sentiment si disponible
-                if 'sentiment' in df.columns:
-                    positive_ratio = (cat_df['sentiment'] == 'positive').sum() / len(cat_df)
-                    metrics['positive_ratio'] = round(positive_ratio * 100, 1)
+                # Sentiment si disponible (tableau croisé du cube, pas de filtre par catégorie)
+                if sentiment_table is not None:
+                    positive = sentiment_table.loc[category].get('positive', 0) if category in sentiment_table.index else 0
+                    metrics['positive_ratio'] = round(positive / count * 100, 1)
                 
                 result['by_category'][category] = metrics
             
@@ -518,9 +519,11 @@ class ExtendedKPICalculator:
                 'average_resolution_time': 0
             }
             
-            if 'status' in df.columns:
-                resolved = (df['status'] == 'resolved').sum()
-                pending = (df['status'] == 'pending').sum()
+            frame = compute_kpi_frame(df)
+            if frame.has('status'):
+                status_counts = frame.counts('status')
+                resolved = status_counts.get('resolved', 0)
+                pending = status_counts.get('pending', 0)
                 
                 result['total_resolved'] = int(resolved)
                 result['pending_count'] = int(pending)
@@ -541,9 +544,10 @@ class ExtendedKPICalculator:
                 'prioritization_efficiency': 0
             }
             
-            if 'priority' in df.columns or 'urgency' in df.columns:
-                priority_col = 'priority' if 'priority' in df.columns else 'urgency'
-                priority_counts = df[priority_col].value_counts()
+            frame = compute_kpi_frame(df)
+            if frame.has('priority') or frame.has('urgency'):
+                priority_col = 'priority' if frame.has('priority') else 'urgency'
+                priority_counts = frame.counts(priority_col)
                 
                 result['priority_distribution'] = priority_counts.to_dict()
                 
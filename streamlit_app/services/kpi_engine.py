@@ -0,0 +1,498 @@
+"""
+Moteur de KPIs en une passe - FreeMobilaChat
+============================================
+
+Socle commun des modules de KPIs (kpi_calculator, extended_kpi_calculator,
+classic_analysis_kpis, advanced_metrics, enhanced_kpis_vizualizations).
+
+Au lieu que chaque module relise le DataFrame (astype(str).str.lower(),
+recherche de la colonne de date, value_counts séparés), le moteur:
+1. Encode une fois chaque colonne catégorielle (factorize: codes entiers +
+   valeurs uniques); la normalisation (minuscules, espaces) ne s'applique
+   qu'aux valeurs uniques, pas aux lignes
+2. Convertit une fois la colonne de date (jour + heure)
+3. Agrège toutes ces dimensions en un seul groupby -> "cube" de comptages
+4. Calcule en un appel les statistiques des colonnes numériques
+
+Les distributions, tableaux croisés et séries temporelles sont ensuite lus
+dans le cube (une ligne par combinaison observée, mémoïsées par colonnes),
+plus jamais dans le DataFrame source.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Colonnes catégorielles agrégées dans le cube (noms insensibles à la casse)
+DIMENSION_NAMES = [
+    'sentiment',
+    'urgence', 'urgency', 'priority', 'priorite', 'is_urgent',
+    'category', 'theme', 'sujet', 'topic', 'topics', 'incident',
+    'is_claim', 'responsable',
+    'status', 'statut', 'etat',
+    'type', 'request_type', 'type_demande',
+    'agent', 'assigned_to', 'agent_id',
+]
+
+# Dimensions stockées sous forme normalisée (' Resolved' et 'resolved' = 'resolved')
+NORMALIZED_DIMENSIONS = {'status', 'statut', 'etat'}
+
+# Colonnes de date, par ordre de préférence
+DATE_NAMES = ['date', 'created_at', 'timestamp', 'datetime', 'created', 'date_creation']
+
+# Colonnes numériques résumées (moyenne, min, max...)
+NUMERIC_NAMES = [
+    'confidence', 'confidence_score', 'score', 'sentiment_score',
+    'retweet_count', 'favorite_count', 'reply_count', 'likes', 'shares',
+    'response_time', 'temps_reponse',
+]
+
+NUMERIC_STATS = ['count', 'sum', 'mean', 'min', 'max', 'std', 'median']
+
+# Valeurs normalisées partagées par les modules de KPIs
+CLAIM_LABELS = ['oui', 'yes', '1', '1.0', 'true']
+POSITIVE_LABELS = ['positive', 'positif', 'pos']
+NEUTRAL_LABELS = ['neutral', 'neutre', 'neu']
+NEGATIVE_LABELS = ['negative', 'négatif', 'negatif', 'neg']
+
+# Colonnes internes du cube
+DAY = '__day__'
+HOUR = '__hour__'
+COUNT = '__count__'
+
+
+def normalize_label(value) -> str:
+    """Forme normalisée d'une valeur catégorielle ('Positif ' -> 'positif', 1 -> '1')"""
+    return str(value).strip().lower()
+
+
+def _first_element(value):
+    """Premier élément d'une liste (colonnes remplies par certains classificateurs)"""
+    if isinstance(value, (list, tuple)):
+        return value[0] if len(value) > 0 else np.nan
+    return value
+
+
+def _normalize_codes(codes: np.ndarray, uniques: pd.Index):
+    """Regroupe les codes des valeurs de même forme normalisée (calcul sur les valeurs distinctes)"""
+    if len(uniques) == 0:
+        return codes, uniques
+    mapping, normalized = pd.factorize(uniques.map(normalize_label))
+    return np.where(codes >= 0, mapping[codes], -1), pd.Index(normalized, dtype=object)
+
+
+def _has_lists(series: pd.Series) -> bool:
+    if series.dtype != object:
+        return False
+    sample = series.dropna().head(100)
+    return bool(sample.map(lambda v: isinstance(v, (list, tuple))).any())
+
+
+@dataclass
+class KPIFrame:
+    """
+    Résultat d'une passe du moteur: cube de comptages et statistiques
+
+    Les colonnes sont désignées par leur nom dans le DataFrame source;
+    column() résout un nom parmi plusieurs candidats.
+    """
+    total: int
+    columns: List[str]
+    cube: pd.DataFrame
+    labels: Dict[str, pd.Index]
+    list_counts: Dict[str, pd.Series] = field(default_factory=dict)
+    date_column: Optional[str] = None
+    days: Optional[pd.DatetimeIndex] = None
+    date_min: Optional[pd.Timestamp] = None
+    date_max: Optional[pd.Timestamp] = None
+    numeric_stats: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    _marginals: Dict[tuple, pd.Series] = field(default_factory=dict, repr=False)
+
+    # ─── Colonnes ─────────────────────────────────────────────
+
+    def column(self, *names: str) -> Optional[str]:
+        """Première colonne présente parmi names (insensible à la casse)"""
+        lower = {col.lower(): col for col in self.columns}
+        for name in names:
+            if name.lower() in lower:
+                return lower[name.lower()]
+        return None
+
+    def has(self, column: Optional[str]) -> bool:
+        """Colonne agrégée dans le cube (ou comptée à plat pour les listes)"""
+        if column is None:
+            return False
+        column = self._resolve(column)
+        return column in self.labels or column in self.list_counts
+
+    def _resolve(self, column: str) -> str:
+        """Nom réel d'une colonne ('priority' -> 'Priority')"""
+        return self.column(column) or column
+
+    # ─── Distributions ────────────────────────────────────────
+
+    def _marginal(self, columns: List[str]) -> pd.Series:
+        key = tuple(columns)
+        if key not in self._marginals:
+            self._marginals[key] = self.cube.groupby(columns, sort=False)[COUNT].sum()
+        return self._marginals[key]
+
+    def counts(self, column: str, normalize: bool = False, dropna: bool = True) -> pd.Series:
+        """
+        Comptages par valeur (équivalent de value_counts, décroissant)
+
+        Args:
+            column: Colonne source
+            normalize: Regroupe les valeurs par forme normalisée (minuscules, sans espaces)
+            dropna: Exclut les valeurs manquantes
+
+        Returns:
+            Série valeur -> nombre de lignes
+        """
+        column = self._resolve(column)
+        if column in self.list_counts:
+            counts = self.list_counts[column]
+        elif column in self.labels:
+            codes = self._marginal([column])
+            if dropna:
+                codes = codes[codes.index >= 0]
+            index = [self.labels[column][code] if code >= 0 else np.nan for code in codes.index]
+            counts = pd.Series(codes.to_numpy(), index=index)
+        else:
+            return pd.Series(dtype='int64')
+
+        if normalize:
+            counts = counts.groupby(counts.index.map(normalize_label)).sum()
+        return counts.sort_values(ascending=False, kind='stable').astype('int64')
+
+    def count_in(self, column: str, labels: Iterable[str]) -> int:
+        """Nombre de lignes dont la valeur normalisée est dans labels"""
+        counts = self.counts(column, normalize=True)
+        return int(counts[counts.index.isin(list(labels))].sum())
+
+    def count_matching(self, column: str, pattern: str, exclude: Optional[str] = None) -> int:
+        """Nombre de lignes dont la valeur normalisée contient pattern (regex), hors exclude"""
+        counts = self.counts(column, normalize=True)
+        mask = counts.index.str.contains(pattern, regex=True)
+        if exclude:
+            mask &= ~counts.index.str.contains(exclude, regex=True)
+        return int(counts[mask].sum())
+
+    def missing(self, column: str) -> int:
+        """Nombre de valeurs manquantes"""
+        column = self._resolve(column)
+        if column not in self.labels:
+            return 0
+        return int(self.cube.loc[self.cube[column] < 0, COUNT].sum())
+
+    def nunique(self, column: str) -> int:
+        """Nombre de valeurs distinctes"""
+        return len(self.counts(column))
+
+    def crosstab(self, row: str, col: str) -> pd.DataFrame:
+        """Tableau croisé des comptages (lignes sans valeur manquante)"""
+        row, col = self._resolve(row), self._resolve(col)
+        if row not in self.labels or col not in self.labels:
+            return pd.DataFrame()
+        codes = self._marginal([row, col])
+        codes = codes[(codes.index.get_level_values(0) >= 0) & (codes.index.get_level_values(1) >= 0)]
+        table = codes.unstack(fill_value=0)
+        table.index = self.labels[row][table.index]
+        table.columns = self.labels[col][table.columns]
+        return table.sort_index().sort_index(axis=1)
+
+    # ─── Temps ────────────────────────────────────────────────
+
+    @property
+    def has_dates(self) -> bool:
+        return self.days is not None and len(self.days) > 0
+
+    def daily_counts(self) -> pd.Series:
+        """Nombre de lignes par jour (index: date, ordre chronologique)"""
+        if not self.has_dates:
+            return pd.Series(dtype='int64')
+        codes = self._marginal([DAY])
+        codes = codes[codes.index >= 0]
+        order = np.argsort(self.days[codes.index].to_numpy(), kind='stable')
+        codes = codes.iloc[order]
+        return pd.Series(codes.to_numpy(), index=self.days[codes.index].date)
+
+    def daily_crosstab(self, column: str) -> pd.DataFrame:
+        """Comptages par jour et valeur de column"""
+        column = self._resolve(column)
+        if not self.has_dates or column not in self.labels:
+            return pd.DataFrame()
+        codes = self._marginal([DAY, column])
+        codes = codes[(codes.index.get_level_values(0) >= 0) & (codes.index.get_level_values(1) >= 0)]
+        table = codes.unstack(fill_value=0)
+        table.index = self.days[table.index]
+        table = table.sort_index()
+        table.index = table.index.date
+        table.columns = self.labels[column][table.columns]
+        return table
+
+    def hourly_counts(self) -> pd.Series:
+        """Nombre de lignes par heure (0-23, heures observées)"""
+        if not self.has_dates:
+            return pd.Series(dtype='int64')
+        counts = self._marginal([HOUR])
+        return counts[counts.index >= 0].sort_index().rename_axis(None).rename(None)
+
+    def weekday_counts(self) -> pd.Series:
+        """Nombre de lignes par jour de la semaine (0 = lundi)"""
+        daily = self.daily_counts()
+        if daily.empty:
+            return daily
+        return daily.groupby(pd.DatetimeIndex(daily.index).dayofweek).sum().sort_index()
+
+    def weekday_hour_counts(self) -> pd.DataFrame:
+        """Matrice 7 x 24 des comptages (lignes: 0 = lundi, colonnes: heure)"""
+        if not self.has_dates:
+            return pd.DataFrame(0, index=range(7), columns=range(24), dtype='int64')
+        codes = self._marginal([DAY, HOUR])
+        codes = codes[(codes.index.get_level_values(0) >= 0) & (codes.index.get_level_values(1) >= 0)]
+        weekday = self.days.dayofweek.to_numpy()[codes.index.get_level_values(0)]
+        counts = codes.groupby([weekday, codes.index.get_level_values(1)]).sum()
+        return (counts.unstack(fill_value=0)
+                .reindex(index=range(7), columns=range(24), fill_value=0)
+                .astype('int64'))
+
+    def month_counts(self) -> pd.Series:
+        """Nombre de lignes par mois (1-12)"""
+        daily = self.daily_counts()
+        if daily.empty:
+            return daily
+        return daily.groupby(pd.DatetimeIndex(daily.index).month).sum().sort_index()
+
+    def dated_rows(self) -> int:
+        """Nombre de lignes avec une date valide"""
+        if not self.has_dates:
+            return 0
+        return int(self.cube.loc[self.cube[DAY] >= 0, COUNT].sum())
+
+    # ─── Numérique ────────────────────────────────────────────
+
+    def numeric(self, column: Optional[str]) -> Optional[Dict[str, float]]:
+        """Statistiques d'une colonne numérique (count, sum, mean, min, max, std, median)"""
+        return self.numeric_stats.get(column) if column else None
+
+
+class KPIEngine:
+    """
+    Calcule un KPIFrame en une passe sur le DataFrame
+
+    Le dernier résultat est conservé: les modules de KPIs appelés
+    successivement sur un DataFrame au contenu inchangé partagent la même
+    passe. Dans un bloc pinned(df), les appels sur df réutilisent le
+    KPIFrame sans recalculer l'empreinte du contenu.
+    """
+
+    def __init__(self):
+        self._last_signature = None
+        self._last_frame: Optional[KPIFrame] = None
+        self._pinned = threading.local()
+
+    def compute(self, df: pd.DataFrame) -> KPIFrame:
+        """
+        KPIFrame du DataFrame (réutilisé si son contenu n'a pas changé depuis le dernier appel)
+
+        Args:
+            df: DataFrame des tweets
+
+        Returns:
+            KPIFrame
+        """
+        pinned = getattr(self._pinned, 'frames', {}).get(id(df))
+        if pinned is not None:
+            return pinned
+
+        signature = self._signature(df)
+        if self._last_frame is not None and self._last_signature == signature:
+            return self._last_frame
+
+        frame = self._compute(df)
+        self._last_signature = signature
+        self._last_frame = frame
+        return frame
+
+    @contextmanager
+    def pinned(self, df: pd.DataFrame) -> Iterator[KPIFrame]:
+        """
+        Fige le KPIFrame de df pendant le bloc (df ne doit pas y être modifié)
+
+        Args:
+            df: DataFrame des tweets
+
+        Yields:
+            KPIFrame
+        """
+        frames = self._pinned.__dict__.setdefault('frames', {})
+        if id(df) in frames:
+            yield frames[id(df)]
+            return
+
+        frames[id(df)] = self.compute(df)
+        try:
+            yield frames[id(df)]
+        finally:
+            del frames[id(df)]
+
+    def clear(self) -> None:
+        """Oublie le dernier KPIFrame (prochain appel = nouvelle passe)"""
+        self._last_signature = None
+        self._last_frame = None
+
+    @staticmethod
+    def _signature(df: pd.DataFrame) -> tuple:
+        """
+        Empreinte du contenu des colonnes lues par le moteur
+
+        Une modification en place (df['sentiment'] = 'pos') change l'empreinte;
+        une copie identique la conserve.
+        """
+        lower = {str(col).lower(): col for col in df.columns}
+        used = [lower[name] for name in DIMENSION_NAMES + DATE_NAMES + NUMERIC_NAMES if name in lower]
+        digest = hashlib.blake2b(digest_size=16)
+        for col in dict.fromkeys(used):
+            series = df[col]
+            try:
+                hashes = pd.util.hash_pandas_object(series, index=False)
+            except TypeError:
+                # Listes (non hachables): empreinte de leur représentation texte
+                hashes = pd.util.hash_pandas_object(series.astype(str), index=False)
+            digest.update(str(col).encode())
+            digest.update(hashes.to_numpy().tobytes())
+        return len(df), tuple(map(str, df.columns)), digest.hexdigest()
+
+    def _compute(self, df: pd.DataFrame) -> KPIFrame:
+        start = time.perf_counter()
+        timings = {}
+        columns = [str(col) for col in df.columns]
+        lower = {col.lower(): col for col in df.columns}
+
+        # 1. Encodage catégoriel (une fois par colonne)
+        keys: Dict[str, np.ndarray] = {}
+        labels: Dict[str, pd.Index] = {}
+        list_counts: Dict[str, pd.Series] = {}
+
+        for name in DIMENSION_NAMES:
+            col = lower.get(name)
+            if col is None or str(col) in labels or str(col) in list_counts:
+                continue
+            series = df[col]
+            if name == 'topics' and _has_lists(series):
+                # Plusieurs thèmes par tweet: comptage à plat, hors cube
+                list_counts[str(col)] = series.explode().dropna().astype(str).value_counts()
+                continue
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Colonne déjà encodée (services.label_schema): codes réutilisés tels quels
+                codes = series.cat.codes.to_numpy(dtype='int64')
+                uniques = pd.Index(series.cat.categories, dtype=object)
+            else:
+                if _has_lists(series):
+                    series = series.map(_first_element)
+                try:
+                    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                except TypeError:
+                    codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=True)
+                uniques = pd.Index(uniques, dtype=object)
+            if name in NORMALIZED_DIMENSIONS:
+                codes, uniques = _normalize_codes(codes, uniques)
+            keys[str(col)] = codes
+            labels[str(col)] = uniques
+
+        timings['encode'] = time.perf_counter() - start
+
+        # 2. Dates (une conversion)
+        step = time.perf_counter()
+        date_column = next((lower[name] for name in DATE_NAMES if name in lower), None)
+        days = date_min = date_max = None
+        if date_column is not None:
+            dates = df[date_column]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors='coerce')
+            if getattr(dates.dt, 'tz', None) is not None:
+                dates = dates.dt.tz_localize(None)
+            valid = dates.notna().to_numpy()
+            if valid.any():
+                day_codes, days = pd.factorize(dates.dt.normalize(), use_na_sentinel=True)
+                keys[DAY] = day_codes
+                keys[HOUR] = np.where(valid, dates.dt.hour.fillna(-1).to_numpy(dtype='int64'), -1)
+                days = pd.DatetimeIndex(days)
+                date_min, date_max = dates.min(), dates.max()
+        timings['dates'] = time.perf_counter() - step
+
+        # 3. Agrégation unique de toutes les dimensions
+        step = time.perf_counter()
+        if keys:
+            cube = pd.DataFrame(keys).groupby(list(keys), sort=False).size().rename(COUNT).reset_index()
+        else:
+            cube = pd.DataFrame({COUNT: [len(df)]})
+        timings['aggregate'] = time.perf_counter() - step
+
+        # 4. Statistiques numériques (un appel)
+        step = time.perf_counter()
+        numeric_columns = [lower[name] for name in NUMERIC_NAMES if name in lower]
+        numeric_stats = {}
+        if numeric_columns:
+            numeric = pd.DataFrame({
+                str(col): pd.to_numeric(df[col].map(_first_element) if _has_lists(df[col]) else df[col],
+                                        errors='coerce')
+                for col in numeric_columns
+            })
+            described = numeric.agg(NUMERIC_STATS)
+            numeric_stats = {
+                col: {stat: float(described.at[stat, col]) for stat in NUMERIC_STATS}
+                for col in described.columns
+            }
+        timings['numeric'] = time.perf_counter() - step
+        timings['total'] = time.perf_counter() - start
+
+        logger.debug(f"KPI engine: {len(df)} lignes, {len(labels)} dimensions, "
+                     f"cube {len(cube)} lignes en {timings['total']*1000:.1f} ms")
+
+        return KPIFrame(
+            total=len(df),
+            columns=columns,
+            cube=cube,
+            labels=labels,
+            list_counts=list_counts,
+            date_column=str(date_column) if date_column is not None else None,
+            days=days,
+            date_min=date_min,
+            date_max=date_max,
+            numeric_stats=numeric_stats,
+            timings=timings,
+        )
+
+
+# Instance globale
+_kpi_engine = None
+
+
+def get_kpi_engine() -> KPIEngine:
+    """Retourne le moteur de KPIs partagé (singleton)"""
+    global _kpi_engine
+    if _kpi_engine is None:
+        _kpi_engine = KPIEngine()
+    return _kpi_engine
+
+
+def compute_kpi_frame(df: pd.DataFrame) -> KPIFrame:
+    """Raccourci: KPIFrame du DataFrame via le moteur partagé"""
+    return get_kpi_engine().compute(df)
+
+
+def pinned_kpi_frame(df: pd.DataFrame):
+    """Raccourci: bloc pinned(df) du moteur partagé"""
+    return get_kpi_engine().pinned(df)
@@ -0,0 +1,245 @@
+"""
+Schéma des colonnes de labels - FreeMobilaChat
+==============================================
+
+Convertit les sorties des classificateurs (sentiment, urgence, topics,
+incident, is_claim) en colonnes pandas Categorical à jeu de catégories fixe,
+dès leur production:
+- une valeur par ligne stockée sur 1 octet (code) au lieu d'une chaîne Python
+- value_counts / groupby sur les codes, sans re-normalisation par les consommateurs
+- variantes ('Positive', 'négatif', 'faible', 1/0...) ramenées à la forme canonique
+
+is_claim devient une catégorie 'oui'/'non' quand le classificateur produit
+du texte (les comparaisons df['is_claim'] == 'oui' restent valides) et une
+colonne 'boolean' quand il produit 1/0; claim_mask() fournit le masque booléen
+dans les deux cas.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LabelSpec:
+    """Jeu de catégories d'une colonne de labels"""
+    categories: tuple
+    fallback: Optional[str] = None  # Remplace les valeurs inconnues (None = manquante)
+    aliases: Dict[str, str] = field(default_factory=dict)
+    ordered: bool = False
+    multi_valued: bool = False  # Plusieurs valeurs possibles par ligne (liste ou 'a, b')
+    boolean: bool = False  # Source numérique/booléenne convertie en dtype 'boolean'
+
+    @property
+    def dtype(self) -> CategoricalDtype:
+        return CategoricalDtype(list(self.categories), ordered=self.ordered)
+
+
+LABEL_SCHEMA: Dict[str, LabelSpec] = {
+    'sentiment': LabelSpec(
+        categories=('negatif', 'neutre', 'positif'),
+        fallback='neutre',
+        aliases={
+            'négatif': 'negatif', 'negative': 'negatif', 'neg': 'negatif', 'très négatif': 'negatif', '-1': 'negatif',
+            'neutral': 'neutre', 'neu': 'neutre', '0': 'neutre',
+            'positive': 'positif', 'pos': 'positif', 'très positif': 'positif', '1': 'positif',
+        },
+    ),
+    'urgence': LabelSpec(
+        categories=('basse', 'moyenne', 'haute', 'critique'),
+        fallback='basse',
+        aliases={
+            'faible': 'basse', 'low': 'basse',
+            'medium': 'moyenne', 'normale': 'moyenne',
+            'high': 'haute', 'élevée': 'haute', 'elevee': 'haute',
+            'critical': 'critique', 'urgent': 'critique',
+        },
+        ordered=True,
+    ),
+    'topics': LabelSpec(
+        # Topics des règles + catégories Mistral fusionnées dans topics
+        categories=('fibre', 'mobile', 'facture', 'produit', 'service', 'support', 'promotion', 'autre'),
+        fallback='autre',
+        multi_valued=True,
+    ),
+    'incident': LabelSpec(
+        categories=('connexion', 'débit', 'activation', 'facturation', 'technique',
+                    'service_client', 'autre', 'aucun', 'non classifié'),
+        fallback='non classifié',
+        aliases={'debit': 'débit'},
+    ),
+    'is_claim': LabelSpec(
+        categories=('non', 'oui'),
+        boolean=True,
+        aliases={
+            'yes': 'oui', 'true': 'oui', '1': 'oui', '1.0': 'oui',
+            'no': 'non', 'false': 'non', '0': 'non', '0.0': 'non',
+        },
+    ),
+}
+
+
+def _canonical(value, spec: LabelSpec) -> Optional[str]:
+    """Forme canonique d'une valeur, None si inconnue"""
+    key = str(value).strip().lower()
+    if key in spec.categories:
+        return key
+    return spec.aliases.get(key)
+
+
+def _is_boolean_source(series: pd.Series, spec: LabelSpec) -> bool:
+    return spec.boolean and (pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype))
+
+
+def _is_list_column(series: pd.Series) -> bool:
+    sample = series.dropna().head(20)
+    return len(sample) > 0 and sample.map(lambda x: isinstance(x, (list, tuple))).any()
+
+
+def _encode(series: pd.Series, spec: LabelSpec):
+    """Codes du schéma pour chaque ligne et nombre de lignes hors schéma (None si multi-valeurs)"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if spec.multi_valued and any(isinstance(value, str) and ',' in value for value in uniques):
+        return None, 0
+    lookup = {category: i for i, category in enumerate(spec.categories)}
+    fallback = lookup.get(spec.fallback, -1)
+
+    canonical = [lookup.get(_canonical(value, spec)) for value in uniques]
+    unique_codes = np.array([fallback if c is None else c for c in canonical] + [-1], dtype=np.int8)
+    # codes == -1 (valeur manquante) pointe sur la dernière entrée (-1)
+    label_codes = unique_codes[codes]
+
+    unknown = [i for i, c in enumerate(canonical) if c is None]
+    n_unknown = int(np.bincount(codes[codes >= 0], minlength=len(uniques))[unknown].sum()) if unknown else 0
+    return label_codes, n_unknown
+
+
+def to_label_category(series: pd.Series, spec: LabelSpec) -> pd.Series:
+    """
+    Convertit une colonne de labels en Categorical du schéma
+
+    La normalisation porte sur les valeurs distinctes (quelques-unes), puis
+    les codes sont propagés aux lignes en une indexation numpy.
+
+    Args:
+        series: Colonne source (chaînes, entiers, booléens ou déjà catégorielle)
+        spec: Jeu de catégories cible
+
+    Returns:
+        Série catégorielle (valeurs inconnues -> fallback, manquantes conservées)
+    """
+    if isinstance(series.dtype, CategoricalDtype) and series.dtype == spec.dtype:
+        return series
+    if _is_boolean_source(series, spec):
+        return series.astype('boolean')
+
+    label_codes, _ = _encode(series, spec)
+    if label_codes is None:
+        return series
+    return pd.Series(
+        pd.Categorical.from_codes(label_codes, dtype=spec.dtype),
+        index=series.index,
+        name=series.name
+    )
+
+
+def validate_labels(df: pd.DataFrame) -> List[str]:
+    """
+    Vérifie les colonnes de labels présentes dans df
+
+    Returns:
+        Liste d'avertissements (vide si conforme): type non catégoriel,
+        valeurs hors du jeu de catégories, valeurs manquantes
+    """
+    warnings = []
+
+    for column, spec in LABEL_SCHEMA.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+
+        if spec.boolean and series.dtype == 'boolean':
+            pass
+        elif not isinstance(series.dtype, CategoricalDtype):
+            if _is_list_column(series):
+                continue
+            unknown = [
+                value for value in series.dropna().unique()
+                if _canonical(value, spec) is None
+            ]
+            if unknown:
+                warnings.append(
+                    f"Colonne '{column}': {len(unknown)} valeur(s) hors schéma "
+                    f"({', '.join(map(str, unknown[:5]))})"
+                )
+            warnings.append(f"Colonne '{column}': type {series.dtype} au lieu de category")
+        elif list(series.cat.categories) != list(spec.categories):
+            extra = sorted(set(map(str, series.cat.categories)) - set(spec.categories))
+            warnings.append(f"Colonne '{column}': catégories non conformes ({', '.join(extra[:5])})")
+
+        missing = int(series.isna().sum())
+        if missing:
+            warnings.append(f"Colonne '{column}': {missing} valeur(s) manquante(s)")
+
+    return warnings
+
+
+def apply_label_schema(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """
+    Convertit les colonnes de labels de df selon LABEL_SCHEMA
+
+    Les colonnes absentes sont ignorées, ainsi que les colonnes à plusieurs
+    valeurs par ligne (listes de topics, ou 'fibre, mobile' relu d'un CSV). Les valeurs hors schéma sont
+    remplacées par la catégorie de repli et signalées dans les logs, de même
+    que les écarts restants relevés par validate_labels (valeurs manquantes...).
+
+    Args:
+        df: DataFrame classifié
+        inplace: Modifie df au lieu d'une copie superficielle
+
+    Returns:
+        DataFrame avec colonnes catégorielles
+    """
+    result = df if inplace else df.copy(deep=False)
+
+    for column, spec in LABEL_SCHEMA.items():
+        if column not in result.columns or _is_list_column(result[column]):
+            continue
+
+        source = result[column]
+        if isinstance(source.dtype, CategoricalDtype) and source.dtype == spec.dtype:
+            continue
+        if _is_boolean_source(source, spec):
+            if source.dtype != 'boolean':
+                result[column] = source.astype('boolean')
+            continue
+
+        label_codes, n_unknown = _encode(source, spec)
+        if label_codes is None:
+            continue
+        if n_unknown:
+            logger.warning(f"Schéma: {n_unknown} valeur(s) de '{column}' hors catégories "
+                           f"remplacée(s) par {spec.fallback!r}")
+
+        result[column] = pd.Categorical.from_codes(label_codes, dtype=spec.dtype)
+
+    for warning in validate_labels(result):
+        logger.warning(f"Schéma: {warning}")
+
+    return result
+
+
+def claim_mask(df: pd.DataFrame) -> np.ndarray:
+    """Masque booléen des réclamations (is_claim == 'oui'), quel que soit le type de la colonne"""
+    if 'is_claim' not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    claims = to_label_category(df['is_claim'], LABEL_SCHEMA['is_claim'])
+    if claims.dtype == 'boolean':
+        return claims.fillna(False).to_numpy(dtype=bool)
+    return (claims == 'oui').to_numpy(dtype=bool)
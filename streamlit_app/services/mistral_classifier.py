@@ -7,13 +7,14 @@ Conforme aux spécifications techniques du projet.
 
 Fonctionnalités:
 - Classification par lots (batch processing)
-- Retry logic (3 tentatives)
+- Lots pipelinés en parallèle sur Ollama (client asynchrone, OLLAMA_NUM_PARALLEL)
+- Retry logic (3 tentatives, backoff exponentiel avec jitter)
 - Progress bar Streamlit
 - Format JSON structuré
 """
 
 # Imports des bibliothèques tierces pour la manipulation de données
-from typing import List, Dict, Optional, Any  # Typage statique pour la validation
+from typing import Callable, List, Dict, Optional, Any  # Typage statique pour la validation
 import pandas as pd  # Manipulation de DataFrame pour le traitement par lot
 import json  # Parsing des réponses JSON du modèle Mistral
 import re  # Expressions régulières pour l'extraction de données structurées
@@ -21,13 +22,16 @@ import time  # Gestion des délais entre les tentatives
 import logging  # Journalisation des opérations et erreurs
 import streamlit as st  # Interface utilisateur et barre de progression
 
+from services.ollama_async_client import AsyncOllamaClient, backoff_delay  # Client Ollama pipeliné
+
 # Configuration du logger pour le suivi des opérations
 logger = logging.getLogger(__name__)
 
 # Configuration des paramètres de traitement par lot (conformes aux spécifications)
+DEFAULT_MODEL = 'mistral'  # Modèle Ollama utilisé par défaut
 BATCH_SIZE = 50  # Nombre de tweets traités simultanément pour optimiser la performance
 MAX_RETRIES = 3  # Nombre maximal de tentatives en cas d'échec de classification
-RETRY_DELAY = 2  # Délai en secondes entre chaque tentative pour éviter la surcharge
+RETRY_DELAY = 2  # Délai de base en secondes du backoff entre les tentatives
 
 # Import conditionnel d'Ollama avec gestion d'erreur gracieuse
 try:
@@ -47,10 +51,11 @@ class MistralClassifier:
     """
     
     def __init__(self, 
-                 model_name: str = 'mistral',
+                 model_name: str = DEFAULT_MODEL,
                  batch_size: int = BATCH_SIZE,
                  temperature: float = 0.1,
-                 max_retries: int = MAX_RETRIES):
+                 max_retries: int = MAX_RETRIES,
+                 num_parallel: Optional[int] = None):
         """
         Initialise le classificateur Mistral avec les paramètres de configuration
         
@@ -59,6 +64,7 @@ class MistralClassifier:
             batch_size: Taille des lots pour le traitement par batch
             temperature: Paramètre de créativité du modèle (0.0 = déterministe, 1.0 = créatif)
             max_retries: Nombre maximal de tentatives en cas d'échec de requête
+            num_parallel: Lots envoyés simultanément (OLLAMA_NUM_PARALLEL par défaut)
         """
         # Stockage des paramètres de configuration dans les attributs d'instance
         self.model_name = model_name  # Identification du modèle LLM à utiliser
@@ -73,6 +79,15 @@ class MistralClassifier:
             'top_p': 0.9  # Échantillonnage nucléaire pour équilibrer créativité et cohérence
         }
         
+        # Client asynchrone: plusieurs lots en vol, dimensionné sur OLLAMA_NUM_PARALLEL
+        self.async_client = AsyncOllamaClient(
+            model_name=model_name,
+            num_parallel=num_parallel,
+            options=self.ollama_options,
+            max_retries=max_retries,
+            backoff_base=RETRY_DELAY
+        )
+        
         # Vérification de la disponibilité et de la connexion au serveur Ollama
         self._check_ollama_connection()
         
@@ -174,11 +189,12 @@ JSON:"""
         Classifie un lot de tweets avec mécanisme de retry automatisé en cas d'échec
         
         Cette méthode implémente une stratégie de résilience avec tentatives multiples
-        et fallback vers classification par règles si toutes les tentatives échouent.
+        (backoff exponentiel avec jitter) et fallback vers classification par règles
+        si toutes les tentatives échouent.
         
         Args:
             tweets: Liste des tweets à classifier (généralement batch_size éléments)
-            retry: Numéro de la tentative actuelle (0 = première tentative)
+            retry: Numéro de la première tentative (0 = première tentative)
             
         Returns:
             Liste de dictionnaires contenant les résultats de classification:
@@ -189,47 +205,96 @@ JSON:"""
             logger.warning("Ollama non disponible, utilisation du fallback")
             return self._classify_batch_fallback(tweets)  # Basculement immédiat vers classification par règles
         
-        try:
-            # Construction du prompt d'instruction pour le modèle LLM
-            prompt = self.build_classification_prompt(tweets)
-            
-            # Journalisation de la tentative en cours pour traçabilité
-            logger.info(f"Appel Ollama pour {len(tweets)} tweets (tentative {retry + 1}/{self.max_retries})")
-            
-            # Envoi de la requête au modèle Mistral via l'API Ollama
-            response = ollama.generate(
-                model=self.model_name,  # Sélection du modèle (mistral, llama2, etc.)
-                prompt=prompt,  # Prompt construit avec taxonomie et exemples
-                options=self.ollama_options  # Paramètres de génération (température, tokens, etc.)
-            )
-            
-            # Extraction du texte de réponse depuis la structure de données Ollama
-            response_text = response.get('response', '')
+        # Construction du prompt d'instruction pour le modèle LLM
+        prompt = self.build_classification_prompt(tweets)
+        
+        for attempt in range(retry, self.max_retries):
+            try:
+                # Journalisation de la tentative en cours pour traçabilité
+                logger.info(f"Appel Ollama pour {len(tweets)} tweets (tentative {attempt + 1}/{self.max_retries})")
+                
+                # Envoi de la requête au modèle Mistral via l'API Ollama
+                response = ollama.generate(
+                    model=self.model_name,  # Sélection du modèle (mistral, llama2, etc.)
+                    prompt=prompt,  # Prompt construit avec taxonomie et exemples
+                    options=self.ollama_options  # Paramètres de génération (température, tokens, etc.)
+                )
+                
+                # Extraction du texte de réponse depuis la structure de données Ollama
+                response_text = response.get('response', '')
+                
+                # Parsing et validation du JSON retourné par le modèle
+                results = self._parse_ollama_response(response_text, len(tweets))
+                
+                # Validation de la présence et de la cohérence des résultats
+                if results:
+                    logger.info(f"Classification réussie de {len(results)} tweets")
+                    return results
+                
+                # Déclenche le mécanisme de retry
+                raise ValueError("Réponse JSON invalide ou vide")
             
-            # Parsing et validation du JSON retourné par le modèle
-            results = self._parse_ollama_response(response_text, len(tweets))
+            except Exception as e:
+                # Capture de toute erreur (timeout, JSON invalide, erreur serveur, etc.)
+                logger.error(f"Erreur classification (tentative {attempt + 1}): {e}")
+                
+                # Backoff exponentiel avec jitter s'il reste des tentatives
+                if attempt < self.max_retries - 1:
+                    delay = backoff_delay(attempt, base=RETRY_DELAY)
+                    logger.info(f"Nouvelle tentative dans {delay:.1f}s...")
+                    time.sleep(delay)
+        
+        # Épuisement des tentatives, basculement vers fallback
+        logger.error(f"Échec après {self.max_retries} tentatives, fallback")
+        return self._classify_batch_fallback(tweets)  # Classification par règles comme solution de secours
+    
+    def classify_tweets(self,
+                        tweets: List[str],
+                        on_result: Optional[Callable[[int, Dict], None]] = None) -> List[Dict]:
+        """
+        Classifie une liste de tweets en pipelinant les lots sur Ollama
+        
+        Les lots de batch_size tweets sont envoyés simultanément via le client
+        asynchrone (au plus num_parallel à la fois). Les tweets sans résultat
+        après toutes les tentatives sont classifiés par règles.
+        
+        Args:
+            tweets: Liste des tweets à classifier
+            on_result: Callback (index du tweet, résultat) appelé dès qu'un résultat est streamé
             
-            # Validation de la présence et de la cohérence des résultats
-            if results:
-                logger.info(f"Classification réussie de {len(results)} tweets")
-                return results
-            else:
-                # Lève une exception pour déclencher le mécanisme de retry
-                raise ValueError("Réponse JSON invalide ou vide")
+        Returns:
+            Résultats de classification dans l'ordre des tweets
+        """
+        # Vérification préalable de la disponibilité d'Ollama
+        if not OLLAMA_AVAILABLE:
+            logger.warning("Ollama non disponible, utilisation du fallback")
+            return self._classify_batch_fallback(tweets)
+        
+        batches = [tweets[i:i + self.batch_size] for i in range(0, len(tweets), self.batch_size)]
+        
+        callback = None
+        if on_result:
+            callback = lambda batch_idx, idx, result: on_result(batch_idx * self.batch_size + idx, result)
         
+        try:
+            batch_results = self.async_client.classify_batches_sync(
+                batches, self.build_classification_prompt, callback
+            )
         except Exception as e:
-            # Capture de toute erreur (timeout, JSON invalide, erreur serveur, etc.)
-            logger.error(f"Erreur classification (tentative {retry + 1}): {e}")
-            
-            # Mécanisme de retry avec backoff exponentiel
-            if retry < self.max_retries - 1:  # Vérification qu'il reste des tentatives
-                logger.info(f"Nouvelle tentative dans {RETRY_DELAY}s...")
-                time.sleep(RETRY_DELAY)  # Pause avant retry pour éviter la surcharge serveur
-                return self.classify_batch(tweets, retry + 1)  # Appel récursif avec incrémentation du compteur
-            else:
-                # Épuisement des tentatives, basculement vers fallback
-                logger.error(f"Échec après {self.max_retries} tentatives, fallback")
-                return self._classify_batch_fallback(tweets)  # Classification par règles comme solution de secours
+            logger.error(f"Erreur client Ollama asynchrone: {e}")
+            batch_results = [[None] * len(batch) for batch in batches]
+        
+        all_results = []
+        for batch, results in zip(batches, batch_results):
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                # Fallback par règles pour les seuls tweets non classifiés
+                fallback = self._classify_batch_fallback([batch[i] for i in missing])
+                for i, result in zip(missing, fallback):
+                    results[i] = dict(result, index=i)
+            all_results.extend(results)
+        
+        return all_results
     
     def _parse_ollama_response(self, response_text: str, expected_count: int) -> List[Dict]:
         """
@@ -343,32 +408,24 @@ JSON:"""
         # Préparation
         tweets = df[text_column].tolist()
         total_batches = (len(tweets) + self.batch_size - 1) // self.batch_size
-        all_results = []
         
         # Progress bar Streamlit
+        on_result = None
         if show_progress:
             progress_bar = st.progress(0)
             status_text = st.empty()
-        
-        # Traitement par lots
-        for batch_idx in range(total_batches):
-            start_idx = batch_idx * self.batch_size
-            end_idx = min(start_idx + self.batch_size, len(tweets))
-            batch_tweets = tweets[start_idx:end_idx]
-            
-            # Mise à jour progress
-            if show_progress:
-                progress = (batch_idx + 1) / total_batches
-                progress_bar.progress(progress)
-                status_text.text(f"Classification: Lot {batch_idx + 1}/{total_batches} ({start_idx + 1}-{end_idx} tweets)")
-            
-            # Classification du lot
-            batch_results = self.classify_batch(batch_tweets)
-            all_results.extend(batch_results)
+            completed = [0]
             
-            # Petit délai entre les lots pour ne pas surcharger Ollama
-            if batch_idx < total_batches - 1:
-                time.sleep(0.5)
+            def on_result(index: int, result: Dict) -> None:
+                # Mise à jour progress au fil des résultats streamés
+                completed[0] += 1
+                if completed[0] % 10 == 0 or completed[0] == len(tweets):
+                    progress_bar.progress(completed[0] / len(tweets))
+                    status_text.text(f"Classification: {completed[0]}/{len(tweets)} tweets "
+                                     f"({total_batches} lots, {self.async_client.num_parallel} en parallèle)")
+        
+        # Traitement par lots pipelinés (sans pause entre les lots)
+        all_results = self.classify_tweets(tweets, on_result=on_result)
         
         # Nettoyage UI avec delay pour stabilité DOM
         if show_progress:
@@ -9,14 +9,29 @@ Performance cible: 5000 tweets en < 2 minutes
 """
 
 from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
 
+from services.pipelined_scheduler import PipelinedScheduler
+from services.uncertainty_router import UncertaintyRouter, RoutingReport, ChunkedBudgetRouter
+from services.label_schema import apply_label_schema, claim_mask
+
 logger = logging.getLogger(__name__)
 
+# Tweets par chunk de la phase CPU (BERT + règles) du pipeline
+PIPELINE_CHUNK_SIZE = 1000
+
+# Colonnes Mistral -> colonnes finales de l'orchestrateur
+MISTRAL_COLUMN_MAPPING = {
+    'categorie': 'topics',
+    'incident': 'incident',
+    'score_confiance': 'confidence',
+    'is_claim': 'is_claim',  # is_claim validé par Mistral
+}
+
 
 class MultiModelOrchestrator:
     """
@@ -24,19 +39,26 @@ class MultiModelOrchestrator:
     
     1. BERT (GPU): Sentiment rapide sur TOUS les tweets
     2. Règles: is_claim + urgence sur TOUS les tweets  
-    3. Mistral: Topics + incident sur ÉCHANTILLON stratifié (20%)
+    3. Mistral: Topics + incident sur les tweets INCERTAINS (budget LLM, 20% max par défaut)
     
     Optimisé pour RTX 5060 + i9-13900H + 32GB RAM
     """
     
-    def __init__(self, mode: str = 'balanced'):
+    def __init__(self,
+                 mode: str = 'balanced',
+                 llm_budget_tweets: Optional[int] = None,
+                 llm_budget_eur: Optional[float] = None):
         """
         Initialise l'orchestrateur
         
         Args:
             mode: 'fast' | 'balanced' | 'precise'
+            llm_budget_tweets: Budget Mistral en tweets (mode balanced, optionnel)
+            llm_budget_eur: Budget Mistral en euros (mode balanced, optionnel)
         """
         self.mode = mode
+        self.llm_budget_tweets = llm_budget_tweets
+        self.llm_budget_eur = llm_budget_eur
         self.models_loaded = False
         
         logger.info(f" Orchestrateur multi-modèle: Mode {mode.upper()}")
@@ -46,6 +68,14 @@ class MultiModelOrchestrator:
         self.rules = None
         self.mistral = None
         self.parallel_processor = None
+        
+        # Ordonnanceur chevauchant les phases CPU et Mistral
+        self.scheduler = PipelinedScheduler(chunk_size=PIPELINE_CHUNK_SIZE)
+        self.last_pipeline_stats = None
+        
+        # Routage des tweets incertains vers Mistral (mode balanced)
+        self.router = UncertaintyRouter()
+        self.last_routing_report: Optional[RoutingReport] = None
     
     def load_models(self, progress_callback=None):
         """
@@ -119,9 +149,12 @@ class MultiModelOrchestrator:
         Pipeline optimisé:
         1. BERT sentiment (TOUS) - 10s
         2. Règles is_claim + urgence (TOUS) - < 1s
-        3. Mistral topics + incident (20% échantillon) - 1-2min
+        3. Mistral topics + incident (tweets incertains, dans le budget LLM) - 1-2min
         4. Agrégation résultats - < 1s
         
+        Les phases 1-2 (CPU) et 3 (E/S) sont chevauchées par chunks: le temps
+        total tend vers max(phases) au lieu de leur somme.
+        
         Args:
             df: DataFrame avec tweets nettoyés
             text_column: Nom de la colonne de texte
@@ -140,95 +173,49 @@ class MultiModelOrchestrator:
         logger.info(f" Classification de {total_tweets} tweets...")
         
         # ═══════════════════════════════════════════════════════════
-        # PHASE 1: BERT Sentiment (TOUS les tweets) - GPU Ultra-rapide
+        # PHASES 1-3 PIPELINÉES: BERT + Règles (CPU) -> Mistral (E/S)
+        # Chaque chunk enrichi par BERT et les règles alimente aussitôt
+        # la phase Mistral via une file bornée: les deux phases se chevauchent
         # ═══════════════════════════════════════════════════════════
         if progress_callback:
-            progress_callback("Phase 1: BERT Sentiment (GPU)...", 0.1)
-        
-        phase1_start = time.time()
-        logger.info(" Phase 1: BERT Sentiment...")
-        
-        bert_results = self.bert.predict_with_confidence(
-            results[text_column].fillna('').tolist(),
-            show_progress=True
+            progress_callback("Phases 1-3: BERT + Règles -> Mistral (pipeline)...", 0.05)
+        
+        use_mistral = self.mode in ['balanced', 'precise']
+        
+        # Budget LLM global: le reliquat de chaque chunk est reporté sur les suivants
+        llm_budget = self.router.budget_for(total_tweets, self.llm_budget_tweets, self.llm_budget_eur)
+        budget = ChunkedBudgetRouter(self.router, total_tweets, llm_budget)
+        
+        logger.info(f" Phases 1-3 pipelinées (chunks de {self.scheduler.chunk_size} tweets, "
+                    f"Mistral: {'oui' if use_mistral else 'non'})...")
+        
+        enriched, mistral_results, pipeline_stats = self.scheduler.run(
+            results,
+            cpu_stage=lambda chunk: self._classify_chunk_cpu(chunk, text_column),
+            # Mode balanced: tweets incertains de chaque chunk, mode precise: tous
+            select_stage=(lambda chunk: self._select_strategic_sample(chunk, budget))
+            if self.mode == 'balanced' else None,
+            remote_stage=(lambda sample: self._classify_chunk_mistral(sample.copy(), text_column))
+            if use_mistral else None,
+            progress_callback=progress_callback,
+            final_stage=budget.flush if self.mode == 'balanced' else None
         )
+        results = enriched
         
-        results['sentiment'] = bert_results['sentiment']
-        results['bert_confidence'] = bert_results['sentiment_confidence']
-        
-        phase1_time = time.time() - phase1_start
-        logger.info(f" Phase 1: {total_tweets} tweets en {phase1_time:.1f}s ({total_tweets/phase1_time:.0f} tweets/s)")
-        
-        # ═══════════════════════════════════════════════════════════
-        # PHASE 2: Règles is_claim + urgence (TOUS) - Ultra-rapide
-        # ═══════════════════════════════════════════════════════════
-        if progress_callback:
-            progress_callback("Phase 2: Détection is_claim + urgence...", 0.3)
-        
-        phase2_start = time.time()
-        logger.info("️ Phase 2: Règles (is_claim + urgence + topics)...")
-        
-        rules_results = self.rules.classify_batch_extended(
-            results[text_column].fillna('').tolist()
-        )
+        logger.info(f" Phases 1-2 (CPU): {total_tweets} tweets en {pipeline_stats.cpu_seconds:.1f}s")
         
-        results['is_claim'] = rules_results['is_claim']
-        results['urgence'] = rules_results['urgence']
-        results['topics_preliminary'] = rules_results['topics']
-        results['incident_preliminary'] = rules_results['incident']
-        
-        phase2_time = time.time() - phase2_start
-        logger.info(f" Phase 2: {total_tweets} tweets en {phase2_time:.1f}s ({total_tweets/phase2_time:.0f} tweets/s)")
-        
-        # ═══════════════════════════════════════════════════════════
-        # PHASE 3: Mistral sur ÉCHANTILLON intelligent (Mode Balanced)
-        # ═══════════════════════════════════════════════════════════
-        if self.mode in ['balanced', 'precise']:
-            if progress_callback:
-                progress_callback("Phase 3: Mistral sur échantillon stratifié...", 0.5)
-            
-            phase3_start = time.time()
-            
-            # Sélection intelligente de l'échantillon
-            if self.mode == 'balanced':
-                sample_df = self._select_strategic_sample(results, ratio=0.20)
-            else:
-                sample_df = results  # Mode precise: tous
-            
-            sample_size = len(sample_df)
-            logger.info(f" Phase 3: Mistral sur {sample_size} tweets ({sample_size/total_tweets*100:.1f}%)...")
+        if use_mistral and mistral_results is not None:
+            sample_size = len(mistral_results)
+            logger.info(f" Phase 3 (Mistral): {sample_size} tweets ({sample_size/total_tweets*100:.1f}%) "
+                        f"en {pipeline_stats.remote_seconds:.1f}s")
             
-            if progress_callback:
-                progress_callback(f"Phase 3: Classification Mistral de {sample_size} tweets...", 0.6)
-            
-            # Classification Mistral en parallèle
-            mistral_results = self._classify_mistral_parallel(
-                sample_df,
-                text_column,
-                progress_callback
-            )
-            
-            # Fusionner résultats Mistral
-            for idx in mistral_results.index:
-                if idx in results.index:
-                    # Topics
-                    if 'categorie' in mistral_results.columns:
-                        results.loc[idx, 'topics'] = mistral_results.loc[idx, 'categorie']
-                    
-                    # Incident
-                    if 'incident' in mistral_results.columns:
-                        results.loc[idx, 'incident'] = mistral_results.loc[idx, 'incident']
-                    
-                    # Confidence
-                    if 'score_confiance' in mistral_results.columns:
-                        results.loc[idx, 'confidence'] = mistral_results.loc[idx, 'score_confiance']
-                    
-                    # is_claim validé par Mistral
-                    if 'is_claim' in mistral_results.columns:
-                        results.loc[idx, 'is_claim'] = mistral_results.loc[idx, 'is_claim']
-            
-            phase3_time = time.time() - phase3_start
-            logger.info(f" Phase 3: {sample_size} tweets en {phase3_time:.1f}s ({sample_size/phase3_time:.0f} tweets/s)")
+            # Fusionner résultats Mistral (alignement sur l'index, sans boucle)
+            self._merge_mistral_results(results, mistral_results)
+        
+        self.last_pipeline_stats = pipeline_stats
+        if self.mode == 'balanced':
+            self.last_routing_report = budget.report
+            UncertaintyRouter.log_report(self.last_routing_report)
         
         # ═══════════════════════════════════════════════════════════
         # PHASE 4: Agrégation et Finalisation
@@ -249,13 +236,14 @@ class MultiModelOrchestrator:
         
         # Confidence: agrégation BERT + règles
         if 'confidence' not in results.columns or results['confidence'].isna().any():
-            results['confidence'] = results.apply(
-                lambda row: self._calculate_aggregated_confidence(row), axis=1
-            )
+            results['confidence'] = self._calculate_aggregated_confidence(results)
         
         # Nettoyer colonnes temporaires
         results.drop(columns=['topics_preliminary', 'incident_preliminary'], errors='ignore', inplace=True)
         
+        # Colonnes de labels en catégories fixes (mémoire, value_counts/groupby sur codes)
+        apply_label_schema(results, inplace=True)
+        
         # Statistiques finales
         total_time = time.time() - start_time
         logger.info(f"⏱️ Temps total: {total_time:.1f}s ({total_time/60:.1f}min)")
@@ -266,112 +254,56 @@ class MultiModelOrchestrator:
         
         return results
     
-    def _select_strategic_sample(self, df: pd.DataFrame, ratio: float = 0.20) -> pd.DataFrame:
+    def _classify_chunk_cpu(self, chunk: pd.DataFrame, text_column: str) -> pd.DataFrame:
         """
-        Sélectionne un échantillon stratifié intelligent
-        
-        Priorité:
-        1. Réclamations urgentes (100%)
-        2. Réclamations moyennes (50%)
-        3. Autres (10%)
+        Phases CPU sur un chunk: BERT sentiment + règles
         
         Args:
-            df: DataFrame complet
-            ratio: Ratio cible (20% par défaut)
+            chunk: Chunk du DataFrame
+            text_column: Colonne de texte
             
         Returns:
-            DataFrame échantillon
+            Chunk enrichi (sentiment, bert_confidence, is_claim, urgence, résultats préliminaires)
         """
-        samples = []
-        
-        # Priorité 1: TOUTES les réclamations urgentes
-        urgent_claims = df[(df['is_claim'] == 1) & (df['urgence'] == 'haute')]
-        if len(urgent_claims) > 0:
-            samples.append(urgent_claims)
-            logger.info(f"   Priorité 1: {len(urgent_claims)} réclamations urgentes (100%)")
-        
-        # Priorité 2: 50% des réclamations moyennes
-        medium_claims = df[(df['is_claim'] == 1) & (df['urgence'] == 'moyenne')]
-        if len(medium_claims) > 0:
-            sample_size = max(len(medium_claims) // 2, 50)
-            medium_sample = medium_claims.sample(n=min(sample_size, len(medium_claims)))
-            samples.append(medium_sample)
-            logger.info(f"   Priorité 2: {len(medium_sample)} réclamations moyennes (50%)")
-        
-        # Priorité 3: Échantillon du reste pour équilibrer
-        rest = df[df['is_claim'] == 0]
-        if len(rest) > 0:
-            target_total = int(len(df) * ratio)
-            current_total = sum(len(s) for s in samples)
-            remaining = max(target_total - current_total, 50)
-            
-            rest_sample = rest.sample(n=min(remaining, len(rest)))
-            samples.append(rest_sample)
-            logger.info(f"   Priorité 3: {len(rest_sample)} non-réclamations (échantillon)")
-        
-        # Combiner
-        combined = pd.concat(samples) if samples else df.head(100)
-        
-        logger.info(f" Échantillon stratifié: {len(combined)}/{len(df)} ({len(combined)/len(df)*100:.1f}%)")
-        
-        return combined
+        texts = chunk[text_column].fillna('').tolist()
+        result = chunk.copy()
+        
+        # Phase 1: BERT sentiment
+        bert_results = self.bert.predict_with_confidence(texts, show_progress=False)
+        result['sentiment'] = bert_results['sentiment'].to_numpy()
+        result['bert_confidence'] = bert_results['sentiment_confidence'].to_numpy()
+        
+        # Phase 2: Règles is_claim + urgence + topics
+        rules_results = self.rules.classify_batch_extended(texts)
+        result['is_claim'] = rules_results['is_claim'].to_numpy()
+        result['urgence'] = rules_results['urgence'].to_numpy()
+        result['topics_preliminary'] = rules_results['topics'].to_numpy()
+        result['incident_preliminary'] = rules_results['incident'].to_numpy()
+        
+        return result
     
-    def _classify_mistral_parallel(self,
-                                   df: pd.DataFrame,
-                                   text_column: str,
-                                   progress_callback=None) -> pd.DataFrame:
+    def _select_strategic_sample(self, df: pd.DataFrame, budget: ChunkedBudgetRouter) -> pd.DataFrame:
         """
-        Classification Mistral en parallèle (optimisé pour i9)
+        Sélectionne les tweets à envoyer à Mistral par incertitude
+        
+        Seuls les tweets où BERT est peu confiant ou contredit les règles
+        sont candidats; ils sont retenus par gain de précision attendu
+        décroissant, dans la part du budget global restant allouée au chunk
+        (les candidats non retenus restent en réserve pour les chunks suivants).
         
         Args:
-            df: DataFrame échantillon
-            text_column: Colonne de texte
-            progress_callback: Callback progression
+            df: DataFrame enrichi par BERT et les règles
+            budget: Répartition du budget LLM global sur les chunks
             
         Returns:
-            DataFrame avec résultats Mistral
+            DataFrame échantillon
         """
-        # Découper en chunks pour parallélisation
-        n_workers = 4  # 4 instances Mistral en parallèle
-        chunk_size = (len(df) + n_workers - 1) // n_workers
+        sample = budget.route(df)
         
-        chunks = []
-        for i in range(0, len(df), chunk_size):
-            chunks.append(df.iloc[i:i+chunk_size].copy())
+        logger.info(f"   Routage: {len(sample)} tweets incertains retenus après {len(df)} tweets "
+                    f"(budget restant {budget.remaining_budget})")
         
-        logger.info(f"    {len(chunks)} chunks pour traitement parallèle")
-        
-        # Traitement parallèle
-        results_list = []
-        
-        with ThreadPoolExecutor(max_workers=n_workers) as executor:
-            futures = {}
-            
-            for idx, chunk in enumerate(chunks):
-                future = executor.submit(
-                    self._classify_chunk_mistral,
-                    chunk,
-                    text_column
-                )
-                futures[future] = idx
-            
-            # Collecter résultats
-            for future in as_completed(futures):
-                idx = futures[future]
-                try:
-                    result = future.result()
-                    results_list.append((idx, result))
-                    
-                    logger.info(f"    Chunk {idx+1}/{len(chunks)} terminé")
-                    
-                except Exception as e:
-                    logger.error(f"    Erreur chunk {idx}: {e}")
-        
-        # Recombiner dans l'ordre
-        results_list.sort(key=lambda x: x[0])
-        combined = pd.concat([r[1] for r in results_list])
-        
-        return combined
+        return sample
     
     def _classify_chunk_mistral(self, chunk: pd.DataFrame, text_column: str) -> pd.DataFrame:
         """
@@ -400,41 +332,69 @@ class MultiModelOrchestrator:
             chunk['score_confiance'] = 0.5
             return chunk
     
-    def _calculate_aggregated_confidence(self, row: pd.Series) -> float:
+    def _merge_mistral_results(self, results: pd.DataFrame, mistral_results: pd.DataFrame) -> None:
         """
-        Calcule un score de confiance agrégé
+        Fusionne les résultats Mistral dans le DataFrame complet (en place)
         
-        Combine:
-        - BERT confidence (sentiment)
-        - Règles confidence (is_claim, urgence)
-        - Mistral confidence (si disponible)
+        Fusion vectorisée alignée sur l'index: les colonnes existantes sont
+        mises à jour avec DataFrame.update (valeurs non nulles uniquement),
+        les nouvelles colonnes sont créées par réindexation.
         
         Args:
-            row: Ligne du DataFrame
-            
-        Returns:
-            Score de confiance agrégé 0-1
+            results: DataFrame complet
+            mistral_results: Résultats Mistral sur l'échantillon
         """
-        scores = []
+        columns = {source: target for source, target in MISTRAL_COLUMN_MAPPING.items()
+                   if source in mistral_results.columns}
+        if not columns or mistral_results.empty:
+            return
         
-        # BERT confidence
-        if 'bert_confidence' in row and not pd.isna(row['bert_confidence']):
-            scores.append(row['bert_confidence'])
+        merged = mistral_results[list(columns)].rename(columns=columns)
+        merged = merged[~merged.index.duplicated(keep='last')]
+        merged = merged[merged.index.isin(results.index)]
         
-        # Règles: confiance selon détection
-        if 'is_claim' in row:
-            # is_claim détecté = haute confiance sur rules
-            scores.append(0.85 if row['is_claim'] == 1 else 0.70)
+        existing = [col for col in merged.columns if col in results.columns]
+        if existing:
+            results.update(merged[existing])
         
-        # Mistral confidence si disponible
-        if 'mistral_confidence' in row and not pd.isna(row['mistral_confidence']):
-            scores.append(row['mistral_confidence'])
+        for col in merged.columns:
+            if col not in existing:
+                results[col] = merged[col].reindex(results.index)
+    
+    def _calculate_aggregated_confidence(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Calcule un score de confiance agrégé (vectorisé)
         
-        # Moyenne pondérée
-        if scores:
-            return sum(scores) / len(scores)
+        Combine, pour chaque ligne, la moyenne des scores disponibles:
+        - BERT confidence (sentiment)
+        - Règles confidence (0.85 si is_claim détecté, 0.70 sinon)
+        - Mistral confidence (si disponible)
         
-        return 0.70  # Par défaut
+        Args:
+            df: DataFrame classifié
+            
+        Returns:
+            Scores de confiance agrégés 0-1 (0.70 par défaut)
+        """
+        n_rows = len(df)
+        total = np.zeros(n_rows)
+        count = np.zeros(n_rows)
+        
+        # BERT et Mistral: uniquement les valeurs renseignées
+        for column in ('bert_confidence', 'mistral_confidence'):
+            if column in df.columns:
+                values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+                valid = ~np.isnan(values)
+                total += np.where(valid, values, 0.0)
+                count += valid
+        
+        # Règles: is_claim détecté = haute confiance
+        if 'is_claim' in df.columns:
+            total += np.where(df['is_claim'].to_numpy() == 1, 0.85, 0.70)
+            count += 1
+        
+        # Moyenne des scores disponibles
+        return np.where(count > 0, total / np.maximum(count, 1), 0.70)
     
     def get_classification_report(self, df: pd.DataFrame) -> Dict[str, any]:
         """
@@ -450,24 +410,24 @@ class MultiModelOrchestrator:
             'total_tweets': len(df),
             
             # is_claim
-            'claims_count': df['is_claim'].sum() if 'is_claim' in df.columns else 0,
-            'claims_percentage': (df['is_claim'].sum() / len(df) * 100) if 'is_claim' in df.columns else 0,
+            'claims_count': int(claim_mask(df).sum()),
+            'claims_percentage': (claim_mask(df).sum() / len(df) * 100) if len(df) else 0,
             
             # Sentiment
-            'sentiment_distribution': df['sentiment'].value_counts().to_dict() if 'sentiment' in df.columns else {},
+            'sentiment_distribution': df['sentiment'].value_counts().loc[lambda counts: counts > 0].to_dict() if 'sentiment' in df.columns else {},
             'sentiment_positive_pct': (df['sentiment'] == 'positif').sum() / len(df) * 100 if 'sentiment' in df.columns else 0,
             'sentiment_negatif_pct': (df['sentiment'] == 'negatif').sum() / len(df) * 100 if 'sentiment' in df.columns else 0,
             
             # Urgence
-            'urgence_distribution': df['urgence'].value_counts().to_dict() if 'urgence' in df.columns else {},
+            'urgence_distribution': df['urgence'].value_counts().loc[lambda counts: counts > 0].to_dict() if 'urgence' in df.columns else {},
             'urgence_haute_count': (df['urgence'] == 'haute').sum() if 'urgence' in df.columns else 0,
             
             # Topics
-            'topics_distribution': df['topics'].value_counts().to_dict() if 'topics' in df.columns else {},
+            'topics_distribution': df['topics'].value_counts().loc[lambda counts: counts > 0].to_dict() if 'topics' in df.columns else {},
             'topics_count': df['topics'].nunique() if 'topics' in df.columns else 0,
             
             # Incidents
-            'incident_distribution': df['incident'].value_counts().to_dict() if 'incident' in df.columns else {},
+            'incident_distribution': df['incident'].value_counts().loc[lambda counts: counts > 0].to_dict() if 'incident' in df.columns else {},
             'incident_count': df['incident'].nunique() if 'incident' in df.columns else 0,
             
             # Confidence
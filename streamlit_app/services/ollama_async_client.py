@@ -0,0 +1,357 @@
+"""
+Client Ollama asynchrone - FreeMobilaChat
+=========================================
+
+Classification par lots pipelinée sur le serveur Ollama local.
+
+Fonctionnalités:
+- Plusieurs prompts multi-tweets en vol simultanément, bornés par
+  OLLAMA_NUM_PARALLEL (nombre de requêtes servies en parallèle par le serveur)
+- Retry avec backoff exponentiel et jitter (sans bloquer les autres lots)
+- Parsing incrémental du JSON streamé: chaque résultat est disponible dès
+  que son objet est complet, avant la fin de la réponse
+- Seuls les tweets sans résultat sont renvoyés au modèle lors d'un retry
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Configuration du serveur (mêmes variables d'environnement que le serveur Ollama)
+DEFAULT_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+DEFAULT_NUM_PARALLEL = int(os.getenv('OLLAMA_NUM_PARALLEL', '4'))
+
+# Paramètres de résilience
+MAX_RETRIES = 3  # Nombre maximal de tentatives par lot
+BACKOFF_BASE = 1.0  # Délai de base en secondes (doublé à chaque tentative)
+BACKOFF_MAX = 30.0  # Délai maximal en secondes
+REQUEST_TIMEOUT = 120.0  # Timeout d'une génération complète
+
+# Statuts HTTP pour lesquels une nouvelle tentative a un sens
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Début du tableau de résultats dans la réponse du modèle
+RESULTS_ARRAY_REGEX = re.compile(r'"results"\s*:\s*\[')
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """
+    Délai avant la tentative suivante (backoff exponentiel, "equal jitter")
+
+    La moitié du délai est fixe, l'autre aléatoire: les lots en échec ne
+    relancent pas tous leur requête au même instant.
+
+    Args:
+        attempt: Numéro de la tentative échouée (0 = première)
+        base: Délai de base en secondes
+        cap: Délai maximal en secondes
+
+    Returns:
+        Délai en secondes
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def run_sync(coroutine):
+    """
+    Exécute une coroutine depuis du code synchrone (scripts Streamlit)
+
+    Si une boucle asyncio tourne déjà dans ce thread, la coroutine est
+    exécutée dans un thread dédié.
+
+    Args:
+        coroutine: Coroutine à exécuter
+
+    Returns:
+        Résultat de la coroutine
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+class StreamingResultsParser:
+    """
+    Parser incrémental du tableau "results" d'une réponse JSON streamée
+
+    Les fragments de texte sont fournis au fil de l'eau via feed(); chaque
+    objet du tableau est renvoyé dès que son accolade fermante est reçue.
+    Le texte parasite avant/après le JSON est ignoré.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start = 0
+        self.done = False
+
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Ajoute un fragment de réponse
+
+        Args:
+            text: Fragment de texte généré
+
+        Returns:
+            Objets du tableau complétés par ce fragment
+        """
+        if self.done or not text:
+            return []
+
+        self._buffer += text
+        items = []
+
+        if not self._in_array:
+            match = RESULTS_ARRAY_REGEX.search(self._buffer)
+            if not match:
+                return items
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif char == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        item = json.loads(buffer[self._obj_start:i + 1])
+                    except json.JSONDecodeError:
+                        logger.warning("Objet JSON invalide ignoré dans la réponse streamée")
+                    else:
+                        if isinstance(item, dict):
+                            items.append(item)
+            elif char == ']' and self._depth == 0:
+                self.done = True
+                break
+            i += 1
+
+        # Ne conserver que l'objet en cours de réception
+        keep_from = self._obj_start if self._depth > 0 else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        self._obj_start = 0
+        return items
+
+
+class AsyncOllamaClient:
+    """
+    Client Ollama asynchrone pour la classification par lots de tweets
+
+    Les lots sont envoyés concurremment à /api/generate en mode streaming,
+    au plus num_parallel à la fois (valeur OLLAMA_NUM_PARALLEL du serveur).
+    """
+
+    def __init__(self,
+                 model_name: str = 'mistral',
+                 base_url: Optional[str] = None,
+                 num_parallel: Optional[int] = None,
+                 options: Optional[Dict] = None,
+                 max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX,
+                 timeout: float = REQUEST_TIMEOUT):
+        """
+        Initialise le client
+
+        Args:
+            model_name: Modèle Ollama à utiliser
+            base_url: URL du serveur Ollama (OLLAMA_BASE_URL par défaut)
+            num_parallel: Requêtes simultanées (OLLAMA_NUM_PARALLEL par défaut)
+            options: Options de génération Ollama (temperature, num_predict...)
+            max_retries: Nombre maximal de tentatives par lot
+            backoff_base: Délai de base du backoff en secondes
+            backoff_max: Délai maximal du backoff en secondes
+            timeout: Timeout d'une génération en secondes
+        """
+        self.model_name = model_name
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.num_parallel = max(1, num_parallel or DEFAULT_NUM_PARALLEL)
+        self.options = options or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.stats = {'requests': 0, 'retries': 0, 'failed_items': 0}
+
+        logger.info(f"AsyncOllamaClient initialisé: model={model_name}, num_parallel={self.num_parallel}")
+
+    async def stream_generate(self, client: httpx.AsyncClient, prompt: str) -> AsyncIterator[str]:
+        """
+        Génère une réponse en streaming
+
+        Args:
+            client: Client HTTP partagé
+            prompt: Prompt complet
+
+        Yields:
+            Fragments de texte au fil de la génération
+        """
+        payload = {
+            'model': self.model_name,
+            'prompt': prompt,
+            'stream': True,
+            'options': self.options,
+        }
+
+        self.stats['requests'] += 1
+        async with client.stream('POST', '/api/generate', json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise ValueError(f"Erreur Ollama: {chunk['error']}")
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    break
+
+    async def classify_batch(self,
+                             client: httpx.AsyncClient,
+                             semaphore: asyncio.Semaphore,
+                             tweets: Sequence[str],
+                             build_prompt: Callable[[List[str]], str],
+                             on_result: Optional[Callable[[int, Dict], None]] = None) -> List[Optional[Dict]]:
+        """
+        Classifie un lot de tweets avec retry
+
+        Args:
+            client: Client HTTP partagé
+            semaphore: Limite de requêtes simultanées
+            tweets: Tweets du lot
+            build_prompt: Fonction construisant le prompt d'une liste de tweets
+            on_result: Callback (index dans le lot, résultat) appelé dès qu'un résultat arrive
+
+        Returns:
+            Résultats dans l'ordre des tweets (None si non classifié après toutes les tentatives)
+        """
+        results: List[Optional[Dict]] = [None] * len(tweets)
+        pending = list(range(len(tweets)))
+
+        for attempt in range(self.max_retries):
+            retryable = True
+            async with semaphore:
+                try:
+                    parser = StreamingResultsParser()
+                    received = 0
+                    prompt = build_prompt([tweets[i] for i in pending])
+                    async for fragment in self.stream_generate(client, prompt):
+                        for item in parser.feed(fragment):
+                            self._store_result(item, received, pending, results, on_result)
+                            received += 1
+                        if parser.done:
+                            break
+                except httpx.HTTPStatusError as e:
+                    retryable = e.response.status_code in RETRYABLE_STATUS
+                    logger.error(f"Erreur HTTP Ollama {e.response.status_code} (tentative {attempt + 1})")
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.error(f"Erreur Ollama (tentative {attempt + 1}): {e}")
+
+            pending = [i for i in pending if results[i] is None]
+            if not pending or not retryable or attempt == self.max_retries - 1:
+                break
+
+            # Attente hors sémaphore: les autres lots continuent pendant le backoff
+            self.stats['retries'] += 1
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            logger.info(f"{len(pending)} tweets sans résultat, nouvelle tentative dans {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        self.stats['failed_items'] += len(pending)
+        return results
+
+    @staticmethod
+    def _store_result(item: Dict,
+                      position: int,
+                      pending: List[int],
+                      results: List[Optional[Dict]],
+                      on_result: Optional[Callable[[int, Dict], None]]) -> None:
+        """
+        Range un résultat streamé à sa place dans le lot
+
+        L'index renvoyé par le modèle est relatif au prompt de la tentative
+        (tweets encore en attente); à défaut, l'ordre d'arrivée est utilisé.
+        """
+        local_index = item.get('index', position)
+        if not isinstance(local_index, int) or not 0 <= local_index < len(pending):
+            local_index = position
+        if local_index >= len(pending):
+            return
+
+        batch_index = pending[local_index]
+        if results[batch_index] is not None:
+            return
+
+        result = dict(item, index=batch_index)
+        results[batch_index] = result
+        if on_result:
+            on_result(batch_index, result)
+
+    async def classify_batches(self,
+                               batches: Sequence[Sequence[str]],
+                               build_prompt: Callable[[List[str]], str],
+                               on_result: Optional[Callable[[int, int, Dict], None]] = None) -> List[List[Optional[Dict]]]:
+        """
+        Classifie plusieurs lots en pipeline
+
+        Args:
+            batches: Lots de tweets
+            build_prompt: Fonction construisant le prompt d'une liste de tweets
+            on_result: Callback (index du lot, index dans le lot, résultat)
+
+        Returns:
+            Résultats de chaque lot, dans l'ordre des lots
+        """
+        semaphore = asyncio.Semaphore(self.num_parallel)
+        limits = httpx.Limits(max_connections=self.num_parallel, max_keepalive_connections=self.num_parallel)
+
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            tasks = []
+            for batch_idx, batch in enumerate(batches):
+                callback = None
+                if on_result:
+                    callback = (lambda b: lambda i, r: on_result(b, i, r))(batch_idx)
+                tasks.append(self.classify_batch(client, semaphore, batch, build_prompt, callback))
+            return await asyncio.gather(*tasks)
+
+    def classify_batches_sync(self,
+                              batches: Sequence[Sequence[str]],
+                              build_prompt: Callable[[List[str]], str],
+                              on_result: Optional[Callable[[int, int, Dict], None]] = None) -> List[List[Optional[Dict]]]:
+        """Version synchrone de classify_batches (scripts Streamlit)"""
+        return run_sync(self.classify_batches(batches, build_prompt, on_result))
@@ -9,6 +9,7 @@ Architecture:
 - Caching agressif (LRU + disk)
 - Multiprocessing optimisé
 - Asynchronisme pour I/O
+- Phases CPU (BERT, Rules) et Mistral chevauchées (pipeline par chunks)
 - Progress tracking temps réel
 
 Performance cible:
@@ -33,8 +34,14 @@ import asyncio
 from dataclasses import dataclass
 import json
 
+from services.pipelined_scheduler import PipelinedScheduler
+from services.uncertainty_router import UncertaintyRouter, RoutingReport, ChunkedBudgetRouter
+
 logger = logging.getLogger(__name__)
 
+# Batches per pipeline chunk (CPU phase granularity)
+PIPELINE_CHUNK_BATCHES = 10
+
 
 @dataclass
 class BatchResult:
@@ -105,6 +112,10 @@ class OptimizedClassifier:
         self.cache_misses = 0
         self.phase_times = {}
         
+        # Uncertainty routing to Mistral (balanced mode)
+        self.router = UncertaintyRouter()
+        self.last_routing_report: Optional[RoutingReport] = None
+        
         # Models (lazy loading)
         self._bert = None
         self._rules = None
@@ -241,10 +252,10 @@ class OptimizedClassifier:
         rules_results = self.rules.classify_batch_extended(texts)
         
         result = batch.copy()
-        result['is_claim'] = rules_results['is_claim']
-        result['urgence'] = rules_results['urgence']
-        result['topics'] = rules_results['topics']
-        result['incident'] = rules_results['incident']
+        result['is_claim'] = rules_results['is_claim'].tolist()
+        result['urgence'] = rules_results['urgence'].tolist()
+        result['topics'] = rules_results['topics'].tolist()
+        result['incident'] = rules_results['incident'].tolist()
         
         return result
     
@@ -316,7 +327,9 @@ class OptimizedClassifier:
                              df: pd.DataFrame,
                              text_column: str = 'text_cleaned',
                              mode: str = 'balanced',
-                             progress_callback: Optional[Callable] = None) -> tuple:
+                             progress_callback: Optional[Callable] = None,
+                             llm_budget_tweets: Optional[int] = None,
+                             llm_budget_eur: Optional[float] = None) -> tuple:
         """
         ★ FONCTION PRINCIPALE ★
         
@@ -327,6 +340,8 @@ class OptimizedClassifier:
             text_column: Nom de la colonne de texte
             mode: 'fast', 'balanced', ou 'precise'
             progress_callback: Fonction callback(message, progress_pct)
+            llm_budget_tweets: Budget Mistral en tweets (mode balanced, optionnel)
+            llm_budget_eur: Budget Mistral en euros (mode balanced, optionnel)
             
         Returns:
             (results_df, benchmark_metrics)
@@ -339,125 +354,67 @@ class OptimizedClassifier:
         if progress_callback:
             progress_callback("🔧 Préparation des batches...", 0.0)
         
-        # Create batches
-        batches = self._create_batches(df, text_column)
-        num_batches = len(batches)
-        
-        # Initialize results
-        results = df.copy()
-        
-        # ═══════════════════════════════════════════════════════════
-        # PHASE 1: BERT Sentiment (TOUS les tweets)
-        # ═══════════════════════════════════════════════════════════
-        phase1_start = time.time()
-        logger.info(f"📊 Phase 1: BERT Sentiment ({num_batches} batches)")
-        
-        bert_results_list = []
-        
-        for batch_idx, batch in enumerate(batches):
-            if progress_callback:
-                pct = (batch_idx / num_batches) * 0.3  # 0-30%
-                progress_callback(f"Phase 1/4: BERT batch {batch_idx+1}/{num_batches}", pct)
-            
-            batch_result = self._process_batch_bert(batch, text_column)
-            bert_results_list.append(batch_result)
-        
-        # Merge results
-        bert_combined = pd.concat(bert_results_list, ignore_index=False)
-        results['sentiment'] = bert_combined['sentiment']
-        results['bert_confidence'] = bert_combined['bert_confidence']
-        
-        self.phase_times['phase1_bert'] = time.time() - phase1_start
-        logger.info(f"✅ Phase 1: {total_tweets} tweets en {self.phase_times['phase1_bert']:.1f}s")
-        
         # ═══════════════════════════════════════════════════════════
-        # PHASE 2: Rules (is_claim, urgence, topics, incident)
+        # PHASES 1-3 PIPELINÉES: BERT + Rules (CPU) -> Mistral (I/O)
+        # Each enriched chunk feeds the Mistral phase through a bounded
+        # queue, so CPU and LLM work overlap instead of running in sequence
         # ═══════════════════════════════════════════════════════════
-        phase2_start = time.time()
-        logger.info(f"🏷️ Phase 2: Rules Classification")
+        use_mistral = mode in ('balanced', 'precise')
         
-        if progress_callback:
-            progress_callback("Phase 2/4: Rules (is_claim, urgence, topics)", 0.35)
+        # Balanced: uncertain tweets only, within the LLM budget (20% by default);
+        # budget left unspent by a chunk carries over to the next ones
+        llm_budget = self.router.budget_for(total_tweets, llm_budget_tweets, llm_budget_eur)
+        budget = ChunkedBudgetRouter(self.router, total_tweets, llm_budget)
         
-        rules_results_list = []
+        self.phase_times['phase1_bert'] = 0.0
+        self.phase_times['phase2_rules'] = 0.0
         
-        for batch_idx, batch in enumerate(batches):
-            batch_result = self._process_batch_rules(batch, text_column)
-            rules_results_list.append(batch_result)
-        
-        rules_combined = pd.concat(rules_results_list, ignore_index=False)
-        results['is_claim'] = rules_combined['is_claim']
-        results['urgence'] = rules_combined['urgence']
-        results['topics'] = rules_combined['topics']
-        results['incident'] = rules_combined['incident']
-        
-        self.phase_times['phase2_rules'] = time.time() - phase2_start
-        logger.info(f"✅ Phase 2: {total_tweets} tweets en {self.phase_times['phase2_rules']:.1f}s")
-        
-        # ═══════════════════════════════════════════════════════════
-        # PHASE 3: Mistral (échantillon stratégique)
-        # ═══════════════════════════════════════════════════════════
-        phase3_start = time.time()
-        
-        if mode == 'balanced':
-            # Sample 20% stratifié
-            sample_size = max(100, int(total_tweets * 0.20))
-            sample_indices = self._select_strategic_indices(results, sample_size)
-            sample_df = results.loc[sample_indices].copy()
-            
-            logger.info(f"🧠 Phase 3: Mistral sur {len(sample_df)} tweets ({len(sample_df)/total_tweets*100:.1f}%)")
-            
-            if progress_callback:
-                progress_callback(f"Phase 3/4: Mistral échantillon ({len(sample_df)} tweets)", 0.50)
-            
-            # Process Mistral sample
-            mistral_batches = self._create_batches(sample_df, text_column)
-            mistral_results_list = []
-            
-            for batch_idx, batch in enumerate(mistral_batches):
-                if progress_callback:
-                    pct = 0.50 + (batch_idx / len(mistral_batches)) * 0.35  # 50-85%
-                    progress_callback(f"Phase 3/4: Mistral batch {batch_idx+1}/{len(mistral_batches)}", pct)
-                
-                batch_result = self._process_batch_mistral(batch, text_column)
-                mistral_results_list.append(batch_result)
-            
-            # Merge Mistral results
-            mistral_combined = pd.concat(mistral_results_list, ignore_index=False)
+        def cpu_stage(chunk: pd.DataFrame) -> pd.DataFrame:
+            phase_start = time.time()
+            enriched = self._process_batch_bert(chunk, text_column)
+            self.phase_times['phase1_bert'] += time.time() - phase_start
             
-            # Update main results for sampled tweets
-            for idx in mistral_combined.index:
-                if idx in results.index:
-                    results.loc[idx, 'confidence'] = mistral_combined.loc[idx, 'confidence']
-                    # Optionally update topics with Mistral
-                    if mistral_combined.loc[idx, 'mistral_categorie'] != 'autre':
-                        results.loc[idx, 'topics'] = mistral_combined.loc[idx, 'mistral_categorie']
+            phase_start = time.time()
+            enriched = self._process_batch_rules(enriched, text_column)
+            self.phase_times['phase2_rules'] += time.time() - phase_start
+            return enriched
+        
+        logger.info(f"📊 Phases 1-3 pipelinées (mode: {mode}, Mistral: {'oui' if use_mistral else 'non'})")
+        
+        scheduler = PipelinedScheduler(chunk_size=self.batch_size * PIPELINE_CHUNK_BATCHES)
+        results, mistral_combined, pipeline_stats = scheduler.run(
+            df,
+            cpu_stage=cpu_stage,
+            select_stage=budget.route if mode == 'balanced' else None,
+            remote_stage=(lambda sample: self._process_batch_mistral(sample, text_column)) if use_mistral else None,
+            progress_callback=progress_callback,
+            final_stage=budget.flush if mode == 'balanced' else None
+        )
+        
+        if mode == 'balanced' and mistral_combined is not None:
+            # Update main results for sampled tweets (index-aligned)
+            results['confidence'] = mistral_combined['confidence'].reindex(results.index)
+            mistral_topics = mistral_combined['mistral_categorie']
+            results.update(mistral_topics[mistral_topics != 'autre'].rename('topics').to_frame())
             
             # Fill non-sampled with default confidence
             results['confidence'] = results['confidence'].fillna(results['bert_confidence'])
             
-        elif mode == 'precise':
-            # All tweets through Mistral (slow!)
-            logger.info(f"🧠 Phase 3: Mistral sur TOUS les tweets (mode precise)")
-            
-            mistral_results_list = []
-            for batch_idx, batch in enumerate(batches):
-                if progress_callback:
-                    pct = 0.50 + (batch_idx / num_batches) * 0.35
-                    progress_callback(f"Phase 3/4: Mistral batch {batch_idx+1}/{num_batches}", pct)
-                
-                batch_result = self._process_batch_mistral(batch, text_column)
-                mistral_results_list.append(batch_result)
-            
-            mistral_combined = pd.concat(mistral_results_list, ignore_index=False)
-            results['confidence'] = mistral_combined['confidence']
+        elif mode == 'precise' and mistral_combined is not None:
+            results['confidence'] = mistral_combined['confidence'].reindex(results.index)
             
-        else:  # fast mode
+        else:  # fast mode (or Mistral unavailable)
             # No Mistral, use BERT confidence
             results['confidence'] = results['bert_confidence']
         
-        self.phase_times['phase3_mistral'] = time.time() - phase3_start
-        logger.info(f"✅ Phase 3: Mistral en {self.phase_times['phase3_mistral']:.1f}s")
+        if mode == 'balanced':
+            self.last_routing_report = budget.report
+            UncertaintyRouter.log_report(self.last_routing_report)
+        
+        self.phase_times['phase3_mistral'] = pipeline_stats.remote_seconds
+        self.phase_times['pipeline_wall'] = pipeline_stats.wall_seconds
+        logger.info(f"✅ Phases 1-3: CPU {pipeline_stats.cpu_seconds:.1f}s + Mistral {pipeline_stats.remote_seconds:.1f}s "
+                    f"en {pipeline_stats.wall_seconds:.1f}s")
         
         # ═══════════════════════════════════════════════════════════
         # PHASE 4: Finalisation et nettoyage
@@ -501,31 +458,6 @@ class OptimizedClassifier:
         
         return results, metrics
     
-    def _select_strategic_indices(self, df: pd.DataFrame, sample_size: int) -> List[int]:
-        """Select strategic sample (diverse sentiments + claims)"""
-        indices = []
-        
-        # Priority 1: All claims
-        if 'is_claim' in df.columns:
-            claim_indices = df[df['is_claim'] == 'oui'].index.tolist()
-            indices.extend(claim_indices)
-        
-        # Priority 2: Diverse sentiments
-        if 'sentiment' in df.columns:
-            for sentiment in df['sentiment'].unique():
-                sent_df = df[df['sentiment'] == sentiment]
-                n_sample = min(len(sent_df), sample_size // 3)
-                indices.extend(sent_df.sample(n=n_sample, random_state=42).index.tolist())
-        
-        # Fill remaining with random
-        remaining = sample_size - len(indices)
-        if remaining > 0:
-            available = list(set(df.index) - set(indices))
-            if available:
-                indices.extend(np.random.choice(available, size=min(remaining, len(available)), replace=False))
-        
-        return list(set(indices))[:sample_size]
-    
     def clear_cache(self):
         """Clear disk cache"""
         import shutil
@@ -7,6 +7,7 @@ les temps de chargement lents lors de l'upload de fichiers.
 
 Features:
 - Lazy loading des modules lourds (BERT, Transformers)
+- Import différé des bibliothèques lourdes (plotly, requests) via lazy_module
 - Cache intelligent avec st.cache_resource
 - Chargement asynchrone des modèles
 - Gestion robuste des erreurs
@@ -14,6 +15,7 @@ Features:
 
 import streamlit as st
 import logging
+import sys
 from typing import Optional, Callable, Any
 from functools import wraps
 import time
@@ -173,13 +175,8 @@ class OptimizedLoader:
             'rules': True  # Toujours disponible
         }
         
-        # Test BERT (rapide)
-        try:
-            import torch
-            from transformers import AutoTokenizer
-            available['bert'] = True
-        except:
-            pass
+        # Test BERT (rapide, sans importer torch)
+        available['bert'] = is_available('torch') and is_available('transformers')
         
         # Test Mistral
         available['mistral'] = OptimizedLoader.check_ollama_availability()
@@ -211,6 +208,60 @@ def lazy_import(module_name: str, item_name: str = None):
     return module
 
 
+def lazy_module(module_name: str):
+    """
+    Module chargé au premier accès à l'un de ses attributs
+    
+    Contrairement à lazy_import, l'import est différé: seul le module parent
+    est résolu à l'appel, le code du module s'exécute au premier usage.
+    
+    Args:
+        module_name: Nom du module (ex: 'plotly.express')
+        
+    Returns:
+        Module (proxy tant qu'il n'a pas été utilisé)
+        
+    Example:
+        px = lazy_module('plotly.express')  # Aucun coût avant px.bar(...)
+    """
+    import importlib.util
+    
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    
+    spec = importlib.util.find_spec(module_name)
+    if spec is None:
+        raise ImportError(f"No module named '{module_name}'")
+    
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+    
+    return module
+
+
+def is_available(module_name: str) -> bool:
+    """
+    Vérifie qu'un module est installé sans l'importer
+    
+    Args:
+        module_name: Nom du module (ex: 'torch')
+        
+    Returns:
+        True si le module peut être importé
+    """
+    import importlib.util
+    
+    if module_name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
 def with_spinner(message: str = "Chargement..."):
     """
     Décorateur pour ajouter un spinner Streamlit aux fonctions lourdes
@@ -0,0 +1,253 @@
+"""
+Ordonnanceur pipeliné multi-phase - FreeMobilaChat
+==================================================
+
+Chevauche les phases CPU (BERT + règles + sélection d'échantillon) et la
+phase distante (Mistral via Ollama, limitée par les E/S).
+
+Principe:
+- Le DataFrame est découpé en chunks traités par la phase CPU dans le
+  thread appelant (compatible Streamlit: les callbacks de progression
+  restent dans le thread du script)
+- Dès qu'un chunk est enrichi, son échantillon est placé dans une file
+  bornée consommée par des workers distants
+- La file bornée applique une contre-pression: la phase CPU attend si le
+  LLM a trop de retard, la mémoire reste bornée
+
+Le temps total tend vers max(CPU, distant) au lieu de CPU + distant.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Paramètres par défaut
+DEFAULT_CHUNK_SIZE = 500  # Lignes par chunk de la phase CPU
+DEFAULT_QUEUE_SIZE = 4  # Chunks en attente maximum entre les phases
+DEFAULT_REMOTE_WORKERS = 1  # Workers distants (le client Ollama parallélise déjà en interne)
+
+# Marqueur de fin de flux pour les workers distants
+_END_OF_STREAM = object()
+
+
+@dataclass
+class PipelineStats:
+    """Statistiques d'exécution du pipeline"""
+    chunks: int = 0
+    remote_chunks: int = 0
+    sampled_rows: int = 0
+    cpu_seconds: float = 0.0
+    remote_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    max_queue_depth: int = 0
+    remote_errors: int = 0
+
+    @property
+    def overlap_ratio(self) -> float:
+        """Temps de travail cumulé / temps réel (>1 si les phases se chevauchent)"""
+        if self.wall_seconds <= 0:
+            return 0.0
+        return (self.cpu_seconds + self.remote_seconds) / self.wall_seconds
+
+    def to_dict(self) -> Dict:
+        stats = asdict(self)
+        stats['overlap_ratio'] = round(self.overlap_ratio, 2)
+        return stats
+
+
+class PipelinedScheduler:
+    """
+    Ordonnanceur à deux étages: CPU (thread appelant) -> distant (workers)
+
+    Usage:
+        scheduler = PipelinedScheduler(chunk_size=500)
+        enriched, remote, stats = scheduler.run(
+            df,
+            cpu_stage=lambda chunk: bert_and_rules(chunk),
+            select_stage=lambda chunk: strategic_sample(chunk),
+            remote_stage=lambda sample: mistral(sample),
+        )
+    """
+
+    def __init__(self,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 remote_workers: int = DEFAULT_REMOTE_WORKERS):
+        """
+        Initialise l'ordonnanceur
+
+        Args:
+            chunk_size: Lignes par chunk de la phase CPU
+            queue_size: Taille maximale de la file entre les phases
+            remote_workers: Nombre de threads consommant la file
+        """
+        self.chunk_size = max(1, chunk_size)
+        self.queue_size = max(1, queue_size)
+        self.remote_workers = max(1, remote_workers)
+
+    def run(self,
+            df: pd.DataFrame,
+            cpu_stage: Callable[[pd.DataFrame], pd.DataFrame],
+            select_stage: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+            remote_stage: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+            progress_callback: Optional[Callable[[str, float], None]] = None,
+            final_stage: Optional[Callable[[], Optional[pd.DataFrame]]] = None
+            ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], PipelineStats]:
+        """
+        Exécute le pipeline
+
+        Args:
+            df: DataFrame source
+            cpu_stage: Enrichit un chunk (BERT, règles...)
+            select_stage: Sélectionne l'échantillon d'un chunk enrichi pour la
+                phase distante (None = chunk complet)
+            remote_stage: Phase distante sur un échantillon (None = pas de phase distante)
+            progress_callback: Callback(message, progression 0-1), appelé dans le thread appelant
+            final_stage: Dernier échantillon pour la phase distante, demandé après le
+                dernier chunk (ex: reliquat du budget LLM reporté d'un chunk à l'autre)
+
+        Returns:
+            (DataFrame enrichi, résultats distants concaténés ou None, statistiques)
+        """
+        stats = PipelineStats()
+        start = time.time()
+
+        chunks = [df.iloc[i:i + self.chunk_size] for i in range(0, len(df), self.chunk_size)]
+        stats.chunks = len(chunks)
+
+        work_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        done_queue: queue.Queue = queue.Queue()
+        lock = threading.Lock()
+        workers: List[threading.Thread] = []
+
+        if remote_stage is not None:
+            for _ in range(self.remote_workers):
+                worker = threading.Thread(
+                    target=self._remote_worker,
+                    args=(remote_stage, work_queue, done_queue, stats, lock),
+                    daemon=True
+                )
+                worker.start()
+                workers.append(worker)
+
+        enriched_chunks: List[pd.DataFrame] = []
+        remote_results: Dict[int, pd.DataFrame] = {}
+        submitted = 0
+        completed = 0
+
+        def collect(block: bool) -> None:
+            # Récupère les résultats distants terminés
+            nonlocal completed
+            while completed < submitted:
+                try:
+                    if block:
+                        chunk_id, result = done_queue.get(timeout=0.5)
+                    else:
+                        chunk_id, result = done_queue.get_nowait()
+                except queue.Empty:
+                    if block and any(worker.is_alive() for worker in workers):
+                        continue
+                    return
+                completed += 1
+                if result is not None:
+                    remote_results[chunk_id] = result
+                self._report(progress_callback, stats, len(enriched_chunks), completed, submitted)
+
+        try:
+            for chunk_id, chunk in enumerate(chunks):
+                cpu_start = time.time()
+                enriched = cpu_stage(chunk)
+                enriched_chunks.append(enriched)
+
+                if remote_stage is not None:
+                    sample = select_stage(enriched) if select_stage is not None else enriched
+                    stats.cpu_seconds += time.time() - cpu_start
+
+                    if sample is not None and len(sample) > 0:
+                        stats.sampled_rows += len(sample)
+                        # Bloque si la phase distante a trop de retard (contre-pression)
+                        work_queue.put((chunk_id, sample))
+                        submitted += 1
+                        stats.max_queue_depth = max(stats.max_queue_depth, work_queue.qsize())
+                else:
+                    stats.cpu_seconds += time.time() - cpu_start
+
+                collect(block=False)
+                self._report(progress_callback, stats, len(enriched_chunks), completed, submitted)
+
+            if remote_stage is not None and final_stage is not None:
+                sample = final_stage()
+                if sample is not None and len(sample) > 0:
+                    stats.sampled_rows += len(sample)
+                    work_queue.put((len(chunks), sample))
+                    submitted += 1
+        finally:
+            for _ in workers:
+                work_queue.put(_END_OF_STREAM)
+
+        # Fin de la phase CPU: attente des derniers résultats distants
+        collect(block=True)
+        for worker in workers:
+            worker.join()
+
+        stats.remote_chunks = len(remote_results)
+        stats.wall_seconds = time.time() - start
+
+        enriched_df = pd.concat(enriched_chunks) if enriched_chunks else df.copy()
+        remote_df = None
+        if remote_results:
+            remote_df = pd.concat([remote_results[i] for i in sorted(remote_results)])
+
+        logger.info(f"Pipeline: {stats.chunks} chunks, {stats.sampled_rows} lignes distantes, "
+                    f"CPU {stats.cpu_seconds:.1f}s + distant {stats.remote_seconds:.1f}s "
+                    f"en {stats.wall_seconds:.1f}s (chevauchement x{stats.overlap_ratio:.2f})")
+
+        return enriched_df, remote_df, stats
+
+    @staticmethod
+    def _remote_worker(remote_stage: Callable[[pd.DataFrame], pd.DataFrame],
+                       work_queue: queue.Queue,
+                       done_queue: queue.Queue,
+                       stats: PipelineStats,
+                       lock: threading.Lock) -> None:
+        """Consomme la file et exécute la phase distante"""
+        while True:
+            item = work_queue.get()
+            if item is _END_OF_STREAM:
+                return
+
+            chunk_id, sample = item
+            remote_start = time.time()
+            try:
+                result = remote_stage(sample)
+            except Exception as e:
+                logger.error(f"Erreur phase distante (chunk {chunk_id}): {e}")
+                result = None
+                with lock:
+                    stats.remote_errors += 1
+            with lock:
+                stats.remote_seconds += time.time() - remote_start
+            done_queue.put((chunk_id, result))
+
+    @staticmethod
+    def _report(progress_callback: Optional[Callable[[str, float], None]],
+                stats: PipelineStats,
+                cpu_done: int,
+                remote_done: int,
+                submitted: int) -> None:
+        """Progression combinée des deux phases"""
+        if not progress_callback or stats.chunks == 0:
+            return
+
+        cpu_progress = cpu_done / stats.chunks
+        remote_progress = remote_done / submitted if submitted else cpu_progress
+        progress = 0.9 * (cpu_progress + remote_progress) / 2
+        progress_callback(f"Pipeline: CPU {cpu_done}/{stats.chunks} chunks, "
+                          f"LLM {remote_done}/{submitted} chunks", progress)
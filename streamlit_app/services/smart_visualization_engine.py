@@ -12,6 +12,8 @@ import logging
 from datetime import datetime
 import json
 
+from .chart_data import cached_figure, downsample, histogram, top_counts
+
 logger = logging.getLogger(__name__)
 
 class SmartVisualizationEngine:
@@ -210,24 +212,19 @@ class SmartVisualizationEngine:
             if len(columns) >= 2:
                 x_col, y_col = columns[0], columns[1]
                 
-                # Vérification si la colonne x est temporelle
-                if pd.api.types.is_datetime64_any_dtype(df[x_col]):
-                    fig = px.line(
-                        df.sort_values(x_col),
-                        x=x_col,
-                        y=y_col,
-                        title=title,
-                        color_discrete_sequence=self.color_palettes['free_mobile']
-                    )
-                else:
-                    fig = px.line(
-                        df,
+                # Tri par x si temporelle, puis réduction LTTB (MAX_POINTS points)
+                def build():
+                    temporal = pd.api.types.is_datetime64_any_dtype(df[x_col])
+                    return px.line(
+                        downsample(df[[x_col, y_col]], x_col, y_col, sort=temporal),
                         x=x_col,
                         y=y_col,
                         title=title,
                         color_discrete_sequence=self.color_palettes['free_mobile']
                     )
                 
+                fig = cached_figure('smart_line', df, build, columns=[x_col, y_col], title=title)
+                
                 return {
                     'type': 'line_chart',
                     'title': title,
@@ -251,14 +248,20 @@ class SmartVisualizationEngine:
                 if len(columns) >= 3:
                     color_col = columns[2]
                 
-                fig = px.scatter(
-                    df,
-                    x=x_col,
-                    y=y_col,
-                    color=color_col,
-                    title=title,
-                    color_discrete_sequence=self.color_palettes['free_mobile']
-                )
+                # Réduction LTTB par couleur (MAX_POINTS points au total)
+                def build():
+                    data = df[[c for c in (x_col, y_col, color_col) if c]]
+                    return px.scatter(
+                        downsample(data, x_col, y_col, group=color_col),
+                        x=x_col,
+                        y=y_col,
+                        color=color_col,
+                        title=title,
+                        color_discrete_sequence=self.color_palettes['free_mobile']
+                    )
+                
+                fig = cached_figure('smart_scatter', df, build,
+                                    columns=[c for c in (x_col, y_col, color_col) if c], title=title)
                 
                 return {
                     'type': 'scatter_plot',
@@ -304,12 +307,7 @@ class SmartVisualizationEngine:
             if len(columns) >= 1:
                 col = columns[0]
                 
-                fig = px.histogram(
-                    df,
-                    x=col,
-                    title=title,
-                    color_discrete_sequence=self.color_palettes['free_mobile']
-                )
+                fig = self._binned_histogram(df, col, title)
                 
                 return {
                     'type': 'histogram',
@@ -425,12 +423,7 @@ class SmartVisualizationEngine:
     def _create_distribution_chart(self, df: pd.DataFrame, column: str) -> Dict[str, Any]:
         """Crée un graphique de distribution"""
         try:
-            fig = px.histogram(
-                df,
-                x=column,
-                title=f"Distribution de {column}",
-                color_discrete_sequence=self.color_palettes['free_mobile']
-            )
+            fig = self._binned_histogram(df, column, f"Distribution de {column}")
             
             return {
                 'type': 'distribution',
@@ -444,6 +437,35 @@ class SmartVisualizationEngine:
             logger.error(f"Erreur lors de la création du graphique de distribution: {e}")
             return None
 
+    def _binned_histogram(self, df: pd.DataFrame, column: str, title: str) -> go.Figure:
+        """Histogramme à classes pré-calculées (numérique) ou comptages des 50 valeurs principales"""
+        def build():
+            values = df[column]
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                bins = histogram(values, bins=30)
+                fig = px.bar(
+                    bins,
+                    x='center',
+                    y='count',
+                    title=title,
+                    color_discrete_sequence=self.color_palettes['free_mobile']
+                )
+                fig.update_traces(width=(bins['right'] - bins['left']).tolist())
+                fig.update_layout(bargap=0, xaxis_title=column)
+                return fig
+            
+            counts = top_counts(values.astype(str) if values.dtype == object else values)
+            fig = px.bar(
+                x=counts.index.astype(str),
+                y=counts.values,
+                title=title,
+                color_discrete_sequence=self.color_palettes['free_mobile']
+            )
+            fig.update_layout(xaxis_title=column, yaxis_title='count')
+            return fig
+        
+        return cached_figure('smart_histogram', df, build, columns=[column], title=title)
+
     def _create_correlation_heatmap(self, df: pd.DataFrame, columns: List[str]) -> Dict[str, Any]:
         """Crée une heatmap de corrélation"""
         try:
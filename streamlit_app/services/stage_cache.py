@@ -0,0 +1,234 @@
+"""
+Cache par étape du pipeline, indexé par hash de contenu - FreeMobilaChat
+=======================================================================
+
+Mémoïse les étapes coûteuses des pages Streamlit (lecture, nettoyage,
+classification, KPIs, graphiques) pour qu'un changement de widget ou de
+filtre réutilise les résultats amont au lieu de tout recalculer.
+
+Les clés sont chaînées: la clé d'une étape dérive de la clé de l'étape
+amont et de ses propres paramètres, donc seul le fichier source est haché
+(une fois par rerun) et jamais les DataFrames intermédiaires.
+
+    fichier -> parse -> clean(config) -> classify(mode) -> kpis / figures
+
+Deux niveaux:
+- Mémoire: LRU de quelques entrées (objets réutilisés sans désérialisation)
+- Disque: pickle par entrée, taille totale bornée (éviction LRU)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Paramètres par défaut
+CACHE_DIR = Path('.stage_cache')
+MAX_DISK_BYTES = 512 * 1024 * 1024  # 512 MB
+MEMORY_ENTRIES = 16
+HASH_BLOCK_SIZE = 8 * 1024 * 1024  # Lecture des fichiers par blocs de 8 MB
+
+_MISSING = object()
+
+
+# ═══════════════════════════════════════════════════════════
+# HASH DE CONTENU
+# ═══════════════════════════════════════════════════════════
+
+def hash_file(source) -> str:
+    """
+    Hash du contenu d'un fichier (chemin, UploadedFile Streamlit, BytesIO)
+
+    Les fichiers en mémoire sont hachés sans copie (getbuffer), les autres
+    par blocs; la position de lecture est restaurée.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    if hasattr(source, 'getbuffer'):
+        digest.update(source.getbuffer())
+        return digest.hexdigest()
+
+    position = source.tell()
+    source.seek(0)
+    for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+def hash_dataframe(df: pd.DataFrame) -> str:
+    """Hash du contenu d'un DataFrame (valeurs, index, colonnes)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stage_key(stage: str, upstream: Optional[str] = None, **params) -> str:
+    """
+    Clé d'une étape: étape + clé amont + paramètres
+
+    Args:
+        stage: Nom de l'étape ('parse', 'clean', 'classify', 'kpis', 'figure'...)
+        upstream: Clé de l'étape amont (ou hash du fichier source)
+        **params: Paramètres influant sur le résultat (config, mode, filtres...)
+
+    Returns:
+        Clé préfixée par le nom de l'étape
+    """
+    payload = json.dumps({'upstream': upstream, 'params': params}, sort_keys=True, default=str)
+    return f"{stage}-{hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()}"
+
+
+# ═══════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════
+
+class StageCache:
+    """
+    Cache mémoire + disque borné en taille
+
+    Usage:
+        cache = get_stage_cache()
+        key = stage_key('clean', file_key, column='text', **cleaning_config)
+        df_cleaned = cache.get_or_compute(key, lambda: cleaner.process_dataframe(df, 'text'))
+    """
+
+    def __init__(self,
+                 cache_dir: Path = CACHE_DIR,
+                 max_bytes: int = MAX_DISK_BYTES,
+                 memory_entries: int = MEMORY_ENTRIES):
+        """
+        Initialise le cache
+
+        Args:
+            cache_dir: Répertoire des entrées sur disque
+            max_bytes: Taille maximale sur disque (0 = pas de disque)
+            memory_entries: Nombre d'entrées gardées en mémoire
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Valeur en cache (mémoire puis disque), default si absente"""
+        stage = key.split('-', 1)[0]
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats[stage]['hits'] += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        if self.max_bytes and path.exists():
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+                os.utime(path)  # Dernier accès pour l'éviction LRU
+                self._remember(key, value)
+                with self._lock:
+                    self.stats[stage]['hits'] += 1
+                return value
+            except Exception as e:
+                logger.warning(f"Entrée de cache illisible ({key}): {e}")
+                path.unlink(missing_ok=True)
+
+        with self._lock:
+            self.stats[stage]['misses'] += 1
+        return default
+
+    def put(self, key: str, value: Any) -> Any:
+        """Enregistre une valeur (mémoire + disque) et la renvoie"""
+        self._remember(key, value)
+
+        if self.max_bytes:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._path(key).with_suffix('.tmp')
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._path(key))
+                self._evict()
+            except Exception as e:
+                logger.warning(f"Écriture du cache impossible ({key}): {e}")
+
+        return value
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Valeur en cache, ou calculée puis mise en cache (None n'est pas mis en cache)"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def _remember(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob('*.pkl'):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug(f"Cache: éviction de {path.name}")
+
+    def clear(self) -> None:
+        """Vide le cache (mémoire et disque)"""
+        with self._lock:
+            self._memory.clear()
+        for path in self.cache_dir.glob('*.pkl'):
+            path.unlink(missing_ok=True)
+
+    def disk_usage(self) -> int:
+        """Taille totale des entrées sur disque (octets)"""
+        return sum(path.stat().st_size for path in self.cache_dir.glob('*.pkl'))
+
+
+# Instance globale
+_stage_cache = None
+
+
+def get_stage_cache() -> StageCache:
+    """Retourne le cache global des étapes (singleton)"""
+    global _stage_cache
+    if _stage_cache is None:
+        _stage_cache = StageCache()
+    return _stage_cache
@@ -0,0 +1,339 @@
+"""
+Classification en flux (streaming) - FreeMobilaChat
+===================================================
+
+API à base de générateurs pour classifier des fichiers de taille
+arbitraire depuis les pages Streamlit:
+- Lecture du fichier par chunks (pd.read_csv(chunksize=...)), jamais en entier
+- Chaque chunk classifié est produit (yield) avec les KPIs cumulés
+- Les résultats sont ajoutés au fil de l'eau dans un CSV sur disque; seul
+  un aperçu borné reste en mémoire
+
+La mémoire du processus Streamlit reste proportionnelle à la taille d'un
+chunk, pas à celle du fichier.
+"""
+
+import io
+import logging
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from services.label_schema import apply_label_schema
+
+logger = logging.getLogger(__name__)
+
+# Paramètres par défaut
+DEFAULT_CHUNK_SIZE = 5000  # Lignes lues et classifiées par chunk
+PREVIEW_ROWS = 1000  # Lignes gardées en mémoire pour l'affichage
+RESULTS_DIR = Path('.classification_results')  # Résultats et DataFrames de session sur disque
+CSV_ENCODINGS = ('utf-8-sig', 'utf-8', 'latin-1', 'iso-8859-1', 'cp1252')
+CONFIDENCE_BINS = 20  # Classes de l'histogramme de confiance
+
+# Valeurs considérées comme réclamation / sentiment négatif selon les classificateurs
+CLAIM_VALUES = (1, '1', 'oui', True)
+NEGATIVE_VALUES = ('neg', 'negatif', 'négatif', 'negative')
+
+
+# ═══════════════════════════════════════════════════════════
+# LECTURE PAR CHUNKS
+# ═══════════════════════════════════════════════════════════
+
+def detect_csv_encoding(source, encodings: Iterable[str] = CSV_ENCODINGS, probe_rows: int = 1000) -> str:
+    """
+    Détecte l'encodage d'un CSV en lisant seulement ses premières lignes
+
+    Args:
+        source: Chemin ou fichier binaire (UploadedFile Streamlit, BytesIO...)
+        encodings: Encodages essayés dans l'ordre
+        probe_rows: Lignes lues pour le test
+
+    Returns:
+        Premier encodage qui décode l'en-tête et les premières lignes
+    """
+    for encoding in encodings:
+        try:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            pd.read_csv(source, encoding=encoding, nrows=probe_rows, on_bad_lines='skip')
+            return encoding
+        except (UnicodeDecodeError, pd.errors.ParserError):
+            continue
+    raise ValueError("Impossible de décoder le CSV")
+
+
+def iter_file_chunks(source,
+                     file_name: Optional[str] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     encoding: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lit un fichier par chunks de chunk_size lignes
+
+    CSV et JSON lines sont lus en flux; Excel et JSON classique n'ont pas de
+    lecteur incrémental et sont lus en entier puis découpés.
+
+    Args:
+        source: Chemin ou fichier binaire
+        file_name: Nom du fichier (extension), déduit du chemin si absent
+        chunk_size: Lignes par chunk
+        encoding: Encodage CSV (détecté si absent)
+
+    Yields:
+        DataFrames de chunk_size lignes au plus (index global continu)
+    """
+    name = file_name or getattr(source, 'name', None) or str(source)
+    extension = name.rsplit('.', 1)[-1].lower()
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    if extension == 'csv':
+        encoding = encoding or detect_csv_encoding(source)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        reader = pd.read_csv(source, encoding=encoding, chunksize=chunk_size, on_bad_lines='skip')
+    elif extension in ('jsonl', 'ndjson'):
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size)
+    elif extension in ('xlsx', 'xls'):
+        reader = _split(pd.read_excel(source), chunk_size)
+    elif extension == 'json':
+        reader = _split(pd.read_json(source), chunk_size)
+    else:
+        raise ValueError(f"Format non supporté: {extension}")
+
+    try:
+        for chunk in reader:
+            yield chunk
+    finally:
+        close = getattr(reader, 'close', None)
+        if close:
+            close()
+
+
+def _split(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def read_progress(source) -> Optional[float]:
+    """Part du fichier déjà lue (position / taille), None si inconnue"""
+    try:
+        size = getattr(source, 'size', None)
+        if size is None and isinstance(source, io.BytesIO):
+            size = len(source.getbuffer())
+        if not size:
+            return None
+        return min(1.0, source.tell() / size)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+# ═══════════════════════════════════════════════════════════
+# KPIs CUMULÉS
+# ═══════════════════════════════════════════════════════════
+
+class RunningKPIs:
+    """
+    KPIs de classification mis à jour chunk par chunk (mémoire constante)
+
+    to_metrics() renvoie les mêmes clés que le calcul sur le DataFrame complet.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.claims = 0
+        self.negatives = 0
+        self.high_urgency = 0
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.confidence_hist = np.zeros(CONFIDENCE_BINS, dtype=int)
+        self.distributions: Dict[str, Counter] = {
+            'topics': Counter(), 'sentiment': Counter(), 'urgence': Counter(), 'incident': Counter()
+        }
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Ajoute les KPIs d'un chunk classifié"""
+        self.total += len(chunk)
+
+        if 'is_claim' in chunk.columns:
+            self.claims += int(chunk['is_claim'].isin(CLAIM_VALUES).sum())
+        if 'sentiment' in chunk.columns:
+            self.negatives += int(chunk['sentiment'].isin(NEGATIVE_VALUES).sum())
+        if 'urgence' in chunk.columns:
+            self.high_urgency += int((chunk['urgence'] == 'haute').sum())
+
+        if 'confidence' in chunk.columns:
+            confidence = pd.to_numeric(chunk['confidence'], errors='coerce').dropna().to_numpy()
+            self.confidence_sum += float(confidence.sum())
+            self.confidence_count += len(confidence)
+            self.confidence_hist += np.histogram(np.clip(confidence, 0.0, 1.0),
+                                                 bins=CONFIDENCE_BINS, range=(0.0, 1.0))[0]
+
+        for column, counter in self.distributions.items():
+            if column not in chunk.columns:
+                continue
+            values = chunk[column]
+            if column == 'topics':
+                # Topics multiples (listes) comptés individuellement
+                values = values.explode()
+            counter.update(values.dropna().astype(str).value_counts().to_dict())
+
+    def to_metrics(self) -> Dict:
+        """Métriques cumulées (distributions en pd.Series triées)"""
+        def distribution(counter: Counter) -> pd.Series:
+            return pd.Series(dict(counter.most_common()), dtype=int)
+
+        return {
+            'total_tweets': self.total,
+            'claims': self.claims,
+            'claims_percentage': self.claims / self.total * 100 if self.total else 0,
+            'negative_sentiments': self.negatives,
+            'high_urgency': self.high_urgency,
+            'avg_confidence': self.confidence_sum / self.confidence_count if self.confidence_count else 0.0,
+            'confidence_hist': self.confidence_hist.copy(),
+            'topic_dist': distribution(self.distributions['topics']),
+            'sentiment_dist': distribution(self.distributions['sentiment']),
+            'urgence_dist': distribution(self.distributions['urgence']),
+            'incident_dist': distribution(self.distributions['incident']),
+        }
+
+
+# ═══════════════════════════════════════════════════════════
+# CLASSIFICATION EN FLUX
+# ═══════════════════════════════════════════════════════════
+
+@dataclass
+class ChunkResult:
+    """Résultat partiel produit après chaque chunk"""
+    chunk_index: int
+    rows_done: int
+    chunk: pd.DataFrame
+    metrics: Dict
+    output_path: Path
+    elapsed: float
+    progress: Optional[float] = None
+
+    @property
+    def tweets_per_second(self) -> float:
+        return self.rows_done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class StreamingClassifier:
+    """
+    Classifie un flux de chunks et écrit les résultats sur disque
+
+    Usage:
+        streamer = StreamingClassifier(classify_chunk)
+        for partial in streamer.stream(iter_file_chunks(uploaded_file), 'text'):
+            progress_bar.progress(partial.progress or 0)
+        df_preview = streamer.preview
+    """
+    classify_chunk: Callable[[pd.DataFrame, str], pd.DataFrame]
+    output_dir: Path = RESULTS_DIR
+    preview_rows: int = PREVIEW_ROWS
+    preview: pd.DataFrame = field(default_factory=pd.DataFrame, init=False)
+    kpis: RunningKPIs = field(default_factory=RunningKPIs, init=False)
+
+    def stream(self,
+               chunks: Iterable[pd.DataFrame],
+               text_column: str,
+               output_path: Optional[Union[str, Path]] = None,
+               progress_source=None) -> Iterator[ChunkResult]:
+        """
+        Classifie les chunks un par un
+
+        Args:
+            chunks: Chunks du fichier (iter_file_chunks)
+            text_column: Colonne de texte
+            output_path: CSV de résultats (nouveau fichier dans output_dir si absent)
+            progress_source: Fichier source pour la progression en octets (optionnel)
+
+        Yields:
+            ChunkResult après chaque chunk (DataFrame partiel + KPIs cumulés)
+        """
+        output_path = Path(output_path) if output_path else new_results_path('classification', self.output_dir)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.unlink(missing_ok=True)
+
+        self.preview = pd.DataFrame()
+        self.kpis = RunningKPIs()
+        start = time.time()
+        rows_done = 0
+
+        for chunk_index, chunk in enumerate(chunks):
+            classified = self.classify_chunk(chunk, text_column)
+            rows_done += len(classified)
+
+            self.kpis.update(classified)
+            _append_csv(classified, output_path, header=chunk_index == 0)
+
+            if len(self.preview) < self.preview_rows:
+                missing = self.preview_rows - len(self.preview)
+                self.preview = pd.concat([self.preview, classified.head(missing)])
+
+            yield ChunkResult(
+                chunk_index=chunk_index,
+                rows_done=rows_done,
+                chunk=classified,
+                metrics=self.kpis.to_metrics(),
+                output_path=output_path,
+                elapsed=time.time() - start,
+                progress=read_progress(progress_source) if progress_source is not None else None
+            )
+
+        logger.info(f"Classification en flux: {rows_done} lignes en {time.time() - start:.1f}s -> {output_path}")
+
+
+def _append_csv(df: pd.DataFrame, path: Path, header: bool) -> None:
+    """Ajoute un chunk au CSV de résultats (listes aplaties en texte)"""
+    out = df.copy()
+    for column in out.columns[out.dtypes == object]:
+        if out[column].map(lambda value: isinstance(value, list)).any():
+            out[column] = out[column].map(lambda value: ', '.join(value) if isinstance(value, list) else value)
+    out.to_csv(path, mode='a', header=header, index=False)
+
+
+# ═══════════════════════════════════════════════════════════
+# DATAFRAMES DE SESSION SUR DISQUE
+# ═══════════════════════════════════════════════════════════
+
+def new_results_path(prefix: str, output_dir: Path = RESULTS_DIR, suffix: str = '.csv') -> Path:
+    """Chemin unique de résultats (un fichier par exécution)"""
+    return Path(output_dir) / f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{suffix}"
+
+
+def save_dataframe(df: pd.DataFrame, prefix: str, output_dir: Path = RESULTS_DIR) -> str:
+    """
+    Sauvegarde un DataFrame sur disque (pickle, sans perte de types)
+
+    Les pages gardent le chemin dans st.session_state au lieu du DataFrame.
+
+    Returns:
+        Chemin du fichier
+    """
+    path = new_results_path(prefix, output_dir, suffix='.pkl')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_pickle(path)
+    return str(path)
+
+
+def load_dataframe(path: Union[str, Path]) -> pd.DataFrame:
+    """Recharge un DataFrame sauvegardé par save_dataframe (pickle) ou stream (CSV)"""
+    path = Path(path)
+    if path.suffix == '.pkl':
+        return pd.read_pickle(path)
+    # Le CSV ne conserve pas les types: labels reconvertis en catégories
+    return apply_label_schema(pd.read_csv(path), inplace=True)
+
+
+def discard_dataframe(path: Optional[Union[str, Path]]) -> None:
+    """Supprime un fichier de résultats devenu inutile"""
+    if path:
+        Path(path).unlink(missing_ok=True)
@@ -6,17 +6,21 @@ Module avancé pour le prétraitement et la déduplication de tweets.
 Conforme aux spécifications techniques du projet académique.
 
 Fonctionnalités:
-- Suppression des doublons (hash MD5)
+- Suppression des doublons (hash vectorisé pandas)
 - Nettoyage du texte (URLs, mentions, hashtags, emojis)
 - Normalisation unicode
+- Nettoyage vectorisé (accesseurs .str) avec mode multiprocessus optionnel
 - Statistiques de nettoyage
 """
 
 # Imports pour la manipulation de types et de données
 from typing import Tuple, Dict, List  # Annotations de types pour la clarté du code
+from concurrent.futures import ProcessPoolExecutor  # Mode multiprocessus par chunks
+import numpy as np  # Réindexation des valeurs uniques transformées
 import pandas as pd  # Traitement de données tabulaires (DataFrames)
-import hashlib  # Génération de hash MD5 pour détection de doublons
 import re  # Expressions régulières pour le nettoyage de texte
+import sys  # Accès au moteur de normalisation partagé (racine du projet)
+from pathlib import Path  # Résolution de la racine du projet
 from unidecode import unidecode  # Normalisation des caractères unicode vers ASCII
 import emoji  # Conversion des emojis en représentation textuelle
 import logging  # Journalisation des opérations de nettoyage
@@ -24,12 +28,25 @@ import logging  # Journalisation des opérations de nettoyage
 # Configuration du logger pour le suivi des opérations
 logger = logging.getLogger(__name__)
 
-# Définition des patterns regex pour le nettoyage (conformes aux spécifications)
-URL_PATTERN = r'http\S+|www\S+|https\S+'  # Détection de toutes les URLs (http, https, www)
-MENTION_PATTERN = r'@\w+'  # Détection des mentions Twitter (@username)
-HASHTAG_PATTERN = r'#\w+'  # Détection des hashtags (#tag)
+# Moteur de normalisation partagé (shared/text_normalization.py, racine du projet)
+_project_root = str(Path(__file__).resolve().parents[2])
+if _project_root not in sys.path:
+    sys.path.append(_project_root)
+
+# Patterns regex pour le nettoyage (conformes aux spécifications), précompilés
+# une seule fois dans le moteur partagé
+from shared.text_normalization import (
+    URL_PATTERN, MENTION_PATTERN, HASHTAG_PATTERN, WHITESPACE_PATTERN,
+    URL_REGEX, MENTION_REGEX, HASHTAG_REGEX, collapse_whitespace
+)
 PUNCTUATION_PATTERN = r'[^\w\s,.\?!]'  # Suppression ponctuation exceptée (garde , . ? !)
-WHITESPACE_PATTERN = r'\s+'  # Normalisation des espaces multiples en espace unique
+
+# Tout emoji contient au moins un caractère hors ASCII/Latin étendu (sauf © et ®):
+# un texte sans ces caractères n'a pas besoin de passer par emoji.demojize
+EMOJI_CANDIDATE_REGEX = re.compile(r'[^\x00-\xa8\xaa-\xad\xaf-\u024f]')
+
+# Taille de chunk par défaut pour le mode multiprocessus
+DEFAULT_CHUNK_SIZE = 100_000
 
 
 class TweetCleaner:
@@ -63,15 +80,25 @@ class TweetCleaner:
         self.convert_emojis = convert_emojis
         self.normalize_unicode = normalize_unicode
         
+        # Regex de suppression actives, dans l'ordre des spécifications
+        self._removal_regexes = [
+            regex for enabled, regex in (
+                (remove_urls, URL_REGEX),
+                (remove_mentions, MENTION_REGEX),
+                (remove_hashtags, HASHTAG_REGEX),
+            ) if enabled
+        ]
+        
         logger.info(f"TweetCleaner initialisé avec options: URLs={remove_urls}, Mentions={remove_mentions}, Hashtags={remove_hashtags}")
     
     @staticmethod
     def remove_duplicates(df: pd.DataFrame, text_column: str = 'text') -> pd.DataFrame:
         """
-        Suppression des doublons par hash MD5
+        Suppression des doublons par hash vectorisé
         
-        Utilise un hash MD5 du texte pour identifier les tweets identiques,
-        même avec des variations mineures.
+        Utilise pd.util.hash_pandas_object (hash 64 bits calculé en C) pour
+        identifier les tweets identiques sans boucle Python par ligne.
+        Le DataFrame d'entrée n'est pas modifié.
         
         Args:
             df: DataFrame avec tweets
@@ -84,19 +111,14 @@ class TweetCleaner:
             logger.warning(f"Colonne '{text_column}' non trouvée, pas de déduplication")
             return df
         
-        # Création des hash MD5
-        df['_hash'] = df[text_column].apply(
-            lambda x: hashlib.md5(str(x).encode()).hexdigest() if pd.notna(x) else None
-        )
-        
         # Comptage avant
         count_before = len(df)
         
-        # Suppression des doublons basée sur le hash
-        df_dedup = df.drop_duplicates(subset=['_hash'], keep='first')
+        # Hash vectorisé de la colonne texte (l'index est ignoré)
+        hashes = pd.util.hash_pandas_object(df[text_column], index=False)
         
-        # Suppression de la colonne temporaire
-        df_dedup = df_dedup.drop(columns=['_hash'])
+        # Suppression des doublons basée sur le hash
+        df_dedup = df[~hashes.duplicated(keep='first').to_numpy()]
         
         # Comptage après
         count_after = len(df_dedup)
@@ -130,42 +152,120 @@ class TweetCleaner:
         
         cleaned = text
         
-        # 1. Suppression des URLs
-        if self.remove_urls:
-            cleaned = re.sub(URL_PATTERN, '', cleaned)
+        # 1-3. Suppression des URLs, mentions et hashtags
+        for regex in self._removal_regexes:
+            cleaned = regex.sub('', cleaned)
         
-        # 2. Suppression des mentions
-        if self.remove_mentions:
-            cleaned = re.sub(MENTION_PATTERN, '', cleaned)
+        # 4-5. Conversion des emojis et normalisation unicode
+        # (inutile pour un texte déjà ASCII)
+        if not cleaned.isascii():
+            cleaned = self._transliterate(cleaned)
+        
+        # 6. Suppression ponctuation excessive (garder , . ? !)
+        # cleaned = re.sub(PUNCTUATION_PATTERN, '', cleaned)
         
-        # 3. Suppression des hashtags
-        if self.remove_hashtags:
-            cleaned = re.sub(HASHTAG_PATTERN, '', cleaned)
+        # 7. Normalisation des espaces
+        # (split/join équivaut à re.sub(WHITESPACE_PATTERN, ' ', ...).strip())
+        return collapse_whitespace(cleaned)
+    
+    def _transliterate(self, text: str) -> str:
+        """
+        Conversion des emojis en texte puis normalisation unicode
         
+        Args:
+            text: Texte contenant des caractères non-ASCII
+            
+        Returns:
+            Texte converti
+        """
         # 4. Conversion des emojis en texte
-        if self.convert_emojis:
+        if self.convert_emojis and EMOJI_CANDIDATE_REGEX.search(text):
             try:
-                cleaned = emoji.demojize(cleaned, delimiters=(" ", " "))
-            except:
+                text = emoji.demojize(text, delimiters=(" ", " "))
+            except Exception:
                 pass  # Si emoji pose problème, continuer
         
         # 5. Normalisation unicode
         if self.normalize_unicode:
             try:
-                cleaned = unidecode(cleaned)
-            except:
+                text = unidecode(text)
+            except Exception:
                 pass  # Si unidecode pose problème, continuer
         
-        # 6. Suppression ponctuation excessive (garder , . ? !)
-        # cleaned = re.sub(PUNCTUATION_PATTERN, '', cleaned)
+        return text
+    
+    def clean_series(self, texts: pd.Series) -> pd.Series:
+        """
+        Nettoyage vectorisé d'une série de tweets
+        
+        Produit exactement le même résultat que clean_text appliqué ligne
+        par ligne, mais:
+        - les regex précompilées passent par les accesseurs Series.str
+        - demojize/unidecode ne sont calculés qu'une fois par texte unique,
+          et uniquement pour les textes contenant des caractères non-ASCII
+        
+        Args:
+            texts: Série de tweets bruts
+            
+        Returns:
+            Série de tweets nettoyés (même index)
+        """
+        if len(texts) == 0:
+            return pd.Series([], index=texts.index, dtype=object)
+        
+        # Les valeurs non textuelles (NaN, nombres...) deviennent ""
+        cleaned = texts.astype(object)
+        if pd.api.types.infer_dtype(cleaned, skipna=False) != 'string':
+            is_text = cleaned.map(lambda x: isinstance(x, str)).astype(bool)
+            cleaned = cleaned.where(is_text, '')
+        
+        # 1-3. Suppression des URLs, mentions et hashtags
+        for regex in self._removal_regexes:
+            cleaned = cleaned.str.replace(regex, '', regex=True)
+        
+        # 4-5. Emojis + unicode, mémoïsés sur les textes uniques non-ASCII
+        if self.convert_emojis or self.normalize_unicode:
+            non_ascii = ~cleaned.map(str.isascii).astype(bool)
+            if non_ascii.any():
+                codes, uniques = pd.factorize(cleaned[non_ascii])
+                converted = np.array([self._transliterate(u) for u in uniques], dtype=object)
+                cleaned = cleaned.copy()
+                cleaned[non_ascii] = converted[codes]
         
         # 7. Normalisation des espaces
-        cleaned = re.sub(WHITESPACE_PATTERN, ' ', cleaned)
-        cleaned = cleaned.strip()
+        return cleaned.map(collapse_whitespace)
+    
+    def clean_series_parallel(self,
+                              texts: pd.Series,
+                              n_jobs: int = 1,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.Series:
+        """
+        Nettoyage vectorisé en mode multiprocessus par chunks
         
-        return cleaned
+        Args:
+            texts: Série de tweets bruts
+            n_jobs: Nombre de processus (1 = pas de multiprocessus)
+            chunk_size: Nombre de tweets par chunk
+            
+        Returns:
+            Série de tweets nettoyés (même index)
+        """
+        if n_jobs <= 1 or len(texts) <= chunk_size:
+            return self.clean_series(texts)
+        
+        chunks = [texts.iloc[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        logger.info(f"Nettoyage multiprocessus: {len(chunks)} chunks sur {n_jobs} processus")
+        
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_clean_chunk, [self] * len(chunks), chunks))
+        
+        return pd.concat(results)
     
-    def process_dataframe(self, df: pd.DataFrame, text_column: str = 'text') -> Tuple[pd.DataFrame, Dict]:
+    def process_dataframe(self,
+                          df: pd.DataFrame,
+                          text_column: str = 'text',
+                          n_jobs: int = 1,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[pd.DataFrame, Dict]:
         """
         Pipeline complet de nettoyage
         
@@ -175,6 +275,8 @@ class TweetCleaner:
         Args:
             df: DataFrame brut
             text_column: Colonne à nettoyer
+            n_jobs: Nombre de processus pour le nettoyage (1 = vectorisé mono-processus)
+            chunk_size: Nombre de tweets par chunk en mode multiprocessus
             
         Returns:
             (df_cleaned, stats_dict) - DataFrame nettoyé et statistiques
@@ -220,7 +322,9 @@ class TweetCleaner:
             stats['avg_length_before'] = 0.0
         
         # 4. Nettoyage du texte
-        df_clean[f'{text_column}_cleaned'] = df_clean[text_column].apply(self.clean_text)
+        df_clean[f'{text_column}_cleaned'] = self.clean_series_parallel(
+            df_clean[text_column], n_jobs=n_jobs, chunk_size=chunk_size
+        )
         
         # 5. Calcul de la longueur moyenne après nettoyage
         if len(df_clean) > 0:
@@ -230,7 +334,7 @@ class TweetCleaner:
         
         # 6. Suppression des tweets vides après nettoyage
         if len(df_clean) > 0:
-            df_clean = df_clean[df_clean[f'{text_column}_cleaned'].str.len() > 0]
+            df_clean = df_clean[df_clean[f'{text_column}_cleaned'].str.len().to_numpy() > 0]
         
         # Statistiques finales
         stats['total_cleaned'] = len(df_clean)
@@ -272,6 +376,11 @@ class TweetCleaner:
 
 
 # Fonctions utilitaires
+def _clean_chunk(cleaner: TweetCleaner, texts: pd.Series) -> pd.Series:
+    """Nettoie un chunk dans un processus worker (doit être picklable)"""
+    return cleaner.clean_series(texts)
+
+
 def clean_tweet_text(text: str, 
                      remove_urls: bool = True,
                      remove_mentions: bool = True,
@@ -308,5 +417,5 @@ def batch_clean_tweets(tweets: List[str], **kwargs) -> List[str]:
         Liste de tweets nettoyés
     """
     cleaner = TweetCleaner(**kwargs)
-    return [cleaner.clean_text(tweet) for tweet in tweets]
+    return cleaner.clean_series(pd.Series(tweets, dtype=object)).tolist()
 
@@ -18,7 +18,7 @@ Architecture:
 │ └─ Disk Cache (persistant entre sessions)     │
 ├─────────────────────────────────────────────────┤
 │ Parallélisation Intelligente                    │
-│ ├─ ThreadPoolExecutor pour I/O (Mistral)      │
+│ ├─ Pipeline CPU (BERT) -> I/O (Mistral)       │
 │ └─ Batch vectorisé pour CPU (BERT)            │
 ├─────────────────────────────────────────────────┤
 │ Monitoring Temps Réel                          │
@@ -54,6 +54,10 @@ from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, asdict
 import warnings
+
+from services.pipelined_scheduler import PipelinedScheduler
+from services.uncertainty_router import UncertaintyRouter, RoutingReport, ChunkedBudgetRouter
+from services.label_schema import apply_label_schema
 warnings.filterwarnings('ignore')
 
 # Setup logging
@@ -63,6 +67,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Batches per pipeline chunk (CPU phase granularity)
+PIPELINE_CHUNK_BATCHES = 10
+
 
 # ═══════════════════════════════════════════════════════════
 # DATA CLASSES
@@ -178,6 +185,10 @@ class UltraOptimizedClassifier:
         self.phase_times = {}
         self.batches_processed = 0
         
+        # Uncertainty routing to Mistral (balanced mode)
+        self.router = UncertaintyRouter()
+        self.last_routing_report: Optional[RoutingReport] = None
+        
         # Models (lazy loading)
         self._bert = None
         self._rules = None
@@ -435,7 +446,9 @@ class UltraOptimizedClassifier:
                              df: pd.DataFrame,
                              text_column: str = 'text_cleaned',
                              mode: str = 'balanced',
-                             progress_callback: Optional[Callable[[str, float], None]] = None) -> Tuple[pd.DataFrame, BenchmarkMetrics]:
+                             progress_callback: Optional[Callable[[str, float], None]] = None,
+                             llm_budget_tweets: Optional[int] = None,
+                             llm_budget_eur: Optional[float] = None) -> Tuple[pd.DataFrame, BenchmarkMetrics]:
         """
          FONCTION PRINCIPALE 
         
@@ -447,6 +460,8 @@ class UltraOptimizedClassifier:
             mode: 'fast', 'balanced', ou 'precise'
             progress_callback: Fonction callback(message: str, progress: float)
                              progress in [0.0, 1.0]
+            llm_budget_tweets: Mistral budget in tweets (balanced mode, optional)
+            llm_budget_eur: Mistral budget in euros (balanced mode, optional)
         
         Returns:
             (results_df, benchmark_metrics)
@@ -467,133 +482,68 @@ class UltraOptimizedClassifier:
         logger.info(f"   └─ Cache: {'Enabled' if self.use_cache else 'Disabled'}")
         logger.info("="*80)
         
-        # Initialize result dataframe
-        results = df.copy()
-        
-        # Create batches
         if progress_callback:
             progress_callback(" Préparation des batches...", 0.0)
         
-        batches = self._create_batches(df)
-        num_batches = len(batches)
-        
-        # ═══════════════════════════════════════════════════════════
-        # PHASE 1: BERT Sentiment (ALL TWEETS)
-        # Target: 13s pour 2634 tweets @ 200 tweets/s
-        # ═══════════════════════════════════════════════════════════
-        phase1_start = time.time()
-        logger.info(f"\n PHASE 1/4: BERT Sentiment")
-        logger.info(f"   Processing {num_batches} batches...")
-        
-        bert_results = []
-        for batch_idx, batch in enumerate(batches):
-            if progress_callback:
-                pct = (batch_idx / num_batches) * 0.30  # 0-30%
-                progress_callback(f"Phase 1/4: BERT batch {batch_idx+1}/{num_batches}", pct)
-            
-            batch_result = self._process_batch_bert(batch, text_column)
-            bert_results.append(batch_result)
-            self.batches_processed += 1
-        
-        # Merge
-        bert_combined = pd.concat(bert_results, ignore_index=False)
-        results['sentiment'] = bert_combined['sentiment']
-        results['bert_confidence'] = bert_combined['bert_confidence']
-        
-        phase1_time = time.time() - phase1_start
-        self.phase_times['phase1_bert'] = phase1_time
-        logger.info(f" Phase 1 completed: {total_tweets} tweets in {phase1_time:.1f}s ({total_tweets/phase1_time:.1f} tweets/s)")
-        
         # ═══════════════════════════════════════════════════════════
-        # PHASE 2: Rules (is_claim, urgence, topics, incident)
-        # Target: 1s pour 2634 tweets @ 2000+ tweets/s
+        # PHASES 1-3 PIPELINED: BERT + Rules (CPU) -> Mistral (I/O)
+        # Each enriched chunk is sampled and queued for Mistral right away
+        # (bounded queue): wall time tends to max(phases), not their sum
         # ═══════════════════════════════════════════════════════════
-        phase2_start = time.time()
-        logger.info(f"\n️ PHASE 2/4: Rules Classification")
-        
-        if progress_callback:
-            progress_callback("Phase 2/4: Rules (is_claim, urgence, topics)", 0.35)
-        
-        rules_results = []
-        for batch in batches:
-            batch_result = self._process_batch_rules(batch, text_column)
-            rules_results.append(batch_result)
+        use_mistral = mode in ('balanced', 'precise')
         
-        # Merge
-        rules_combined = pd.concat(rules_results, ignore_index=False)
-        results['is_claim'] = rules_combined['is_claim']
-        results['urgence'] = rules_combined['urgence']
-        results['topics'] = rules_combined['topics']
-        results['incident'] = rules_combined['incident']
+        # Balanced: uncertain tweets only, within the LLM budget (20% by default);
+        # budget left unspent by a chunk carries over to the next ones
+        llm_budget = self.router.budget_for(total_tweets, llm_budget_tweets, llm_budget_eur)
+        budget = ChunkedBudgetRouter(self.router, total_tweets, llm_budget)
         
-        phase2_time = time.time() - phase2_start
-        self.phase_times['phase2_rules'] = phase2_time
-        logger.info(f" Phase 2 completed: {total_tweets} tweets in {phase2_time:.1f}s ({total_tweets/phase2_time:.1f} tweets/s)")
+        self.phase_times['phase1_bert'] = 0.0
+        self.phase_times['phase2_rules'] = 0.0
         
-        # ═══════════════════════════════════════════════════════════
-        # PHASE 3: Mistral (Strategic Sampling)
-        # Target: 50s pour 527 tweets échantillon @ 10 tweets/s
-        # ═══════════════════════════════════════════════════════════
-        phase3_start = time.time()
-        
-        if mode == 'balanced':
-            # Sample 20% strategic
-            sample_size = max(100, int(total_tweets * 0.20))
-            sample_indices = self._select_strategic_sample(results, sample_size)
-            sample_df = results.loc[sample_indices].copy()
-            
-            logger.info(f"\n PHASE 3/4: Mistral Sampling")
-            logger.info(f"   Sample: {len(sample_df)} tweets ({len(sample_df)/total_tweets*100:.1f}%)")
-            
-            if progress_callback:
-                progress_callback(f"Phase 3/4: Mistral échantillon ({len(sample_df)} tweets)", 0.50)
-            
-            # Process sample
-            sample_batches = self._create_batches(sample_df)
-            mistral_results = []
-            
-            for batch_idx, batch in enumerate(sample_batches):
-                if progress_callback:
-                    pct = 0.50 + (batch_idx / len(sample_batches)) * 0.35  # 50-85%
-                    progress_callback(f"Phase 3/4: Mistral batch {batch_idx+1}/{len(sample_batches)}", pct)
-                
-                batch_result = self._process_batch_mistral(batch, text_column)
-                mistral_results.append(batch_result)
-            
-            # Merge Mistral results
-            mistral_combined = pd.concat(mistral_results, ignore_index=False)
-            
-            # Update main results for sampled tweets
-            for idx in mistral_combined.index:
-                if idx in results.index:
-                    results.loc[idx, 'confidence'] = mistral_combined.loc[idx, 'mistral_confidence']
-            
-            # Fill non-sampled with BERT confidence
-            results['confidence'] = results.get('confidence', results['bert_confidence']).fillna(results['bert_confidence'])
-            
-        elif mode == 'precise':
-            # ALL tweets through Mistral (slow!)
-            logger.info(f"\n PHASE 3/4: Mistral (ALL TWEETS - Precise Mode)")
-            
-            mistral_results = []
-            for batch_idx, batch in enumerate(batches):
-                if progress_callback:
-                    pct = 0.50 + (batch_idx / num_batches) * 0.35
-                    progress_callback(f"Phase 3/4: Mistral batch {batch_idx+1}/{num_batches}", pct)
-                
-                batch_result = self._process_batch_mistral(batch, text_column)
-                mistral_results.append(batch_result)
-            
-            mistral_combined = pd.concat(mistral_results, ignore_index=False)
-            results['confidence'] = mistral_combined['mistral_confidence']
+        def cpu_stage(chunk: pd.DataFrame) -> pd.DataFrame:
+            phase_start = time.time()
+            enriched = self._process_batch_bert(chunk, text_column)
+            self.phase_times['phase1_bert'] += time.time() - phase_start
+            self.batches_processed += 1
             
-        else:  # fast mode
+            phase_start = time.time()
+            enriched = self._process_batch_rules(enriched, text_column)
+            self.phase_times['phase2_rules'] += time.time() - phase_start
+            return enriched
+        
+        def select_stage(chunk: pd.DataFrame) -> pd.DataFrame:
+            return self._select_strategic_sample(chunk, budget)
+        
+        logger.info(f"\n PHASES 1-3: BERT + Rules -> Mistral (pipelined)")
+        
+        scheduler = PipelinedScheduler(chunk_size=self.batch_size * PIPELINE_CHUNK_BATCHES)
+        results, mistral_combined, pipeline_stats = scheduler.run(
+            df,
+            cpu_stage=cpu_stage,
+            select_stage=select_stage if mode == 'balanced' else None,
+            remote_stage=(lambda sample: self._process_batch_mistral(sample, text_column)) if use_mistral else None,
+            progress_callback=progress_callback,
+            final_stage=budget.flush if mode == 'balanced' else None
+        )
+        
+        if use_mistral and mistral_combined is not None:
+            # Sampled tweets get Mistral confidence (index-aligned), others BERT
+            results['confidence'] = mistral_combined['mistral_confidence'].reindex(results.index)
+            results['confidence'] = results['confidence'].fillna(results['bert_confidence'])
+        else:  # fast mode (or Mistral unavailable)
             # Use BERT confidence
             results['confidence'] = results['bert_confidence']
         
-        phase3_time = time.time() - phase3_start
+        if mode == 'balanced':
+            self.last_routing_report = budget.report
+            UncertaintyRouter.log_report(self.last_routing_report)
+        
+        phase3_time = pipeline_stats.remote_seconds
         self.phase_times['phase3_mistral'] = phase3_time
-        logger.info(f" Phase 3 completed in {phase3_time:.1f}s")
+        self.phase_times['pipeline_wall'] = pipeline_stats.wall_seconds
+        logger.info(f" Phases 1-3 completed in {pipeline_stats.wall_seconds:.1f}s "
+                    f"(CPU {pipeline_stats.cpu_seconds:.1f}s, Mistral {phase3_time:.1f}s, "
+                    f"overlap x{pipeline_stats.overlap_ratio:.2f})")
         
         # ═══════════════════════════════════════════════════════════
         # PHASE 4: Finalization & Cleanup
@@ -622,6 +572,9 @@ class UltraOptimizedClassifier:
         temp_cols = [c for c in results.columns if 'preliminary' in c or 'mistral_' in c or 'bert_confidence' in c]
         results = results.drop(columns=temp_cols, errors='ignore')
         
+        # Colonnes de labels en catégories fixes (mémoire, value_counts/groupby sur codes)
+        apply_label_schema(results, inplace=True)
+        
         phase4_time = time.time() - phase4_start
         self.phase_times['phase4_finalization'] = phase4_time
         
@@ -671,46 +624,20 @@ class UltraOptimizedClassifier:
         
         return results, metrics
     
-    def _select_strategic_sample(self, df: pd.DataFrame, sample_size: int) -> List[int]:
+    def _select_strategic_sample(self, df: pd.DataFrame, budget: ChunkedBudgetRouter) -> pd.DataFrame:
         """
-        Select strategic sample for Mistral classification
+        Select the tweets worth a Mistral call (uncertainty sampling)
         
         Strategy:
-        1. ALL claims (is_claim = 'oui')
-        2. Diverse sentiments (balanced distribution)
-        3. Random remainder
+        1. Candidates: low BERT confidence, or BERT/rules disagreement
+        2. Ranked by expected accuracy gain (LLM accuracy - P(BERT correct))
+        3. At most the chunk's share of the remaining global budget; unselected
+           candidates stay in reserve for later chunks (confident tweets are never sent)
         """
-        indices = []
-        
-        # Priority 1: All claims
-        if 'is_claim' in df.columns:
-            claims = df[df['is_claim'] == 'oui'].index.tolist()
-            indices.extend(claims)
-            logger.info(f"   ├─ Claims selected: {len(claims)}")
-        
-        # Priority 2: Diverse sentiments
-        if 'sentiment' in df.columns and len(indices) < sample_size:
-            remaining = sample_size - len(indices)
-            sentiments = df['sentiment'].unique()
-            per_sentiment = remaining // len(sentiments)
-            
-            for sentiment in sentiments:
-                sent_df = df[(df['sentiment'] == sentiment) & (~df.index.isin(indices))]
-                n = min(len(sent_df), per_sentiment)
-                if n > 0:
-                    sample = sent_df.sample(n=n, random_state=42).index.tolist()
-                    indices.extend(sample)
-        
-        # Fill remaining randomly
-        if len(indices) < sample_size:
-            available = list(set(df.index) - set(indices))
-            remaining = sample_size - len(indices)
-            if available and remaining > 0:
-                random_sample = np.random.choice(available, size=min(remaining, len(available)), replace=False)
-                indices.extend(random_sample.tolist())
-        
-        logger.info(f"   └─ Total sample: {len(indices)} tweets")
-        return list(set(indices))[:sample_size]
+        sample = budget.route(df)
+        
+        logger.info(f"   └─ Routed: {len(sample)} tweets after {len(df)} (budget left: {budget.remaining_budget})")
+        return sample
     
     def clear_cache(self):
         """Clear all disk cache"""
@@ -0,0 +1,320 @@
+"""
+Routeur par incertitude (active learning) - FreeMobilaChat
+==========================================================
+
+Décide quels tweets envoyer au LLM (Mistral) après BERT et les règles.
+
+Un tweet n'est routé vers le LLM que si la réponse BERT est incertaine:
+- confiance BERT sous le seuil, ou
+- désaccord entre BERT et les règles (réclamation / urgence haute
+  classées "positif" par BERT)
+
+Les candidats sont classés par gain de précision attendu
+(précision LLM - probabilité que BERT ait raison) et retenus dans la
+limite du budget LLM, exprimé en tweets et/ou en euros.
+
+Sur un flux de chunks (pipeline), ChunkedBudgetRouter reporte le budget
+non consommé d'un chunk à l'autre et garde en réserve les meilleurs
+candidats non encore envoyés: le total routé atteint le budget global.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Paramètres par défaut
+CONFIDENCE_THRESHOLD = 0.75  # Confiance BERT en dessous de laquelle un tweet est incertain
+LLM_ACCURACY = 0.90  # Précision attendue du LLM sur les tweets routés
+DISAGREEMENT_PENALTY = 0.30  # Baisse relative de la probabilité BERT correcte en cas de désaccord
+COST_PER_TWEET_EUR = 0.0002  # Coût estimé d'un tweet classifié par le LLM
+MAX_FRACTION = 0.20  # Budget par défaut: au plus 20% des tweets (ancien échantillon fixe)
+
+# Valeurs "réclamation" des différents classificateurs par règles
+CLAIM_VALUES = (1, '1', 'oui', True)
+
+
+@dataclass
+class RoutingReport:
+    """Bilan d'un routage: budget consommé et gain attendu"""
+    total_tweets: int = 0
+    candidates: int = 0
+    selected: int = 0
+    budget_tweets: int = 0
+    cost_eur: float = 0.0
+    expected_gain: float = 0.0
+    expected_accuracy_before: float = 0.0
+    expected_accuracy_after: float = 0.0
+
+    @property
+    def sampled_fraction(self) -> float:
+        """Part des tweets envoyés au LLM"""
+        return self.selected / self.total_tweets if self.total_tweets else 0.0
+
+    @property
+    def expected_gain_per_call(self) -> float:
+        """Gain de précision attendu (en tweets corrigés) par appel LLM"""
+        return self.expected_gain / self.selected if self.selected else 0.0
+
+    def merge(self, other: 'RoutingReport') -> 'RoutingReport':
+        """Combine deux bilans (routage par chunks)"""
+        total = self.total_tweets + other.total_tweets
+
+        def weighted(a: float, b: float) -> float:
+            if not total:
+                return 0.0
+            return (a * self.total_tweets + b * other.total_tweets) / total
+
+        return RoutingReport(
+            total_tweets=total,
+            candidates=self.candidates + other.candidates,
+            selected=self.selected + other.selected,
+            budget_tweets=self.budget_tweets + other.budget_tweets,
+            cost_eur=self.cost_eur + other.cost_eur,
+            expected_gain=self.expected_gain + other.expected_gain,
+            expected_accuracy_before=weighted(self.expected_accuracy_before, other.expected_accuracy_before),
+            expected_accuracy_after=weighted(self.expected_accuracy_after, other.expected_accuracy_after),
+        )
+
+    def to_dict(self) -> Dict:
+        report = asdict(self)
+        report['sampled_fraction'] = round(self.sampled_fraction, 4)
+        report['expected_gain_per_call'] = round(self.expected_gain_per_call, 4)
+        return report
+
+
+class UncertaintyRouter:
+    """
+    Routeur BERT/règles -> LLM guidé par l'incertitude
+
+    La confiance BERT (probabilité softmax de la classe prédite) est utilisée
+    comme estimation de la probabilité que BERT ait raison; elle est réduite
+    en cas de désaccord avec les règles.
+    """
+
+    def __init__(self,
+                 confidence_threshold: float = CONFIDENCE_THRESHOLD,
+                 llm_accuracy: float = LLM_ACCURACY,
+                 disagreement_penalty: float = DISAGREEMENT_PENALTY,
+                 cost_per_tweet_eur: float = COST_PER_TWEET_EUR,
+                 max_fraction: float = MAX_FRACTION,
+                 confidence_column: str = 'bert_confidence'):
+        """
+        Initialise le routeur
+
+        Args:
+            confidence_threshold: Seuil de confiance BERT
+            llm_accuracy: Précision attendue du LLM
+            disagreement_penalty: Baisse relative de la probabilité BERT correcte en cas de désaccord
+            cost_per_tweet_eur: Coût d'un tweet classifié par le LLM (euros)
+            max_fraction: Budget par défaut en fraction des tweets
+            confidence_column: Colonne de confiance BERT
+        """
+        self.confidence_threshold = confidence_threshold
+        self.llm_accuracy = llm_accuracy
+        self.disagreement_penalty = disagreement_penalty
+        self.cost_per_tweet_eur = cost_per_tweet_eur
+        self.max_fraction = max_fraction
+        self.confidence_column = confidence_column
+
+    def budget_for(self,
+                   n_tweets: int,
+                   budget_tweets: Optional[int] = None,
+                   budget_eur: Optional[float] = None) -> int:
+        """
+        Nombre maximal de tweets envoyables au LLM
+
+        Args:
+            n_tweets: Nombre de tweets à router
+            budget_tweets: Budget en tweets (optionnel)
+            budget_eur: Budget en euros (optionnel)
+
+        Returns:
+            Budget effectif en tweets (le plus contraignant des budgets fournis,
+            max_fraction des tweets si aucun)
+        """
+        limits = []
+        if budget_tweets is not None:
+            limits.append(int(budget_tweets))
+        if budget_eur is not None and self.cost_per_tweet_eur > 0:
+            limits.append(int(budget_eur / self.cost_per_tweet_eur))
+        if not limits:
+            limits.append(int(round(n_tweets * self.max_fraction)))
+        return max(0, min(min(limits), n_tweets))
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcule l'incertitude et le gain attendu de chaque tweet (vectorisé)
+
+        Args:
+            df: DataFrame avec confiance BERT, sentiment et signaux des règles
+
+        Returns:
+            DataFrame (même index) avec p_bert_correct, disagreement, candidate, expected_gain
+        """
+        n_rows = len(df)
+        if self.confidence_column in df.columns:
+            confidence = pd.to_numeric(df[self.confidence_column], errors='coerce').fillna(0.5).to_numpy(dtype=float)
+        else:
+            confidence = np.full(n_rows, 0.5)
+
+        disagreement = np.zeros(n_rows, dtype=bool)
+        if 'sentiment' in df.columns:
+            positive = df['sentiment'].astype(str).str.startswith('positif').to_numpy()
+            if 'is_claim' in df.columns:
+                disagreement |= positive & df['is_claim'].isin(CLAIM_VALUES).to_numpy()
+            if 'urgence' in df.columns:
+                disagreement |= positive & (df['urgence'] == 'haute').to_numpy()
+
+        p_correct = np.where(disagreement, confidence * (1 - self.disagreement_penalty), confidence)
+        candidate = (confidence < self.confidence_threshold) | disagreement
+        expected_gain = np.where(candidate, np.clip(self.llm_accuracy - p_correct, 0.0, None), 0.0)
+
+        return pd.DataFrame({
+            'p_bert_correct': p_correct,
+            'disagreement': disagreement,
+            'candidate': candidate,
+            'expected_gain': expected_gain,
+        }, index=df.index)
+
+    def route(self,
+              df: pd.DataFrame,
+              budget_tweets: Optional[int] = None,
+              budget_eur: Optional[float] = None) -> Tuple[pd.Index, RoutingReport]:
+        """
+        Sélectionne les tweets à envoyer au LLM
+
+        Args:
+            df: DataFrame enrichi par BERT et les règles
+            budget_tweets: Budget en tweets (optionnel)
+            budget_eur: Budget en euros (optionnel)
+
+        Returns:
+            (index des tweets routés par gain décroissant, bilan du routage)
+        """
+        scores = self.score(df)
+        budget = self.budget_for(len(df), budget_tweets, budget_eur)
+
+        useful = scores[scores['expected_gain'] > 0]
+        selected = useful['expected_gain'].nlargest(budget).index if budget else useful.index[:0]
+
+        gain = float(scores.loc[selected, 'expected_gain'].sum()) if len(selected) else 0.0
+        accuracy_before = float(scores['p_bert_correct'].mean()) if len(scores) else 0.0
+
+        report = RoutingReport(
+            total_tweets=len(df),
+            candidates=int(scores['candidate'].sum()),
+            selected=len(selected),
+            budget_tweets=budget,
+            cost_eur=len(selected) * self.cost_per_tweet_eur,
+            expected_gain=gain,
+            expected_accuracy_before=accuracy_before,
+            expected_accuracy_after=accuracy_before + (gain / len(df) if len(df) else 0.0),
+        )
+        return selected, report
+
+    @staticmethod
+    def log_report(report: RoutingReport) -> None:
+        """Journalise un bilan de routage"""
+        logger.info(f"   Routage LLM: {report.selected}/{report.total_tweets} tweets "
+                    f"({report.sampled_fraction*100:.1f}%, {report.candidates} incertains, "
+                    f"budget {report.budget_tweets}, {report.cost_eur:.4f} €)")
+        logger.info(f"   Gain attendu: {report.expected_gain_per_call:.3f} tweet corrigé par appel LLM, "
+                    f"précision {report.expected_accuracy_before*100:.1f}% -> {report.expected_accuracy_after*100:.1f}%")
+
+
+class ChunkedBudgetRouter:
+    """
+    Répartition d'un budget LLM global sur des chunks traités au fil de l'eau
+
+    Chaque chunk reçoit sa part du budget RESTANT au prorata des tweets
+    restants (arrondie au supérieur): le budget non consommé par un chunk
+    est reporté sur les suivants. Les candidats utiles non retenus sont
+    gardés en réserve (au plus le budget restant, par gain décroissant) et
+    concourent avec les candidats des chunks suivants; flush() envoie les
+    meilleurs restants en fin de flux. Le total routé atteint donc le budget
+    dès qu'il y a assez de tweets incertains, même concentrés dans un chunk.
+    """
+
+    def __init__(self, router: UncertaintyRouter, total_tweets: int, budget_tweets: int):
+        """
+        Initialise la répartition
+
+        Args:
+            router: Routeur (score d'incertitude et coût par tweet)
+            total_tweets: Nombre total de tweets du flux
+            budget_tweets: Budget global en tweets
+        """
+        self.router = router
+        self.budget_tweets = max(0, int(budget_tweets))
+        self.remaining_budget = self.budget_tweets
+        self.remaining_tweets = total_tweets
+        self._reserve: Optional[pd.DataFrame] = None
+
+        self._seen = 0
+        self._candidates = 0
+        self._selected = 0
+        self._gain = 0.0
+        self._p_correct_sum = 0.0
+
+    def route(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Échantillon à envoyer au LLM après un chunk
+
+        Args:
+            chunk: Chunk enrichi par BERT et les règles
+
+        Returns:
+            Tweets routés (du chunk ou de la réserve des chunks précédents)
+        """
+        scores = self.router.score(chunk)
+        self._seen += len(chunk)
+        self._candidates += int(scores['candidate'].sum())
+        self._p_correct_sum += float(scores['p_bert_correct'].sum())
+
+        if self.remaining_tweets > len(chunk):
+            allowance = math.ceil(self.remaining_budget * len(chunk) / self.remaining_tweets)
+        else:
+            allowance = self.remaining_budget
+        self.remaining_tweets = max(0, self.remaining_tweets - len(chunk))
+
+        useful = scores['expected_gain'] > 0
+        pool = chunk.loc[useful.to_numpy()].assign(_routing_gain=scores.loc[useful, 'expected_gain'].to_numpy())
+        if self._reserve is not None and len(self._reserve):
+            pool = pd.concat([self._reserve, pool])
+        pool = pool.nlargest(self.remaining_budget, '_routing_gain') if self.remaining_budget else pool.iloc[:0]
+
+        sample, self._reserve = pool.iloc[:allowance], pool.iloc[allowance:]
+        return self._take(sample)
+
+    def flush(self) -> pd.DataFrame:
+        """Meilleurs candidats restants en fin de flux (dans le budget restant)"""
+        reserve = self._reserve if self._reserve is not None else pd.DataFrame({'_routing_gain': []})
+        self._reserve = None
+        return self._take(reserve.iloc[:self.remaining_budget])
+
+    def _take(self, sample: pd.DataFrame) -> pd.DataFrame:
+        self.remaining_budget -= len(sample)
+        self._selected += len(sample)
+        self._gain += float(sample['_routing_gain'].sum())
+        return sample.drop(columns='_routing_gain')
+
+    @property
+    def report(self) -> RoutingReport:
+        """Bilan global du routage"""
+        accuracy_before = self._p_correct_sum / self._seen if self._seen else 0.0
+        return RoutingReport(
+            total_tweets=self._seen,
+            candidates=self._candidates,
+            selected=self._selected,
+            budget_tweets=self.budget_tweets,
+            cost_eur=self._selected * self.router.cost_per_tweet_eur,
+            expected_gain=self._gain,
+            expected_accuracy_before=accuracy_before,
+            expected_accuracy_after=accuracy_before + (self._gain / self._seen if self._seen else 0.0),
+        )
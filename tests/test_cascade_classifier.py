@@ -0,0 +1,123 @@
+"""
+Tests Unitaires - Classification en cascade
+===========================================
+
+Validation de la sortie anticipée par étage, du bilan trafic/latence et de
+la calibration des seuils sur des tweets annotés.
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+from services.cascade_classifier import CascadeClassifier, calibrate_threshold, NO_EXIT
+
+
+def make_bert(confident_prefix='avis'):
+    """BERT factice: confiant sur les tweets commençant par le préfixe"""
+    bert = MagicMock()
+    bert.predict_with_confidence.side_effect = lambda texts, show_progress=False: pd.DataFrame({
+        'sentiment': ['neutre'] * len(texts),
+        'sentiment_confidence': [0.95 if t.startswith(confident_prefix) else 0.40 for t in texts]
+    })
+    return bert
+
+
+def make_mistral():
+    """Mistral factice: négatif avec confiance 0.9"""
+    mistral = MagicMock()
+    mistral.classify_dataframe.side_effect = lambda df, col, show_progress=False: df.assign(
+        sentiment='negatif', score_confiance=0.9
+    )
+    return mistral
+
+
+class TestCascadeClassifier(unittest.TestCase):
+    """Tests unitaires pour CascadeClassifier"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.df = pd.DataFrame({'text_cleaned': [
+            "Merci, super service, bravo !",
+            "Panne totale, plus de connexion depuis 3 jours",
+            "avis sur la nouvelle box",
+            "je ne sais pas quoi penser",
+        ]}, index=[10, 11, 12, 13])
+        self.bert = make_bert()
+        self.mistral = make_mistral()
+        self.cascade = CascadeClassifier(bert=self.bert, mistral=self.mistral,
+                                         thresholds={'rules': 0.85, 'bert': 0.80})
+
+    def test_early_exit_per_stage(self):
+        """Test: Chaque tweet sort au premier étage suffisamment confiant"""
+        results, report = self.cascade.classify(self.df)
+
+        self.assertEqual(results['cascade_stage'].tolist(), ['rules', 'rules', 'bert', 'mistral'])
+        self.assertEqual(results['sentiment'].tolist(), ['positif', 'negatif', 'neutre', 'negatif'])
+        self.assertEqual(results.index.tolist(), [10, 11, 12, 13])
+        self.assertEqual(results.loc[11, 'is_claim'], 'oui')
+        self.assertEqual(results.loc[11, 'urgence'], 'haute')
+
+        # Les étages suivants ne reçoivent que les tweets non tranchés
+        bert_texts = self.bert.predict_with_confidence.call_args[0][0]
+        self.assertEqual(bert_texts, ["avis sur la nouvelle box", "je ne sais pas quoi penser"])
+        mistral_df = self.mistral.classify_dataframe.call_args[0][0]
+        self.assertEqual(mistral_df['text'].tolist(), ["je ne sais pas quoi penser"])
+
+    def test_stage_report(self):
+        """Test: Bilan de trafic et latence par étage"""
+        _, report = self.cascade.classify(self.df)
+        table = report.to_dataframe()
+
+        self.assertEqual(table['name'].tolist(), ['rules', 'bert', 'mistral'])
+        self.assertEqual(table['received'].tolist(), [4, 2, 1])
+        self.assertEqual(table['exited'].tolist(), [2, 1, 1])
+        self.assertEqual(table['traffic_share'].tolist(), [0.5, 0.25, 0.25])
+        self.assertEqual(report.stages[-1].threshold, 0.0)
+        self.assertTrue((table['ms_per_tweet'] >= 0).all())
+
+    def test_last_available_stage_accepts_all(self):
+        """Test: Sans Mistral, BERT tranche tous les tweets restants"""
+        cascade = CascadeClassifier(bert=self.bert, thresholds={'rules': 0.85, 'bert': 0.80})
+
+        results, report = cascade.classify(self.df)
+
+        self.assertEqual(results['cascade_stage'].tolist(), ['rules', 'rules', 'bert', 'bert'])
+        self.assertEqual([stage.name for stage in report.stages], ['rules', 'bert'])
+
+    def test_calibrate_threshold(self):
+        """Test: Plus petit seuil atteignant la précision cible"""
+        confidence = np.array([0.9, 0.9, 0.8, 0.8, 0.7, 0.6])
+        correct = np.array([True, True, True, False, False, False])
+
+        self.assertEqual(calibrate_threshold(confidence, correct, target_precision=0.75, min_support=1), 0.8)
+        self.assertEqual(calibrate_threshold(confidence, correct, target_precision=1.0, min_support=1), 0.9)
+        self.assertEqual(calibrate_threshold(confidence, correct, target_precision=1.0, min_support=3), NO_EXIT)
+
+    def test_calibrate_on_labeled_data(self):
+        """Test: Calibration étage par étage sur des tweets annotés"""
+        labeled = pd.DataFrame({
+            'text_cleaned': ["merci bravo"] * 10 + ["avis produit"] * 10 + ["bof"] * 10,
+            'sentiment': ['positif'] * 10 + ['neutre'] * 10 + ['negatif'] * 10,
+        })
+
+        thresholds = self.cascade.calibrate(labeled, target_precision=0.9, min_support=5)
+
+        self.assertEqual(set(thresholds), {'rules', 'bert'})
+        self.assertAlmostEqual(thresholds['rules'], 0.85)
+        self.assertAlmostEqual(thresholds['bert'], 0.95)
+        self.assertEqual(self.cascade.calibration['rules']['exited'], 10)
+        self.assertEqual(self.cascade.calibration['bert']['received'], 20)
+
+        results, _ = self.cascade.classify(labeled)
+        self.assertEqual((results['sentiment'] == labeled['sentiment']).mean(), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Tests Unitaires - Couche de données des graphiques
+==================================================
+
+Validation de LTTB, des histogrammes pré-calculés, de la taille bornée des
+figures quel que soit le nombre de lignes et du cache des figures.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+# Les modules de visualisation importent streamlit
+if 'streamlit' not in sys.modules:
+    sys.modules['streamlit'] = MagicMock()
+
+from services import stage_cache
+from services.chart_data import (
+    MAX_POINTS, cached_figure, daily_counts, downsample, histogram, lttb_indices, payload_size,
+    weekday_hour_counts
+)
+from services.kpi_engine import get_kpi_engine
+
+
+def make_tweets(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Tweets classifiés synthétiques sur 90 jours"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 90 * 86400, rows), unit='s'),
+        'sentiment': rng.choice(['positive', 'negative', 'neutral'], rows),
+        'confidence': rng.random(rows),
+        'retweet_count': rng.integers(0, 50, rows),
+    })
+
+
+class TestChartData(unittest.TestCase):
+    """Tests unitaires pour services.chart_data"""
+
+    def setUp(self):
+        """Cache de figures isolé dans un dossier temporaire"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self._previous = stage_cache._stage_cache
+        stage_cache._stage_cache = stage_cache.StageCache(cache_dir=self.tmp.name)
+        get_kpi_engine().clear()
+
+    def tearDown(self):
+        stage_cache._stage_cache = self._previous
+        self.tmp.cleanup()
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        """Test: LTTB garde max_points points dont extrémités et pics"""
+        x = np.arange(10_000)
+        y = np.sin(x / 500.0)
+        y[4321] = 25.0
+
+        indices = lttb_indices(x, y, 200)
+
+        self.assertEqual(len(indices), 200)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 9_999)
+        self.assertIn(4321, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        np.testing.assert_array_equal(lttb_indices(x[:50], y[:50], 200), np.arange(50))
+
+    def test_downsample_groups_and_fallback(self):
+        """Test: Réduction par couleur et échantillon régulier hors axes numériques"""
+        df = make_tweets(20_000)
+
+        scatter = downsample(df, 'confidence', 'retweet_count', max_points=500, group='sentiment')
+        self.assertLessEqual(len(scatter), 500)
+        self.assertEqual(set(scatter['sentiment']), {'positive', 'negative', 'neutral'})
+
+        categorical = downsample(df, 'sentiment', 'retweet_count', max_points=500)
+        self.assertLessEqual(len(categorical), 500)
+
+    def test_histogram_counts(self):
+        """Test: Classes pré-calculées couvrant toutes les valeurs non manquantes"""
+        values = pd.Series([0.1, 0.5, 0.9, np.nan, 0.95])
+        bins = histogram(values, bins=10, value_range=(0, 1))
+
+        self.assertEqual(len(bins), 10)
+        self.assertEqual(int(bins['count'].sum()), 4)
+        self.assertEqual(int(bins['count'].iloc[-1]), 2)
+        self.assertTrue(histogram(pd.Series([], dtype=float)).empty)
+
+    def test_time_aggregations(self):
+        """Test: Volumes par jour et matrice jour x heure cohérents avec les lignes"""
+        df = make_tweets(5_000)
+
+        total, by_sentiment = daily_counts(df, 'date', by='sentiment')
+        self.assertEqual(int(total.sum()), 5_000)
+        self.assertEqual(int(by_sentiment.values.sum()), 5_000)
+        self.assertLessEqual(len(total), 90)
+
+        weekly, _ = daily_counts(df, 'date', max_points=20)
+        self.assertLessEqual(len(weekly), 20)
+        self.assertEqual(int(weekly.sum()), 5_000)
+
+        matrix = weekday_hour_counts(df, 'date')
+        self.assertEqual(matrix.shape, (7, 24))
+        self.assertEqual(int(matrix.values.sum()), 5_000)
+        self.assertEqual(weekday_hour_counts(df.rename(columns={'date': 'created'}), 'created').values.tolist(),
+                         matrix.values.tolist())
+
+    def test_payload_bounded(self):
+        """Test: Taille des figures indépendante du nombre de lignes"""
+        from services.classic_analysis_kpis import create_confidence_histogram
+        from services.enhanced_kpis_vizualizations import create_time_series_chart, create_activity_heatmap
+        from services.advanced_visualizations import AdvancedVisualizations
+        from services.smart_visualization_engine import SmartVisualizationEngine
+
+        engine = SmartVisualizationEngine()
+        small, large = make_tweets(2_000), make_tweets(200_000, seed=1)
+
+        builders = [
+            create_confidence_histogram,
+            create_time_series_chart,
+            create_activity_heatmap,
+            lambda df: AdvancedVisualizations().create_temporal_evolution_chart({}, df),
+            lambda df: engine._create_scatter_plot(df, ['confidence', 'retweet_count', 'sentiment'], 'S')['figure'],
+            lambda df: engine._create_line_chart(df, ['date', 'confidence'], 'L')['figure'],
+            lambda df: engine._create_histogram(df, ['retweet_count'], 'H')['figure'],
+        ]
+        for build in builders:
+            small_size = payload_size(build(small))
+            large_size = payload_size(build(large))
+            self.assertLess(large_size, max(3 * small_size, 250_000))
+
+        # Les données sources ne sont pas modifiées
+        self.assertEqual(list(large.columns), ['date', 'sentiment', 'confidence', 'retweet_count'])
+
+    def test_cached_figure(self):
+        """Test: Figure construite une fois par contenu des colonnes utilisées"""
+        df = make_tweets(1_000)
+        build = MagicMock(return_value='figure')
+
+        cached_figure('chart', df, build, columns=['confidence'])
+        cached_figure('chart', df.copy(), build, columns=['confidence'])
+        self.assertEqual(build.call_count, 1)
+
+        cached_figure('chart', df.assign(retweet_count=0), build, columns=['confidence'])
+        self.assertEqual(build.call_count, 1)
+
+        cached_figure('chart', df.assign(confidence=0.5), build, columns=['confidence'])
+        cached_figure('chart', df, build, columns=['confidence'], bins=30)
+        self.assertEqual(build.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Tests Unitaires - Réponses en flux du chatbot SAV (backend)
+===========================================================
+
+Validation de ChatbotService.stream_message avec un LLM local simulé:
+fragments transmis dès leur arrivée, temps jusqu'au premier fragment,
+stockage des messages après la fin du flux, réponses en cache et de secours.
+"""
+
+import unittest
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Le service importe app.*: backend/ en tête du chemin
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.models import KnowledgeDocument
+from app.services.chatbot_service import ChatbotService, LLM_ERROR_RESPONSE, format_sse
+
+TOKENS = ['Pour ', 'résilier, ', 'envoyez ', 'un courrier.']
+TOKEN_DELAY = 0.05
+
+
+class StubAgent:
+    """LLM local: événements de flux façon Agno, un fragment toutes les 50 ms"""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = []
+
+    def run(self, message, stream=False):
+        self.calls.append((message, stream))
+        return self._events()
+
+    def _events(self):
+        for i, token in enumerate(TOKENS):
+            if i == self.fail_after:
+                raise RuntimeError('connexion perdue')
+            time.sleep(TOKEN_DELAY)
+            yield SimpleNamespace(event='RunContent', content=token)
+        # Événement de fin: porte la réponse complète, ne doit pas être retransmis
+        yield SimpleNamespace(event='RunCompleted', content=''.join(TOKENS))
+
+
+class RecordingDB:
+    """Gestionnaire de base simulé: horodate le stockage des messages"""
+
+    database_type = 'postgresql'
+
+    def __init__(self):
+        self.messages = []
+
+    def get_vector_index(self):
+        return SimpleNamespace(revision=1)
+
+    async def store_chat_batch(self, conversations, messages):
+        await asyncio.sleep(0.05)
+        self.messages.extend((time.perf_counter(), message) for message in messages)
+        return len(messages)
+
+
+class TestChatbotStreaming(unittest.TestCase):
+    """Tests unitaires pour ChatbotService.stream_message"""
+
+    def setUp(self):
+        self.db = RecordingDB()
+        self.service = ChatbotService(db_manager=self.db)
+        self.service.graphrag_enabled = False
+        self.service.fast_graphrag = SimpleNamespace(revision=1, embedding_model=None)
+        self.agent = StubAgent()
+
+        async def search(query, max_results=5):
+            doc = KnowledgeDocument(
+                title='Résiliation', content='Pour résilier votre ligne Free Mobile...',
+                source_url='https://assistance.free.fr/resiliation', source_domain='assistance.free.fr',
+                content_hash='a' * 64
+            )
+            return [(doc, 0.9)]
+
+        self.service.doc_scraper.embedding_model = object()
+        self.service.doc_scraper._generate_embeddings = lambda text: [1.0, 0.0, 0.0]
+        self.service._search_with_vector_db = search
+        self.service._get_or_create_agno_agent = lambda: self.agent
+
+    def stream(self, message='Comment résilier ?'):
+        """Consommer le flux; renvoie les événements horodatés et attend les stockages"""
+        async def run():
+            events = []
+            async for event in self.service.stream_message(message, 'conv_test_1_20250101_000000'):
+                events.append((time.perf_counter(), event))
+            end = time.perf_counter()
+            await self.service.write_buffer.flush()
+            return events, end
+        return asyncio.run(run())
+
+    def test_tokens_streamed_as_they_arrive(self):
+        """Teste la transmission incrémentale et le temps jusqu'au premier fragment"""
+        events, _ = self.stream()
+        types = [event['type'] for _, event in events]
+
+        self.assertEqual(types, ['metadata'] + ['token'] * len(TOKENS) + ['done'])
+        self.assertEqual([event['content'] for _, event in events if event['type'] == 'token'], TOKENS)
+        self.assertEqual(events[0][1]['sources'], ['https://assistance.free.fr/resiliation'])
+        self.assertEqual(self.agent.calls[0][1], True)
+
+        token_times = [t for t, event in events if event['type'] == 'token']
+        self.assertGreater(token_times[-1] - token_times[0], (len(TOKENS) - 2) * TOKEN_DELAY)
+
+        done = events[-1][1]
+        self.assertLess(done['time_to_first_token'], done['processing_time'] - 2 * TOKEN_DELAY)
+
+    def test_messages_stored_after_stream(self):
+        """Teste le stockage des deux messages après la fin du flux, avec l'ID annoncé"""
+        events, end = self.stream()
+        done = events[-1][1]
+
+        self.assertEqual(len(self.db.messages), 2)
+        self.assertTrue(all(stored_at > end for stored_at, _ in self.db.messages))
+        user, assistant = (message for _, message in self.db.messages)
+        self.assertEqual((user['role'], assistant['role']), ('user', 'assistant'))
+        self.assertEqual(assistant['content'], ''.join(TOKENS))
+        self.assertEqual(assistant['id'], done['message_id'])
+
+    def test_repeated_question_served_from_cache(self):
+        """Teste la réponse en cache transmise sans appel au LLM"""
+        self.stream()
+        events, _ = self.stream()
+
+        self.assertTrue(events[0][1]['answer_cached'])
+        self.assertEqual([event['content'] for _, event in events if event['type'] == 'token'],
+                         [''.join(TOKENS)])
+        self.assertEqual(len(self.agent.calls), 1)
+
+    def test_fallback_and_failure(self):
+        """Teste la réponse de secours sans agent et l'échec avant le premier fragment"""
+        self.service._get_or_create_agno_agent = lambda: None
+        events, _ = self.stream()
+        tokens = [event['content'] for _, event in events if event['type'] == 'token']
+        self.assertEqual(len(tokens), 1)
+        self.assertIn('Comment résilier ?', tokens[0])
+
+        self.agent = StubAgent(fail_after=0)
+        self.service._get_or_create_agno_agent = lambda: self.agent
+        events, _ = self.stream()
+        self.assertEqual([event['content'] for _, event in events if event['type'] == 'token'],
+                         [LLM_ERROR_RESPONSE])
+        self.assertEqual(events[-1][1]['type'], 'done')
+        self.assertEqual(len(self.service.query_cache.answers), 0)  # Rien de mis en cache
+
+    def test_format_sse(self):
+        """Teste la sérialisation Server-Sent Events"""
+        frame = format_sse({'type': 'token', 'content': 'Bonjour\nà vous'})
+
+        self.assertTrue(frame.startswith('event: token\ndata: '))
+        self.assertTrue(frame.endswith('\n\n'))
+        self.assertEqual(json.loads(frame.split('data: ', 1)[1]), {'content': 'Bonjour\nà vous'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Tests Unitaires - Stockage de la base de connaissances SAV (backend)
+====================================================================
+
+Validation de DocumentationScraper.store_documents: une page dont le contenu
+change entre deux passages met à jour le document de son URL (pas de doublon),
+ses chunks sont ré-encodés (les anciens quittent l'index vectoriel) et ses
+validateurs HTTP sont conservés.
+"""
+
+import unittest
+import asyncio
+import hashlib
+import os
+import sys
+import zlib
+import numpy as np
+
+# Le service importe app.*: backend/ en tête du chemin
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.models import KnowledgeDocument
+from app.services.documentation_scraper import DocumentationScraper
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.polite_crawler import FetchResult
+from app.utils.vector_index import VectorIndex
+
+URL = 'https://assistance.free.fr/articles/forfait'
+
+
+class BagOfWordsModel:
+    """Modèle de test: un mot = une dimension (embedding déterministe)"""
+
+    def get_sentence_embedding_dimension(self):
+        return 64
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                vectors[row, zlib.crc32(word.encode('utf-8')) % 64] += 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class FakeKnowledgeDB:
+    """Base de connaissances en mémoire (mêmes méthodes que DatabaseManager)"""
+
+    def __init__(self):
+        self.documents = {}
+        self.chunks = {}
+        self.index = VectorIndex()
+
+    async def find_knowledge_document(self, content_hash):
+        for document_id, document in self.documents.items():
+            if document['content_hash'] == content_hash:
+                chunk_count = sum(chunk['document_id'] == document_id for chunk in self.chunks.values())
+                return {'id': document_id, 'chunk_count': chunk_count}
+        return None
+
+    async def find_knowledge_document_by_url(self, source_url):
+        for document_id, document in self.documents.items():
+            if document['source_url'] == source_url:
+                return {'id': document_id, 'content_hash': document['content_hash']}
+        return None
+
+    async def store_knowledge_document(self, document):
+        document_id = f'doc{len(self.documents) + 1}'
+        self.documents[document_id] = dict(document)
+        return document_id
+
+    async def replace_knowledge_document(self, document_id, document):
+        self.documents[document_id].update(document, source_url=self.documents[document_id]['source_url'])
+        chunk_ids = [chunk_id for chunk_id, chunk in self.chunks.items() if chunk['document_id'] == document_id]
+        for chunk_id in chunk_ids:
+            del self.chunks[chunk_id]
+        return chunk_ids
+
+    async def ensure_vector_index(self):
+        return self.index
+
+    async def get_existing_chunk_ids(self, content_hashes):
+        hashes = set(content_hashes)
+        return {chunk['content_hash']: chunk_id for chunk_id, chunk in self.chunks.items()
+                if chunk['content_hash'] in hashes}
+
+    async def store_knowledge_chunks(self, chunks):
+        for chunk in chunks:
+            self.chunks[chunk['id']] = chunk
+        return len(chunks)
+
+
+def make_document(content):
+    return KnowledgeDocument(
+        title='Changer de forfait',
+        content=content,
+        source_url=URL,
+        source_domain='assistance.free.fr',
+        content_hash=hashlib.sha256(content.encode('utf-8')).hexdigest()
+    )
+
+
+class TestStoreDocuments(unittest.TestCase):
+    """Tests unitaires pour DocumentationScraper.store_documents"""
+
+    def setUp(self):
+        self.db = FakeKnowledgeDB()
+        self.scraper = DocumentationScraper(db_manager=self.db)
+        self.scraper.crawler.cache_path = None  # Validateurs en mémoire seule
+        self.model = BagOfWordsModel()
+        self.scraper.embedding_model = self.model
+        self.scraper.embedding_pipeline = EmbeddingPipeline(self.model, max_tokens=6, overlap_tokens=0)
+
+    def tearDown(self):
+        self.scraper.close()
+
+    def crawl(self, content, etag):
+        """Un passage du crawler: page téléchargée (200) puis stockée"""
+        self.scraper._pending_validators[URL] = FetchResult(url=URL, status=200, text=content, etag=etag)
+        return asyncio.run(self.scraper.store_documents([make_document(content)]))
+
+    def test_changed_page_updates_document_in_place(self):
+        """Teste qu'une page modifiée met à jour le document de son URL"""
+        self.assertEqual(self.crawl('pour changer de forfait ouvrez votre espace abonné', '"v1"'), 1)
+        (document_id,) = self.db.documents
+
+        new_content = 'le changement de forfait se fait depuis l application'
+        self.assertEqual(self.crawl(new_content, '"v2"'), 1)
+
+        self.assertEqual(list(self.db.documents), [document_id])
+        self.assertEqual(self.db.documents[document_id]['content'], new_content)
+        self.assertEqual(
+            ' '.join(chunk['content'] for chunk in sorted(self.db.chunks.values(), key=lambda c: c['chunk_index'])),
+            new_content
+        )
+        self.assertTrue(all(chunk['document_id'] == document_id for chunk in self.db.chunks.values()))
+        # La page reste en GET conditionnel avec ses nouveaux validateurs
+        self.assertEqual(self.scraper.crawler.validators[URL], {'etag': '"v2"'})
+
+    def test_replaced_chunks_leave_vector_index(self):
+        """Teste qu'un passage remplacé ne ressort plus de la recherche vectorielle"""
+        old_content = 'pour changer de forfait ouvrez votre espace abonné puis choisissez la rubrique offres'
+        old_passages = self.scraper.embedding_pipeline.chunk_text(old_content)
+        self.crawl(old_content, '"v1"')
+        self.assertEqual(len(self.db.index), len(old_passages))
+
+        self.crawl('le changement de forfait se fait depuis l application', '"v2"')
+
+        self.assertEqual(len(self.db.index), len(self.db.chunks))
+        results = self.db.index.search(self.model.encode([old_passages[-1]])[0], k=10)
+        self.assertTrue(results)
+        self.assertTrue(all(chunk_id in self.db.chunks for chunk_id, _ in results))
+
+    def test_unchanged_page_is_not_stored_again(self):
+        """Teste qu'une page inchangée n'est ni dupliquée ni ré-encodée"""
+        content = 'pour changer de forfait ouvrez votre espace abonné'
+        self.assertEqual(self.crawl(content, '"v1"'), 1)
+        chunks = dict(self.db.chunks)
+
+        self.assertEqual(self.crawl(content, '"v1"'), 0)
+        self.assertEqual(len(self.db.documents), 1)
+        self.assertEqual(self.db.chunks, chunks)
+
+
+if __name__ == '__main__':
+    unittest.main()
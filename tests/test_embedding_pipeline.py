@@ -0,0 +1,121 @@
+"""
+Tests Unitaires - Pipeline d'embeddings de la base de connaissances (backend)
+=============================================================================
+
+Validation du découpage en chunks bornés en tokens (avec chevauchement), de
+l'encodage par lots, de la déduplication par hash et des blobs float32.
+"""
+
+import unittest
+import importlib.util
+import os
+import numpy as np
+
+# Chargement direct du module: le nom 'app' est aussi celui de streamlit_app/app.py
+_spec = importlib.util.spec_from_file_location(
+    'backend_embedding_pipeline',
+    os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'services', 'embedding_pipeline.py')
+)
+embedding_pipeline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(embedding_pipeline)
+
+EmbeddingPipeline = embedding_pipeline.EmbeddingPipeline
+
+
+class CharTokenizer:
+    """Tokenizer de test: un token par tranche de 4 caractères"""
+
+    def __call__(self, words, add_special_tokens=False):
+        return {'input_ids': [list(range((len(word) + 3) // 4)) for word in words]}
+
+
+class RecordingModel:
+    """Modèle de test: embedding déterministe, enregistre les appels"""
+
+    max_seq_length = 12
+
+    def __init__(self):
+        self.tokenizer = CharTokenizer()
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 8
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls.append((len(texts), batch_size, kwargs))
+        rng = np.random.default_rng(len(texts))
+        return rng.normal(size=(len(texts), 8))
+
+
+def make_text(n_words: int) -> str:
+    return ' '.join(f'mot{i}' for i in range(n_words))
+
+
+class TestEmbeddingPipeline(unittest.TestCase):
+    """Tests unitaires pour EmbeddingPipeline"""
+
+    def test_chunks_cover_whole_document(self):
+        """Teste que tout le texte est couvert, au-delà des 512 premiers caractères"""
+        pipeline = EmbeddingPipeline(max_tokens=50, overlap_tokens=10)
+        text = make_text(400)
+
+        chunks = pipeline.chunk_text(text)
+
+        self.assertGreater(len(text), 512)
+        self.assertGreater(len(chunks), 1)
+        covered = {word for chunk in chunks for word in chunk.split()}
+        self.assertEqual(covered, set(text.split()))
+        self.assertTrue(all(len(chunk.split()) <= 50 for chunk in chunks))
+
+    def test_consecutive_chunks_overlap(self):
+        """Teste le chevauchement entre chunks consécutifs"""
+        pipeline = EmbeddingPipeline(max_tokens=20, overlap_tokens=5)
+        chunks = [chunk.split() for chunk in pipeline.chunk_text(make_text(100))]
+
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertEqual(previous[-5:], current[:5])
+
+        self.assertEqual(pipeline.chunk_text('   '), [])
+        self.assertEqual(pipeline.chunk_text('un deux'), ['un deux'])
+
+    def test_token_budget_uses_model_tokenizer(self):
+        """Teste la borne en tokens du modèle (longueur de séquence - tokens spéciaux)"""
+        model = RecordingModel()
+        pipeline = EmbeddingPipeline(model, overlap_tokens=2)
+        self.assertEqual(pipeline.max_tokens, 10)
+
+        text = 'court ' + 'motassezlong ' * 6 + 'anticonstitutionnellement'
+        for chunk in pipeline.chunk_text(text):
+            words = chunk.split()
+            self.assertTrue(len(words) == 1 or sum(pipeline.count_tokens(words)) <= 10)
+
+    def test_batched_encoding_skips_known_hashes(self):
+        """Teste l'encodage en un seul appel par lot et la déduplication par hash"""
+        model = RecordingModel()
+        pipeline = EmbeddingPipeline(model, max_tokens=5, overlap_tokens=0, batch_size=16)
+        words = [f'w{i}' for i in range(20)]  # un token par mot
+        chunks = pipeline.chunk_document('doc-1', ' '.join(words)) + pipeline.chunk_document('doc-2', ' '.join(words[:10]))
+        self.assertEqual([chunk.chunk_id for chunk in chunks[:2]], ['doc-1#0', 'doc-1#1'])
+
+        # doc-2 répète les deux premiers chunks de doc-1; le troisième est déjà stocké
+        encoded, vectors = pipeline.encode_chunks(chunks, known_hashes={chunks[2].content_hash})
+
+        self.assertEqual([chunk.chunk_id for chunk in encoded], ['doc-1#0', 'doc-1#1', 'doc-1#3'])
+        self.assertEqual(vectors.shape, (3, 8))
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(model.calls[0][:2], (3, 16))
+        self.assertTrue(model.calls[0][2]['normalize_embeddings'])
+
+    def test_float32_blob_roundtrip(self):
+        """Teste la sérialisation des embeddings en blobs float32"""
+        vector = np.random.default_rng(0).normal(size=384)
+
+        blob = embedding_pipeline.embedding_to_blob(vector)
+
+        self.assertEqual(len(blob), 384 * 4)
+        np.testing.assert_array_equal(embedding_pipeline.blob_to_embedding(blob), vector.astype(np.float32))
+
+
+if __name__ == '__main__':
+    unittest.main()
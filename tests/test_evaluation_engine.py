@@ -0,0 +1,214 @@
+"""
+Tests Unitaires - Moteur d'évaluation des classifieurs (backend)
+================================================================
+
+Validation des métriques vectorisées (identiques à scikit-learn), du cache
+de prédictions (seuls les éléments modifiés sont recalculés), de
+l'exécution concurrente des stratégies synchrones, asynchrones et par lots,
+et des statistiques de débit et de coût.
+"""
+
+import unittest
+import asyncio
+import importlib.util
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import classification_report, confusion_matrix, precision_recall_fscore_support
+
+# Chargement direct du module: le nom 'app' est aussi celui de streamlit_app/app.py
+_spec = importlib.util.spec_from_file_location(
+    'backend_evaluation_engine',
+    os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'services', 'evaluation_engine.py')
+)
+evaluation_engine = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(evaluation_engine)
+
+EvaluationEngine = evaluation_engine.EvaluationEngine
+EvaluationStrategy = evaluation_engine.EvaluationStrategy
+PredictionCache = evaluation_engine.PredictionCache
+classification_metrics = evaluation_engine.classification_metrics
+from_classifier_taxonomy = evaluation_engine.from_classifier_taxonomy
+parse_llm_classification = evaluation_engine.parse_llm_classification
+
+SPLIT = pd.DataFrame({
+    'text': ['box en panne', 'merci pour tout', 'facture trop élevée', 'box en panne', 'question forfait'],
+    'sentiment': ['negative', 'positive', 'negative', 'negative', 'neutral'],
+    'category': ['technique', 'compliment', 'facturation', 'technique', 'question'],
+    'priority': ['haute', 'basse', 'moyenne', 'haute', None],
+})
+
+
+def keyword_rules(text):
+    """Classifieur de test par mots-clés"""
+    return {
+        'sentiment': 'positive' if 'merci' in text else 'negative',
+        'category': 'facturation' if 'facture' in text else 'technique',
+        'priority': 'haute' if 'panne' in text else 'basse',
+    }
+
+
+class TestClassificationMetrics(unittest.TestCase):
+    """Tests unitaires pour classification_metrics"""
+
+    def test_matches_scikit_learn(self):
+        """Teste l'égalité avec scikit-learn sur des étiquettes aléatoires"""
+        rng = np.random.default_rng(0)
+        labels = ['autre', 'question', 'technique', 'réseau', 'facturation']
+        y_true = rng.choice(labels, size=2000).tolist()
+        y_pred = rng.choice(labels[:4] + ['compliment'], size=2000).tolist()
+
+        metrics = classification_metrics(y_true, y_pred)
+        precision, recall, f1, _ = precision_recall_fscore_support(y_true, y_pred, average='weighted', zero_division=0)
+        report = classification_report(y_true, y_pred, output_dict=True, zero_division=0)
+
+        self.assertAlmostEqual(metrics['precision'], precision)
+        self.assertAlmostEqual(metrics['recall'], recall)
+        self.assertAlmostEqual(metrics['f1_score'], f1)
+        self.assertEqual(metrics['confusion_matrix'], confusion_matrix(y_true, y_pred).tolist())
+        self.assertEqual(metrics['labels'], sorted(set(y_true + y_pred)))
+        for label in metrics['labels'] + ['macro avg', 'weighted avg']:
+            for key in ('precision', 'recall', 'f1-score', 'support'):
+                self.assertAlmostEqual(metrics['classification_report'][label][key], report[label][key])
+        self.assertAlmostEqual(metrics['classification_report']['accuracy'], report['accuracy'])
+
+    def test_empty_input(self):
+        """Teste un split vide"""
+        metrics = classification_metrics([], [])
+        self.assertEqual(metrics['accuracy'], 0.0)
+        self.assertEqual(metrics['confusion_matrix'], [])
+
+
+class TestTaxonomy(unittest.TestCase):
+    """Tests unitaires pour l'analyse des réponses LLM"""
+
+    def test_parse_and_map(self):
+        """Teste la lecture JSON ou clé: valeur et la conversion vers les étiquettes du dataset"""
+        answer = 'Voici: {"theme": "FACTURE", "sentiment": "NEGATIF", "urgence": "ELEVEE", "confidence": 0.9}'
+        self.assertEqual(from_classifier_taxonomy(parse_llm_classification(answer)),
+                         {'sentiment': 'negative', 'category': 'facturation', 'priority': 'haute', 'confidence': 0.9})
+
+        answer = 'Sentiment: NEUTRE\nCategory: question\nPriority: basse'
+        self.assertEqual(from_classifier_taxonomy(parse_llm_classification(answer)),
+                         {'sentiment': 'neutral', 'category': 'question', 'priority': 'basse'})
+
+
+class TestEvaluationEngine(unittest.TestCase):
+    """Tests unitaires pour EvaluationEngine"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, 'predictions.sqlite')
+        self.engine = EvaluationEngine(PredictionCache(self.cache_path))
+
+    def tearDown(self):
+        self.engine.cache.close()
+        self.tmp.cleanup()
+
+    def test_cache_only_pays_for_changed_items(self):
+        """Teste qu'un second run ne rappelle le modèle que pour les textes modifiés"""
+        calls = []
+
+        def predict(text):
+            calls.append(text)
+            return keyword_rules(text)
+
+        strategy = EvaluationStrategy(name='rules', predict=predict, version='v1', cost_per_item=0.01)
+
+        first = asyncio.run(self.engine.evaluate(strategy, {'test': SPLIT}))
+        self.assertEqual(len(calls), 4)  # Texte en double calculé une seule fois
+        run = first['splits']['test']['run']
+        self.assertEqual((run['cache_hits'], run['computed']), (0, 4))
+        self.assertAlmostEqual(run['cost'], 0.04)
+
+        changed = SPLIT.copy()
+        changed.loc[4, 'text'] = 'merci, forfait réglé'
+        engine = EvaluationEngine(PredictionCache(self.cache_path))  # Nouveau run, même fichier
+        second = asyncio.run(engine.evaluate(strategy, {'test': changed}))
+        engine.cache.close()
+
+        self.assertEqual(calls[4:], ['merci, forfait réglé'])
+        run = second['splits']['test']['run']
+        self.assertEqual((run['cache_hits'], run['computed']), (3, 1))
+        self.assertAlmostEqual(run['cost_saved'], 0.03)
+
+        bumped = EvaluationStrategy(name='rules', predict=predict, version='v2')
+        asyncio.run(self.engine.evaluate(bumped, {'test': SPLIT}))
+        self.assertEqual(len(calls), 9)  # Nouvelle version: tout est recalculé
+
+    def test_metrics_per_split(self):
+        """Teste les métriques par tâche (étiquettes manquantes ignorées)"""
+        strategy = EvaluationStrategy(name='rules', predict=keyword_rules)
+        result = asyncio.run(self.engine.evaluate(strategy, {'validation': SPLIT.iloc[:3], 'test': SPLIT}))
+
+        metrics = result['splits']['test']['metrics']
+        self.assertEqual(metrics['sentiment']['accuracy'], 0.8)
+        self.assertEqual(metrics['priority']['support'], 4)
+        self.assertEqual(metrics['overall']['total_samples'], 5)
+        self.assertEqual(result['splits']['validation']['metrics']['sentiment']['accuracy'], 1.0)
+
+    def test_async_strategy_runs_concurrently(self):
+        """Teste l'exécution concurrente bornée d'un classifieur asynchrone"""
+        active = {'now': 0, 'max': 0}
+
+        async def predict(text):
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+            await asyncio.sleep(0.02)
+            active['now'] -= 1
+            return keyword_rules(text)
+
+        texts = pd.DataFrame({'text': [f'tweet {i}' for i in range(40)], 'sentiment': ['negative'] * 40})
+        strategy = EvaluationStrategy(name='llm', predict=predict, concurrency=10)
+
+        start = time.perf_counter()
+        result = asyncio.run(self.engine.evaluate(strategy, {'test': texts}))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(active['max'], 10)
+        self.assertLess(elapsed, 40 * 0.02 / 3)
+        self.assertGreater(result['splits']['test']['run']['throughput_items_per_s'], 0)
+
+    def test_batch_strategy_and_failures(self):
+        """Teste les lots, les échecs (non mis en cache) et la prédiction par défaut"""
+        batches = []
+
+        def predict_batch(texts):
+            batches.append(len(texts))
+            return [None if 'panne' in text else {'sentiment': 'positive'} for text in texts]
+
+        strategy = EvaluationStrategy(name='bert', predict_batch=predict_batch, tasks=('sentiment',),
+                                      batch_size=2, concurrency=1,
+                                      default_prediction={'sentiment': 'neutral'})
+        predictions, run = asyncio.run(self.engine.predict(strategy, SPLIT['text'].tolist()))
+
+        self.assertEqual(batches, [2, 2])
+        self.assertEqual(run['failed'], 1)
+        self.assertEqual(run['model_calls'], 2)
+        self.assertEqual(predictions[0], {'sentiment': 'neutral'})
+        self.assertEqual(predictions[1], {'sentiment': 'positive'})
+
+        asyncio.run(self.engine.predict(strategy, SPLIT['text'].tolist()))
+        self.assertEqual(batches, [2, 2, 1])  # Seul l'échec est retenté
+
+    def test_compare_strategies(self):
+        """Teste la comparaison de stratégies et le tableau récapitulatif"""
+        rules = EvaluationStrategy(name='rules', predict=keyword_rules, cost_per_item=0.0)
+        constant = EvaluationStrategy(name='constant', predict=lambda text: {'sentiment': 'neutral'},
+                                      tasks=('sentiment',), cost_per_item=0.001)
+
+        comparison = asyncio.run(self.engine.compare([constant, rules], {'test': SPLIT}))
+
+        self.assertEqual(set(comparison['strategies']), {'rules', 'constant'})
+        self.assertEqual([row['strategy'] for row in comparison['summary']], ['rules', 'constant'])
+        self.assertAlmostEqual(comparison['summary'][1]['cost'], 0.004)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.engine.compare([rules, rules], {'test': SPLIT}))
+
+
+if __name__ == '__main__':
+    unittest.main()
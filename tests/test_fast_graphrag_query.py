@@ -0,0 +1,141 @@
+"""
+Tests Unitaires - Recherche matricielle Fast-GraphRAG (backend)
+===============================================================
+
+Validation de la recherche par produit matrice-vecteur, de la persistance de
+la matrice d'embeddings (mémoire mappée), de la migration des graphes ancien
+format et du PageRank personnalisé.
+"""
+
+import unittest
+import asyncio
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+import numpy as np
+
+# Le service importe app.config_pkg: backend/ en tête du chemin
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.config_pkg.fast_graphrag_config import FastGraphRAGConfig
+from app.services.fast_graphrag_service import FastGraphRAGService
+
+
+class FixedEncoder:
+    """Modèle d'embedding de test: vecteurs connus par texte"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, texts, batch_size=32):
+        if isinstance(texts, str):
+            return np.asarray(self.vectors[texts], dtype=np.float32)
+        return np.asarray([self.vectors[text] for text in texts], dtype=np.float32)
+
+
+# Requête q; C relié à B, D relié uniquement à E (sans rapport avec q)
+VECTORS = {
+    'q': [1.0, 0.0, 0.0, 0.0],
+    'doc A': [1.0, 0.0, 0.0, 0.0],
+    'doc B': [0.8, 0.6, 0.0, 0.0],
+    'doc C': [0.6, 0.8, 0.0, 0.0],
+    'doc D': [0.0, 0.0, 1.0, 0.0],
+    'doc E': [0.7, 0.0, 0.714, 0.0],
+}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestFastGraphRAGQuery(unittest.TestCase):
+    """Tests unitaires pour FastGraphRAGService.query_graph"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = FastGraphRAGConfig(storage_dir=Path(self.tmp.name), embedding_dim=4,
+                                         similarity_threshold=0.5, top_k_edges=2)
+        self.documents = ['doc A', 'doc B', 'doc C', 'doc D', 'doc E']
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_service(self, vectors=VECTORS) -> FastGraphRAGService:
+        """Service sans fast_graphrag/sentence_transformers: graphe chargé directement"""
+        service = FastGraphRAGService(self.config)
+        service.embedding_model = FixedEncoder(vectors)
+        service._load_or_create_graph()
+        service.is_initialized = True
+        return service
+
+    def test_matrix_search_matches_cosine(self):
+        """Teste le classement par similarité cosinus et le seuil"""
+        service = self.make_service()
+        self.assertTrue(run(service.build_graph_from_documents(self.documents)))
+
+        results = run(service.query_graph('q', top_k=3, expand=False))
+
+        self.assertEqual([r['content'] for r in results], ['doc A', 'doc B', 'doc E'])
+        self.assertAlmostEqual(results[0]['score'], 1.0, places=5)
+        self.assertAlmostEqual(results[1]['score'], 0.8, places=5)
+        self.assertNotIn('pagerank', results[0])
+
+        # Seuil: doc D (similarité 0) n'est jamais une graine
+        all_results = run(service.query_graph('q', top_k=10, expand=False))
+        self.assertNotIn('doc D', [r['content'] for r in all_results])
+
+    def test_embeddings_persisted_and_memory_mapped(self):
+        """Teste la matrice .npy normalisée, rechargée en mémoire mappée"""
+        service = self.make_service()
+        run(service.build_graph_from_documents(self.documents))
+        self.assertTrue(self.config.index_path.exists())
+        self.assertNotIn('embedding', service.graph['nodes']['doc_0'])
+
+        reloaded = self.make_service()
+        self.assertIsInstance(reloaded._embeddings, np.memmap)
+        self.assertEqual(reloaded._embeddings.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(reloaded._embeddings, axis=1), 1.0, rtol=1e-6)
+        self.assertEqual(run(reloaded.query_graph('q', top_k=3)), run(service.query_graph('q', top_k=3)))
+
+        # Mise à jour incrémentale sur une matrice mappée
+        vectors = dict(VECTORS, **{'doc F': [0.9, 0.1, 0.0, 0.0]})
+        reloaded.embedding_model = FixedEncoder(vectors)
+        self.assertTrue(run(reloaded.update_graph(['doc F'])))
+        self.assertEqual(reloaded.get_graph_stats()['num_nodes'], 6)
+        self.assertEqual(run(reloaded.query_graph('q', top_k=2, expand=False))[1]['content'], 'doc F')
+
+    def test_legacy_graph_migrated(self):
+        """Teste la conversion d'un graphe ancien format (embedding par nœud)"""
+        legacy = {
+            'nodes': {f'doc_{i}': {'content': doc, 'embedding': VECTORS[doc]} for i, doc in enumerate(self.documents)},
+            'edges': [],
+            'metadata': {'num_documents': len(self.documents)}
+        }
+        with open(self.config.graph_path, 'wb') as f:
+            pickle.dump(legacy, f)
+
+        service = self.make_service()
+
+        self.assertEqual(service._embeddings.shape, (5, 4))
+        self.assertNotIn('embedding', service.graph['nodes']['doc_0'])
+        self.assertEqual(run(service.query_graph('q', top_k=1))[0]['content'], 'doc A')
+
+    def test_personalized_pagerank_expansion(self):
+        """Teste le second étage: voisins reliés aux graines remontés par PageRank"""
+        service = self.make_service()
+        run(service.build_graph_from_documents(self.documents))
+        self.assertGreater(service.get_graph_stats()['num_edges'], 0)
+
+        expanded = run(service.query_graph('q', top_k=5, expand=True))
+        contents = [r['content'] for r in expanded]
+
+        self.assertIn('doc D', contents)
+        self.assertTrue(all('pagerank' in r for r in expanded))
+        self.assertAlmostEqual(sum(r['pagerank'] for r in expanded), 1.0, places=5)
+        self.assertEqual(contents[0], 'doc A')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+"""
+Tests Unitaires - Moteur de KPIs
+================================
+
+Validation de la passe unique (encodage, cube, dates, statistiques) et de
+la cohérence des modules de KPIs qui la partagent.
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+# Mock streamlit pour les tests
+if 'streamlit' not in sys.modules:
+    sys.modules['streamlit'] = MagicMock()
+
+from services.kpi_engine import KPIEngine, compute_kpi_frame
+
+
+def make_tweets(n: int = 500, seed: int = 0) -> pd.DataFrame:
+    """DataFrame de tweets classifiés synthétique"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'text': [f"tweet {i}" for i in range(n)],
+        'date': pd.date_range('2025-03-01', periods=n, freq='97min').astype(str),
+        'sentiment': rng.choice(['positive', 'negative', 'neutral', ' Positive', None], n),
+        'category': rng.choice(['reseau', 'facture', 'offre', None], n),
+        'status': rng.choice(['resolved', 'pending', 'open'], n),
+        'agent': rng.choice(['alice', 'bob', None], n),
+        'confidence': np.where(rng.random(n) < 0.1, np.nan, rng.random(n)),
+    })
+
+
+class TestKPIEngine(unittest.TestCase):
+    """Tests unitaires pour KPIEngine et KPIFrame"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.df = make_tweets()
+        self.frame = KPIEngine().compute(self.df)
+
+    def test_counts_match_value_counts(self):
+        """Test: Comptages identiques à value_counts, valeurs manquantes à part"""
+        for column in ['sentiment', 'category', 'status', 'agent']:
+            expected = self.df[column].value_counts()
+            counts = self.frame.counts(column)
+            self.assertEqual(counts.to_dict(), expected.to_dict())
+            self.assertTrue(counts.is_monotonic_decreasing)
+            self.assertEqual(self.frame.missing(column), int(self.df[column].isna().sum()))
+            self.assertEqual(self.frame.nunique(column), self.df[column].nunique())
+
+    def test_normalized_labels(self):
+        """Test: Valeurs regroupées par forme normalisée"""
+        normalized = self.frame.counts('sentiment', normalize=True)
+        expected = self.df['sentiment'].dropna().str.strip().str.lower().value_counts()
+
+        self.assertEqual(normalized.to_dict(), expected.to_dict())
+        self.assertEqual(self.frame.count_in('sentiment', ['positive']), expected['positive'])
+        self.assertEqual(self.frame.count_matching('status', 'pend|open'),
+                         int(self.df['status'].isin(['pending', 'open']).sum()))
+
+    def test_crosstab(self):
+        """Test: Tableau croisé identique à pd.crosstab"""
+        expected = pd.crosstab(self.df['category'], self.df['sentiment'])
+        table = self.frame.crosstab('category', 'sentiment')
+
+        pd.testing.assert_frame_equal(table, expected, check_names=False, check_dtype=False)
+
+    def test_time_views(self):
+        """Test: Volumes par jour (ordre chronologique), heure et jour de semaine"""
+        dates = pd.to_datetime(self.df['date'])
+        shuffled = KPIEngine().compute(self.df.sample(frac=1, random_state=1))
+
+        expected_daily = dates.groupby(dates.dt.date).size()
+        self.assertEqual(list(shuffled.daily_counts().index), list(expected_daily.index))
+        self.assertEqual(shuffled.daily_counts().tolist(), expected_daily.tolist())
+        self.assertEqual(self.frame.hourly_counts().to_dict(), dates.dt.hour.value_counts().sort_index().to_dict())
+        self.assertEqual(self.frame.weekday_counts().to_dict(),
+                         dates.dt.dayofweek.value_counts().sort_index().to_dict())
+        self.assertEqual(self.frame.date_min, dates.min())
+        self.assertEqual(self.frame.dated_rows(), len(self.df))
+
+        by_day = self.frame.daily_crosstab('status')
+        self.assertEqual(int(by_day.to_numpy().sum()), len(self.df))
+
+    def test_numeric_stats(self):
+        """Test: Statistiques numériques calculées sans les valeurs manquantes"""
+        stats = self.frame.numeric('confidence')
+
+        self.assertAlmostEqual(stats['mean'], self.df['confidence'].mean())
+        self.assertAlmostEqual(stats['median'], self.df['confidence'].median())
+        self.assertEqual(stats['count'], self.df['confidence'].notna().sum())
+        self.assertIsNone(self.frame.numeric('absente'))
+
+    def test_list_columns(self):
+        """Test: Colonne de thèmes multiples comptée à plat"""
+        df = pd.DataFrame({'topics': [['reseau', 'facture'], ['reseau'], [], None]})
+        frame = KPIEngine().compute(df)
+
+        self.assertEqual(frame.counts('topics').to_dict(), {'reseau': 2, 'facture': 1})
+
+    def test_categorical_columns(self):
+        """Test: Colonnes catégorielles (schéma des labels) lues via leurs codes"""
+        from services.label_schema import apply_label_schema
+
+        df = pd.DataFrame({
+            'sentiment': ['positif', 'negatif', None, 'positif'],
+            'is_claim': ['oui', 'non', 'oui', 'oui'],
+        })
+        frame = KPIEngine().compute(apply_label_schema(df))
+
+        self.assertEqual(frame.counts('sentiment').to_dict(), {'positif': 2, 'negatif': 1})
+        self.assertEqual(frame.nunique('sentiment'), 2)
+        self.assertEqual(frame.missing('sentiment'), 1)
+        self.assertEqual(frame.count_in('is_claim', ['oui']), 3)
+
+    def test_status_is_normalized(self):
+        """Test: Statuts regroupés sans tenir compte de la casse ni des espaces"""
+        df = pd.DataFrame({
+            'status': ['Resolved', ' resolved', 'PENDING', None, 'pending '],
+            'sentiment': ['pos', 'neg', 'pos', 'pos', 'neg'],
+        })
+        frame = KPIEngine().compute(df)
+
+        self.assertEqual(frame.counts('status').to_dict(), {'resolved': 2, 'pending': 2})
+        self.assertEqual(frame.missing('status'), 1)
+        self.assertEqual(frame.crosstab('status', 'sentiment').loc['resolved', 'pos'], 1)
+
+        categorical = KPIEngine().compute(df.astype({'status': 'category'}))
+        self.assertEqual(categorical.counts('status').to_dict(), {'resolved': 2, 'pending': 2})
+
+    def test_frame_is_reused(self):
+        """Test: Une seule passe par contenu, recalcul si les colonnes ou les valeurs changent"""
+        engine = KPIEngine()
+        df = make_tweets(50)
+
+        first = engine.compute(df)
+        self.assertIs(engine.compute(df), first)
+        self.assertIs(engine.compute(df.copy()), first)
+
+        df['priority'] = 'high'
+        second = engine.compute(df)
+        self.assertIsNot(second, first)
+        self.assertTrue(second.has('priority'))
+
+        df['sentiment'] = 'pos'
+        third = engine.compute(df)
+        self.assertIsNot(third, second)
+        self.assertEqual(third.counts('sentiment').to_dict(), {'pos': 50})
+
+        df.loc[0, 'priority'] = 'low'
+        self.assertEqual(engine.compute(df).counts('priority').to_dict(), {'high': 49, 'low': 1})
+
+    def test_column_names_are_resolved(self):
+        """Test: Les noms de colonnes sont insensibles à la casse"""
+        df = pd.DataFrame({'Priority': ['haute', 'basse', 'haute'], 'Sentiment': ['pos', 'neg', None]})
+        frame = KPIEngine().compute(df)
+
+        self.assertEqual(frame.counts('priority').to_dict(), {'haute': 2, 'basse': 1})
+        self.assertTrue(frame.has('priority'))
+        self.assertEqual(frame.missing('sentiment'), 1)
+        self.assertEqual(frame.crosstab('priority', 'sentiment').loc['haute', 'pos'], 1)
+
+
+class TestKPIModulesConsistency(unittest.TestCase):
+    """Cohérence des modules de KPIs partageant la passe unique"""
+
+    def test_classic_and_business_kpis(self):
+        """Test: KPIs classiques et métier cohérents avec les comptages bruts"""
+        from services.classic_analysis_kpis import compute_classic_kpis
+        from services.enhanced_kpis_vizualizations import compute_business_kpis
+
+        df = make_tweets()
+        df['is_claim'] = np.random.default_rng(2).choice(['oui', 'non'], len(df))
+        classic = compute_classic_kpis(df)
+        business = compute_business_kpis(df)
+
+        claims = int((df['is_claim'] == 'oui').sum())
+        self.assertEqual(business['claim_rate']['count'], claims)
+        self.assertEqual(classic['claim_rate']['count'], claims)
+        self.assertEqual(classic['claim_rate']['non_claims'], len(df) - claims)
+
+        positive = int(df['sentiment'].str.strip().str.lower().eq('positive').sum())
+        self.assertEqual(business['satisfaction_index']['positive_count'], positive)
+        self.assertAlmostEqual(classic['confidence_score']['average'], df['confidence'].mean())
+
+    def test_advanced_metrics(self):
+        """Test: Métriques avancées sans copie ni conversion du DataFrame source"""
+        from services.advanced_metrics import AdvancedMetrics
+
+        df = make_tweets()
+        original = df.copy()
+        metrics = AdvancedMetrics().calculate_all_metrics(df)
+
+        pd.testing.assert_frame_equal(df, original)
+        agents = metrics['performance_metrics']['agent_performance']
+        self.assertEqual(agents['alice']['total_tickets'], int((df['agent'] == 'alice').sum()))
+        self.assertEqual(agents['bob']['resolved'],
+                         int(((df['agent'] == 'bob') & (df['status'] == 'resolved')).sum()))
+        self.assertEqual(sum(metrics['temporal_metrics']['weekly_pattern'].values()), len(df))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests Unitaires - Schéma des colonnes de labels
+===============================================
+
+Validation de la conversion en catégories fixes, de la normalisation des
+variantes et des avertissements de validation.
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+from services.label_schema import LABEL_SCHEMA, apply_label_schema, validate_labels, claim_mask
+
+
+class TestLabelSchema(unittest.TestCase):
+    """Tests unitaires pour apply_label_schema et validate_labels"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.df = pd.DataFrame({
+            'text': ['panne', 'merci', 'facture', 'lent', 'bof'],
+            'sentiment': ['negatif', 'Positive', 'neutre', 'négatif', None],
+            'urgence': ['haute', 'basse', 'faible', 'moyenne', 'haute'],
+            'topics': ['fibre', 'mobile', 'facture', 'autre', 'inconnu'],
+            'incident': ['connexion', 'aucun', 'facturation', 'debit', 'aucun'],
+            'is_claim': ['oui', 'non', 'oui', 'non', 'non'],
+        })
+
+    def test_columns_converted(self):
+        """Test: Catégories fixes, variantes normalisées, manquantes conservées"""
+        result = apply_label_schema(self.df)
+
+        for column, spec in LABEL_SCHEMA.items():
+            self.assertEqual(result[column].dtype, spec.dtype)
+        self.assertEqual(result['sentiment'].tolist()[:4], ['negatif', 'positif', 'neutre', 'negatif'])
+        self.assertTrue(pd.isna(result['sentiment'].iloc[4]))
+        self.assertEqual(result['urgence'].iloc[2], 'basse')
+        self.assertEqual(result['topics'].iloc[4], 'autre')
+        self.assertEqual(result['incident'].iloc[3], 'débit')
+
+        # Copie superficielle: df source inchangé
+        self.assertEqual(self.df['sentiment'].dtype, object)
+        self.assertEqual(result['text'].tolist(), self.df['text'].tolist())
+
+    def test_existing_comparisons_still_work(self):
+        """Test: Comparaisons et comptages des consommateurs inchangés"""
+        result = apply_label_schema(self.df)
+
+        self.assertEqual(int((result['is_claim'] == 'oui').sum()), 2)
+        self.assertEqual(int((result['urgence'] == 'haute').sum()), 2)
+        self.assertTrue((result['urgence'] >= 'moyenne').iloc[3])
+        self.assertEqual(result['sentiment'].value_counts()['negatif'], 2)
+        self.assertEqual(claim_mask(result).tolist(), [True, False, True, False, False])
+        self.assertEqual(claim_mask(pd.DataFrame({'is_claim': [1, 0, 1]})).tolist(), [True, False, True])
+
+    def test_validation(self):
+        """Test: Avertissements avant conversion, aucun après (hors manquantes)"""
+        warnings = validate_labels(self.df)
+
+        self.assertTrue(any("'topics'" in w and 'inconnu' in w for w in warnings))
+        self.assertTrue(any("'urgence'" in w and 'category' in w for w in warnings))
+        self.assertEqual(validate_labels(apply_label_schema(self.df)),
+                         ["Colonne 'sentiment': 1 valeur(s) manquante(s)"])
+
+        with self.assertLogs('services.label_schema', level='WARNING') as logs:
+            apply_label_schema(self.df)
+        self.assertTrue(any('1 valeur(s) manquante(s)' in line for line in logs.output))
+
+    def test_multi_valued_topics_left_untouched(self):
+        """Test: Topics multiples (listes ou texte 'a, b') non convertis"""
+        df = pd.DataFrame({'topics': [['fibre', 'mobile'], ['facture']], 'is_claim': [1, 0]})
+        flattened = pd.DataFrame({'topics': ['fibre, mobile', 'facture']})
+
+        self.assertEqual(apply_label_schema(df)['topics'].dtype, object)
+        self.assertEqual(apply_label_schema(df)['is_claim'].dtype, 'boolean')
+        self.assertEqual(apply_label_schema(flattened)['topics'].tolist(), ['fibre, mobile', 'facture'])
+
+    def test_memory_reduction(self):
+        """Test: Colonnes de labels au moins 10x plus compactes"""
+        rng = np.random.default_rng(0)
+        n = 20_000
+        df = pd.DataFrame({
+            'sentiment': rng.choice(['positif', 'negatif', 'neutre'], n),
+            'urgence': rng.choice(['haute', 'moyenne', 'basse'], n),
+            'is_claim': rng.choice(['oui', 'non'], n),
+        })
+        before = df.memory_usage(deep=True, index=False).sum()
+        after = apply_label_schema(df).memory_usage(deep=True, index=False).sum()
+
+        self.assertGreater(before / after, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests Unitaires - Imports différés
+==================================
+
+Validation du chargement paresseux des modules (lazy_module) et des
+classes exposées par le package services.
+"""
+
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+import shutil
+from unittest.mock import MagicMock
+
+# Ajout du chemin pour les imports
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit_app')
+sys.path.append(APP_DIR)
+
+# Mock streamlit pour les tests
+if 'streamlit' not in sys.modules:
+    sys.modules['streamlit'] = MagicMock()
+
+from services.optimized_loader import lazy_module, is_available
+
+
+class TestLazyImports(unittest.TestCase):
+    """Tests unitaires pour lazy_module et les exports paresseux"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.tmp_dir, 'lazy_probe_module.py'), 'w') as f:
+            f.write("import builtins\n"
+                    "builtins.lazy_probe_runs = getattr(builtins, 'lazy_probe_runs', 0) + 1\n"
+                    "VALUE = 42\n")
+        sys.path.insert(0, self.tmp_dir)
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        import builtins
+        sys.path.remove(self.tmp_dir)
+        sys.modules.pop('lazy_probe_module', None)
+        if hasattr(builtins, 'lazy_probe_runs'):
+            del builtins.lazy_probe_runs
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_module_executed_on_first_access(self):
+        """Test: Le code du module ne s'exécute qu'au premier attribut lu"""
+        import builtins
+
+        module = lazy_module('lazy_probe_module')
+        self.assertEqual(getattr(builtins, 'lazy_probe_runs', 0), 0)
+
+        self.assertEqual(module.VALUE, 42)
+        self.assertEqual(builtins.lazy_probe_runs, 1)
+
+        self.assertIs(lazy_module('lazy_probe_module'), module)
+        self.assertEqual(builtins.lazy_probe_runs, 1)
+
+    def test_missing_module(self):
+        """Test: Module absent détecté sans exception par is_available"""
+        self.assertTrue(is_available('json'))
+        self.assertFalse(is_available('module_inexistant_xyz'))
+        with self.assertRaises(ImportError):
+            lazy_module('module_inexistant_xyz')
+
+    def test_services_exports_are_lazy(self):
+        """Test: Une classe exposée par services n'importe son module qu'au premier accès"""
+        code = (
+            "import sys\n"
+            "import services\n"
+            "before = 'services.rule_classifier' in sys.modules\n"
+            "cls = services.EnhancedRuleClassifier\n"
+            "after = 'services.rule_classifier' in sys.modules\n"
+            "print(before, after, cls.__name__, 'torch' in sys.modules)\n"
+        )
+        proc = subprocess.run([sys.executable, '-c', code], cwd=APP_DIR, capture_output=True, text=True)
+
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.split(), ['False', 'True', 'EnhancedRuleClassifier', 'False'])
+
+    def test_unknown_export(self):
+        """Test: Attribut inconnu du package services"""
+        import services
+
+        with self.assertRaises(AttributeError):
+            services.ClasseInexistante
+
+
+if __name__ == '__main__':
+    unittest.main()
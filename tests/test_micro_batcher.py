@@ -0,0 +1,123 @@
+"""
+Tests Unitaires - Micro-batching de l'inférence locale (backend)
+================================================================
+
+Validation de MicroBatcher: regroupement des requêtes concurrentes en un
+seul appel du modèle, résultats rendus à chaque appelant, délai d'attente
+borné, propagation des erreurs et fermeture.
+"""
+
+import unittest
+import asyncio
+import importlib.util
+import os
+import threading
+import time
+
+# Chargement direct du module: le nom 'app' est aussi celui de streamlit_app/app.py
+_spec = importlib.util.spec_from_file_location(
+    'backend_micro_batcher',
+    os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'services', 'micro_batcher.py')
+)
+micro_batcher = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(micro_batcher)
+
+MicroBatcher = micro_batcher.MicroBatcher
+
+
+class StubModel:
+    """Modèle simulé: coût fixe par passe (10 ms), enregistre la taille des lots"""
+
+    def __init__(self, fail_on=None):
+        self.batch_sizes = []
+        self.threads = set()
+        self.fail_on = fail_on
+
+    def predict_batch(self, texts):
+        self.threads.add(threading.current_thread().name)
+        self.batch_sizes.append(len(texts))
+        time.sleep(0.01)
+        if self.fail_on in texts:
+            raise ValueError('entrée invalide')
+        return [{'label': text.upper()} for text in texts]
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """Tests unitaires pour MicroBatcher"""
+
+    def run_batcher(self, batcher, coroutine):
+        async def run():
+            try:
+                return await coroutine()
+            finally:
+                await batcher.close()
+        return asyncio.run(run())
+
+    def test_concurrent_requests_share_forward_passes(self):
+        """Teste le regroupement de 100 requêtes concurrentes et l'ordre des résultats"""
+        model = StubModel()
+        batcher = MicroBatcher(model.predict_batch, max_batch_size=32, max_wait_ms=5)
+        texts = [f'tweet {i}' for i in range(100)]
+
+        start = time.perf_counter()
+        results = self.run_batcher(batcher, lambda: asyncio.gather(*(batcher.submit(t) for t in texts)))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([r['label'] for r in results], [t.upper() for t in texts])
+        self.assertEqual(sum(model.batch_sizes), 100)
+        self.assertLessEqual(len(model.batch_sizes), 5)
+        self.assertLessEqual(max(model.batch_sizes), 32)
+        self.assertLess(elapsed, 100 * 0.01 / 2)  # Bien plus rapide qu'une passe par requête
+        self.assertEqual(len(model.threads), 1)
+        self.assertEqual(batcher.stats()['items'], 100)
+
+    def test_lone_request_waits_at_most_max_wait(self):
+        """Teste la latence d'une requête isolée (délai d'attente borné)"""
+        model = StubModel()
+        batcher = MicroBatcher(model.predict_batch, max_wait_ms=20)
+
+        async def lone():
+            start = time.perf_counter()
+            result = await batcher.submit('seul')
+            return result, time.perf_counter() - start
+
+        result, elapsed = self.run_batcher(batcher, lone)
+
+        self.assertEqual(result, {'label': 'SEUL'})
+        self.assertEqual(model.batch_sizes, [1])
+        self.assertLess(elapsed, 0.02 + 0.01 + 0.05)
+
+    def test_errors_reach_the_failed_batch_only(self):
+        """Teste la propagation d'une erreur aux requêtes du lot concerné"""
+        model = StubModel(fail_on='bad')
+        batcher = MicroBatcher(model.predict_batch, max_wait_ms=5)
+
+        async def scenario():
+            failed = await asyncio.gather(batcher.submit('ok'), batcher.submit('bad'), return_exceptions=True)
+            after = await batcher.submit_many(['encore', 'ok'])
+            return failed, after
+
+        failed, after = self.run_batcher(batcher, scenario)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in failed))
+        self.assertEqual(after, [{'label': 'ENCORE'}, {'label': 'OK'}])
+
+    def test_close_fails_pending_requests(self):
+        """Teste qu'aucune requête ne reste en attente après la fermeture"""
+        model = StubModel()
+        batcher = MicroBatcher(model.predict_batch, max_wait_ms=1000)
+
+        async def scenario():
+            pending = asyncio.ensure_future(batcher.submit('en attente'))
+            await asyncio.sleep(0.01)
+            await batcher.close()
+            return await asyncio.gather(pending, return_exceptions=True)
+
+        (result,) = asyncio.run(scenario())
+
+        self.assertIsInstance(result, RuntimeError)
+        self.assertEqual(model.batch_sizes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Tests Unitaires - Client Ollama asynchrone
+==========================================
+
+Validation du parsing JSON streamé, du pipelining borné par num_parallel et
+des retries, contre un serveur Ollama factice local.
+"""
+
+import unittest
+import json
+import re
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+from services.ollama_async_client import AsyncOllamaClient, StreamingResultsParser, backoff_delay
+
+
+def build_prompt(tweets):
+    """Prompt minimal: un tweet numéroté par ligne"""
+    return "\n".join(f"{i}: {tweet}" for i, tweet in enumerate(tweets))
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Serveur /api/generate factice: streame un résultat JSON par tweet du prompt"""
+
+    protocol_version = 'HTTP/1.0'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        tweets = re.findall(r'^(\d+): (.*)$', payload['prompt'], re.MULTILINE)
+
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = server.failures > 0
+            if fail:
+                server.failures -= 1
+
+        try:
+            if fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+
+            results = [{"index": int(i), "sentiment": "negatif" if "panne" in text else "neutre",
+                        "categorie": "produit", "score_confiance": 0.9} for i, text in tweets]
+            text = "Voici le JSON: " + json.dumps({"results": results})
+            # Fragments de taille arbitraire, comme les tokens générés
+            for start in range(0, len(text), 7):
+                line = json.dumps({"response": text[start:start + 7], "done": False}) + "\n"
+                self.wfile.write(line.encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(server.delay)
+            self.wfile.write((json.dumps({"response": "", "done": True}) + "\n").encode('utf-8'))
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class TestStreamingResultsParser(unittest.TestCase):
+    """Tests unitaires pour le parser incrémental"""
+
+    def test_items_available_before_end(self):
+        """Teste que chaque objet est renvoyé dès sa fermeture"""
+        parser = StreamingResultsParser()
+        self.assertEqual(parser.feed('Réponse: {"results": [{"index": 0, "sen'), [])
+        self.assertEqual(parser.feed('timent": "positif"}, {"index"'), [{"index": 0, "sentiment": "positif"}])
+        self.assertEqual(parser.feed(': 1, "note": "a } \\" ]"}]} fin'), [{"index": 1, "note": 'a } " ]'}])
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.feed('{"index": 2}'), [])
+
+    def test_char_by_char(self):
+        """Teste un flux caractère par caractère"""
+        text = json.dumps({"results": [{"index": i, "v": {"x": [i]}} for i in range(5)]})
+        parser = StreamingResultsParser()
+        items = [item for char in text for item in parser.feed(char)]
+        self.assertEqual([item['index'] for item in items], list(range(5)))
+
+    def test_backoff_delay_bounds(self):
+        """Teste les bornes du backoff avec jitter"""
+        for attempt in range(6):
+            delay = backoff_delay(attempt, base=1.0, cap=8.0)
+            expected = min(8.0, 2 ** attempt)
+            self.assertGreaterEqual(delay, expected / 2)
+            self.assertLessEqual(delay, expected)
+
+
+class TestAsyncOllamaClient(unittest.TestCase):
+    """Tests d'intégration contre un serveur Ollama factice"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.failures = 0
+        self.server.delay = 0.002
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pipelined_batches_bounded_by_num_parallel(self):
+        """Teste que les lots sont envoyés en parallèle, au plus num_parallel à la fois"""
+        client = AsyncOllamaClient(base_url=self.base_url, num_parallel=3)
+        batches = [[f"panne {b}-{i}" if i % 2 else f"tweet {b}-{i}" for i in range(5)] for b in range(8)]
+        streamed = []
+
+        results = client.classify_batches_sync(batches, build_prompt,
+                                               lambda b, i, r: streamed.append((b, i)))
+
+        self.assertEqual(len(results), 8)
+        for batch_results in results:
+            self.assertEqual([r['index'] for r in batch_results], list(range(5)))
+            self.assertEqual([r['sentiment'] for r in batch_results],
+                             ['neutre', 'negatif', 'neutre', 'negatif', 'neutre'])
+        self.assertEqual(len(streamed), 40)
+        self.assertEqual(self.server.max_in_flight, 3)
+        self.assertEqual(self.server.requests, 8)
+
+    def test_retry_after_server_error(self):
+        """Teste la nouvelle tentative après une erreur 503"""
+        self.server.failures = 1
+        client = AsyncOllamaClient(base_url=self.base_url, num_parallel=1, backoff_base=0.01)
+
+        results = client.classify_batches_sync([["panne réseau", "bonjour"]], build_prompt)
+
+        self.assertEqual([r['sentiment'] for r in results[0]], ['negatif', 'neutre'])
+        self.assertEqual(client.stats['retries'], 1)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_unreachable_server_returns_none(self):
+        """Teste qu'un serveur injoignable laisse les tweets sans résultat"""
+        self.server.failures = 10
+        client = AsyncOllamaClient(base_url=self.base_url, max_retries=2, backoff_base=0.01)
+
+        results = client.classify_batches_sync([["a", "b"]], build_prompt)
+
+        self.assertEqual(results, [[None, None]])
+        self.assertEqual(client.stats['failed_items'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
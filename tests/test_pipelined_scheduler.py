@@ -0,0 +1,119 @@
+"""
+Tests Unitaires - Ordonnanceur pipeliné
+=======================================
+
+Validation du chevauchement des phases CPU et distante, de l'ordre des
+résultats, de la contre-pression et de la gestion des erreurs.
+"""
+
+import unittest
+import sys
+import os
+import time
+import pandas as pd
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+from services.pipelined_scheduler import PipelinedScheduler
+
+
+def cpu_stage(chunk):
+    """Phase CPU factice: 30ms par chunk"""
+    time.sleep(0.03)
+    result = chunk.copy()
+    result['length'] = result['text'].str.len()
+    return result
+
+
+def remote_stage(sample):
+    """Phase distante factice: 30ms par chunk"""
+    time.sleep(0.03)
+    return pd.DataFrame({'remote': sample['text'].str.upper()}, index=sample.index)
+
+
+class TestPipelinedScheduler(unittest.TestCase):
+    """Tests unitaires pour PipelinedScheduler"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.df = pd.DataFrame({'text': [f"tweet {i}" for i in range(100)]}, index=range(1000, 1100))
+
+    def test_phases_overlap(self):
+        """Test: Le temps total approche max(phases) et non leur somme"""
+        scheduler = PipelinedScheduler(chunk_size=10, queue_size=2)
+
+        enriched, remote, stats = scheduler.run(self.df, cpu_stage, remote_stage=remote_stage)
+
+        self.assertEqual(stats.chunks, 10)
+        self.assertEqual(stats.remote_chunks, 10)
+        # Séquentiel: ~0.6s; pipeliné: ~0.33s
+        self.assertLess(stats.wall_seconds, 0.8 * (stats.cpu_seconds + stats.remote_seconds))
+        self.assertGreater(stats.overlap_ratio, 1.2)
+
+    def test_results_in_order(self):
+        """Test: Résultats enrichis et distants dans l'ordre d'origine"""
+        scheduler = PipelinedScheduler(chunk_size=7, remote_workers=3)
+
+        enriched, remote, stats = scheduler.run(
+            self.df, cpu_stage,
+            select_stage=lambda chunk: chunk.iloc[::2],
+            remote_stage=remote_stage
+        )
+
+        self.assertEqual(enriched.index.tolist(), self.df.index.tolist())
+        self.assertEqual(enriched['length'].tolist(), self.df['text'].str.len().tolist())
+        self.assertEqual(remote.index.tolist(), sorted(remote.index))
+        self.assertEqual(stats.sampled_rows, len(remote))
+        self.assertEqual(remote.loc[1002, 'remote'], "TWEET 2")
+
+    def test_bounded_queue(self):
+        """Test: La file entre les phases reste bornée"""
+        scheduler = PipelinedScheduler(chunk_size=5, queue_size=2)
+
+        slow_remote = lambda sample: (time.sleep(0.02), sample)[1]
+        _, remote, stats = scheduler.run(self.df, lambda chunk: chunk, remote_stage=slow_remote)
+
+        self.assertLessEqual(stats.max_queue_depth, 2)
+        self.assertEqual(len(remote), 100)
+
+    def test_remote_errors_are_isolated(self):
+        """Test: Une erreur distante n'interrompt pas le pipeline"""
+        def flaky_remote(sample):
+            if sample.index[0] == 1020:
+                raise RuntimeError("Ollama indisponible")
+            return remote_stage(sample)
+
+        scheduler = PipelinedScheduler(chunk_size=10)
+        enriched, remote, stats = scheduler.run(self.df, cpu_stage, remote_stage=flaky_remote)
+
+        self.assertEqual(len(enriched), 100)
+        self.assertEqual(stats.remote_errors, 1)
+        self.assertEqual(len(remote), 90)
+        self.assertNotIn(1020, remote.index)
+
+    def test_cpu_only(self):
+        """Test: Sans phase distante (mode fast)"""
+        scheduler = PipelinedScheduler(chunk_size=30)
+        progress = []
+
+        enriched, remote, stats = scheduler.run(self.df, cpu_stage,
+                                                progress_callback=lambda msg, pct: progress.append(pct))
+
+        self.assertIsNone(remote)
+        self.assertEqual(len(enriched), 100)
+        self.assertEqual(len(progress), 4)
+        self.assertEqual(progress, sorted(progress))
+
+    def test_cpu_error_propagates(self):
+        """Test: Une erreur de la phase CPU est remontée à l'appelant"""
+        def failing_cpu(chunk):
+            raise ValueError("BERT indisponible")
+
+        scheduler = PipelinedScheduler(chunk_size=10)
+        with self.assertRaises(ValueError):
+            scheduler.run(self.df, failing_cpu, remote_stage=remote_stage)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Tests Unitaires - Crawler de la documentation (backend)
+=======================================================
+
+Validation du GET conditionnel (ETag / Last-Modified), des limites de
+concurrence et de délai par domaine et de la persistance des validateurs,
+contre un serveur HTTP local; libération des créneaux des requêtes annulées.
+"""
+
+import unittest
+import asyncio
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Chargement direct du module: le nom 'app' est aussi celui de streamlit_app/app.py
+_spec = importlib.util.spec_from_file_location(
+    'backend_polite_crawler',
+    os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'services', 'polite_crawler.py')
+)
+polite_crawler = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(polite_crawler)
+
+PoliteCrawler = polite_crawler.PoliteCrawler
+
+LAST_MODIFIED = 'Wed, 01 Oct 2025 08:00:00 GMT'
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Pages de test: /etag/*, /dated/* et /slow/* (réponse après 100 ms)"""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, time.monotonic(), dict(self.headers)))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if self.path.startswith('/slow/'):
+                time.sleep(0.1)
+
+            if self.path.startswith('/dated/'):
+                if self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                validator = ('Last-Modified', LAST_MODIFIED)
+            else:
+                etag = f'"v1-{self.path}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                validator = ('ETag', etag)
+
+            body = f'<html><body><main>Page {self.path}</main></body></html>'.encode('utf-8')
+            self.send_response(200)
+            self.send_header(*validator)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipUnless(importlib.util.find_spec('aiohttp'), "aiohttp requis pour le crawler")
+class TestPoliteCrawler(unittest.TestCase):
+    """Tests unitaires pour PoliteCrawler"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests, self.server.active, self.server.max_active = [], 0, 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def crawl(self, crawler, paths):
+        async def run():
+            async with crawler:
+                return await asyncio.gather(*(crawler.fetch(self.base_url + path) for path in paths))
+        return asyncio.run(run())
+
+    def test_conditional_get_skips_unchanged_pages(self):
+        """Teste le 304 sur une page connue (ETag et Last-Modified)"""
+        crawler = PoliteCrawler(delay=0)
+        first = self.crawl(crawler, ['/etag/a', '/dated/b'])
+        self.assertEqual([r.status for r in first], [200, 200])
+        self.assertIn('Page /etag/a', first[0].text)
+        for result in first:
+            crawler.remember(result)
+
+        second = self.crawl(crawler, ['/etag/a', '/dated/b', '/etag/new'])
+
+        self.assertEqual([r.not_modified for r in second], [True, True, False])
+        self.assertIsNone(second[0].text)
+        headers = [h for path, _, h in self.server.requests[-3:] if path == '/etag/a'][0]
+        self.assertEqual(headers['If-None-Match'], '"v1-/etag/a"')
+
+        # Page oubliée: requête complète
+        crawler.forget(self.base_url + '/etag/a')
+        self.assertEqual(self.crawl(crawler, ['/etag/a'])[0].status, 200)
+
+    def test_per_domain_concurrency_and_delay(self):
+        """Teste la limite de requêtes simultanées et l'espacement des départs"""
+        crawler = PoliteCrawler(max_per_domain=2, delay=0.03)
+
+        start = time.monotonic()
+        results = self.crawl(crawler, [f'/slow/{i}' for i in range(6)])
+        elapsed = time.monotonic() - start
+
+        self.assertTrue(all(r.status == 200 for r in results))
+        self.assertLessEqual(self.server.max_active, 2)
+        self.assertGreaterEqual(self.server.max_active, 2)  # Requêtes bien concurrentes
+        starts = sorted(t for _, t, _ in self.server.requests)
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        self.assertGreaterEqual(min(gaps), 0.02)
+        self.assertLess(elapsed, 6 * 0.1)  # Plus rapide qu'en séquentiel
+
+    def test_validators_persisted(self):
+        """Teste la sauvegarde et le rechargement des validateurs"""
+        cache_path = os.path.join(self.tmp.name, 'crawl_cache.json')
+        crawler = PoliteCrawler(delay=0, cache_path=cache_path)
+        crawler.remember(self.crawl(crawler, ['/etag/a'])[0])
+        self.crawl(crawler, [])  # Sauvegarde à la fermeture de la session
+
+        reloaded = PoliteCrawler(delay=0, cache_path=cache_path)
+
+        self.assertEqual(reloaded.validators, crawler.validators)
+        self.assertTrue(self.crawl(reloaded, ['/etag/a'])[0].not_modified)
+
+
+class TestDomainSlots(unittest.TestCase):
+    """Tests unitaires pour la réservation des créneaux par domaine (sans réseau)"""
+
+    def test_cancelled_wait_releases_slot(self):
+        """Teste qu'une requête annulée pendant le délai de politesse rend sa place"""
+        crawler = PoliteCrawler(max_per_domain=1, delay=0.2)
+
+        async def run():
+            first = await crawler._wait_turn('example.org')
+            first.semaphore.release()
+            # Place acquise, puis attente du délai (0.2s) avant le départ
+            waiter = asyncio.create_task(crawler._wait_turn('example.org'))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            return await asyncio.wait_for(crawler._wait_turn('example.org'), timeout=1)
+
+        slot = asyncio.run(run())
+        self.assertTrue(slot.semaphore.locked())
+        slot.semaphore.release()
+        self.assertFalse(slot.semaphore.locked())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+Tests Unitaires - Caches de requêtes du chatbot SAV (backend)
+=============================================================
+
+Validation de la normalisation des questions, du cache LRU, du cache
+sémantique des réponses et de leur intégration dans ChatbotService
+(embeddings, résultats de recherche, réponses sans appel LLM, invalidation).
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+
+# Le service importe app.*: backend/ en tête du chemin
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.models import KnowledgeDocument
+from app.services.query_cache import LRUCache, QueryCache, SemanticAnswerCache, normalize_query
+from app.services.chatbot_service import ChatbotService
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+# Questions de test: "résilier" et sa paraphrase sont quasi identiques
+VECTORS = {
+    'comment résilier': unit(1.0, 0.0, 0.0),
+    'comment je peux résilier': unit(1.0, 0.15, 0.0),
+    'activer la 5g': unit(0.0, 1.0, 0.0),
+}
+
+
+class TestQueryCachePrimitives(unittest.TestCase):
+    """Tests unitaires pour normalize_query, LRUCache et SemanticAnswerCache"""
+
+    def test_normalize_query(self):
+        """Teste la casse, la ponctuation et les espaces ignorés, accents conservés"""
+        self.assertEqual(normalize_query('  Comment RÉSILIER ?! '), 'comment résilier')
+        self.assertEqual(normalize_query("l'offre   5G"), 'l offre 5g')
+        self.assertNotEqual(normalize_query('résilier'), normalize_query('resilier'))
+
+    def test_lru_eviction(self):
+        """Teste l'éviction de l'entrée la moins récemment utilisée"""
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'a' devient la plus récente
+        cache.set('c', 3)
+
+        self.assertNotIn('b', cache)
+        self.assertEqual((cache.get('a'), cache.get('c'), cache.get('b', 'absent')), (1, 3, 'absent'))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_semantic_lookup(self):
+        """Teste le seuil de similarité, l'intention et le remplacement circulaire"""
+        cache = SemanticAnswerCache(threshold=0.95, maxsize=2)
+        cache.add(VECTORS['comment résilier'], {'response': 'R1'}, intent='default')
+
+        answer, similarity = cache.lookup(VECTORS['comment je peux résilier'], intent='default')
+        self.assertEqual(answer['response'], 'R1')
+        self.assertGreater(similarity, 0.95)
+        self.assertIsNone(cache.lookup(VECTORS['activer la 5g'], intent='default'))
+        self.assertIsNone(cache.lookup(VECTORS['comment résilier'], intent='billing'))
+        self.assertIsNone(cache.lookup([1.0, 0.0], intent='default'))  # Autre dimension
+        self.assertIsNone(cache.lookup(VECTORS['comment résilier'], intent='default', model='ollama'))
+
+        cache.add(VECTORS['activer la 5g'], {'response': 'R2'}, intent='technical')
+        cache.add(unit(0.0, 0.0, 1.0), {'response': 'R3'}, intent='default')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.lookup(VECTORS['comment résilier'], intent='default'))  # R1 remplacée
+
+    def test_revision_invalidates_results_not_embeddings(self):
+        """Teste l'invalidation quand la révision de la base change"""
+        cache = QueryCache()
+        cache.check_revision((1, 1))
+        cache.embeddings.set(('model', 'q'), [1.0])
+        cache.retrieval.set(('q', 5), ['doc'])
+        cache.answers.add([1.0, 0.0], {'response': 'R'})
+
+        cache.check_revision((1, 1))
+        self.assertEqual(len(cache.retrieval), 1)
+
+        cache.check_revision((2, 1))
+        self.assertEqual((len(cache.embeddings), len(cache.retrieval), len(cache.answers)), (1, 0, 0))
+
+
+class TestChatbotServiceCaching(unittest.TestCase):
+    """Tests d'intégration des caches dans ChatbotService.process_message"""
+
+    def setUp(self):
+        self.service = ChatbotService(db_manager=None)
+        self.service.graphrag_enabled = False
+        self.service.fast_graphrag = SimpleNamespace(revision=1, embedding_model=None)
+        self.calls = {'encode': 0, 'search': 0, 'llm': 0}
+        self.generated = True
+
+        def encode(text):
+            self.calls['encode'] += 1
+            return VECTORS[normalize_query(text)].tolist()
+
+        async def search(query, max_results=5):
+            self.calls['search'] += 1
+            doc = KnowledgeDocument(
+                title='Résiliation', content='Pour résilier votre forfait Free Mobile...',
+                source_url='https://assistance.free.fr/resiliation', source_domain='assistance.free.fr',
+                content_hash='a' * 64
+            )
+            return [(doc, 0.9)]
+
+        async def llm(system_prompt, message, provider):
+            self.calls['llm'] += 1
+            return f"Réponse {self.calls['llm']}", self.generated
+
+        self.service.doc_scraper.embedding_model = object()
+        self.service.doc_scraper._generate_embeddings = encode
+        self.service._search_with_vector_db = search
+        self.service._generate_llm_response = llm
+
+    def ask(self, message, history=None, provider='mistral'):
+        return asyncio.run(self.service.process_message(message, 'conv_test_1_20250101_000000',
+                                                        llm_provider=provider, conversation_history=history))
+
+    def test_repeated_question_skips_llm(self):
+        """Teste la réutilisation de la réponse pour une question répétée ou paraphrasée"""
+        first = self.ask('Comment résilier ?')
+        second = self.ask('comment résilier')
+        paraphrase = self.ask('Comment je peux résilier ?')
+
+        self.assertFalse(first['answer_cached'])
+        self.assertTrue(second['answer_cached'])
+        self.assertTrue(paraphrase['answer_cached'])
+        self.assertEqual(paraphrase['response'], first['response'])
+        self.assertEqual(paraphrase['sources'], first['sources'])
+        self.assertEqual(self.calls, {'encode': 2, 'search': 1, 'llm': 1})
+
+        other = self.ask('Activer la 5G')
+        self.assertFalse(other['answer_cached'])
+        self.assertEqual(self.calls['llm'], 2)
+
+    def test_history_bypasses_answer_cache_but_reuses_retrieval(self):
+        """Teste qu'une question avec historique n'utilise que le cache de recherche"""
+        self.ask('Comment résilier ?')
+        history = [{'role': 'user', 'content': 'Bonjour'}]
+
+        result = self.ask('Comment résilier ?', history=history)
+
+        self.assertFalse(result['answer_cached'])
+        self.assertEqual((self.calls['search'], self.calls['llm']), (1, 2))
+
+    def test_knowledge_update_invalidates(self):
+        """Teste l'invalidation des résultats et réponses après une mise à jour du graphe"""
+        self.ask('Comment résilier ?')
+        self.service.fast_graphrag.revision += 1
+
+        result = self.ask('Comment résilier ?')
+
+        self.assertFalse(result['answer_cached'])
+        self.assertEqual(self.calls, {'encode': 1, 'search': 2, 'llm': 2})
+
+    def test_answers_are_scoped_to_llm_model(self):
+        """Teste qu'une réponse n'est réutilisée que pour le même fournisseur et le même modèle"""
+        self.ask('Comment résilier ?')
+        self.assertFalse(self.ask('Comment résilier ?', provider='openai')['answer_cached'])
+        self.assertTrue(self.ask('Comment résilier ?', provider='openai')['answer_cached'])
+
+        # L'Agent passe d'Ollama à l'API Mistral
+        self.service.llm_provider = 'mistral'
+        self.service.mistral_api_key = 'cle-de-test'
+        self.assertFalse(self.ask('Comment résilier ?')['answer_cached'])
+        self.assertEqual(self.calls['llm'], 3)
+
+    def test_fallback_answers_not_cached(self):
+        """Teste qu'une réponse de secours (sans LLM) n'est pas réutilisée"""
+        self.generated = False
+        self.ask('Comment résilier ?')
+        result = self.ask('Comment résilier ?')
+
+        self.assertFalse(result['answer_cached'])
+        self.assertEqual(self.calls['llm'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,253 @@
+"""
+Tests Unitaires - Rate limiter GCRA (backend)
+=============================================
+
+Validation de l'espacement des appels, de l'ordre FIFO, des budgets de tokens
+et de la prise en compte des en-têtes Retry-After / x-ratelimit-*.
+"""
+
+import unittest
+import importlib.util
+import asyncio
+import time
+import os
+
+# Chargement direct du module: le nom 'app' est aussi celui de streamlit_app/app.py
+_spec = importlib.util.spec_from_file_location(
+    'backend_rate_limiter',
+    os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'utils', 'rate_limiter.py')
+)
+rate_limiter = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(rate_limiter)
+
+RateLimiter = rate_limiter.RateLimiter
+MultiProviderRateLimiter = rate_limiter.MultiProviderRateLimiter
+AdaptiveRateLimiter = rate_limiter.AdaptiveRateLimiter
+parse_retry_after = rate_limiter.parse_retry_after
+parse_reset_time = rate_limiter.parse_reset_time
+estimate_tokens = rate_limiter.estimate_tokens
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Tests unitaires pour RateLimiter"""
+
+    def test_concurrent_callers_are_evenly_spaced(self):
+        """Teste 100 appelants concurrents: espacement régulier, sans rafale"""
+        limiter = RateLimiter(max_calls=1000, time_window=1, burst=1)
+        granted = []
+
+        async def caller():
+            await limiter.acquire()
+            granted.append(time.monotonic())
+
+        async def run():
+            await asyncio.gather(*(caller() for _ in range(100)))
+
+        start = time.monotonic()
+        asyncio.run(run())
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(granted), 100)
+        # 100 appels à 1ms d'intervalle: ~0.1s, pas de sérialisation sous verrou
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(limiter.total_calls, 100)
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_fifo_order(self):
+        """Teste que les appelants sont servis dans l'ordre d'arrivée"""
+        limiter = RateLimiter(max_calls=200, time_window=1)
+        order = []
+
+        async def caller(i):
+            await limiter.acquire()
+            order.append(i)
+
+        async def run():
+            await asyncio.gather(*(caller(i) for i in range(20)))
+
+        asyncio.run(run())
+        self.assertEqual(order, list(range(20)))
+
+    def test_burst(self):
+        """Teste que la tolérance de rafale laisse passer plusieurs appels immédiatement"""
+        limiter = RateLimiter(max_calls=10, time_window=60, burst=3)
+
+        async def run():
+            start = time.monotonic()
+            for _ in range(3):
+                await limiter.acquire()
+            return time.monotonic() - start
+
+        self.assertLess(asyncio.run(run()), 0.05)
+        self.assertEqual(limiter.get_remaining_calls(), 0)
+
+    def test_default_burst_is_full_window(self):
+        """Teste que, par défaut, une fenêtre complète passe sans attente"""
+        limiter = RateLimiter(max_calls=30, time_window=60)
+
+        async def run():
+            start = time.monotonic()
+            for _ in range(30):
+                await limiter.acquire()
+            return time.monotonic() - start
+
+        self.assertLess(asyncio.run(run()), 0.05)
+        self.assertEqual(limiter.get_remaining_calls(), 0)
+
+        limiter.set_rate(60)
+        self.assertEqual(limiter.burst, 60)
+
+    def test_retry_after_releases_reserved_slot(self):
+        """Teste qu'un appel repoussé par Retry-After rend son créneau initial"""
+        limiter = RateLimiter(max_calls=10, time_window=1, max_tokens=1000, burst=1)
+
+        async def run():
+            start = time.monotonic()
+            # Créneaux à 0, 0.1 et 0.2s; le second est bloqué jusqu'à 0.15s
+            waiters = [asyncio.create_task(limiter.acquire(tokens=100)) for _ in range(3)]
+            await asyncio.sleep(0)
+            limiter.block_for(0.15)
+            await asyncio.gather(*waiters)
+            return start
+
+        start = asyncio.run(run())
+        # 3 créneaux réservés au total, pas 4: le créneau abandonné est rendu
+        self.assertLess(limiter._request_tat - start, 0.35)
+        self.assertLess(limiter._token_tat - start, 0.35)
+        self.assertEqual(limiter.total_calls, 3)
+
+    def test_cancelled_waiter_releases_reserved_slot(self):
+        """Teste qu'un appel annulé pendant son attente rend son créneau"""
+        limiter = RateLimiter(max_calls=10, time_window=1, max_tokens=1000, burst=1)
+
+        async def run():
+            start = time.monotonic()
+            # Créneaux à 0, 0.1 et 0.2s; le second est annulé pendant son attente
+            waiters = [asyncio.create_task(limiter.acquire(tokens=100)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            waiters[1].cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            return start, waiters[1].cancelled()
+
+        start, cancelled = asyncio.run(run())
+        self.assertTrue(cancelled)
+        # 2 créneaux consommés, pas 3: le créneau annulé est rendu
+        self.assertLess(limiter._request_tat - start, 0.25)
+        self.assertLess(limiter._token_tat - start, 0.25)
+        self.assertEqual(limiter.total_calls, 2)
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_token_budget(self):
+        """Teste que le budget de tokens ralentit les appels coûteux"""
+        limiter = RateLimiter(max_calls=1000, time_window=1, max_tokens=1000)
+
+        async def run():
+            start = time.monotonic()
+            await limiter.acquire(tokens=1000)
+            await limiter.acquire(tokens=100)
+            return time.monotonic() - start
+
+        # Le second appel attend la recharge de 100 tokens (0.1s)
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+        self.assertEqual(limiter.total_tokens, 1100)
+
+    def test_retry_after_header_pauses_calls(self):
+        """Teste que Retry-After bloque les appels suivants"""
+        limiter = RateLimiter(max_calls=1000, time_window=1)
+
+        self.assertEqual(limiter.update_from_headers({'Retry-After': '0.1'}), 0.1)
+        self.assertEqual(limiter.get_remaining_calls(), 0)
+
+        async def run():
+            start = time.monotonic()
+            await limiter.acquire()
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+
+    def test_exhausted_budget_headers(self):
+        """Teste les en-têtes de budget épuisé (format OpenAI)"""
+        limiter = RateLimiter(max_calls=60)
+        pause = limiter.update_from_headers({
+            'x-ratelimit-remaining-requests': '0',
+            'x-ratelimit-reset-requests': '1.5s',
+            'x-ratelimit-remaining-tokens': '5000',
+            'x-ratelimit-reset-tokens': '6m0s',
+        })
+        self.assertAlmostEqual(pause, 1.5)
+        self.assertIsNone(limiter.update_from_headers({'x-ratelimit-remaining-requests': '12'}))
+
+    def test_set_rate_keeps_limiter(self):
+        """Teste le changement de débit sans recréer le limiteur"""
+        limiter = RateLimiter(max_calls=30)
+        limiter.set_rate(60, max_tokens=1000)
+        self.assertEqual(limiter.max_calls, 60)
+        self.assertEqual(limiter.max_tokens, 1000)
+        self.assertAlmostEqual(limiter.request_interval, 1.0)
+
+    def test_stats(self):
+        """Teste les statistiques"""
+        limiter = RateLimiter(max_calls=100, time_window=1)
+        asyncio.run(limiter.acquire())
+        stats = limiter.get_stats()
+        self.assertEqual(stats['total_calls'], 1)
+        self.assertEqual(stats['current_calls'], 1)
+        self.assertEqual(stats['waiting'], 0)
+
+
+class TestHeaderParsing(unittest.TestCase):
+    """Tests unitaires pour le parsing des en-têtes"""
+
+    def test_parse_retry_after(self):
+        """Teste Retry-After en secondes et en date HTTP"""
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertAlmostEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:30 GMT', now=1445412500.0), 10.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_estimate_tokens(self):
+        """Teste l'estimation des tokens (prompt + plafond de complétion)"""
+        self.assertEqual(estimate_tokens('a' * 400), 101)
+        self.assertEqual(estimate_tokens('a' * 400, max_output_tokens=300), 401)
+
+    def test_parse_reset_time(self):
+        """Teste les formats de reset (durée, secondes, RFC 3339)"""
+        self.assertAlmostEqual(parse_reset_time('6m0s'), 360.0)
+        self.assertAlmostEqual(parse_reset_time('20ms'), 0.02)
+        self.assertAlmostEqual(parse_reset_time('1h2m3.5s'), 3723.5)
+        self.assertEqual(parse_reset_time('12'), 12.0)
+        self.assertAlmostEqual(parse_reset_time('2015-10-21T07:28:30Z', now=1445412500.0), 10.0)
+        self.assertIsNone(parse_reset_time('later'))
+
+
+class TestProviderLimiters(unittest.TestCase):
+    """Tests unitaires pour les limiteurs multi-fournisseurs et adaptatifs"""
+
+    def test_multi_provider_token_budgets(self):
+        """Teste la création des limiteurs avec budgets de tokens par défaut"""
+        multi = MultiProviderRateLimiter()
+        asyncio.run(multi.acquire('openai', tokens=100))
+        limiter = multi.get_or_create_limiter('openai')
+        self.assertEqual(limiter.max_tokens, 150000)
+        self.assertEqual(limiter.total_tokens, 100)
+        self.assertEqual(multi.update_from_headers('openai', {'retry-after': '0'}), None)
+
+    def test_adaptive_rate_updates_in_place(self):
+        """Teste que l'adaptation modifie le débit du limiteur existant"""
+        adaptive = AdaptiveRateLimiter(initial_rate=30, min_rate=5, max_rate=100)
+        limiter = adaptive.limiter
+
+        adaptive.report_failure(is_rate_limit_error=True, headers={'Retry-After': '1'})
+        self.assertIs(adaptive.limiter, limiter)
+        self.assertEqual(adaptive.get_current_rate(), 21)
+        self.assertEqual(limiter.max_calls, 21)
+        self.assertEqual(limiter.get_remaining_calls(), 0)
+
+        for _ in range(10):
+            adaptive.report_success()
+        self.assertEqual(limiter.max_calls, 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Tests Unitaires - Cache par étape
+=================================
+
+Validation des clés chaînées, du hash de contenu, des niveaux mémoire et
+disque et de l'éviction bornée en taille.
+"""
+
+import unittest
+import sys
+import os
+import io
+import tempfile
+import shutil
+import pandas as pd
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+from services.stage_cache import StageCache, hash_file, hash_dataframe, stage_key
+
+
+class TestStageCache(unittest.TestCase):
+    """Tests unitaires pour StageCache"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = StageCache(cache_dir=self.tmp_dir)
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_stage_keys_are_chained(self):
+        """Test: Clés stables, dépendantes de l'amont et des paramètres"""
+        clean = stage_key('clean', 'abc', column='text', remove_urls=True)
+
+        self.assertTrue(clean.startswith('clean-'))
+        self.assertEqual(clean, stage_key('clean', 'abc', remove_urls=True, column='text'))
+        self.assertNotEqual(clean, stage_key('clean', 'abc', column='text', remove_urls=False))
+        self.assertNotEqual(clean, stage_key('clean', 'abd', column='text', remove_urls=True))
+        self.assertNotEqual(stage_key('classify', clean, mode='fast'),
+                            stage_key('classify', clean, mode='balanced'))
+
+    def test_hash_file(self):
+        """Test: Hash identique pour un chemin et un fichier en mémoire, position restaurée"""
+        content = b"text\nbonjour free\n" * 100
+        path = os.path.join(self.tmp_dir, 'tweets.csv')
+        with open(path, 'wb') as f:
+            f.write(content)
+
+        buffer = io.BytesIO(content)
+        buffer.seek(5)
+
+        self.assertEqual(hash_file(path), hash_file(buffer))
+        self.assertEqual(buffer.tell(), 5)
+        self.assertNotEqual(hash_file(path), hash_file(io.BytesIO(content + b"x")))
+
+    def test_hash_dataframe(self):
+        """Test: Hash sensible au contenu du DataFrame"""
+        df = pd.DataFrame({'text': ['a', 'b'], 'score': [1, 2]})
+        modified = df.copy()
+        modified.loc[1, 'score'] = 3
+
+        self.assertEqual(hash_dataframe(df), hash_dataframe(df.copy()))
+        self.assertNotEqual(hash_dataframe(df), hash_dataframe(modified))
+
+    def test_memory_and_disk_hits(self):
+        """Test: Valeur relue depuis le disque par une nouvelle instance"""
+        df = pd.DataFrame({'sentiment': ['positif', 'negatif']})
+        key = stage_key('classify', 'abc', mode='fast')
+
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, (df, {'total': 2}))
+
+        cached_df, stats = self.cache.get(key)
+        self.assertIs(cached_df, df)
+
+        other = StageCache(cache_dir=self.tmp_dir)
+        disk_df, disk_stats = other.get(key)
+        pd.testing.assert_frame_equal(disk_df, df)
+        self.assertEqual(disk_stats, {'total': 2})
+        self.assertEqual(other.stats['classify']['hits'], 1)
+        self.assertEqual(self.cache.stats['classify'], {'hits': 1, 'misses': 1})
+
+    def test_get_or_compute(self):
+        """Test: Calcul exécuté une seule fois, None jamais mis en cache"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'total_tweets': 10}
+
+        key = stage_key('kpis', 'abc')
+        self.assertEqual(self.cache.get_or_compute(key, compute), {'total_tweets': 10})
+        self.assertEqual(self.cache.get_or_compute(key, compute), {'total_tweets': 10})
+        self.assertEqual(len(calls), 1)
+
+        self.cache.get_or_compute(stage_key('parse', 'bad'), lambda: None)
+        self.assertEqual(self.cache.get(stage_key('parse', 'bad'), 'absent'), 'absent')
+
+    def test_disk_eviction(self):
+        """Test: Taille sur disque bornée, entrées les plus anciennes évincées"""
+        cache = StageCache(cache_dir=self.tmp_dir, max_bytes=50_000, memory_entries=1)
+        payload = b"x" * 20_000
+
+        for i in range(5):
+            cache.put(stage_key('figure', 'abc', chart=i), payload)
+
+        self.assertLessEqual(cache.disk_usage(), 50_000)
+        self.assertIsNotNone(cache.get(stage_key('figure', 'abc', chart=4)))
+        self.assertIsNone(cache.get(stage_key('figure', 'abc', chart=0)))
+
+        cache.clear()
+        self.assertEqual(cache.disk_usage(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
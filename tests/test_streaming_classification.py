@@ -0,0 +1,125 @@
+"""
+Tests Unitaires - Classification en flux
+========================================
+
+Validation de la lecture par chunks, des KPIs cumulés, de l'écriture des
+résultats sur disque et de l'aperçu borné en mémoire.
+"""
+
+import unittest
+import sys
+import os
+import io
+import tempfile
+import pandas as pd
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+from services.streaming_classification import (
+    StreamingClassifier, RunningKPIs, iter_file_chunks, read_progress,
+    save_dataframe, load_dataframe, discard_dataframe
+)
+
+
+def classify_chunk(chunk, text_column):
+    """Classificateur factice: réclamation si 'panne' dans le texte"""
+    result = chunk.copy()
+    is_panne = result[text_column].str.contains('panne')
+    result['is_claim'] = is_panne.astype(int)
+    result['sentiment'] = is_panne.map({True: 'neg', False: 'neu'})
+    result['urgence'] = is_panne.map({True: 'haute', False: 'basse'})
+    result['topics'] = [['fibre', 'mobile'] if p else ['autre'] for p in is_panne]
+    result['incident'] = 'information'
+    result['confidence'] = is_panne.map({True: 0.9, False: 0.6})
+    return result
+
+
+class TestStreamingClassification(unittest.TestCase):
+    """Tests unitaires pour l'API de classification en flux"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            'id': range(250),
+            'text': [f"panne réseau {i}" if i % 5 == 0 else f"tweet éà {i}" for i in range(250)]
+        })
+        self.upload = io.BytesIO(self.df.to_csv(index=False).encode('latin-1'))
+        self.upload.name = 'tweets.csv'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iter_file_chunks_csv(self):
+        """Test: CSV lu par chunks avec détection d'encodage"""
+        chunks = list(iter_file_chunks(self.upload, chunk_size=100))
+
+        self.assertEqual([len(c) for c in chunks], [100, 100, 50])
+        self.assertEqual(pd.concat(chunks)['text'].tolist(), self.df['text'].tolist())
+        self.assertEqual(chunks[-1].index[-1], 249)
+
+    def test_stream_writes_results_to_disk(self):
+        """Test: Résultats partiels produits chunk par chunk et écrits sur disque"""
+        streamer = StreamingClassifier(classify_chunk, output_dir=self.tmp.name, preview_rows=30)
+
+        partials = list(streamer.stream(iter_file_chunks(self.upload, chunk_size=100), 'text',
+                                        progress_source=self.upload))
+
+        self.assertEqual([p.rows_done for p in partials], [100, 200, 250])
+        self.assertEqual(partials[-1].progress, 1.0)
+        self.assertEqual(partials[0].metrics['claims'], 20)
+        self.assertEqual(partials[-1].metrics['claims'], 50)
+        self.assertEqual(len(streamer.preview), 30)
+
+        saved = pd.read_csv(partials[-1].output_path)
+        self.assertEqual(len(saved), 250)
+        self.assertEqual(saved.loc[0, 'topics'], 'fibre, mobile')
+        self.assertEqual(saved['text'].tolist(), self.df['text'].tolist())
+
+    def test_stream_is_lazy(self):
+        """Test: Un chunk n'est lu qu'après classification du précédent"""
+        consumed = []
+
+        def chunks():
+            for start in range(0, 250, 50):
+                consumed.append(start)
+                yield self.df.iloc[start:start + 50]
+
+        streamer = StreamingClassifier(classify_chunk, output_dir=self.tmp.name)
+        stream = streamer.stream(chunks(), 'text')
+
+        next(stream)
+        self.assertEqual(consumed, [0])
+        next(stream)
+        self.assertEqual(consumed, [0, 50])
+
+    def test_running_kpis_match_full_computation(self):
+        """Test: KPIs cumulés identiques au calcul sur le DataFrame complet"""
+        full = classify_chunk(self.df, 'text')
+        running = RunningKPIs()
+        for start in range(0, 250, 70):
+            running.update(full.iloc[start:start + 70])
+        metrics = running.to_metrics()
+
+        self.assertEqual(metrics['total_tweets'], 250)
+        self.assertEqual(metrics['negative_sentiments'], 50)
+        self.assertEqual(metrics['high_urgency'], 50)
+        self.assertAlmostEqual(metrics['avg_confidence'], full['confidence'].mean())
+        self.assertEqual(metrics['topic_dist'].to_dict(), {'autre': 200, 'fibre': 50, 'mobile': 50})
+        self.assertEqual(int(metrics['confidence_hist'].sum()), 250)
+
+    def test_session_dataframe_on_disk(self):
+        """Test: DataFrame de session sauvegardé puis rechargé sans perte"""
+        df = self.df.assign(date=pd.Timestamp('2024-01-01'))
+        path = save_dataframe(df, 'cleaned', output_dir=self.tmp.name)
+
+        pd.testing.assert_frame_equal(load_dataframe(path), df)
+        self.assertEqual(read_progress(io.BytesIO(b'')), None)
+
+        discard_dataframe(path)
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests Unitaires - Cache de tokenisation des datasets (backend)
+==============================================================
+
+Validation de TokenizationCache (tokenisation unique par tokenizer,
+longueur maximale et contenu du split, tableaux mappés en mémoire), du
+padding dynamique et de l'échantillonnage groupé par longueur.
+"""
+
+import unittest
+import importlib.util
+import os
+import pickle
+import sys
+import tempfile
+
+import numpy as np
+
+# Chargement direct du module: le nom 'app' est aussi celui de streamlit_app/app.py
+_spec = importlib.util.spec_from_file_location(
+    'backend_tokenization_cache',
+    os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'services', 'tokenization_cache.py')
+)
+tokenization_cache = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = tokenization_cache  # Requis par pickle
+_spec.loader.exec_module(tokenization_cache)
+
+TokenizationCache = tokenization_cache.TokenizationCache
+LengthGroupedSampler = tokenization_cache.LengthGroupedSampler
+pad_sequences = tokenization_cache.pad_sequences
+
+
+class WordTokenizer:
+    """Tokenizer de test: un token par mot, entouré de <s> (0) et </s> (2)"""
+
+    name_or_path = 'test-words'
+
+    def __init__(self):
+        self.calls = 0
+        self.vocab = {}
+
+    def __len__(self):
+        return 1000
+
+    def __call__(self, texts, truncation=True, max_length=512, padding=False):
+        self.calls += 1
+        input_ids = []
+        for text in texts:
+            ids = [self.vocab.setdefault(word, len(self.vocab) + 3) for word in text.split()]
+            input_ids.append([0] + ids[:max_length - 2] + [2])
+        return {'input_ids': input_ids}
+
+
+TEXTS = ['box en panne', 'merci', 'pas de réseau depuis ce matin à Paris', 'facture trop élevée ce mois']
+
+
+class TestTokenizationCache(unittest.TestCase):
+    """Tests unitaires pour TokenizationCache et TokenizedSplit"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tokenizer = WordTokenizer()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tokenized_once(self):
+        """Teste la relecture depuis le disque, sans nouvel appel au tokenizer"""
+        first = TokenizationCache(self.tmp.name, batch_size=3).encode(self.tokenizer, TEXTS, max_length=6)
+        self.assertEqual(self.tokenizer.calls, 2)  # Deux lots de 3 textes maximum
+
+        second = TokenizationCache(self.tmp.name).encode(self.tokenizer, TEXTS, max_length=6)
+
+        self.assertEqual(self.tokenizer.calls, 2)
+        self.assertIsInstance(second.tokens, np.memmap)
+        self.assertEqual(len(second), 4)
+        self.assertEqual(second.lengths.tolist(), [5, 3, 6, 6])  # Troncature à max_length
+        for i in range(len(TEXTS)):
+            self.assertEqual(second[i].tolist(), first[i].tolist())
+        self.assertEqual(second[1].tolist(), [0, 6, 2])
+
+    def test_key_depends_on_content_and_max_length(self):
+        """Teste une nouvelle tokenisation si le split ou max_length change"""
+        cache = TokenizationCache(self.tmp.name)
+        cache.encode(self.tokenizer, TEXTS, max_length=6)
+        cache.encode(self.tokenizer, TEXTS, max_length=8)
+        cache.encode(self.tokenizer, TEXTS[:3] + ['autre texte'], max_length=8)
+        cache.encode(self.tokenizer, TEXTS, max_length=8)
+
+        self.assertEqual(self.tokenizer.calls, 3)
+        self.assertEqual(len([p for p in os.listdir(self.tmp.name) if not p.startswith('.')]), 3)
+
+    def test_pickle_reopens_memory_map(self):
+        """Teste la sérialisation (workers DataLoader) par chemin et non par copie"""
+        split = TokenizationCache(self.tmp.name).encode(self.tokenizer, TEXTS)
+        payload = pickle.dumps(split)
+
+        self.assertLess(len(payload), 500)
+        restored = pickle.loads(payload)
+        self.assertEqual(restored[2].tolist(), split[2].tolist())
+
+
+class TestBatching(unittest.TestCase):
+    """Tests unitaires pour pad_sequences et LengthGroupedSampler"""
+
+    def test_pad_sequences(self):
+        """Teste le padding à la plus longue séquence du lot"""
+        input_ids, attention_mask = pad_sequences([[5, 6, 7], [8]], pad_token_id=1)
+        self.assertEqual(input_ids.tolist(), [[5, 6, 7], [8, 1, 1]])
+        self.assertEqual(attention_mask.tolist(), [[1, 1, 1], [1, 0, 0]])
+        self.assertEqual(input_ids.dtype, np.int64)
+
+        input_ids, _ = pad_sequences([[5, 6, 7]], pad_token_id=1, pad_to_multiple_of=8)
+        self.assertEqual(input_ids.shape, (1, 8))
+
+    def test_length_grouped_sampler(self):
+        """Teste la couverture, le regroupement par longueur et le mélange par epoch"""
+        rng = np.random.default_rng(0)
+        lengths = rng.integers(5, 200, size=1000)
+        sampler = LengthGroupedSampler(lengths, batch_size=16, mega_batch_mult=10, seed=1)
+
+        epoch_0 = list(sampler)
+        epoch_1 = list(sampler)
+
+        self.assertEqual(sorted(epoch_0), list(range(1000)))
+        self.assertNotEqual(epoch_0, epoch_1)
+        self.assertEqual(epoch_0, sampler.indices(0).tolist())  # Reproductible
+        self.assertEqual(lengths[epoch_0[0]], lengths.max())  # Lot le plus long en premier
+
+        def padded_positions(order):
+            return sum(lengths[order[i:i + 16]].max() * len(order[i:i + 16]) for i in range(0, 1000, 16))
+
+        random_order = rng.permutation(1000).tolist()
+        self.assertLess(padded_positions(epoch_0), 0.7 * padded_positions(random_order))
+
+
+if __name__ == '__main__':
+    unittest.main()
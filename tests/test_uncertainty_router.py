@@ -0,0 +1,148 @@
+"""
+Tests Unitaires - Routeur par incertitude
+=========================================
+
+Validation de la sélection des tweets incertains, du respect des budgets
+LLM (tweets et euros), du bilan de gain attendu et du report du budget
+d'un chunk à l'autre dans le pipeline.
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour les imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
+
+from services.uncertainty_router import UncertaintyRouter, RoutingReport, ChunkedBudgetRouter
+from services.pipelined_scheduler import PipelinedScheduler
+
+
+class TestUncertaintyRouter(unittest.TestCase):
+    """Tests unitaires pour UncertaintyRouter"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.router = UncertaintyRouter(confidence_threshold=0.75, llm_accuracy=0.90,
+                                        disagreement_penalty=0.30, cost_per_tweet_eur=0.001)
+        self.df = pd.DataFrame({
+            'bert_confidence': [0.95, 0.50, 0.70, 0.99, 0.90, 0.60],
+            'sentiment': ['neutre', 'negatif', 'positif', 'neutre', 'positif', 'neutre'],
+            'is_claim': ['non', 'non', 'non', 'non', 'oui', 'non'],
+            'urgence': ['faible', 'faible', 'faible', 'faible', 'faible', 'faible'],
+        }, index=[10, 11, 12, 13, 14, 15])
+
+    def test_only_uncertain_tweets_routed(self):
+        """Test: Les tweets confiants et cohérents ne sont jamais envoyés au LLM"""
+        selected, report = self.router.route(self.df, budget_tweets=6)
+
+        self.assertEqual(set(selected), {11, 12, 14, 15})
+        self.assertEqual(report.candidates, 4)
+        self.assertEqual(report.selected, 4)
+
+    def test_ranked_by_expected_gain(self):
+        """Test: Sélection par gain attendu décroissant"""
+        selected, _ = self.router.route(self.df, budget_tweets=2)
+
+        # Gains: 11 -> 0.40, 15 -> 0.30, 14 -> 0.90 - 0.63 = 0.27, 12 -> 0.20
+        self.assertEqual(selected.tolist(), [11, 15])
+
+    def test_disagreement_with_rules(self):
+        """Test: Réclamation ou urgence haute classée positive = désaccord"""
+        df = pd.DataFrame({
+            'bert_confidence': [0.95, 0.95, 0.95],
+            'sentiment': ['positif', 'positif', 'negatif'],
+            'is_claim': [1, 0, 1],
+            'urgence': ['basse', 'haute', 'haute'],
+        })
+
+        scores = self.router.score(df)
+
+        self.assertEqual(scores['disagreement'].tolist(), [True, True, False])
+        self.assertEqual(scores['candidate'].tolist(), [True, True, False])
+        self.assertAlmostEqual(scores.loc[0, 'p_bert_correct'], 0.95 * 0.70)
+
+    def test_budget_in_euros(self):
+        """Test: Le budget le plus contraignant (euros ou tweets) s'applique"""
+        self.assertEqual(self.router.budget_for(1000, budget_eur=0.003), 3)
+        self.assertEqual(self.router.budget_for(1000, budget_tweets=2, budget_eur=0.003), 2)
+        self.assertEqual(self.router.budget_for(1000), 200)
+        self.assertEqual(self.router.budget_for(5, budget_tweets=50), 5)
+
+        selected, report = self.router.route(self.df, budget_eur=0.001)
+        self.assertEqual(selected.tolist(), [11])
+        self.assertAlmostEqual(report.cost_eur, 0.001)
+
+    def test_report(self):
+        """Test: Bilan du routage et fusion par chunks"""
+        _, report = self.router.route(self.df, budget_tweets=2)
+
+        self.assertAlmostEqual(report.expected_gain, 0.70)
+        self.assertAlmostEqual(report.expected_gain_per_call, 0.35)
+        self.assertAlmostEqual(report.expected_accuracy_after - report.expected_accuracy_before, 0.70 / 6)
+
+        merged = RoutingReport().merge(report).merge(report)
+        self.assertEqual(merged.total_tweets, 12)
+        self.assertEqual(merged.selected, 4)
+        self.assertAlmostEqual(merged.expected_gain_per_call, 0.35)
+        self.assertAlmostEqual(merged.expected_accuracy_before, report.expected_accuracy_before)
+        self.assertAlmostEqual(merged.to_dict()['sampled_fraction'], round(4 / 12, 4))
+
+    def test_missing_columns(self):
+        """Test: Sans colonne de confiance, tous les tweets sont incertains"""
+        selected, report = self.router.route(pd.DataFrame({'text': ['a', 'b', 'c']}), budget_tweets=1)
+
+        self.assertEqual(len(selected), 1)
+        self.assertEqual(report.candidates, 3)
+
+
+
+class TestChunkedBudgetRouter(unittest.TestCase):
+    """Tests unitaires pour ChunkedBudgetRouter"""
+
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.router = UncertaintyRouter(confidence_threshold=0.75, llm_accuracy=0.90,
+                                        cost_per_tweet_eur=0.001)
+
+    def _run(self, confidences, budget, chunk_size=1000):
+        """Pipeline complet (chunks + reliquat final), renvoie les tweets routés et le bilan"""
+        df = pd.DataFrame({'bert_confidence': confidences, 'sentiment': 'neutre'})
+        budget_router = ChunkedBudgetRouter(self.router, len(df), budget)
+        _, routed, _ = PipelinedScheduler(chunk_size=chunk_size).run(
+            df,
+            cpu_stage=lambda chunk: chunk,
+            select_stage=budget_router.route,
+            remote_stage=lambda sample: sample,
+            final_stage=budget_router.flush,
+        )
+        return (routed if routed is not None else df.iloc[:0]), budget_router.report
+
+    def test_total_routed_equals_budget(self):
+        """Test: Petit budget sur beaucoup de chunks, entièrement consommé"""
+        confidences = np.random.default_rng(0).uniform(0.3, 0.7, size=100_000)
+
+        for budget in (50, 120):
+            routed, report = self._run(confidences, budget)
+            self.assertEqual(len(routed), budget)
+            self.assertFalse(routed.index.duplicated().any())
+            self.assertEqual(report.selected, budget)
+            self.assertEqual(report.budget_tweets, budget)
+            self.assertEqual(report.total_tweets, 100_000)
+            self.assertAlmostEqual(report.cost_eur, budget * 0.001)
+
+    def test_uncertain_tweets_in_one_chunk(self):
+        """Test: Tweets incertains concentrés dans un seul chunk, tous routés"""
+        confidences = np.full(100_000, 0.99)
+        confidences[5_000:6_000] = 0.50
+
+        routed, report = self._run(confidences, budget=1_000)
+
+        self.assertEqual(sorted(routed.index), list(range(5_000, 6_000)))
+        self.assertEqual(report.candidates, 1_000)
+        self.assertAlmostEqual(report.expected_gain, 1_000 * 0.40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,7 @@ from services.mistral_classifier import (
     classify_single_tweet
 )
 from services.tweet_cleaner import TweetCleaner
+from services.multi_model_orchestrator import MultiModelOrchestrator
 
 
 class TestMistralClassifier(unittest.TestCase):
@@ -209,6 +210,132 @@ class TestCleanerConfiguration(unittest.TestCase):
         self.assertIn('#hashtag', cleaned)  # Hashtag préservé
 
 
+class TestOrchestratorAggregation(unittest.TestCase):
+    """Tests de la fusion vectorisée des résultats de l'orchestrateur"""
+    
+    def setUp(self):
+        """Setup avant chaque test"""
+        self.orchestrator = MultiModelOrchestrator(mode='balanced')
+        self.results = pd.DataFrame({
+            'bert_confidence': [0.9, 0.6, None, 0.8],
+            'is_claim': [1, 0, 1, 0],
+            'urgence': ['haute', 'basse', 'moyenne', 'basse']
+        }, index=[10, 11, 12, 13])
+    
+    def test_merge_mistral_results(self):
+        """Test: Fusion alignée sur l'index des résultats Mistral"""
+        mistral = pd.DataFrame({
+            'categorie': ['produit', 'service', 'autre'],
+            'score_confiance': [0.95, None, 0.5],
+            'is_claim': [0, 1, 1]
+        }, index=[12, 10, 99])  # 99 absent du DataFrame complet
+        
+        self.orchestrator._merge_mistral_results(self.results, mistral)
+        
+        self.assertEqual(self.results.loc[[10, 12], 'topics'].tolist(), ['service', 'produit'])
+        self.assertTrue(self.results.loc[[11, 13], 'topics'].isna().all())
+        self.assertAlmostEqual(self.results.loc[12, 'confidence'], 0.95)
+        self.assertEqual(self.results['is_claim'].tolist(), [1, 0, 0, 0])
+        self.assertEqual(self.results['is_claim'].dtype, 'int64')
+        self.assertNotIn(99, self.results.index)
+    
+    def test_report_on_categorical_labels(self):
+        """Test: Rapport sur colonnes catégorielles, sans catégories absentes"""
+        from services.label_schema import apply_label_schema
+        
+        df = apply_label_schema(pd.DataFrame({
+            'sentiment': ['negatif', 'negatif', 'positif'],
+            'is_claim': ['oui', 'non', 'oui'],
+        }))
+        report = self.orchestrator.get_classification_report(df)
+        
+        self.assertEqual(report['sentiment_distribution'], {'negatif': 2, 'positif': 1})
+        self.assertEqual(report['claims_count'], 2)
+    
+    def test_aggregated_confidence(self):
+        """Test: Confiance agrégée BERT + règles + Mistral"""
+        self.results['mistral_confidence'] = [None, 0.5, 0.9, None]
+        
+        confidence = self.orchestrator._calculate_aggregated_confidence(self.results)
+        
+        expected = [(0.9 + 0.85) / 2, (0.6 + 0.70 + 0.5) / 3, (0.85 + 0.9) / 2, (0.8 + 0.70) / 2]
+        for value, exp in zip(confidence, expected):
+            self.assertAlmostEqual(value, exp)
+    
+    def test_classify_intelligent_pipeline(self):
+        """Test: Phases BERT/règles et Mistral pipelinées de bout en bout"""
+        df = pd.DataFrame({'text_cleaned': [f"panne {i}" if i % 3 == 0 else f"merci {i}" for i in range(30)]},
+                          index=range(100, 130))
+        
+        bert = MagicMock()
+        bert.predict_with_confidence.side_effect = lambda texts, show_progress=False: pd.DataFrame({
+            'sentiment': ['negatif' if t.startswith('panne') else 'positif' for t in texts],
+            'sentiment_confidence': [0.9] * len(texts)
+        })
+        rules = MagicMock()
+        rules.classify_batch_extended.side_effect = lambda texts: pd.DataFrame({
+            'is_claim': [int(t.startswith('panne')) for t in texts],
+            'urgence': ['haute' if t.startswith('panne') else 'basse' for t in texts],
+            'topics': ['reseau'] * len(texts),
+            'incident': ['aucun'] * len(texts)
+        })
+        mistral = MagicMock()
+        mistral.classify_dataframe.side_effect = lambda chunk, col, show_progress=False: chunk.assign(
+            categorie='produit', score_confiance=0.95
+        )
+        
+        orchestrator = MultiModelOrchestrator(mode='precise')
+        orchestrator.bert, orchestrator.rules, orchestrator.mistral = bert, rules, mistral
+        orchestrator.models_loaded = True
+        orchestrator.scheduler.chunk_size = 8
+        
+        results = orchestrator.classify_intelligent(df, 'text_cleaned')
+        
+        self.assertEqual(results.index.tolist(), df.index.tolist())
+        self.assertEqual(results.loc[100, 'sentiment'], 'negatif')
+        self.assertEqual(results.loc[101, 'is_claim'], 0)
+        self.assertTrue((results['topics'] == 'produit').all())
+        self.assertEqual(orchestrator.last_pipeline_stats.chunks, 4)
+        self.assertEqual(orchestrator.last_pipeline_stats.sampled_rows, 30)
+        self.assertNotIn('topics_preliminary', results.columns)
+    
+    def test_balanced_routes_only_uncertain_tweets(self):
+        """Test: Mode balanced, seuls les tweets incertains vont à Mistral dans le budget"""
+        df = pd.DataFrame({'text_cleaned': [f"tweet {i}" for i in range(20)]}, index=range(200, 220))
+        
+        bert = MagicMock()
+        bert.predict_with_confidence.side_effect = lambda texts, show_progress=False: pd.DataFrame({
+            'sentiment': ['neutre'] * len(texts),
+            'sentiment_confidence': [0.5 if t.endswith(('3', '7')) else 0.95 for t in texts]
+        })
+        rules = MagicMock()
+        rules.classify_batch_extended.side_effect = lambda texts: pd.DataFrame({
+            'is_claim': [0] * len(texts), 'urgence': ['basse'] * len(texts),
+            'topics': ['reseau'] * len(texts), 'incident': ['aucun'] * len(texts)
+        })
+        mistral = MagicMock()
+        mistral.classify_dataframe.side_effect = lambda chunk, col, show_progress=False: chunk.assign(
+            categorie='produit', score_confiance=0.95
+        )
+        
+        orchestrator = MultiModelOrchestrator(mode='balanced', llm_budget_tweets=10)
+        orchestrator.bert, orchestrator.rules, orchestrator.mistral = bert, rules, mistral
+        orchestrator.models_loaded = True
+        orchestrator.scheduler.chunk_size = 10
+        
+        results = orchestrator.classify_intelligent(df, 'text_cleaned')
+        
+        routed = results.index[results['topics'] == 'produit'].tolist()
+        self.assertEqual(routed, [203, 207, 213, 217])
+        self.assertEqual(orchestrator.last_routing_report.selected, 4)
+        self.assertEqual(orchestrator.last_routing_report.budget_tweets, 10)
+    
+    def test_aggregated_confidence_default(self):
+        """Test: Confiance par défaut sans aucun score"""
+        confidence = self.orchestrator._calculate_aggregated_confidence(pd.DataFrame({'text': ['a', 'b']}))
+        self.assertEqual(confidence.tolist(), [0.70, 0.70])
+
+
 if __name__ == '__main__':
     # Exécuter les tests
     unittest.main(verbosity=2)
@@ -6,6 +6,8 @@ Validation complète du module de nettoyage de tweets.
 """
 
 import unittest
+import importlib.util
+import tempfile
 import pandas as pd
 import sys
 import os
@@ -14,6 +16,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app'))
 
 from services.tweet_cleaner import TweetCleaner, clean_tweet_text, batch_clean_tweets
+from services.chunked_cleaning import ChunkedCleaningPipeline, merge_cleaning_stats, quality_distribution
 
 
 class TestTweetCleaner(unittest.TestCase):
@@ -114,6 +117,31 @@ class TestTweetCleaner(unittest.TestCase):
         self.assertNotIn('http://test.com', cleaned)
         self.assertIn('panne', cleaned)
     
+    def test_remove_duplicates_does_not_mutate_input(self):
+        """Test: La déduplication ne modifie pas le DataFrame d'entrée"""
+        df = pd.DataFrame({'text': self.sample_tweets})
+        TweetCleaner.remove_duplicates(df, 'text')
+        
+        self.assertEqual(list(df.columns), ['text'])
+    
+    def test_clean_series_matches_clean_text(self):
+        """Test: Le nettoyage vectorisé est identique au nettoyage ligne par ligne"""
+        texts = pd.Series(self.sample_tweets + [
+            "éàç réseau \t  nul  ", "© Free #️⃣", None, 42, "", "@userhttp://x"
+        ])
+        
+        expected = [self.cleaner.clean_text(t) for t in texts]
+        self.assertEqual(self.cleaner.clean_series(texts).tolist(), expected)
+    
+    def test_process_dataframe_parallel_chunks(self):
+        """Test: Le mode multiprocessus donne le même résultat"""
+        df = pd.DataFrame({'text': [f"@Free tweet {i} réseau 😊" for i in range(40)]})
+        df_single, _ = self.cleaner.process_dataframe(df, 'text')
+        df_multi, stats = self.cleaner.process_dataframe(df, 'text', n_jobs=2, chunk_size=10)
+        
+        self.assertEqual(stats['total_cleaned'], 40)
+        self.assertEqual(df_multi['text_cleaned'].tolist(), df_single['text_cleaned'].tolist())
+    
     def test_batch_clean(self):
         """Test: Nettoyage par lot"""
         tweets = ["@Free test", "http://example.com info"]
@@ -164,6 +192,101 @@ class TestTweetCleanerEdgeCases(unittest.TestCase):
         self.assertGreater(len(cleaned), 0)
 
 
+class TestChunkedCleaningPipeline(unittest.TestCase):
+    """Tests du nettoyage parallèle par chunks"""
+    
+    def setUp(self):
+        # 30 tweets dont 10 doublons répartis dans des chunks différents
+        tweets = [f"@Free tweet numéro {i} 😊" for i in range(20)]
+        self.df = pd.DataFrame({'text': tweets + tweets[:10]})
+    
+    def test_cross_chunk_deduplication(self):
+        """Test: Les doublons entre chunks sont supprimés"""
+        pipeline = ChunkedCleaningPipeline(n_workers=2, chunk_size=8)
+        df_cleaned, stats = pipeline.process_dataframe(self.df)
+        
+        self.assertEqual(len(df_cleaned), 20)
+        self.assertEqual(stats['total_original'], 30)
+        self.assertEqual(stats['duplicates_removed'], 10)
+        self.assertEqual(stats['total_cleaned'], 20)
+        self.assertEqual(stats['chunks'], 4)
+        # L'ordre de lecture est conservé
+        self.assertEqual(df_cleaned['text'].tolist(), self.df['text'].tolist()[:20])
+    
+    def test_merge_cleaning_stats_weighted_lengths(self):
+        """Test: Les longueurs moyennes sont pondérées par chunk"""
+        merged = merge_cleaning_stats([
+            {'total_original': 10, 'total_cleaned': 10, 'avg_length_before': 10.0, 'avg_length_after': 5.0},
+            {'total_original': 30, 'total_cleaned': 30, 'avg_length_before': 20.0, 'avg_length_after': 15.0},
+        ])
+        
+        self.assertEqual(merged['total_original'], 40)
+        self.assertAlmostEqual(merged['avg_length_before'], 17.5)
+        self.assertAlmostEqual(merged['avg_length_after'], 12.5)
+    
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow requis pour Parquet")
+    def test_run_writes_parquet_shards(self):
+        """Test: Le CSV est nettoyé en shards Parquet"""
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'raw.csv')
+            self.df.to_csv(csv_path, index=False)
+            
+            pipeline = ChunkedCleaningPipeline(n_workers=2, chunk_size=8)
+            stats = pipeline.run(csv_path, os.path.join(tmp, 'shards'))
+            
+            shards = [os.path.join(tmp, 'shards', name) for name in stats['shards']]
+            df_out = pd.concat([pd.read_parquet(path) for path in shards], ignore_index=True)
+            self.assertEqual(len(shards), 4)
+            self.assertEqual(len(df_out), 20)
+            self.assertIn('text_cleaned', df_out.columns)
+
+    def test_data_processor_engine_stats(self):
+        """Test: Le moteur data_processor calcule doublons et longueurs comme TweetCleaner"""
+        df = pd.DataFrame({'text': ["Bonjour http://t.co/x", "Bonjour http://t.co/x", None, "Réseau en panne"]})
+        pipeline = ChunkedCleaningPipeline(n_workers=1, chunk_size=10, engine='data_processor')
+        df_cleaned, stats = pipeline.process_dataframe(df)
+        
+        self.assertEqual(stats['empty_tweets'], 1)
+        self.assertEqual(stats['duplicates_removed'], 1)
+        self.assertEqual(stats['total_cleaned'], len(df_cleaned))
+        self.assertAlmostEqual(stats['avg_length_before'], (21 + 15) / 2)
+        expected_after = df_cleaned['text'].astype(str).str.len().sum() / 2
+        self.assertAlmostEqual(stats['avg_length_after'], expected_after)
+        self.assertNotIn('__raw_length__', df_cleaned.columns)
+        self.assertEqual(sum(stats['quality_distribution'].values()), len(df_cleaned))
+        
+        # Déduplication entre chunks sur le texte brut, comme le moteur tweet_cleaner
+        df = pd.DataFrame({'text': ["Bonjour http://t.co/a", "Bonjour http://t.co/b", "Bonjour http://t.co/a"]})
+        pipeline = ChunkedCleaningPipeline(n_workers=1, chunk_size=1, engine='data_processor')
+        df_cleaned, stats = pipeline.process_dataframe(df)
+        self.assertEqual(len(df_cleaned), 2)
+        self.assertEqual(stats['duplicates_removed'], 1)
+        self.assertNotIn('__raw_hash__', df_cleaned.columns)
+    
+    def test_quality_distribution(self):
+        """Test: Score de qualité = part du texte conservée, par classes de 10"""
+        distribution = quality_distribution(pd.Series([100, 10, 40, 0]), pd.Series([100, 5, 39, 0]))
+        
+        self.assertEqual(distribution[100], 1)
+        self.assertEqual(distribution[50], 1)
+        self.assertEqual(distribution[90], 1)
+        self.assertEqual(distribution[0], 1)
+        self.assertEqual(sum(distribution.values()), 4)
+    
+    def test_malformed_lines_are_counted(self):
+        """Test: Les lignes CSV malformées ignorées sont comptées"""
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'raw.csv')
+            with open(csv_path, 'w', encoding='utf-8') as f:
+                f.write("text,id\n" + "".join(f"tweet {i},{i}\n" for i in range(10)) + "cassé,1,2\nok,11\nx,1,2,3\n")
+            
+            pipeline = ChunkedCleaningPipeline(n_workers=1, chunk_size=4)
+            chunks = list(pipeline.read_chunks(csv_path))
+            
+            self.assertEqual(sum(len(chunk) for chunk in chunks), 11)
+            self.assertEqual(pipeline.bad_lines_skipped, 2)
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
 
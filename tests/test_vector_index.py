@@ -0,0 +1,123 @@
+"""
+Tests Unitaires - Index vectoriel des documents de connaissances (backend)
+=========================================================================
+
+Validation de la recherche exacte et IVF, du seuil de similarité, des mises
+à jour incrémentales et de la persistance sur disque.
+"""
+
+import unittest
+import importlib.util
+import os
+import tempfile
+import numpy as np
+
+# Chargement direct du module: le nom 'app' est aussi celui de streamlit_app/app.py
+_spec = importlib.util.spec_from_file_location(
+    'backend_vector_index',
+    os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'utils', 'vector_index.py')
+)
+vector_index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vector_index)
+
+VectorIndex = vector_index.VectorIndex
+
+
+def make_embeddings(n: int, dim: int = 64, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    """Embeddings synthétiques regroupés par thème"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(0, clusters, n)] + 0.5 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def exact_top(vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:k].tolist()
+
+
+class TestVectorIndex(unittest.TestCase):
+    """Tests unitaires pour VectorIndex"""
+
+    def setUp(self):
+        self.vectors = make_embeddings(2_000)
+        self.ids = [f'doc-{i}' for i in range(len(self.vectors))]
+
+    def test_flat_search_is_exact(self):
+        """Teste la recherche exacte sous le seuil IVF, scores cosinus décroissants"""
+        index = VectorIndex()
+        index.add(self.ids, self.vectors)
+        query = self.vectors[42]
+
+        results = index.search(query, k=5)
+
+        self.assertFalse(index.is_partitioned)
+        self.assertEqual([doc_id for doc_id, _ in results], [f'doc-{i}' for i in exact_top(self.vectors, query, 5)])
+        self.assertEqual(results[0][0], 'doc-42')
+        self.assertAlmostEqual(results[0][1], 1.0, places=5)
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_similarity_threshold(self):
+        """Teste le seuil: aucun résultat pour une requête sans rapport"""
+        index = VectorIndex()
+        index.add(['a', 'b'], [[1.0, 0.0], [0.8, 0.6]])
+
+        self.assertEqual([doc_id for doc_id, _ in index.search([1.0, 0.0], k=5, threshold=0.9)], ['a'])
+        self.assertEqual(index.search([-1.0, 0.0], k=5, threshold=0.3), [])
+        self.assertEqual(VectorIndex().search([1.0, 0.0]), [])
+
+    def test_ivf_recall(self):
+        """Teste le mode IVF: rappel@10 élevé par rapport à la recherche exacte"""
+        vectors = make_embeddings(30_000, seed=1)
+        index = VectorIndex(flat_threshold=5_000)
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        self.assertTrue(index.is_partitioned)
+
+        rng = np.random.default_rng(2)
+        hits = 0
+        for row in rng.integers(0, len(vectors), 50):
+            query = vectors[row] + 0.2 * rng.normal(size=vectors.shape[1]).astype(np.float32)
+            found = {int(doc_id) for doc_id, _ in index.search(query, k=10)}
+            hits += len(found & set(exact_top(vectors, query, 10)))
+
+        self.assertGreaterEqual(hits / 500, 0.9)
+
+    def test_incremental_updates(self):
+        """Teste l'ajout, le remplacement et la suppression incrémentaux"""
+        index = VectorIndex(flat_threshold=1_000)
+        index.add(self.ids[:1_500], self.vectors[:1_500])
+        index.add(self.ids[1_500:], self.vectors[1_500:])
+        self.assertEqual(len(index), 2_000)
+        self.assertEqual(index.search(self.vectors[1_999], k=1)[0][0], 'doc-1999')
+
+        # Remplacement: même id, nouveau vecteur
+        index.add(['doc-0'], [self.vectors[7]])
+        self.assertEqual(len(index), 2_000)
+        self.assertEqual({doc_id for doc_id, _ in index.search(self.vectors[7], k=2)}, {'doc-0', 'doc-7'})
+
+        self.assertEqual(index.remove(['doc-7', 'missing']), 1)
+        self.assertNotIn('doc-7', index)
+        self.assertNotIn('doc-7', [doc_id for doc_id, _ in index.search(self.vectors[7], k=5)])
+
+        with self.assertRaises(ValueError):
+            index.add(['bad'], np.ones((1, 3)))
+
+    def test_persistence(self):
+        """Teste la sauvegarde et le rechargement (flat et IVF)"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for flat_threshold in (10_000, 1_000):
+                path = os.path.join(tmp_dir, f'index_{flat_threshold}.vectors.npz')
+                index = VectorIndex(path, flat_threshold=flat_threshold)
+                index.add(self.ids, self.vectors)
+                index.remove(['doc-3'])
+                self.assertTrue(index.save())
+
+                reloaded = VectorIndex(path, flat_threshold=flat_threshold)
+                self.assertEqual(len(reloaded), 1_999)
+                self.assertEqual(reloaded.is_partitioned, index.is_partitioned)
+                self.assertEqual(reloaded.search(self.vectors[10], k=5), index.search(self.vectors[10], k=5))
+                self.assertNotIn('doc-3', reloaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Tests Unitaires - Écriture différée des conversations du chatbot (backend)
+==========================================================================
+
+Validation de ChatWriteBuffer: regroupement des écritures concurrentes en
+transactions, reprise après échec (au moins une fois), écriture à l'arrêt,
+et réponse de ChatbotService sans attente de la base de données.
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Le service importe app.*: backend/ en tête du chemin
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.utils.write_behind import ChatWriteBuffer
+from app.services.chatbot_service import ChatbotService
+
+
+class FakeDB:
+    """Base simulée: une transaction par appel, insertions idempotentes par ID"""
+
+    database_type = 'postgresql'
+
+    def __init__(self, latency=0.0, failures=0):
+        self.latency = latency
+        self.failures = failures
+        self.transactions = 0
+        self.conversations = {}
+        self.messages = {}
+
+    def get_vector_index(self):
+        return SimpleNamespace(revision=1)
+
+    async def store_chat_batch(self, conversations, messages):
+        await asyncio.sleep(self.latency)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('base indisponible')
+        self.transactions += 1
+        for conversation in conversations:
+            self.conversations.setdefault(conversation['id'], conversation)
+        for message in messages:
+            self.messages.setdefault(message['id'], message)
+        return len(messages)
+
+
+def message(conversation_id, role='user', content='Bonjour'):
+    return {'conversation_id': conversation_id, 'role': role, 'content': content}
+
+
+class TestChatWriteBuffer(unittest.TestCase):
+    """Tests unitaires pour ChatWriteBuffer"""
+
+    def test_concurrent_writes_batched(self):
+        """Teste le regroupement des écritures de nombreuses requêtes"""
+        db = FakeDB(latency=0.01)
+        buffer = ChatWriteBuffer(db, flush_interval=0.05)
+
+        async def request(i):
+            await asyncio.sleep(0.001 * (i % 10))
+            buffer.add_conversation({'id': f'conv_{i}', 'session_id': f's{i}'})
+            buffer.add_message(message(f'conv_{i}', 'user'))
+            buffer.add_message(message(f'conv_{i}', 'assistant'))
+
+        async def run():
+            await asyncio.gather(*(request(i) for i in range(200)))
+            await asyncio.sleep(0.1)
+            return await buffer.close()
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual((len(db.conversations), len(db.messages)), (200, 400))
+        self.assertLessEqual(db.transactions, 3)
+        self.assertEqual(buffer.pending, 0)
+
+        # Ordre et horodatage conservés dans une conversation
+        user, assistant = [m for m in db.messages.values() if m['conversation_id'] == 'conv_7']
+        self.assertEqual((user['role'], assistant['role']), ('user', 'assistant'))
+        self.assertLessEqual(user['timestamp'], assistant['timestamp'])
+
+    def test_failed_batch_retried(self):
+        """Teste la conservation et la reprise d'un lot en échec"""
+        db = FakeDB(failures=2)
+        buffer = ChatWriteBuffer(db, flush_interval=0.01, retry_delay=0.01)
+
+        async def run():
+            ids = [buffer.add_message(message('conv_1')) for _ in range(5)]
+            self.assertTrue(buffer.has_pending('conv_1'))
+            await asyncio.sleep(0.2)
+            return ids
+
+        ids = asyncio.run(run())
+
+        self.assertEqual(set(db.messages), set(ids))
+        self.assertEqual(buffer.failures, 2)
+        self.assertFalse(buffer.has_pending('conv_1'))
+
+    def test_close_flushes_remaining(self):
+        """Teste l'écriture à l'arrêt de messages mis en file hors boucle"""
+        db = FakeDB()
+        buffer = ChatWriteBuffer(db, max_batch=2)
+        for i in range(5):
+            buffer.add_message(message('conv_1', content=f'm{i}'))
+
+        self.assertTrue(asyncio.run(buffer.close()))
+        self.assertEqual(len(db.messages), 5)
+        self.assertEqual(db.transactions, 3)  # Lots de 2 messages maximum
+
+    def test_overflow_drops_oldest(self):
+        """Teste la borne mémoire quand la base reste indisponible"""
+        buffer = ChatWriteBuffer(FakeDB(), max_pending=3)
+        for i in range(5):
+            buffer.add_message(message(f'conv_{i}'))
+
+        self.assertEqual((buffer.pending, buffer.dropped), (3, 2))
+        self.assertFalse(buffer.has_pending('conv_0'))
+        self.assertTrue(buffer.has_pending('conv_4'))
+
+
+class TestChatbotServiceWriteBehind(unittest.TestCase):
+    """Tests d'intégration de l'écriture différée dans ChatbotService"""
+
+    def test_response_does_not_wait_for_database(self):
+        """Teste une réponse plus rapide que l'écriture en base"""
+        db = FakeDB(latency=0.3)
+        service = ChatbotService(db_manager=db)
+        service.graphrag_enabled = False
+        service.fast_graphrag = SimpleNamespace(revision=1, embedding_model=None)
+
+        async def search(query, max_results=5):
+            return []
+
+        async def llm(system_prompt, message, provider):
+            return 'Réponse', True
+
+        service._search_with_vector_db = search
+        service._generate_llm_response = llm
+
+        async def run():
+            start = time.perf_counter()
+            result = await service.process_message('Bonjour', 'conv_test_1_20250101_000000')
+            elapsed = time.perf_counter() - start
+            await service.close()
+            return result, elapsed
+
+        result, elapsed = asyncio.run(run())
+
+        self.assertTrue(result['success'])
+        self.assertLess(elapsed, db.latency)
+        self.assertIn(result['message_id'], db.messages)
+        self.assertEqual(db.conversations['conv_test_1_20250101_000000']['session_id'], 'test_1')
+        self.assertEqual([m['role'] for m in db.messages.values()], ['user', 'assistant'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests unitaires pour le moteur de normalisation partagé
+Validation des patterns précompilés, de l'extraction des entités et de l'API batch
+"""
+
+import pytest
+from shared.text_normalization import (
+    TextNormalizer, collapse_whitespace, extract_entities, get_text_normalizer,
+    remove_control_chars
+)
+
+
+class TestExtractEntities:
+    """Tests pour l'extraction des mentions/hashtags/URLs"""
+
+    def test_extraction(self):
+        """Teste l'extraction des trois types d'entités"""
+        entities = extract_entities("@Free panne #fibre https://t.co/x et www.free.fr @Freebox")
+        assert entities == {
+            'mentions': ['Free', 'Freebox'],
+            'hashtags': ['fibre'],
+            'urls': ['https://t.co/x', 'www.free.fr'],
+        }
+
+    def test_no_entities(self):
+        """Teste un texte sans entité"""
+        assert extract_entities("le réseau est nul") == {'mentions': [], 'hashtags': [], 'urls': []}
+        assert extract_entities("") == {'mentions': [], 'hashtags': [], 'urls': []}
+
+    def test_entities_are_extracted_independently(self):
+        """Teste le comportement des anciens extracteurs (une recherche par type d'entité)"""
+        assert extract_entities("@userhttp://x") == {
+            'mentions': ['userhttp'],
+            'hashtags': [],
+            'urls': ['http://x'],
+        }
+        entities = extract_entities("voir https://free.fr/aide#forfait")
+        assert entities['urls'] == ['https://free.fr/aide#forfait']
+        assert entities['hashtags'] == ['forfait']
+
+
+class TestHelpers:
+    """Tests pour les fonctions utilitaires"""
+
+    def test_collapse_whitespace(self):
+        """Teste la normalisation des espaces"""
+        assert collapse_whitespace("  Hello \n\t World  ") == "Hello World"
+
+    def test_remove_control_chars(self):
+        """Teste la suppression des caractères de contrôle"""
+        assert remove_control_chars("Hello\x00\x01World") == "HelloWorld"
+        assert remove_control_chars("Café ☕") == "Café ☕"
+
+
+class TestTextNormalizer:
+    """Tests pour la classe TextNormalizer"""
+
+    @pytest.fixture
+    def normalizer(self):
+        return get_text_normalizer()
+
+    def test_singleton(self, normalizer):
+        """Teste que l'instance globale est partagée"""
+        assert get_text_normalizer() is normalizer
+        assert isinstance(normalizer, TextNormalizer)
+
+    def test_clean_for_analysis(self, normalizer):
+        """Teste le nettoyage pour analyse"""
+        text = "@Free le réseau est nul 😡 https://t.co/xxx"
+        assert normalizer.clean_for_analysis(text, preserve_emojis=False) == "@Free le réseau est nul"
+
+    def test_clean_for_analysis_batch_matches_single(self, normalizer):
+        """Teste que le batch donne le même résultat que l'appel unitaire"""
+        texts = ["Hello&amp;World  nooooon", "@Free #fibre http://x.fr ok", "Hello&amp;World  nooooon"]
+        expected = [normalizer.clean_for_analysis(t, preserve_mentions=False) for t in texts]
+        assert normalizer.clean_for_analysis_batch(texts, preserve_mentions=False) == expected
+
+    def test_extract_entities_batch(self, normalizer):
+        """Teste l'extraction batch"""
+        results = normalizer.extract_entities_batch(["@a #b", "rien", "@a #b"])
+        assert [r['mentions'] for r in results] == [['a'], [], ['a']]
+
+    def test_map_unique_calls_once_per_text(self, normalizer):
+        """Teste que chaque texte distinct n'est traité qu'une fois"""
+        calls = []
+
+        def func(text):
+            calls.append(text)
+            return text.upper()
+
+        assert normalizer.map_unique(["a", "b", "a", "a"], func) == ["A", "B", "A", "A"]
+        assert calls == ["a", "b"]